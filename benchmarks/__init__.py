@@ -0,0 +1 @@
+"""Local benchmarks for the redirect service, run as modules from the repository root."""
@@ -0,0 +1,114 @@
+"""
+Benchmark the import and init time of the redirect function, i.e. its cold start.
+
+Every run starts a fresh interpreter in the function's asset directory and times
+`import src.index`, which includes building the RedirectController. No network
+calls are made: creating the DynamoDB client doesn't connect yet.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_cold_start [--runs 20] [--max-ms 300] [--importtime]
+
+With --max-ms the benchmark exits with status 1 when the median exceeds the
+budget, so it can guard against cold start regressions in CI.
+"""
+
+# Standard library imports
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+ASSET_DIR = os.path.join("resources", "functions", "redirect")
+
+MEASURE_IMPORT = """
+import json, sys, time
+start = time.perf_counter()
+import src.index
+elapsed = time.perf_counter() - start
+print(json.dumps({"import_ms": elapsed * 1000, "modules": len(sys.modules)}))
+"""
+
+
+def _environment() -> Dict[str, str]:
+    """Return the environment the function would see, without real credentials."""
+    return dict(
+        os.environ,
+        DDB_TABLE_NAME="bench-table",
+        AWS_DEFAULT_REGION=os.environ.get("AWS_DEFAULT_REGION", "eu-west-1"),
+        AWS_ACCESS_KEY_ID="bench",
+        AWS_SECRET_ACCESS_KEY="bench",
+    )
+
+
+def measure_once() -> dict:
+    """Time a single cold import of src.index in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", MEASURE_IMPORT],
+        cwd=ASSET_DIR,
+        env=_environment(),
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def top_imports(limit: int = 15) -> List[str]:
+    """Return the slowest imports by cumulative time, from python -X importtime."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.index"],
+        cwd=ASSET_DIR,
+        env=_environment(),
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stderr
+
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+
+    rows.sort(reverse=True)
+    return [
+        f"{cumulative / 1000:8.1f} ms {own / 1000:8.1f} ms  {module}"
+        for cumulative, own, module in rows[:limit]
+    ]
+
+
+def main(argv: List[str]) -> int:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--max-ms", type=float, default=None)
+    parser.add_argument("--importtime", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = [measure_once() for _ in range(args.runs)]
+    timings = sorted(result["import_ms"] for result in results)
+    median = statistics.median(timings)
+    p90 = timings[int(0.9 * (len(timings) - 1))]
+    print(
+        f"src.index import+init over {args.runs} runs: median {median:.1f} ms, "
+        f"p90 {p90:.1f} ms, min {timings[0]:.1f} ms, "
+        f"{results[0]['modules']} modules loaded"
+    )
+
+    if args.importtime:
+        print(f"{'cumulative':>11} {'self':>11}  module")
+        print("\n".join(top_imports()))
+
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"Median cold start exceeds the budget of {args.max_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
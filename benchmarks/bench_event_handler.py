@@ -0,0 +1,290 @@
+"""
+Load test event_handler end to end against an in-process DynamoDB table.
+
+Synthetic API Gateway events with a mix of aliased, exact, fallback and unknown
+requests are sent through the real handler and RedirectController. Only the
+DynamoDB client is replaced, by a stub table with a configurable latency. The
+controller is configured from the environment like the function itself, so e.g.
+CACHE_TTL_SECONDS=0 or LOOKUP_STRATEGY=batch_get can be compared directly.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_event_handler [--requests 5000] [--latency-ms 5]
+
+Every run is stored in benchmarks/results/ with the commit it ran on. Pass an
+earlier result file with --compare to print the difference to that run.
+"""
+
+# Standard library imports
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+# Local application / library specific imports
+from benchmarks.workload import (
+    DEFAULT_MIX,
+    build_workload,
+    generate_events,
+    percentile,
+)
+from tests.stubs.dynamodb import StubDynamoDBClient, StubTable, tail_latency
+
+RESULTS_DIR = os.path.join("benchmarks", "results")
+TABLE_NAME = "bench-table"
+DDB_OPERATIONS = ("get_item", "query", "scan", "batch_get_item")
+
+
+class StageTimer:
+    """Accumulates the time spent in each stage of the request handling."""
+
+    def __init__(self) -> None:
+        """Construct a new StageTimer."""
+        self.seconds: Dict[str, float] = defaultdict(float)
+
+    def wrap(self, stage: str, function: Callable) -> Callable:
+        """Return function, timing every call of it as the given stage."""
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.seconds[stage] += time.perf_counter() - start
+
+        return timed
+
+
+def load_handler(table: StubTable, timer: StageTimer):
+    """Import the function with its DDB client replaced by the stub, and instrument it."""
+    os.environ.setdefault("DDB_TABLE_NAME", TABLE_NAME)
+    os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-1")
+    ddb_client = StubDynamoDBClient({os.environ["DDB_TABLE_NAME"]: table})
+    for operation in DDB_OPERATIONS:
+        setattr(
+            ddb_client,
+            operation,
+            timer.wrap(f"ddb.{operation}", getattr(ddb_client, operation)),
+        )
+
+    # pylint: disable=import-outside-toplevel
+    from resources.functions.redirect.src import index
+    from resources.functions.redirect.src.controllers.redirect_controller import (
+        RedirectController,
+    )
+
+    with patch.object(
+        RedirectController, "_create_ddb_client", return_value=ddb_client
+    ):
+        controller = RedirectController(
+            ddb_table_name=os.environ["DDB_TABLE_NAME"],
+            config=index.ControllerConfig.from_environ(os.environ),
+            metrics=index.metrics,
+        )
+    controller.resolve = timer.wrap("resolve", controller.resolve)
+    controller.get_alias = timer.wrap("resolve.alias", controller.get_alias)
+    controller.get_redirect_location = timer.wrap(
+        "resolve.location", controller.get_redirect_location
+    )
+    index.redirect_controller = controller
+    return index.event_handler
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Run the load test and return its results."""
+    workload = build_workload(domains=args.domains, seed=args.seed)
+    table = StubTable(
+        items=workload.items,
+        latency=tail_latency(
+            median=args.latency_ms / 1000,
+            slow=args.slow_ms / 1000,
+            slow_probability=args.slow_probability,
+            seed=args.seed,
+        ),
+    )
+    timer = StageTimer()
+    event_handler = load_handler(table, timer)
+    events = list(
+        generate_events(workload, args.warmup + args.requests, seed=args.seed)
+    )
+
+    for _, event in events[: args.warmup]:
+        event_handler(event, None)
+    timer.seconds.clear()
+    table.calls.clear()
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    start = time.perf_counter()
+    for kind, event in events[args.warmup :]:
+        request_start = time.perf_counter()
+        event_handler(event, None)
+        latencies[kind].append((time.perf_counter() - request_start) * 1000)
+    elapsed = time.perf_counter() - start
+
+    all_latencies = sorted(
+        latency for kind_latencies in latencies.values() for latency in kind_latencies
+    )
+    stages_ms = {
+        stage: seconds * 1000 / args.requests
+        for stage, seconds in sorted(timer.seconds.items())
+    }
+    stages_ms["handler overhead"] = sum(all_latencies) / args.requests - stages_ms.get(
+        "resolve", 0.0
+    )
+
+    return {
+        "requests": args.requests,
+        "requests_per_second": args.requests / elapsed,
+        "latency_ms": {
+            "p50": percentile(all_latencies, 50),
+            "p95": percentile(all_latencies, 95),
+            "p99": percentile(all_latencies, 99),
+        },
+        "latency_ms_by_kind": {
+            kind: {
+                "p50": percentile(sorted(kind_latencies), 50),
+                "p99": percentile(sorted(kind_latencies), 99),
+            }
+            for kind, kind_latencies in sorted(latencies.items())
+        },
+        "stages_ms_per_request": stages_ms,
+        "ddb_calls_per_request": len(table.calls) / args.requests,
+        "allocations": measure_allocations(
+            event_handler, [event for _, event in events[: args.allocation_requests]]
+        ),
+    }
+
+
+def measure_allocations(event_handler: Callable, events: List[dict]) -> dict:
+    """Return the memory allocated while handling, and retained after, each request."""
+    # tracemalloc slows every allocation down, so it gets its own pass over
+    # requests that have been seen before, instead of skewing the latencies.
+    tracemalloc.start()
+    peak_bytes, retained_bytes = 0, 0
+    for event in events:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        event_handler(event, None)
+        after, peak = tracemalloc.get_traced_memory()
+        peak_bytes += peak - before
+        retained_bytes += after - before
+    tracemalloc.stop()
+    return {
+        "peak_kib_per_request": peak_bytes / 1024 / len(events),
+        "retained_bytes_per_request": retained_bytes / len(events),
+    }
+
+
+def git_commit() -> str:
+    """Return the short hash of the checked out commit, marked if the tree is dirty."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def store(result: dict) -> str:
+    """Write a result to the results directory and return its path."""
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(
+        RESULTS_DIR,
+        f"{time.strftime('%Y%m%dT%H%M%S')}-{result['commit']}.json",
+    )
+    with open(path, "w", encoding="utf-8") as result_file:
+        json.dump(result, result_file, indent=2)
+    return path
+
+
+def report(result: dict, baseline: Optional[dict]) -> None:
+    """Print a result, with the change relative to the baseline if one is given."""
+
+    def row(name: str, value: float, path: List[str], unit: str) -> None:
+        line = f"{name:<28} {value:>10.3f} {unit:<6}"
+        if baseline is not None:
+            baseline_value = baseline
+            for key in path:
+                baseline_value = baseline_value.get(key, {})
+            if isinstance(baseline_value, (int, float)) and baseline_value:
+                change = (value - baseline_value) / baseline_value
+                line += f"   {baseline_value:>10.3f} ({change:+.1%})"
+        print(line.rstrip())
+
+    print(f"commit {result['commit']}, {result['requests']} requests")
+    if baseline is not None:
+        print(f"{'':<28} {'this run':>10} {'':<6}   baseline {baseline['commit']}")
+    row("requests/s", result["requests_per_second"], ["requests_per_second"], "")
+    for name, value in result["latency_ms"].items():
+        row(f"latency {name}", value, ["latency_ms", name], "ms")
+    for kind, kind_latencies in result["latency_ms_by_kind"].items():
+        for name, value in kind_latencies.items():
+            row(
+                f"  {kind} {name}",
+                value,
+                ["latency_ms_by_kind", kind, name],
+                "ms",
+            )
+    for stage, value in result["stages_ms_per_request"].items():
+        row(f"stage {stage}", value, ["stages_ms_per_request", stage], "ms/req")
+    row(
+        "ddb calls",
+        result["ddb_calls_per_request"],
+        ["ddb_calls_per_request"],
+        "/req",
+    )
+    for name, value in result["allocations"].items():
+        row(name.replace("_", " "), value, ["allocations", name], "")
+
+
+def main(argv: List[str]) -> int:
+    """Run the load test, store its result and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--allocation-requests", type=int, default=500)
+    parser.add_argument("--domains", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--slow-ms", type=float, default=100.0)
+    parser.add_argument("--slow-probability", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--compare", default=None, help="an earlier result file")
+    parser.add_argument("--no-store", action="store_true")
+    args = parser.parse_args(argv)
+
+    result = {
+        "commit": git_commit(),
+        "arguments": vars(args),
+        "mix": DEFAULT_MIX,
+        **run(args),
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+    report(result, baseline)
+
+    if not args.no_store:
+        print(f"stored as {store(result)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,103 @@
+"""
+Benchmark the compiled FallbackIndex against the original linear fallback scan.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_fallback_index
+"""
+
+# Standard library imports
+import random
+import time
+import timeit
+from typing import List, Optional
+
+# Local application / library specific imports
+from resources.functions.redirect.src.models.database import RedirectFallbackOption
+from resources.functions.redirect.src.utils.fallback_index import FallbackIndex
+
+SIZES = [10, 1_000, 100_000]
+LOOKUPS = 200
+
+
+def linear_best_match(
+    options: List[RedirectFallbackOption], request_path: str
+) -> Optional[RedirectFallbackOption]:
+    """Return the best fallback with the loop RedirectController used to run per request."""
+    best_match = None
+    max_matching_characters = 0
+    for redirect in options:
+        if redirect.path in request_path:
+            matching_characters = len(redirect.path)
+            if matching_characters > max_matching_characters:
+                best_match = redirect
+                max_matching_characters = matching_characters
+    return best_match
+
+
+def make_options(size: int, rng: random.Random) -> List[RedirectFallbackOption]:
+    """Return `size` legacy-URL style fallbacks, sorted like a DDB query result."""
+    paths = {
+        f"/legacy/{rng.choice(['blog', 'news', 'docs', 'shop'])}/{i}-{rng.randrange(10**6)}"
+        for i in range(size)
+    }
+    return [
+        RedirectFallbackOption(
+            domain="example.com", path=path, target=f"https://x{path}"
+        )
+        for path in sorted(paths)
+    ]
+
+
+def make_request_paths(
+    options: List[RedirectFallbackOption], rng: random.Random
+) -> List[str]:
+    """Return a mix of request paths that hit a fallback and paths that miss all of them."""
+    request_paths = []
+    for i in range(LOOKUPS):
+        if i % 2:
+            request_paths.append(rng.choice(options).path + "/some/deeper/page.html")
+        else:
+            request_paths.append(f"/wp-login.php?{rng.randrange(10**6)}")
+    return request_paths
+
+
+def main() -> None:
+    """Print build and per-lookup timings for every benchmark size."""
+    rng = random.Random(1)
+    print(
+        f"{'fallbacks':>10} {'build ms':>10} {'linear us':>12} {'index us':>10} {'speedup':>8}"
+    )
+    for size in SIZES:
+        options = make_options(size, rng)
+        request_paths = make_request_paths(options, rng)
+
+        start = time.perf_counter()
+        index = FallbackIndex(options)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        for request_path in request_paths:
+            assert index.match(request_path) == linear_best_match(options, request_path)
+
+        linear_s = timeit.timeit(
+            lambda options=options, request_paths=request_paths: [
+                linear_best_match(options, path) for path in request_paths
+            ],
+            number=1,
+        )
+        index_s = timeit.timeit(
+            lambda index=index, request_paths=request_paths: [
+                index.match(path) for path in request_paths
+            ],
+            number=1,
+        )
+        linear_us = linear_s / LOOKUPS * 1e6
+        index_us = index_s / LOOKUPS * 1e6
+        print(
+            f"{size:>10} {build_ms:>10.1f} {linear_us:>12.1f} {index_us:>10.1f}"
+            f" {linear_us / index_us:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark hedged DynamoDB reads against plain reads on a table with a long latency tail.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_hedging
+"""
+
+# Standard library imports
+import argparse
+import time
+from typing import Callable, List
+
+# Local application / library specific imports
+from benchmarks.workload import percentile
+from resources.functions.redirect.src.utils.hedging import (
+    HedgedDynamoDBClient,
+    HedgingPolicy,
+)
+from tests.stubs.dynamodb import StubDynamoDBClient, StubTable, tail_latency
+
+GET_ITEM_KWARGS = {
+    "TableName": "bench_table",
+    "Key": {"pk": {"S": "Redirect#example.com"}, "sk": {"S": "/"}},
+    "ProjectionExpression": "target",
+}
+
+
+def make_table(args: argparse.Namespace) -> StubTable:
+    """Return a single-item table whose reads follow the configured latency distribution."""
+    return StubTable(
+        items=[{"pk": "Redirect#example.com", "sk": "/", "target": "https://x/"}],
+        latency=tail_latency(
+            median=args.median_ms / 1000,
+            slow=args.slow_ms / 1000,
+            slow_probability=args.slow_probability,
+            seed=1,
+        ),
+    )
+
+
+def measure(get_item: Callable[..., dict], reads: int) -> List[float]:
+    """Return the sorted latencies of `reads` sequential reads, in milliseconds."""
+    latencies = []
+    for _ in range(reads):
+        start = time.perf_counter()
+        get_item(**GET_ITEM_KWARGS)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies)
+
+
+def main() -> None:
+    """Print latency percentiles of plain and hedged reads."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reads", type=int, default=1_000)
+    parser.add_argument("--median-ms", type=float, default=5.0)
+    parser.add_argument("--slow-ms", type=float, default=150.0)
+    parser.add_argument("--slow-probability", type=float, default=0.02)
+    parser.add_argument("--hedge-percentile", type=float, default=95.0)
+    parser.add_argument("--hedge-max-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    plain_table = make_table(args)
+    plain = measure(
+        StubDynamoDBClient({"bench_table": plain_table}).get_item, args.reads
+    )
+
+    hedged_table = make_table(args)
+    hedged_client = HedgedDynamoDBClient(
+        StubDynamoDBClient({"bench_table": hedged_table}),
+        policy=HedgingPolicy(
+            percentile=args.hedge_percentile, max_hedge_rate=args.hedge_max_rate
+        ),
+        budget=1.0,
+    )
+    hedged = measure(hedged_client.get_item, args.reads)
+
+    print(f"{'':>8} {'p50 ms':>8} {'p99 ms':>8} {'p99.9 ms':>9} {'ddb calls':>10}")
+    for name, latencies, table in (
+        ("plain", plain, plain_table),
+        ("hedged", hedged, hedged_table),
+    ):
+        print(
+            f"{name:>8} {percentile(latencies, 50):>8.1f} {percentile(latencies, 99):>8.1f}"
+            f" {percentile(latencies, 99.9):>9.1f} {len(table.calls):>10}"
+        )
+    print(
+        f"hedged {hedged_client.policy.hedges} of {hedged_client.policy.reads} reads"
+        f" ({hedged_client.policy.hedges / hedged_client.policy.reads:.1%})"
+    )
+
+
+if __name__ == "__main__":
+    main()
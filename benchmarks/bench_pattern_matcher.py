@@ -0,0 +1,109 @@
+"""
+Benchmark the combined PatternMatcher against evaluating the regex rules one by one.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pattern_matcher
+"""
+
+# Standard library imports
+import random
+import re
+import time
+import timeit
+from typing import List, Optional, Pattern, Tuple
+
+# Local application / library specific imports
+from resources.functions.redirect.src.models.database import RedirectPatternOption
+from resources.functions.redirect.src.utils.pattern_matcher import (
+    PatternMatcher,
+    expand_target,
+)
+
+SIZES = [10, 100, 1_000]
+LOOKUPS = 200
+SECTIONS = ["blog", "news", "docs", "shop"]
+
+
+def sequential_match(
+    compiled: List[Tuple[Pattern, str]], request_path: str
+) -> Optional[str]:
+    """Return the target of the first matching rule, evaluating precompiled rules in turn."""
+    for regex, target in compiled:
+        match = regex.fullmatch(request_path)
+        if match is not None:
+            return expand_target(match, target)
+    return None
+
+
+def make_options(size: int, rng: random.Random) -> List[RedirectPatternOption]:
+    """Return `size` regex rules for legacy URL schemes, sorted like a DDB query result."""
+    patterns = {
+        rf"/{rng.choice(SECTIONS)}-{i}/(\d{{4}})/(\d{{2}})/(.*)" for i in range(size)
+    }
+    return [
+        RedirectPatternOption(
+            domain="example.com",
+            pattern=pattern,
+            target=f"https://new.site/{i}/$1-$2/$3",
+        )
+        for i, pattern in enumerate(sorted(patterns))
+    ]
+
+
+def make_request_paths(size: int, rng: random.Random) -> List[str]:
+    """Return a mix of request paths that match a rule and paths that match none."""
+    request_paths = []
+    for i in range(LOOKUPS):
+        if i % 2:
+            request_paths.append(
+                f"/{rng.choice(SECTIONS)}-{rng.randrange(size)}/2019/04/some-post"
+            )
+        else:
+            request_paths.append(f"/wp-login.php/{rng.randrange(10**6)}")
+    return request_paths
+
+
+def main() -> None:
+    """Print build and per-lookup timings for every benchmark size."""
+    rng = random.Random(1)
+    print(
+        f"{'patterns':>10} {'build ms':>10} {'sequential us':>14}"
+        f" {'combined us':>12} {'speedup':>8}"
+    )
+    for size in SIZES:
+        options = make_options(size, rng)
+        request_paths = make_request_paths(size, rng)
+        compiled = [(re.compile(option.pattern), option.target) for option in options]
+
+        start = time.perf_counter()
+        matcher = PatternMatcher(options)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        for request_path in request_paths:
+            assert matcher.match(request_path) == sequential_match(
+                compiled, request_path
+            )
+
+        sequential_s = timeit.timeit(
+            lambda compiled=compiled, request_paths=request_paths: [
+                sequential_match(compiled, path) for path in request_paths
+            ],
+            number=5,
+        )
+        combined_s = timeit.timeit(
+            lambda matcher=matcher, request_paths=request_paths: [
+                matcher.match(path) for path in request_paths
+            ],
+            number=5,
+        )
+        sequential_us = sequential_s / (5 * LOOKUPS) * 1e6
+        combined_us = combined_s / (5 * LOOKUPS) * 1e6
+        print(
+            f"{size:>10} {build_ms:>10.1f} {sequential_us:>14.1f} {combined_us:>12.1f}"
+            f" {sequential_us / combined_us:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Measure the throughput of the standalone HTTP server, in requests per second per core.
+
+The synthetic workload is exported to a routing snapshot, or with --storage to the
+file of a local storage backend, which a server started with `python -m src.server`
+answers from. Client processes keep --connections
+connections each open and send requests one after another on every connection,
+for --seconds. Requests per second per core is the number of responses divided
+by the CPU time of the server's workers, so it doesn't depend on the cores the
+clients take up on the same machine.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_server [--workers 2] [--clients 2] [--seconds 10]
+        [--storage snapshot|memory|sqlite]
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import multiprocessing
+import os
+import resource
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+from urllib.parse import urlencode
+
+# Local application / library specific imports
+from benchmarks.workload import build_workload, generate_events, percentile
+from tools.export_storage import LOCAL_BACKENDS, export_storage
+from tools.snapshot import export_snapshot
+
+ASSET_DIR = os.path.join("resources", "functions", "redirect")
+HOST = "127.0.0.1"
+RESPONSE_END = b"\r\n\r\n"
+
+
+def request_bytes(event: dict) -> bytes:
+    """Return the HTTP request for an API Gateway event of the workload."""
+    target = event["path"]
+    if event["queryStringParameters"]:
+        target += "?" + urlencode(event["queryStringParameters"])
+    return f"GET {target} HTTP/1.1\r\nHost: {event['headers']['Host']}\r\n\r\n".encode()
+
+
+def free_port() -> int:
+    """Return a port on the loopback interface that is free right now."""
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def export_rules(items: List[dict], storage: str, directory: str) -> Dict[str, str]:
+    """Export the items for the given storage, and return the server's environment for it."""
+    if storage == "snapshot":
+        snapshot_path = os.path.join(directory, "routes.snap")
+        export_snapshot(items, snapshot_path)
+        return {"SNAPSHOT_PATH": snapshot_path}
+    storage_path = os.path.join(directory, f"rules.{storage}")
+    export_storage(items, storage, storage_path)
+    return {"STORAGE_BACKEND": storage, "STORAGE_PATH": storage_path}
+
+
+def start_server(environ: Dict[str, str], port: int, workers: int) -> subprocess.Popen:
+    """Start the server and wait until it accepts connections."""
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "src.server",
+            f"--host={HOST}",
+            f"--port={port}",
+            f"--workers={workers}",
+        ],
+        cwd=ASSET_DIR,
+        env=dict(os.environ, **environ),
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((HOST, port)).close()
+            return server
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError("The server didn't start listening within 10 seconds")
+
+
+async def send_requests(
+    port: int, requests: List[bytes], connections: int, seconds: float
+) -> List[float]:
+    """Send requests on every connection until time is up, and return their latencies."""
+    deadline = time.perf_counter() + seconds
+    latencies: List[float] = []
+
+    async def connection(offset: int) -> None:
+        reader, writer = await asyncio.open_connection(HOST, port)
+        index = offset
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(requests[index % len(requests)])
+            await reader.readuntil(RESPONSE_END)
+            latencies.append(time.perf_counter() - start)
+            index += connections
+        writer.close()
+
+    await asyncio.gather(*(connection(offset) for offset in range(connections)))
+    return latencies
+
+
+def run_client(
+    port: int, requests: List[bytes], connections: int, seconds: float
+) -> List[float]:
+    """Run one client process's connections, and return the latencies of its requests."""
+    return asyncio.run(send_requests(port, requests, connections, seconds))
+
+
+def children_cpu_seconds() -> float:
+    """Return the CPU time of all finished child processes, and theirs, so far."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def main(argv: List[str]) -> int:
+    """Run the benchmark and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--clients", type=int, default=2)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--domains", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--storage", choices=("snapshot",) + LOCAL_BACKENDS, default="snapshot"
+    )
+    args = parser.parse_args(argv)
+
+    workload = build_workload(domains=args.domains, seed=args.seed)
+    requests = [
+        request_bytes(event)
+        for _, event in generate_events(workload, args.requests, seed=args.seed)
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        environ = export_rules(workload.items, args.storage, directory)
+        port = free_port()
+        server = start_server(environ, port, args.workers)
+        try:
+            with multiprocessing.Pool(args.clients) as pool:
+                client_latencies = pool.starmap(
+                    run_client,
+                    [
+                        (
+                            port,
+                            requests[offset :: args.clients],
+                            args.connections,
+                            args.seconds,
+                        )
+                        for offset in range(args.clients)
+                    ],
+                )
+            cpu_seconds = children_cpu_seconds()
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+        # The server has waited for its workers, and this process for the server, so
+        # the CPU time of all of them is counted now.
+        server_cpu_seconds = children_cpu_seconds() - cpu_seconds
+
+    latencies = sorted(
+        latency for latencies in client_latencies for latency in latencies
+    )
+    requests_per_second = len(latencies) / args.seconds
+    print(
+        f"{len(latencies)} requests in {args.seconds:.1f} s over "
+        f"{args.clients * args.connections} connections to {args.workers} workers, "
+        f"from {args.storage}"
+    )
+    print(f"requests/s           {requests_per_second:>10.0f}")
+    print(f"requests/s per core  {len(latencies) / server_cpu_seconds:>10.0f}")
+    print(f"server CPU seconds   {server_cpu_seconds:>10.2f}")
+    for percent in (50, 99):
+        print(
+            f"latency p{percent:<13} {percentile(latencies, percent) * 1000:>10.3f} ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,113 @@
+"""Module for synthetic redirect tables and API Gateway events to benchmark against."""
+
+# Standard library imports
+import random
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# The request kinds a workload mixes, and their default share of all requests.
+DEFAULT_MIX = {"alias": 0.2, "exact": 0.4, "fallback": 0.3, "missing": 0.1}
+
+
+@dataclass
+class Workload:
+    """A synthetic table and the request paths that exercise each kind of lookup."""
+
+    items: List[dict] = field(default_factory=list)
+    # Per request kind, the (domain, path) pairs to draw requests from.
+    requests: Dict[str, List[Tuple[str, str]]] = field(default_factory=dict)
+
+
+def build_workload(
+    domains: int = 50,
+    redirects_per_domain: int = 200,
+    fallbacks_per_domain: int = 50,
+    seed: int = 1,
+) -> Workload:
+    """Return a table of aliased domains with exact and fallback redirects."""
+    rng = random.Random(seed)
+    workload = Workload(requests={kind: [] for kind in DEFAULT_MIX})
+
+    for domain_number in range(domains):
+        domain = f"site{domain_number}.example.com"
+        alias_domain = f"www.{domain}"
+        workload.items.append(
+            {
+                "pk": f"DomainAlias#{alias_domain}",
+                "sk": f"DomainAlias#{alias_domain}",
+                "target_domain": domain,
+            }
+        )
+
+        for redirect_number in range(redirects_per_domain):
+            path = f"/page/{redirect_number}-{rng.randrange(10**6)}"
+            workload.items.append(
+                {
+                    "pk": f"Redirect#{domain}",
+                    "sk": path,
+                    "target": f"https://new.{domain}{path}",
+                }
+            )
+            workload.requests["exact"].append((domain, path))
+            workload.requests["alias"].append((alias_domain, path))
+
+        for fallback_number in range(fallbacks_per_domain):
+            path = f"/legacy/{fallback_number}"
+            workload.items.append(
+                {
+                    "pk": f"RedirectFallback#{domain}",
+                    "sk": path,
+                    "target": f"https://new.{domain}/archive",
+                }
+            )
+            workload.requests["fallback"].append((domain, path + "/"))
+
+        workload.requests["missing"].append((domain, "/wp-login.php"))
+
+    return workload
+
+
+def lambda_event(domain: str, path: str, query_params=None) -> dict:
+    """Return an API Gateway proxy event, as passed to the function."""
+    return {
+        "resource": "/{proxy+}",
+        "path": path,
+        "httpMethod": "GET",
+        "headers": {"Host": domain},
+        "queryStringParameters": query_params,
+        "pathParameters": {"proxy": path.lstrip("/")},
+        "requestContext": {
+            "domainName": domain,
+            "path": path,
+            "httpMethod": "GET",
+            "stage": "$default",
+        },
+        "body": None,
+        "isBase64Encoded": False,
+    }
+
+
+def generate_events(
+    workload: Workload,
+    count: int,
+    mix: Optional[Dict[str, float]] = None,
+    seed: int = 1,
+) -> Iterator[Tuple[str, dict]]:
+    """Yield `count` (kind, event) pairs, drawn according to the request mix."""
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+
+    for kind in rng.choices(kinds, weights=weights, k=count):
+        domain, path = rng.choice(workload.requests[kind])
+        if kind == "fallback":
+            # A deeper page below the fallback, so every request path is new.
+            path += f"article-{rng.randrange(10**6)}.html"
+        query_params = {"utm_source": "bench"} if rng.random() < 0.2 else None
+        yield kind, lambda_event(domain, path, query_params)
+
+
+def percentile(latencies: List[float], percent: float) -> float:
+    """Return the given percentile of sorted latencies."""
+    return latencies[round(percent / 100 * (len(latencies) - 1))]
@@ -1,13 +1,19 @@
 """The process module, responsible for the components processing a request."""
 
+import os
+from typing import Optional
+
 from aws_cdk import (
     Duration,
-    aws_apigateway as apigateway,
     aws_dynamodb as dynamodb,
     aws_lambda as lambda_,
 )
 from constructs import Construct
 
+REDIRECT_FUNCTION_ASSET = "resources/functions/redirect/"
+# The routing snapshot written by `python -m tools.snapshot`, relative to the asset.
+ROUTING_SNAPSHOT_PATH = "snapshot/routes.snap"
+
 
 class Process(Construct):
     """The process class, responsible for the components processing a request."""
@@ -16,23 +22,47 @@ class Process(Construct):
         self,
         scope: Construct,
         construct_id: str,
-        proxy_api: apigateway.RestApi,
         ddb_table: dynamodb.Table,
+        redirect_cache_seconds: Optional[int] = None,
+        not_found_cache_seconds: Optional[int] = None,
+        origin_secret: Optional[str] = None,
         **kwargs
     ) -> None:
-        """Construct a new Process class."""
+        """
+        Construct a new Process class.
+
+        The Proxy routes requests to `handler`, the live alias of the function.
+
+        Redirects and 404s get caching headers for the given number of seconds,
+        unless a rule has a TTL of its own, or none if no TTL is given.
+
+        With an `origin_secret`, the function takes the requested domain from the
+        x-forwarded-host header of requests carrying the secret, which the Proxy's
+        CloudFront distributions add to every origin request.
+        """
         super().__init__(scope, construct_id, **kwargs)
 
+        environment = {"DDB_TABLE_NAME": ddb_table.table_name}
+        # Ship the routing snapshot with the function if one has been exported
+        if os.path.exists(os.path.join(REDIRECT_FUNCTION_ASSET, ROUTING_SNAPSHOT_PATH)):
+            environment["SNAPSHOT_PATH"] = ROUTING_SNAPSHOT_PATH
+        if redirect_cache_seconds is not None:
+            environment["REDIRECT_CACHE_SECONDS"] = str(redirect_cache_seconds)
+        if not_found_cache_seconds is not None:
+            environment["NOT_FOUND_CACHE_SECONDS"] = str(not_found_cache_seconds)
+        if origin_secret is not None:
+            environment["ORIGIN_SECRET"] = origin_secret
+
         redirect_handler = lambda_.Function(
             scope=self,
             id="RedirectHandler",
-            code=lambda_.Code.from_asset("resources/functions/redirect/"),
+            code=lambda_.Code.from_asset(REDIRECT_FUNCTION_ASSET),
             handler="src.index.event_handler",
             architecture=lambda_.Architecture.ARM_64,
             runtime=lambda_.Runtime.PYTHON_3_11,
             timeout=Duration.seconds(1),
             memory_size=1024,
-            environment={"DDB_TABLE_NAME": ddb_table.table_name},
+            environment=environment,
         )
 
         # Use an alias to allow API Gateway to gracefully switch between versions
@@ -43,14 +73,4 @@ class Process(Construct):
             version=redirect_handler.current_version,
         )
         ddb_table.grant_read_data(lambda_alias)
-
-        redirect_integration = apigateway.LambdaIntegration(
-            handler=lambda_alias, allow_test_invoke=False
-        )
-
-        # Route all GET requests to the Lambda Function
-        proxy_resource = proxy_api.root.add_proxy(
-            any_method=False,
-            default_integration=redirect_integration,
-        )
-        proxy_resource.add_method("GET", redirect_integration)
+        self.handler = lambda_alias
@@ -1,20 +1,72 @@
 """The proxy module, responsible for the API Gateway proxy."""
 
+import hashlib
+import os
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 from aws_cdk import (
+    CfnResource,
+    Duration,
+    Fn,
+    Names,
+    Stack,
     aws_apigateway as apigateway,
+    aws_apigatewayv2 as apigatewayv2,
     aws_certificatemanager as acm,
+    aws_cloudfront as cloudfront,
+    aws_cloudfront_origins as origins,
+    aws_iam as iam,
+    aws_lambda as lambda_,
     aws_route53 as route53,
     aws_route53_targets as route53_targets,
+    aws_s3_assets as s3_assets,
 )
 from constructs import Construct
 
+# The requested host, copied into a header of its own by the viewer request function.
+# The Host header itself can't be forwarded, since API Gateway only accepts requests
+# for its own domain names, so this header takes its place in the cache key.
+FORWARDED_HOST_HEADER = "x-forwarded-host"
+# Added to every origin request, with the secret shared with the function, which
+# only trusts FORWARDED_HOST_HEADER on requests carrying it. The execute-api
+# endpoints and the Function URL stay public, since they are the origins.
+ORIGIN_SECRET_HEADER = "x-origin-secret"
+FORWARD_HOST_FUNCTION_CODE = f"""\
+function handler(event) {{
+    var request = event.request;
+    request.headers['{FORWARDED_HOST_HEADER}'] = {{value: request.headers.host.value}};
+    return request;
+}}
+"""
+# How requests reach the redirect function: through a REST API, an HTTP API with
+# payload format 2.0, or a Lambda Function URL, which only CloudFront can serve
+# custom domains for.
+INGRESS_MODES = ("rest", "http", "function_url")
+
+# Certificates for CloudFront have to be issued in us-east-1.
+CLOUDFRONT_CERTIFICATE_REGION = "us-east-1"
+
+EDGE_FUNCTION_ASSET = "resources/functions/edge/"
+# The KeyValueStore import file and the function resolving requests from it, both
+# written by `python -m tools.compile_kvs`, relative to the asset.
+EDGE_STORE_IMPORT_PATH = "redirects.kvs.json"
+EDGE_FUNCTION_PATH = "redirect.js"
+# Replaced with the ID of the deployed store in the function code.
+KVS_ID_PLACEHOLDER = "__KVS_ID__"
+# KeyValueStores can only be read by functions of this runtime.
+EDGE_FUNCTION_RUNTIME = "cloudfront-js-2.0"
+
 
 @dataclass
 class ApiMapping:
-    """Model for API mappings."""
+    """
+    Model for API mappings.
+
+    Domain names can be wildcards like '*.example.com', which serve every subdomain
+    of example.com without a mapping of its own. Pair them with a wildcard alias in
+    the redirects table to send all those subdomains to one domain.
+    """
 
     domain_names: List[str]
     hosted_zone_name: str
@@ -22,11 +74,41 @@ class ApiMapping:
 
 
 class Proxy(Construct):
-    """The proxy class, responsible for the API Gateway proxy."""
+    """
+    The proxy class, responsible for the API Gateway proxy.
 
-    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+    The ingress mode selects a REST API, an HTTP API or a Function URL in front
+    of the handler. An HTTP API costs less per request than a REST API and adds
+    less latency, and a Function URL has no API in between at all.
+
+    With edge caching, the custom domain names point to CloudFront distributions in
+    front of the API instead of to the API itself. Responses are cached per host,
+    path and query string, for as long as their Cache-Control header allows. The
+    distributions send the `origin_secret` with every origin request, so the
+    function can tell their requests from direct calls of the origin.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        scope: Construct,
+        construct_id: str,
+        handler: lambda_.IFunction,
+        ingress: str = "rest",
+        edge_caching: bool = False,
+        origin_secret: Optional[str] = None,
+        **kwargs,
+    ) -> None:
         """Construct a new Proxy class."""
         super().__init__(scope, construct_id, **kwargs)
+        if ingress not in INGRESS_MODES:
+            raise ValueError(f"Unknown ingress mode: {ingress}")
+        if edge_caching and origin_secret is None:
+            raise ValueError("Edge caching needs an origin secret")
+        self._origin_secret = origin_secret
+        if ingress == "function_url" and not edge_caching:
+            raise ValueError(
+                "A Function URL can only serve custom domains with edge caching"
+            )
 
         # A list of custom domain names and their hosted zone names
         # this API should respond to.
@@ -57,6 +139,30 @@ class Proxy(Construct):
             ),
         ]
 
+        self.rest_api: Optional[apigateway.RestApi] = None
+        self.http_api: Optional[apigatewayv2.CfnApi] = None
+        self.http_stage: Optional[apigatewayv2.CfnStage] = None
+        self.function_url: Optional[lambda_.FunctionUrl] = None
+        if ingress == "rest":
+            self._add_rest_api(handler)
+        elif ingress == "http":
+            self._add_http_api(handler)
+        else:
+            # Public, like the APIs, and only used as the origin of CloudFront.
+            # Direct calls lack the origin secret, so they can't pick the domain.
+            self.function_url = handler.add_function_url(
+                auth_type=lambda_.FunctionUrlAuthType.NONE
+            )
+
+        self.edge_cache: Optional[EdgeCache] = None
+        if edge_caching:
+            self.edge_cache = EdgeCache(scope=self, construct_id="EdgeCache")
+
+        for api_mapping in api_mappings:
+            self._add_mapping(api_mapping)
+
+    def _add_rest_api(self, handler: lambda_.IFunction) -> None:
+        """Add a REST API routing all GET requests to the handler."""
         self.rest_api = apigateway.RestApi(
             scope=self,
             id="ProxyApi",
@@ -70,14 +176,79 @@ class Proxy(Construct):
             ),
         )
 
-        for api_mapping in api_mappings:
-            self._add_mapping(api_mapping, self.rest_api)
+        redirect_integration = apigateway.LambdaIntegration(
+            handler=handler, allow_test_invoke=False
+        )
 
-    def _add_mapping(
-        self,
-        api_mapping: ApiMapping,
-        rest_api: apigateway.RestApi,
-    ) -> None:
+        # Route all GET requests to the Lambda Function
+        proxy_resource = self.rest_api.root.add_proxy(
+            any_method=False,
+            default_integration=redirect_integration,
+        )
+        proxy_resource.add_method("GET", redirect_integration)
+
+    def _add_http_api(self, handler: lambda_.IFunction) -> None:
+        """Add an HTTP API routing all GET requests to the handler, with payload format 2.0."""
+        self.http_api = apigatewayv2.CfnApi(
+            scope=self,
+            id="HttpProxyApi",
+            name="HttpProxyApi",
+            protocol_type="HTTP",
+        )
+        redirect_integration = apigatewayv2.CfnIntegration(
+            scope=self,
+            id="HttpProxyIntegration",
+            api_id=self.http_api.ref,
+            integration_type="AWS_PROXY",
+            integration_uri=handler.function_arn,
+            payload_format_version="2.0",
+        )
+
+        # Route all GET requests to the Lambda Function
+        for route_id, route_key in [
+            ("HttpProxyRootRoute", "GET /"),
+            ("HttpProxyRoute", "GET /{proxy+}"),
+        ]:
+            apigatewayv2.CfnRoute(
+                scope=self,
+                id=route_id,
+                api_id=self.http_api.ref,
+                route_key=route_key,
+                target=f"integrations/{redirect_integration.ref}",
+            )
+
+        # The default stage is served without a stage name in the path, and
+        # without execution logging.
+        self.http_stage = apigatewayv2.CfnStage(
+            scope=self,
+            id="HttpProxyStage",
+            api_id=self.http_api.ref,
+            stage_name="$default",
+            auto_deploy=True,
+        )
+        handler.add_permission(
+            "HttpProxyApiInvoke",
+            principal=iam.ServicePrincipal("apigateway.amazonaws.com"),
+            source_arn=Stack.of(self).format_arn(
+                service="execute-api", resource=self.http_api.ref, resource_name="*"
+            ),
+        )
+
+    def _edge_origin(self) -> cloudfront.IOrigin:
+        """Return a CloudFront origin for the ingress of the handler."""
+        custom_headers = {ORIGIN_SECRET_HEADER: self._origin_secret}
+        if self.rest_api is not None:
+            return origins.RestApiOrigin(self.rest_api, custom_headers=custom_headers)
+        if self.http_api is not None:
+            endpoint = self.http_api.attr_api_endpoint
+        else:
+            endpoint = self.function_url.url
+        # The endpoint is a URL like 'https://<id>.execute-api.<region>.amazonaws.com'
+        return origins.HttpOrigin(
+            Fn.select(2, Fn.split("/", endpoint)), custom_headers=custom_headers
+        )
+
+    def _add_mapping(self, api_mapping: ApiMapping) -> None:
         """Add custom domain names for the given list of custom hostnames."""
 
         api_hosted_zone = route53.HostedZone.from_hosted_zone_attributes(
@@ -87,13 +258,34 @@ class Proxy(Construct):
             zone_name=api_mapping.hosted_zone_name,
         )
 
+        if self.edge_cache is not None:
+            EdgeDomain(
+                scope=self,
+                construct_id=f"EdgeDomain{api_mapping.hosted_zone_id}",
+                domain_names=api_mapping.domain_names,
+                api_hosted_zone=api_hosted_zone,
+                origin=self._edge_origin(),
+                edge_cache=self.edge_cache,
+            )
+            return
+
         for domain_name in api_mapping.domain_names:
+            if self.http_api is not None:
+                HttpApiDomain(
+                    scope=self,
+                    construct_id=domain_name.replace("*", "wildcard"),
+                    domain_name=domain_name,
+                    api_hosted_zone=api_hosted_zone,
+                    http_api=self.http_api,
+                    http_stage=self.http_stage,
+                )
+                continue
             CustomDomain(
                 scope=self,
-                construct_id=domain_name,
+                construct_id=domain_name.replace("*", "wildcard"),
                 domain_name=domain_name,
                 api_hosted_zone=api_hosted_zone,
-                rest_api=rest_api,
+                rest_api=self.rest_api,
             )
 
 
@@ -144,3 +336,226 @@ class CustomDomain(Construct):
             ),
             record_name=domain_name,
         )
+
+
+class HttpApiDomain(Construct):
+    """A construct to group the resources for a custom domain of the HTTP API."""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        scope: Construct,
+        construct_id: str,
+        domain_name: str,
+        api_hosted_zone: route53.IHostedZone,
+        http_api: apigatewayv2.CfnApi,
+        http_stage: apigatewayv2.CfnStage,
+        **kwargs,
+    ) -> None:
+        """Construct a new HttpApiDomain class."""
+        super().__init__(scope, construct_id, **kwargs)
+
+        # The TLS certificate for the custom domain.
+        api_cert = acm.Certificate(
+            scope=self,
+            id="APICertificate",
+            domain_name=domain_name,
+            validation=acm.CertificateValidation.from_dns(hosted_zone=api_hosted_zone),
+        )
+
+        # The API Gateway custom domain, mapped to the default stage
+        domain = apigatewayv2.CfnDomainName(
+            scope=self,
+            id="CustomDomainName",
+            domain_name=domain_name,
+            domain_name_configurations=[
+                apigatewayv2.CfnDomainName.DomainNameConfigurationProperty(
+                    certificate_arn=api_cert.certificate_arn,
+                    endpoint_type="REGIONAL",
+                    security_policy="TLS_1_2",
+                )
+            ],
+        )
+        apigatewayv2.CfnApiMapping(
+            scope=self,
+            id="ApiMapping",
+            api_id=http_api.ref,
+            domain_name=domain.ref,
+            stage=http_stage.ref,
+        )
+
+        # The Route 53 alias record pointing to the API Gateway custom domain
+        route53.ARecord(
+            scope=self,
+            id="CustomDomainAliasRecord",
+            zone=api_hosted_zone,
+            target=route53.RecordTarget.from_alias(
+                route53_targets.ApiGatewayv2DomainProperties(
+                    domain.attr_regional_domain_name,
+                    domain.attr_regional_hosted_zone_id,
+                )
+            ),
+            record_name=domain_name,
+        )
+
+
+class EdgeCache(Construct):
+    """A construct to group the CloudFront resources shared by all distributions."""
+
+    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+        """Construct a new EdgeCache class."""
+        super().__init__(scope, construct_id, **kwargs)
+
+        # Copies the requested host into the header the cache key and the redirect
+        # function use, as the origin request goes to the execute-api domain. With
+        # a compiled KeyValueStore, the function also answers the requests it holds.
+        function_path = os.path.join(EDGE_FUNCTION_ASSET, EDGE_FUNCTION_PATH)
+        import_path = os.path.join(EDGE_FUNCTION_ASSET, EDGE_STORE_IMPORT_PATH)
+        if os.path.exists(function_path) and os.path.exists(import_path):
+            self.viewer_request_function = self._add_edge_redirect_function(
+                function_path, import_path
+            )
+        else:
+            self.viewer_request_function = cloudfront.Function(
+                scope=self,
+                id="ForwardHostFunction",
+                code=cloudfront.FunctionCode.from_inline(FORWARD_HOST_FUNCTION_CODE),
+                comment="Copy the Host header to X-Forwarded-Host",
+            )
+
+        # The path is always part of the cache key. Responses without a
+        # Cache-Control header, e.g. from rules without a TTL, are not cached.
+        self.cache_policy = cloudfront.CachePolicy(
+            scope=self,
+            id="RedirectCachePolicy",
+            comment="Cache redirects per host, path and query string",
+            header_behavior=cloudfront.CacheHeaderBehavior.allow_list(
+                FORWARDED_HOST_HEADER
+            ),
+            query_string_behavior=cloudfront.CacheQueryStringBehavior.all(),
+            cookie_behavior=cloudfront.CacheCookieBehavior.none(),
+            min_ttl=Duration.seconds(0),
+            default_ttl=Duration.seconds(0),
+            max_ttl=Duration.days(365),
+        )
+
+    def _add_edge_redirect_function(
+        self, function_path: str, import_path: str
+    ) -> cloudfront.Function:
+        """Add the KeyValueStore of the import file, and the function resolving from it."""
+        with open(import_path, "rb") as import_file:
+            digest = hashlib.sha256(import_file.read()).hexdigest()[:12]
+        import_asset = s3_assets.Asset(
+            scope=self, id="KeyValueStoreImport", path=import_path
+        )
+
+        # A store only reads its import file when it's created, so a changed file
+        # creates a new store, which replaces the previous one.
+        store = CfnResource(
+            scope=self,
+            id=f"KeyValueStore{digest}",
+            type="AWS::CloudFront::KeyValueStore",
+            properties={
+                "Name": f"{Names.unique_resource_name(self, max_length=51)}-{digest}",
+                "ImportSource": {
+                    "SourceType": "S3",
+                    "SourceArn": import_asset.bucket.arn_for_objects(
+                        import_asset.s3_object_key
+                    ),
+                },
+            },
+        )
+
+        with open(function_path, encoding="utf-8") as function_file:
+            code = function_file.read().replace(
+                KVS_ID_PLACEHOLDER, store.get_att("Id").to_string()
+            )
+        function = cloudfront.Function(
+            scope=self,
+            id="EdgeRedirectFunction",
+            code=cloudfront.FunctionCode.from_inline(code),
+            comment="Answer redirects from the KeyValueStore, or forward them",
+        )
+        # The Function construct doesn't support the runtime or stores yet.
+        cfn_function: cloudfront.CfnFunction = function.node.default_child
+        cfn_function.add_property_override(
+            "FunctionConfig.Runtime", EDGE_FUNCTION_RUNTIME
+        )
+        cfn_function.add_property_override(
+            "FunctionConfig.KeyValueStoreAssociations",
+            [{"KeyValueStoreARN": store.get_att("Arn").to_string()}],
+        )
+        return function
+
+
+class EdgeDomain(Construct):
+    """A construct to group the resources for the custom domains of one hosted zone."""
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        scope: Construct,
+        construct_id: str,
+        domain_names: List[str],
+        api_hosted_zone: route53.IHostedZone,
+        origin: cloudfront.IOrigin,
+        edge_cache: EdgeCache,
+        **kwargs,
+    ) -> None:
+        """Construct a new EdgeDomain class."""
+        super().__init__(scope, construct_id, **kwargs)
+
+        # The TLS certificate for all domain names of the hosted zone.
+        edge_cert = acm.DnsValidatedCertificate(
+            scope=self,
+            id="EdgeCertificate",
+            domain_name=domain_names[0],
+            subject_alternative_names=domain_names[1:],
+            hosted_zone=api_hosted_zone,
+            region=CLOUDFRONT_CERTIFICATE_REGION,
+        )
+
+        self.distribution = cloudfront.Distribution(
+            scope=self,
+            id="Distribution",
+            comment=f"Redirects for {api_hosted_zone.zone_name}",
+            domain_names=domain_names,
+            certificate=edge_cert,
+            price_class=cloudfront.PriceClass.PRICE_CLASS_100,
+            default_behavior=cloudfront.BehaviorOptions(
+                origin=origin,
+                cache_policy=edge_cache.cache_policy,
+                # Plain HTTP requests are redirected just like HTTPS requests.
+                viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.ALLOW_ALL,
+                function_associations=[
+                    cloudfront.FunctionAssociation(
+                        function=edge_cache.viewer_request_function,
+                        event_type=cloudfront.FunctionEventType.VIEWER_REQUEST,
+                    )
+                ],
+            ),
+            # CloudFront caches 404s for 10 seconds by default, regardless of
+            # their headers. Without a minimum, the Cache-Control header decides.
+            error_responses=[
+                cloudfront.ErrorResponse(http_status=404, ttl=Duration.seconds(0))
+            ],
+        )
+
+        # The Route 53 alias records pointing to the distribution
+        target = route53.RecordTarget.from_alias(
+            route53_targets.CloudFrontTarget(self.distribution)
+        )
+        for domain_name in domain_names:
+            record_id = domain_name.replace("*", "wildcard")
+            route53.ARecord(
+                scope=self,
+                id=f"{record_id}AliasRecord",
+                zone=api_hosted_zone,
+                target=target,
+                record_name=domain_name,
+            )
+            route53.AaaaRecord(
+                scope=self,
+                id=f"{record_id}AliasRecordIPv6",
+                zone=api_hosted_zone,
+                target=target,
+                record_name=domain_name,
+            )
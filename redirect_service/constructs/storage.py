@@ -24,3 +24,13 @@ class Storage(Construct):
             billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
             removal_policy=RemovalPolicy.RETAIN_ON_UPDATE_OR_DELETE,
         )
+        # The sparse index of changed rules, which table mirrors query for deltas
+        self.ddb_table.add_global_secondary_index(
+            index_name="UpdatedAtIndex",
+            partition_key=dynamodb.Attribute(
+                name="change_shard", type=dynamodb.AttributeType.NUMBER
+            ),
+            sort_key=dynamodb.Attribute(
+                name="updated_at", type=dynamodb.AttributeType.NUMBER
+            ),
+        )
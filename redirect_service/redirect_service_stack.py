@@ -1,7 +1,7 @@
 """The module containing all the resources of the redirect service."""
 
 # Related third party imports
-from aws_cdk import Stack
+from aws_cdk import Stack, aws_secretsmanager as secretsmanager
 from constructs import Construct
 
 # Local application / library specific imports
@@ -9,6 +9,11 @@ from redirect_service.constructs.proxy import Proxy
 from redirect_service.constructs.process import Process
 from redirect_service.constructs.storage import Storage
 
+# With edge caching, how long redirects without a TTL of their own and 404s are
+# cached. A 404 is cached briefly, so new rules take effect soon after they're added.
+EDGE_REDIRECT_CACHE_SECONDS = 3600
+EDGE_NOT_FOUND_CACHE_SECONDS = 60
+
 
 class RedirectServiceStack(Stack):
     """The class containing all the resources of the redirect service."""
@@ -17,11 +22,45 @@ class RedirectServiceStack(Stack):
         """Construct a new RedirectServiceStack class."""
         super().__init__(scope, construct_id, **kwargs)
 
+        # Serve the API through CloudFront, caching redirects at the edge, with
+        # e.g. `cdk deploy -c edge_caching=true`.
+        edge_caching = str(self.node.try_get_context("edge_caching")).lower() == "true"
+
+        # Put a REST API, an HTTP API or, with edge caching only, a Function URL in
+        # front of the function, e.g. with `cdk deploy -c ingress=http`.
+        ingress = self.node.try_get_context("ingress") or "rest"
+
+        # The secret the distributions send with origin requests, so the function
+        # only trusts the host they forward, not one sent to the origin directly.
+        origin_secret = None
+        if edge_caching:
+            origin_secret = secretsmanager.Secret(
+                scope=self,
+                id="OriginSecret",
+                description="Sent by CloudFront with every origin request",
+                generate_secret_string=secretsmanager.SecretStringGenerator(
+                    exclude_punctuation=True
+                ),
+            ).secret_value.unsafe_unwrap()
+
         storage = Storage(scope=self, construct_id="Storage")
-        proxy = Proxy(scope=self, construct_id="Proxy")
-        Process(
+        process = Process(
             scope=self,
             construct_id="Process",
-            proxy_api=proxy.rest_api,
             ddb_table=storage.ddb_table,
+            redirect_cache_seconds=(
+                EDGE_REDIRECT_CACHE_SECONDS if edge_caching else None
+            ),
+            not_found_cache_seconds=(
+                EDGE_NOT_FOUND_CACHE_SECONDS if edge_caching else None
+            ),
+            origin_secret=origin_secret,
+        )
+        Proxy(
+            scope=self,
+            construct_id="Proxy",
+            handler=process.handler,
+            ingress=ingress,
+            edge_caching=edge_caching,
+            origin_secret=origin_secret,
         )
@@ -1,37 +1,537 @@
 """The module for the RedirectController class, responsible for requests destinations."""
 
 # Standard library imports
-from typing import Optional, List
-
-# Related third party imports
-import boto3
-from boto3.dynamodb.conditions import Key
-
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
 
 # Local application / library specific imports
+from ..models.config import ControllerConfig
 from ..models.request import ApiGatewayRequest
-from ..models.database import Alias, RedirectFallbackOption
+from ..models.database import (
+    GENERATION_KEY,
+    WILDCARD_ALIAS_KEY,
+    Alias,
+    RedirectFallbackOption,
+    RedirectPatternOption,
+    ResolvedRoute,
+)
+from ..models.resolution import Location, Resolution
+from ..storage import STORAGE_BACKENDS, StorageBackend
+from ..storage.dynamodb import DynamoDBBackend
+from ..utils.alias_chain import follow_alias_chain
+from ..utils.cache import MISSING, TTLCache
+from ..utils.canonical import RequestCanonicalizer
+from ..utils.dynamodb import decode_item, encode_key
+from ..utils.fallback_index import FallbackIndex
+from ..utils.host_trie import HostSuffixTrie
+from ..utils.metrics import MetricsRecorder
+from ..utils.pattern_matcher import PatternMatcher
+
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+    from ..utils.bloom import RoutingFilter
+
+# Imports of botocore, the thread pool, the snapshot reader, the mirror, the
+# routing filter, the hedging client and the local storage backends are deferred
+# until a configuration needs them, since every import adds to cold start time.
+
+
+LOOKUP_STRATEGIES = ("query", "batch_get")
+
+# BatchGetItem accepts at most 100 keys per call.
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_ATTEMPTS = 4
+
+
+def _longest_fallback(
+    snapshot_match: Optional[RedirectFallbackOption],
+    stored_match: Optional[RedirectFallbackOption],
+) -> Optional[RedirectFallbackOption]:
+    """Return the fallback with the longer path, the stored (newer) one on a tie."""
+    if snapshot_match is None:
+        return stored_match
+    if stored_match is None or len(snapshot_match.path) > len(stored_match.path):
+        return snapshot_match
+    return stored_match
 
 
 class RedirectController:
     """The RedirectController class handles fetching the correct destination for requests."""
 
-    def __init__(self, ddb_table_name: str) -> None:
-        """Construct a new RedirectController."""
-        dynamodb = boto3.resource("dynamodb")
-        self._ddb_table = dynamodb.Table(ddb_table_name)
+    def __init__(
+        self,
+        ddb_table_name: str,
+        config: Optional[ControllerConfig] = None,
+        metrics: Optional[MetricsRecorder] = None,
+        storage: Optional[StorageBackend] = None,
+    ) -> None:
+        """
+        Construct a new RedirectController.
+
+        Aliases, exact redirects and fallbacks are read from `storage`, or else
+        from the storage backend the config selects.
+        """
+        self._config = config or ControllerConfig()
+        self._metrics = metrics or MetricsRecorder(enabled=False)
+        if self._config.lookup_strategy not in LOOKUP_STRATEGIES:
+            raise ValueError(f"Unknown lookup strategy: {self._config.lookup_strategy}")
+        self._validate_storage_backend()
+        if self._config.snapshot_only:
+            if not self._config.snapshot_path:
+                raise ValueError("Snapshot-only lookups need a snapshot path")
+            if self._config.mirror_enabled or self._config.routing_filter_enabled:
+                raise ValueError(
+                    "Snapshot-only lookups can't load the mirror or routing filter"
+                )
+
+        self._ddb_table_name = ddb_table_name
+        self._canonicalizer = RequestCanonicalizer(
+            canonicalize_host=self._config.canonicalize_host,
+            path_policy=self._config.path_policy,
+            domain_path_policies=self._config.domain_path_policies,
+        )
+        # The low-level client is thread-safe and much cheaper to create than
+        # the boto3 resource layer, so it is shared by all lookups. Without it, no
+        # lookup can make a network call.
+        uses_ddb = (
+            self._config.storage_backend == "dynamodb"
+            and not self._config.snapshot_only
+        )
+        self._ddb_client = self._create_ddb_client() if uses_ddb else None
+        self._storage: Optional[StorageBackend] = storage
+        if self._storage is None and not self._config.snapshot_only:
+            self._storage = self._create_storage(ddb_table_name)
+
+        # Speculative lookups run on worker threads, created on first use.
+        self._executor: Optional["ThreadPoolExecutor"] = None
+
+        # A snapshot answers alias and exact redirect lookups for everything it
+        # contains without a network call. Anything it lacks, e.g. items added after
+        # it was built, is looked up in DynamoDB as usual. Its fallbacks only apply
+        # once DynamoDB has no exact redirect or regex rule for the request, and no
+        # longer fallback, since a rule added after the snapshot may be more specific.
+        self._snapshot = None
+        if self._config.snapshot_path:
+            # pylint: disable=import-outside-toplevel
+            from ..utils.snapshot import RoutingSnapshot
+
+            self._snapshot = RoutingSnapshot(self._config.snapshot_path)
+
+        # A mirror holds the whole table, so requests never wait for DynamoDB. Only
+        # its background refresher reads from the table after init.
+        self._mirror = None
+        if self._config.mirror_enabled:
+            # pylint: disable=import-outside-toplevel
+            from ..utils.mirror import TableMirror
+
+            self._mirror = TableMirror(
+                ddb_client=self._ddb_client,
+                ddb_table_name=ddb_table_name,
+                scan_segments=self._config.mirror_scan_segments,
+                refresh_interval=self._config.mirror_refresh_seconds,
+                pattern_rules=self._config.pattern_rules,
+                wildcard_aliases=self._config.wildcard_aliases,
+            )
+            self._mirror.load()
+
+        # A Bloom filter of the rules tells which lookups can't find anything, so
+        # those are skipped. Without a filter matching the table generation, e.g.
+        # right after the rules changed, every lookup is made as usual.
+        self._routing_filter = None
+        if self._config.routing_filter_enabled:
+            # pylint: disable=import-outside-toplevel
+            from ..utils.bloom import RoutingFilter
+
+            self._routing_filter = RoutingFilter(
+                ddb_client=self._ddb_client,
+                ddb_table_name=ddb_table_name,
+                refresh_interval=self._config.routing_filter_refresh_seconds,
+            )
+            self._routing_filter.load()
+
+        # Aliases, exact redirects and resolved locations survive between warm
+        # invocations. Negative results (None) are cached as well, so repeated
+        # requests for unknown domains or paths don't hit DynamoDB either.
+        self._cache = TTLCache(
+            ttl=self._config.cache_ttl_seconds,
+            max_entries=self._config.cache_max_entries,
+        )
+
+    def _validate_storage_backend(self) -> None:
+        """Raise a ValueError if the storage backend can't serve the configuration."""
+        backend = self._config.storage_backend
+        if backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Unknown storage backend: {backend}")
+        if backend == "dynamodb":
+            return
+        if not self._config.storage_path:
+            raise ValueError(f"The {backend} storage backend needs a storage path")
+
+        ddb_only_features = [
+            name
+            for name, enabled in [
+                ("mirror_enabled", self._config.mirror_enabled),
+                ("routing_filter_enabled", self._config.routing_filter_enabled),
+                ("resolved_lookups", self._config.resolved_lookups),
+                ("pattern_rules", self._config.pattern_rules),
+                ("wildcard_aliases", self._config.wildcard_aliases),
+                ("batch_get", self._config.lookup_strategy == "batch_get"),
+            ]
+            if enabled
+        ]
+        if ddb_only_features:
+            raise ValueError(
+                f"The {backend} storage backend doesn't support "
+                + ", ".join(ddb_only_features)
+            )
+
+    def _create_storage(self, ddb_table_name: str) -> StorageBackend:
+        """Create the storage backend the config selects."""
+        # pylint: disable=import-outside-toplevel
+        if self._config.storage_backend == "memory":
+            from ..storage.memory import MemoryBackend
+
+            return MemoryBackend.from_file(self._config.storage_path)
+        if self._config.storage_backend == "sqlite":
+            from ..storage.sqlite import SQLiteBackend
+
+            return SQLiteBackend(self._config.storage_path)
+        return DynamoDBBackend(
+            self._ddb_client, ddb_table_name, record_call=self._record_ddb_call
+        )
+
+    def resolve(self, request: ApiGatewayRequest) -> Resolution:
+        """
+        Resolve the domain and redirect location for a request.
+
+        An alias for the requested domain, e.g. 'bss.com' for 'www.bss.com', takes
+        precedence over the requested domain. With concurrent lookups enabled the
+        redirect for the requested domain is looked up while the alias is still in
+        flight, and that speculative result is discarded if an alias points elsewhere.
+        With the batch_get strategy the alias and redirect candidates are fetched together.
+        With resolved lookups enabled, a precompiled Resolved item answers the request
+        in a single round trip when one exists for the current table generation. With
+        the routing filter enabled, requests for domains without any rules are answered
+        without a lookup at all.
+        Requests are canonicalized first, according to the configured policies, and
+        the resolution gets the cache TTL of its rule, or else the configured default.
+        """
+        cache_hits, cache_misses = self._cache.hits, self._cache.misses
+        if self._canonicalizer.enabled:
+            canonical_request = self._canonicalizer.canonicalize(request)
+            if canonical_request is not request:
+                self._metrics.add("CanonicalizedRequests")
+                request = canonical_request
+        resolution = self._resolve(request)
+        resolution.cache_ttl = self._cache_ttl(resolution.location)
+        if self._metrics.recording:
+            self._metrics.add("CacheHits", self._cache.hits - cache_hits)
+            self._metrics.add("CacheMisses", self._cache.misses - cache_misses)
+        return resolution
+
+    def _cache_ttl(self, location: Optional[str]) -> Optional[int]:
+        """Return how long the response for a location may be cached, or None."""
+        if location is None:
+            return self._config.not_found_cache_seconds
+        cache_ttl = getattr(location, "cache_ttl", None)
+        if cache_ttl is None:
+            return self._config.redirect_cache_seconds
+        return cache_ttl
+
+    def _resolve(self, request: ApiGatewayRequest) -> Resolution:
+        """Resolve a request from the first source that is configured."""
+        if self._config.snapshot_only:
+            with self._metrics.timer("SnapshotLookupTime"):
+                return self._resolve_from_snapshot(request)
+
+        if self._mirror is not None:
+            self._mirror.maybe_refresh()
+            return self._resolve_sequentially(request)
+
+        if self._routing_filter is not None:
+            self._routing_filter.maybe_refresh()
+            if not self._routing_filter.might_have_domain(request.domain):
+                self._metrics.add("FilterShortCircuits")
+                return Resolution(domain=request.domain, location=None)
+
+        if self._snapshot is not None:
+            with self._metrics.timer("SnapshotLookupTime"):
+                resolution = self._resolve_from_snapshot(request, fallbacks=False)
+            if resolution.location is not None:
+                return resolution
+
+        if self._config.resolved_lookups:
+            resolution = self._get_resolution(request)
+            if resolution is not None:
+                return resolution
+
+        if self._config.lookup_strategy == "batch_get":
+            return self._resolve_with_batch_get(request)
+
+        if self._config.concurrent_lookups:
+            return self._resolve_concurrently(request)
+
+        return self._resolve_sequentially(request)
+
+    def _get_resolution(self, request: ApiGatewayRequest) -> Optional[Resolution]:
+        """
+        Return the (cached) precompiled resolution of a request, or None.
+
+        A Resolved item compiled at another generation than the table's, which is
+        read at most once per cache TTL, is outdated and ignored.
+        """
+        with self._metrics.timer("ResolvedLookupTime"):
+            route: Optional[ResolvedRoute] = self._cache.get_or_set(
+                ("resolved", request.domain, request.path),
+                lambda: self._get_resolved_from_ddb(request.domain, request.path),
+            )
+            if route is None or route.generation is None:
+                return None
+            generation = self._cache.get_or_set(
+                ("generation",), self._get_generation_from_ddb
+            )
+        if route.generation != generation:
+            self._metrics.add("OutdatedResolvedItems")
+            return None
+        return Resolution(domain=route.domain, location=route.location)
+
+    def _resolve_from_snapshot(
+        self, request: ApiGatewayRequest, fallbacks: bool = True
+    ) -> Resolution:
+        """
+        Resolve a request from the snapshot alone, with no location if it has none.
+
+        Without `fallbacks`, only an exact redirect in the snapshot resolves it.
+        Otherwise its regex rules come next, if enabled, and then its fallbacks,
+        like in DynamoDB.
+        """
+        alias = follow_alias_chain(
+            request.domain,
+            lambda domain: self._snapshot.get_alias(domain)
+            or self._match_wildcard_alias(domain),
+            self._config.max_alias_hops,
+        )
+        domain = alias.target_domain if alias else request.domain
+        location = self._snapshot.get_redirect_target(domain, request.path)
+        if location is None and fallbacks:
+            location = self._get_snapshot_pattern_location(domain, request.path)
+        if location is None and fallbacks:
+            best_match = self._get_snapshot_fallback_match(domain, request.path)
+            location = best_match.location if best_match else None
+        return Resolution(domain=domain, location=location)
+
+    def _get_snapshot_pattern_location(
+        self, domain: str, request_path: str
+    ) -> Optional[str]:
+        """Return the target of the first regex rule in the snapshot matching the path."""
+        if not self._config.pattern_rules:
+            return None
+        pattern_matcher: PatternMatcher = self._cache.get_or_set(
+            ("snapshot_pattern_matcher", domain),
+            lambda: PatternMatcher(self._snapshot.get_patterns(domain)),
+        )
+        return pattern_matcher.match(request_path)
+
+    def _get_snapshot_fallback_match(
+        self, domain: str, request_path: str
+    ) -> Optional[RedirectFallbackOption]:
+        """Return the best matching fallback from the snapshot, or None."""
+        fallback_index: FallbackIndex = self._cache.get_or_set(
+            ("snapshot_fallback_index", domain),
+            lambda: FallbackIndex(self._snapshot.get_fallbacks(domain)),
+        )
+        return fallback_index.match(request_path)
+
+    def _resolve_sequentially(self, request: ApiGatewayRequest) -> Resolution:
+        """Resolve a request by looking up the alias first, then the redirect location."""
+        alias = self.get_alias(request)
+        domain = alias.target_domain if alias else request.domain
+        return Resolution(
+            domain=domain,
+            location=self.get_redirect_location(
+                domain=domain, request_path=request.path
+            ),
+        )
+
+    def _resolve_concurrently(self, request: ApiGatewayRequest) -> Resolution:
+        """Resolve a request, overlapping the alias, exact and fallback lookups."""
+        location_key = ("location", request.domain, request.path)
+        if self._cache.get(location_key) is not MISSING:
+            # The redirect for the requested domain is already known, so there
+            # are no round trips left to overlap with the alias lookup.
+            return self._resolve_sequentially(request)
+
+        executor = self._get_executor()
+        exact_future = executor.submit(
+            self._get_cached_exact_redirect_target, request.domain, request.path
+        )
+        fallback_future = executor.submit(
+            self._get_fallback_redirect_location, request.domain, request.path
+        )
+        alias = self.get_alias(request)
+
+        if alias and alias.target_domain != request.domain:
+            # The speculative lookups were for the wrong domain. Lookups that
+            # haven't started yet are dropped; running ones finish in the background.
+            exact_future.cancel()
+            fallback_future.cancel()
+            return Resolution(
+                domain=alias.target_domain,
+                location=self.get_redirect_location(
+                    domain=alias.target_domain, request_path=request.path
+                ),
+            )
+
+        location = exact_future.result()
+        if location is None:
+            location = self._get_pattern_redirect_location(request.domain, request.path)
+        if location is None:
+            location = fallback_future.result()
+        self._cache.set(location_key, location)
+        return Resolution(domain=request.domain, location=location)
+
+    def _resolve_with_batch_get(self, request: ApiGatewayRequest) -> Resolution:
+        """Resolve a request, fetching the alias and redirect candidates in one round trip."""
+        location_key = ("location", request.domain, request.path)
+        alias_key = ("alias", request.domain)
+        if (
+            self._cache.get(alias_key) is not MISSING
+            or self._cache.get(location_key) is not MISSING
+        ):
+            return self._resolve_sequentially(request)
+
+        alias_pk = f"DomainAlias#{request.domain}"
+        with self._metrics.timer("BatchGetLookupTime"):
+            items = self._batch_get_candidates(
+                request.domain, request.path, extra_keys=[(alias_pk, alias_pk)]
+            )
+        alias_item = items.get((alias_pk, alias_pk))
+        if alias_item:
+            alias = Alias.from_ddb_item(alias_item)
+        else:
+            alias = self._match_wildcard_alias(request.domain)
+        self._cache.set(("alias_hop", request.domain), alias)
+
+        if alias and alias.target_domain != request.domain:
+            # The candidates were fetched for the wrong domain, so fetch them
+            # again for the domain the alias (chain) ends at.
+            return self._resolve_sequentially(request)
+        self._cache.set(alias_key, None)
+
+        location = self._location_from_candidates(items, request.domain, request.path)
+        self._cache.set(location_key, location)
+        return Resolution(domain=request.domain, location=location)
+
+    def _filter_rules_out(self, might_match: Callable[["RoutingFilter"], bool]) -> bool:
+        """Return True if the routing filter rules out that a lookup finds anything."""
+        if self._routing_filter is None or might_match(self._routing_filter):
+            return False
+        self._metrics.add("FilterSkippedLookups")
+        return True
+
+    def _get_executor(self) -> "ThreadPoolExecutor":
+        """Return the thread pool for speculative lookups, creating it on first use."""
+        if self._executor is None:
+            # pylint: disable=import-outside-toplevel
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._executor = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix="redirect-lookup"
+            )
+        return self._executor
+
+    def _create_ddb_client(self):
+        """Create the low-level DDB client, tuned for the 1 second function timeout."""
+        # botocore is used directly, since importing boto3 also imports s3transfer
+        # and adds over 100 ms to every cold start.
+        # pylint: disable=import-outside-toplevel
+        import botocore.config
+        import botocore.session
+
+        client_config = botocore.config.Config(
+            connect_timeout=self._config.ddb_connect_timeout_seconds,
+            read_timeout=self._config.ddb_read_timeout_seconds,
+            # Adaptive mode adds client-side rate limiting when DDB throttles, and
+            # the attempt cap keeps retries from outliving the function.
+            retries={
+                "mode": "adaptive",
+                "total_max_attempts": self._config.ddb_max_attempts,
+            },
+            # Only enables TCP keepalive probes on idle connections. Connections are
+            # reused between warm invocations because the client lives as long as
+            # the module-level controller, not because of this option.
+            tcp_keepalive=True,
+            # Our requests are built in code, validating them costs time for nothing.
+            parameter_validation=False,
+        )
+        ddb_client = botocore.session.get_session().create_client(
+            "dynamodb", config=client_config
+        )
+        if not self._config.hedging_enabled:
+            return ddb_client
+
+        # pylint: disable=import-outside-toplevel
+        from ..utils.hedging import HedgedDynamoDBClient, HedgingPolicy
+
+        return HedgedDynamoDBClient(
+            ddb_client,
+            policy=HedgingPolicy(
+                percentile=self._config.hedge_percentile,
+                max_hedge_rate=self._config.hedge_max_rate,
+            ),
+            budget=self._config.hedge_budget_seconds,
+        )
 
     def get_alias(self, request: ApiGatewayRequest) -> Optional[Alias]:
-        """Return an Alias object from DDB or None if no alias exists."""
-        key = f"DomainAlias#{request.domain}"
-        response = self._ddb_table.query(
-            KeyConditionExpression=Key("pk").eq(key) & Key("sk").eq(key),
+        """
+        Return an Alias object from DDB or None if no alias exists.
+
+        Chains of aliases, e.g. a -> b -> c, are followed for up to `max_alias_hops`
+        hops, and the returned alias points from the requested domain to the end of
+        the chain. Both every hop and the flattened alias are cached, so a warm chain
+        costs a single cache lookup. A chain that loops or goes on for more hops
+        raises an AliasChainError.
+        """
+        if self._mirror is not None:
+            return follow_alias_chain(
+                request.domain, self._mirror.get_alias, self._config.max_alias_hops
+            )
+
+        with self._metrics.timer("AliasLookupTime"):
+            return self._cache.get_or_set(
+                ("alias", request.domain),
+                lambda: follow_alias_chain(
+                    request.domain,
+                    self._get_cached_alias_hop,
+                    self._config.max_alias_hops,
+                ),
+            )
+
+    def _get_cached_alias_hop(self, domain: str) -> Optional[Alias]:
+        """Return the (cached) alias of the domain itself, without following it."""
+        return self._cache.get_or_set(
+            ("alias_hop", domain), lambda: self._lookup_alias(domain)
         )
 
-        if response["Count"] == 0:
+    def _lookup_alias(self, domain: str) -> Optional[Alias]:
+        """Return the alias of the domain from the snapshot, or else from storage."""
+        if self._snapshot is not None:
+            alias = self._snapshot.get_alias(domain)
+            if alias is not None:
+                return alias
+        if self._filter_rules_out(lambda bloom: bloom.might_have_alias(domain)):
             return None
+        return self._storage.get_alias(domain) or self._match_wildcard_alias(domain)
 
-        return Alias.from_ddb_item(response["Items"][0])
+    def _match_wildcard_alias(self, domain: str) -> Optional[Alias]:
+        """Return the most specific wildcard alias matching the domain, or None."""
+        if not self._config.wildcard_aliases or self._config.snapshot_only:
+            return None
+        wildcard_aliases: HostSuffixTrie[Alias] = self._cache.get_or_set(
+            ("wildcard_aliases",), self._get_wildcard_aliases_from_ddb
+        )
+        return wildcard_aliases.match(domain)
 
     def get_redirect_location(self, domain: str, request_path: str) -> Optional[str]:
         """
@@ -40,68 +540,373 @@ class RedirectController:
         This function first checks for exact domain and path matches, and returns them if they
         are found. If none are found, it will look for fallback redirects, where the path in the
         database partially matches the request. If any are found, the best match is returned. If
-        none are found, None is returned.
+        none are found, None is returned. Both positive and negative outcomes are cached.
         """
+        if self._mirror is not None:
+            return self._mirror.get_redirect_location(domain, request_path)
 
-        ddb_response = self._get_redirect_from_ddb(domain, request_path)
+        return self._cache.get_or_set(
+            ("location", domain, request_path),
+            lambda: self._resolve_redirect_location(domain, request_path),
+        )
 
-        if ddb_response["Count"] == 1:
-            return ddb_response["Items"][0]["target"]
+    def _resolve_redirect_location(
+        self, domain: str, request_path: str
+    ) -> Optional[str]:
+        """Resolve the redirect location, preferring exact matches over fallbacks."""
+        if self._config.lookup_strategy == "batch_get":
+            with self._metrics.timer("BatchGetLookupTime"):
+                items = self._batch_get_candidates(domain, request_path)
+            return self._location_from_candidates(items, domain, request_path)
+
+        exact_target = self._get_cached_exact_redirect_target(domain, request_path)
+        if exact_target is not None:
+            return exact_target
+
+        pattern_target = self._get_pattern_redirect_location(domain, request_path)
+        if pattern_target is not None:
+            return pattern_target
 
         return self._get_fallback_redirect_location(domain, request_path)
 
+    def _get_pattern_redirect_location(
+        self, domain: str, request_path: str
+    ) -> Optional[str]:
+        """Return the target of the first regex rule matching the path, or None."""
+        if not self._config.pattern_rules or self._filter_rules_out(
+            lambda bloom: bloom.might_have_patterns(domain)
+        ):
+            return None
+
+        with self._metrics.timer("PatternLookupTime"):
+            # Compiled once per domain, and reused for every path until it expires.
+            pattern_matcher: PatternMatcher = self._cache.get_or_set(
+                ("pattern_matcher", domain),
+                lambda: PatternMatcher(self._get_redirect_patterns_from_ddb(domain)),
+            )
+            return pattern_matcher.match(request_path)
+
+    def _get_cached_exact_redirect_target(
+        self, domain: str, request_path: str
+    ) -> Optional[str]:
+        """Return the (cached) target of the exactly matching redirect, or None."""
+        with self._metrics.timer("ExactLookupTime"):
+            return self._cache.get_or_set(
+                ("redirect", domain, request_path),
+                lambda: self._get_exact_redirect_target(domain, request_path),
+            )
+
+    def _get_exact_redirect_target(
+        self, domain: str, request_path: str
+    ) -> Optional[str]:
+        """Return the target of the exactly matching redirect, or None."""
+        if self._snapshot is not None:
+            target = self._snapshot.get_redirect_target(domain, request_path)
+            if target is not None:
+                return target
+        if self._filter_rules_out(
+            lambda bloom: bloom.might_have_redirect(domain, request_path)
+        ):
+            return None
+        return self._storage.get_redirect(domain, request_path)
+
     def _get_fallback_redirect_location(
         self, domain: str, request_path: str
     ) -> Optional[str]:
-        """Return the best fallback redirect location for the given request path, or None."""
-        ddb_response = self._get_redirect_fallbacks_from_ddb(domain=domain)
+        """
+        Return the best fallback redirect location for the given request path, or None.
+
+        A fallback in the snapshot only wins if no fallback in storage has a longer
+        path, since a more specific one may have been added after the snapshot was
+        built. Storage is only skipped if the snapshot's fallback spans the whole
+        path, as no longer fallback can match then.
+        """
+        snapshot_match = None
+        if self._snapshot is not None:
+            snapshot_match = self._get_snapshot_fallback_match(domain, request_path)
+            if snapshot_match is not None and snapshot_match.path == request_path:
+                return snapshot_match.location
+
+        best_match = _longest_fallback(
+            snapshot_match, self._get_stored_fallback_match(domain, request_path)
+        )
+        return best_match.location if best_match else None
+
+    def _get_stored_fallback_match(
+        self, domain: str, request_path: str
+    ) -> Optional[RedirectFallbackOption]:
+        """Return the best matching fallback from storage, or None."""
+        # Fallbacks match any substring of the path, so the filter can only tell
+        # whether the domain has fallbacks at all, not whether one matches.
+        if self._filter_rules_out(lambda bloom: bloom.might_have_fallbacks(domain)):
+            return None
+
+        with self._metrics.timer("FallbackLookupTime"):
+            # The compiled index is cached per domain, so every path requested for
+            # the same domain reuses it instead of scanning all fallbacks again.
+            # Matching against it evaluates no candidates one by one.
+            fallback_index = self._cache.get(("fallback_index", domain))
+            if fallback_index is not MISSING:
+                return fallback_index.match(request_path)
 
-        # Reshape the DDB responses into models
-        redirect_options: List[RedirectFallbackOption] = []
-        for item in ddb_response["Items"]:
-            redirect_options.append(RedirectFallbackOption.from_ddb_item(item))
+            return self._stream_fallback_match(domain, request_path)
 
-        # Loop over all redirects and return the best matching
-        # redirect fallback option for the requested path
-        best_match = None
+    def _stream_fallback_match(
+        self, domain: str, request_path: str
+    ) -> Optional[RedirectFallbackOption]:
+        """
+        Match the fallbacks for the domain page by page, without loading them all first.
+
+        While the number of fallbacks stays within the configured limit, they are
+        also collected into a FallbackIndex for the next request. Beyond that limit
+        the collected options are dropped, so memory stays bounded by a single page,
+        and the scan stops as soon as a fallback spans the whole request path: a
+        longer fallback can never be a substring of it.
+        """
+        index_options: Optional[List[RedirectFallbackOption]] = (
+            [] if self._cache.enabled else None
+        )
+        best_match: Optional[RedirectFallbackOption] = None
         max_matching_characters = 0
-        for redirect in redirect_options:
-            # Check if the path for the redirect option has any overlap
-            # with the requested path. If so, it is redirect candidate.
-            if redirect.path in request_path:
-                # Get the number of matching characters between the path
-                # for the redirect option and the requested path.
-                matching_characters = len(redirect.path)
+        candidates = 0
 
-                # If the number of matching characters is greater than
-                # the current best match, update the best match and the
-                # number of matching characters.
-                if matching_characters > max_matching_characters:
-                    best_match = redirect
-                    max_matching_characters = matching_characters
+        for option in self._storage.iter_fallbacks(domain):
+            candidates += 1
+            path = option.path
 
-        # Return the best matching redirect fallback option, or None if none are found
-        return best_match.target if best_match else None
+            # Loop over all redirects and keep the best matching redirect
+            # fallback option for the requested path. Only a strictly longer
+            # match replaces the current one, so ties go to the lowest sort key.
+            if len(path) > max_matching_characters and path in request_path:
+                best_match = option
+                max_matching_characters = len(path)
 
-    def _get_redirect_from_ddb(self, domain: str, request_path: str):
+            if index_options is not None:
+                index_options.append(option)
+                if len(index_options) > self._config.fallback_index_max_entries:
+                    index_options = None
+
+            if index_options is None and max_matching_characters == len(request_path):
+                break
+
+        if index_options is not None:
+            self._cache.set(("fallback_index", domain), FallbackIndex(index_options))
+
+        self._metrics.add("FallbackCandidates", candidates)
+        return best_match
+
+    @staticmethod
+    def _fallback_prefixes(request_path: str) -> List[str]:
+        """
+        Return every prefix of the request path that ends at a path segment boundary.
+
+        For '/a/b' these are '/', '/a', '/a/' and '/a/b': O(path depth) candidates,
+        longest last. Fallbacks that only match mid-segment or not at the start
+        of the path are not found by the batch_get strategy.
+        """
+        prefixes = []
+        for index, char in enumerate(request_path):
+            if char == "/":
+                if index:
+                    prefixes.append(request_path[:index])
+                prefixes.append(request_path[: index + 1])
+        if request_path and not request_path.endswith("/"):
+            prefixes.append(request_path)
+        return list(dict.fromkeys(prefixes))
+
+    def _location_from_candidates(
+        self, items: Dict[Tuple[str, str], dict], domain: str, request_path: str
+    ) -> Optional[str]:
+        """
+        Return the exact match, or else the first matching regex rule, or else the
+        longest fallback prefix, among fetched items.
+        """
+        exact_item = items.get((f"Redirect#{domain}", request_path))
+        if exact_item is not None:
+            return Location.from_ddb_item(exact_item)
+        if self._snapshot is not None:
+            target = self._snapshot.get_redirect_target(domain, request_path)
+            if target is not None:
+                return target
+
+        pattern_target = self._get_pattern_redirect_location(domain, request_path)
+        if pattern_target is not None:
+            return pattern_target
+
+        # The longer of the snapshot's and the fetched fallbacks wins, as with the
+        # query strategy.
+        snapshot_match = None
+        if self._snapshot is not None:
+            snapshot_match = self._get_snapshot_fallback_match(domain, request_path)
+
+        fetched_match = None
+        fallback_pk = f"RedirectFallback#{domain}"
+        for prefix in reversed(self._fallback_prefixes(request_path)):
+            fallback_item = items.get((fallback_pk, prefix))
+            if fallback_item is not None:
+                fetched_match = RedirectFallbackOption.from_ddb_item(fallback_item)
+                break
+
+        best_match = _longest_fallback(snapshot_match, fetched_match)
+        return best_match.location if best_match else None
+
+    def _batch_get_candidates(
+        self,
+        domain: str,
+        request_path: str,
+        extra_keys: Optional[List[Tuple[str, str]]] = None,
+    ) -> Dict[Tuple[str, str], dict]:
+        """Fetch the exact and fallback candidates for a request path, keyed by (pk, sk)."""
+        keys = list(extra_keys or [])
+        keys.append((f"Redirect#{domain}", request_path))
+        keys.extend(
+            (f"RedirectFallback#{domain}", prefix)
+            for prefix in self._fallback_prefixes(request_path)
+        )
+        self._metrics.add("FallbackCandidates", len(keys) - 1 - len(extra_keys or []))
+
+        items: Dict[Tuple[str, str], dict] = {}
+        for start in range(0, len(keys), BATCH_GET_MAX_KEYS):
+            for item in self._batch_get_from_ddb(
+                keys[start : start + BATCH_GET_MAX_KEYS]
+            ):
+                items[(item["pk"], item["sk"])] = item
+        return items
+
+    def _batch_get_from_ddb(self, keys: List[Tuple[str, str]]) -> List[dict]:
+        """
+        Extracted DDB batch get request for easy mocking.
+
+        Retries UnprocessedKeys with a short exponential backoff, within the function timeout.
+        """
+        request_items = {
+            self._ddb_table_name: {
+                "Keys": [encode_key(pk, sk) for pk, sk in keys],
+                "ProjectionExpression": "pk, sk, target, target_domain, cache_ttl, deleted",
+            }
+        }
+
+        items: List[dict] = []
+        for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+            if attempt:
+                time.sleep(0.01 * 2**attempt)
+
+            response = self._ddb_client.batch_get_item(
+                RequestItems=request_items, ReturnConsumedCapacity="TOTAL"
+            )
+            self._record_ddb_call(response)
+            # Tombstones left by mirror writers are read like missing items
+            items.extend(
+                item
+                for item in map(
+                    decode_item, response["Responses"].get(self._ddb_table_name, [])
+                )
+                if not item.get("deleted")
+            )
+            request_items = response.get("UnprocessedKeys")
+            if not request_items:
+                return items
+
+        raise RuntimeError("Unprocessed keys remained after retrying BatchGetItem")
+
+    def _get_resolved_from_ddb(
+        self, domain: str, request_path: str
+    ) -> Optional[ResolvedRoute]:
+        """
+        Extracted DDB resolved route request for easy mocking.
+
+        Reads the Resolved item compiled for the requested domain and path, or None.
+        """
+        response = self._ddb_client.get_item(
+            TableName=self._ddb_table_name,
+            Key=encode_key(f"Resolved#{domain}", request_path),
+            ProjectionExpression="pk, sk, resolved_domain, target, cache_ttl, generation",
+            ReturnConsumedCapacity="TOTAL",
+        )
+        self._record_ddb_call(response)
+
+        if "Item" not in response:
+            return None
+
+        return ResolvedRoute.from_ddb_item(decode_item(response["Item"]))
+
+    def _get_generation_from_ddb(self) -> Optional[int]:
         """
-        Extracted DDB redirect request for easy mocking.
+        Extracted DDB generation request for easy mocking.
 
-        Queries the database for all exactly matching redirect locations
-        for the requested path.
+        Reads the current table generation, or None if the table doesn't track it.
         """
-        response = self._ddb_table.query(
-            KeyConditionExpression=Key("pk").eq(f"Redirect#{domain}")
-            & Key("sk").eq(request_path),
+        response = self._ddb_client.get_item(
+            TableName=self._ddb_table_name,
+            Key=encode_key(GENERATION_KEY, GENERATION_KEY),
+            ProjectionExpression="generation",
+            ReturnConsumedCapacity="TOTAL",
         )
+        self._record_ddb_call(response)
+
+        if "Item" not in response:
+            return None
+
+        return int(decode_item(response["Item"])["generation"])
+
+    def _get_redirect_patterns_from_ddb(
+        self, domain: str
+    ) -> List[RedirectPatternOption]:
+        """Query all regex rules of the domain, in sort key order, following LastEvaluatedKey."""
+        query_kwargs = {
+            "TableName": self._ddb_table_name,
+            "KeyConditionExpression": "pk = :pk",
+            "ExpressionAttributeValues": {":pk": {"S": f"RedirectPattern#{domain}"}},
+            "ProjectionExpression": "pk, sk, target, cache_ttl, deleted",
+            "ReturnConsumedCapacity": "TOTAL",
+        }
+        options = []
+        while True:
+            response = self._ddb_client.query(**query_kwargs)
+            self._record_ddb_call(response)
+            options.extend(
+                RedirectPatternOption.from_ddb_item(item)
+                for item in map(decode_item, response["Items"])
+                if not item.get("deleted")
+            )
+
+            if not response.get("LastEvaluatedKey"):
+                return options
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
 
-        if response["Count"] > 1 or len(response["Items"]) > 1:
-            raise RuntimeError("Multiple redirect options found for request path")
+    def _get_wildcard_aliases_from_ddb(self) -> HostSuffixTrie[Alias]:
+        """Query all wildcard aliases, following LastEvaluatedKey, into a trie."""
+        query_kwargs = {
+            "TableName": self._ddb_table_name,
+            "KeyConditionExpression": "pk = :pk",
+            "ExpressionAttributeValues": {":pk": {"S": WILDCARD_ALIAS_KEY}},
+            "ProjectionExpression": "pk, sk, target_domain, deleted",
+            "ReturnConsumedCapacity": "TOTAL",
+        }
+        wildcard_aliases: HostSuffixTrie[Alias] = HostSuffixTrie()
+        while True:
+            response = self._ddb_client.query(**query_kwargs)
+            self._record_ddb_call(response)
+            for item in map(decode_item, response["Items"]):
+                if item.get("deleted"):
+                    continue
+                alias = Alias.from_ddb_item(item)
+                wildcard_aliases.add(alias.source_domain, alias)
 
-        return response
+            if not response.get("LastEvaluatedKey"):
+                return wildcard_aliases
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
 
-    def _get_redirect_fallbacks_from_ddb(self, domain: str):
-        """Extracted DDB redirect fallbacks request for easy mocking."""
-        return self._ddb_table.query(
-            KeyConditionExpression=Key("pk").eq(f"RedirectFallback#{domain}"),
+    def _record_ddb_call(self, response: dict) -> None:
+        """Count a DDB call and the read capacity it consumed."""
+        if not self._metrics.recording:
+            return
+        self._metrics.add("DdbCalls")
+        consumed_capacity = response.get("ConsumedCapacity", [])
+        # BatchGetItem reports a list with the capacity per table
+        if isinstance(consumed_capacity, dict):
+            consumed_capacity = [consumed_capacity]
+        self._metrics.add(
+            "DdbConsumedCapacity",
+            sum(capacity.get("CapacityUnits", 0) for capacity in consumed_capacity),
         )
@@ -1,54 +1,88 @@
 """The redirect Lambda Function, responsible for redirecting requests."""
 
 # Standard library imports
+import logging
 import os
-from urllib.parse import urlencode
 
 # Local application / library specific imports
+from .models.config import ControllerConfig
 from .models.request import ApiGatewayRequest
 from .controllers.redirect_controller import RedirectController
+from .utils.alias_chain import AliasChainError
+from .utils.metrics import MetricsRecorder
+from .utils.response import alias_chain_error_response, redirect_response
+
+logger = logging.getLogger(__name__)
 
 DDB_TABLE_NAME = os.environ["DDB_TABLE_NAME"]
+CONFIG = ControllerConfig.from_environ(os.environ)
+
+metrics = MetricsRecorder(
+    enabled=CONFIG.metrics_enabled,
+    sample_rate=CONFIG.metrics_sample_rate,
+    flush_every=CONFIG.metrics_flush_every,
+    max_age_seconds=CONFIG.metrics_flush_seconds,
+)
+
+redirect_controller = RedirectController(
+    ddb_table_name=DDB_TABLE_NAME, config=CONFIG, metrics=metrics
+)
 
-redirect_controller = RedirectController(ddb_table_name=DDB_TABLE_NAME)
+# The profiler, and with it cProfile and tracemalloc, is only loaded when enabled.
+PROFILER = None
+if CONFIG.profile_every:
+    from .utils.profiling import InvocationProfiler
+
+    PROFILER = InvocationProfiler(
+        every=CONFIG.profile_every,
+        trace_allocations=CONFIG.profile_trace_allocations,
+        dump_interval=CONFIG.profile_dump_seconds,
+    )
 
 
 def event_handler(event, _context):
     """
-    Handle an incoming request from API Gateway.
+    Handle an incoming request from API Gateway or a Lambda Function URL.
 
     The function returns a 404 if no redirect option is found, or a 301
-    with a 'Location' header if it is.
+    with a 'Location' header if it is. Either can carry caching headers, with
+    the TTL of the matching rule or the configured defaults.
     """
-    # Reshape the request into a model
-    request = ApiGatewayRequest.from_lambda_event(event)
+    if PROFILER is not None:
+        return PROFILER.run(measure_request, event)
+    return measure_request(event)
 
-    # Check if an alias exists for the domain, e.g. 'bss.com' for 'www.bss.com'.
-    alias = redirect_controller.get_alias(request)
 
-    # Decide which domain to retrieve a redirect for. If an alias is found, use it.
-    # If no alias is found, use the domain in the original request.
-    domain = alias.target_domain if alias else request.domain
+def measure_request(event):
+    """Handle a request, recording its metrics."""
+    metrics.begin()
+    try:
+        with metrics.timer("HandlerTime"):
+            response = handle_request(event)
+        if response["statusCode"] == 404:
+            metrics.add("NotFound")
+        elif response["statusCode"] == 508:
+            metrics.add("AliasChainErrors")
+        else:
+            metrics.add("Redirects")
+        return response
+    finally:
+        metrics.end()
 
-    # Retrieve the redirect location for the domain and path in the request.
-    redirect_location = redirect_controller.get_redirect_location(
-        domain=domain, request_path=request.path
-    )
-
-    # Add the resolved domain to the headers.
-    base_headers = {"X-Resolved-Domain": domain}
-
-    # If a redirect location is not found, return a 404.
-    if not redirect_location:
-        return {"statusCode": 404, "headers": base_headers}
 
-    # A redirect location is found, so we add any query parameters
-    # from the original request to the redirect location.
-    if request.query_params:
-        redirect_location += "?" + urlencode(request.query_params)
+def handle_request(event):
+    """Build the response for an API Gateway request."""
+    # Reshape the request into a model
+    request = ApiGatewayRequest.from_lambda_event(
+        event, origin_secret=CONFIG.origin_secret
+    )
 
-    # Return a 301 redirect to the location retreived from DynamoDB.
-    return {
-        "statusCode": 301,
-        "headers": base_headers | {"Location": redirect_location},
-    }
+    # Resolve the domain and redirect location for the request. If an alias exists
+    # for the domain, e.g. 'bss.com' for 'www.bss.com', its target domain is used.
+    # An alias chain that loops or is too long is refused rather than followed.
+    try:
+        resolution = redirect_controller.resolve(request)
+    except AliasChainError as error:
+        logger.error("Not redirecting %s: %s", request.domain, error)
+        return alias_chain_error_response(request)
+    return redirect_response(request, resolution)
@@ -0,0 +1,279 @@
+"""Module for configuration models, representing settings read from the environment."""
+
+# Standard library imports
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional
+
+# Local application / library specific imports
+from . import BaseDataclass
+
+TRAILING_SLASH_POLICIES = ("keep", "strip", "add")
+
+
+@dataclass
+class PathPolicy(BaseDataclass):
+    """The PathPolicy model, representing how request paths are canonicalized."""
+
+    # Lowercase the path, so '/Foo' and '/foo' are the same path.
+    lowercase: bool = False
+    # "strip" or "add" a trailing slash, except on '/', or "keep" it as requested.
+    trailing_slash: str = "keep"
+    # Decode percent-encoded unreserved characters, e.g. '%7E' to '~', and
+    # uppercase the hex digits of the remaining escapes, as in RFC 3986 6.2.2.
+    normalize_percent_encoding: bool = False
+    # Replace runs of slashes, e.g. in '/a//b', with a single slash.
+    collapse_slashes: bool = False
+
+    def __post_init__(self) -> None:
+        """Validate the trailing slash policy."""
+        if self.trailing_slash not in TRAILING_SLASH_POLICIES:
+            raise ValueError(f"Unknown trailing slash policy: {self.trailing_slash}")
+
+    @property
+    def enabled(self) -> bool:
+        """Return whether the policy changes any path at all."""
+        return self != PathPolicy()
+
+
+@dataclass
+class ControllerConfig(BaseDataclass):
+    """The ControllerConfig model, representing the tunables of the RedirectController."""
+
+    # Where aliases, exact redirects and fallbacks are read from: "dynamodb", the
+    # table named by DDB_TABLE_NAME, or "memory" or "sqlite", loaded from the file
+    # at `storage_path` without any network calls. The local backends hold no
+    # wildcard aliases or regex rules, and don't support the DynamoDB-only mirror,
+    # routing filter, resolved lookups and batch_get strategy.
+    storage_backend: str = "dynamodb"
+    storage_path: Optional[str] = None
+    # How long resolved aliases, redirects and locations are kept between invocations.
+    cache_ttl_seconds: float = 60.0
+    # The maximum number of cached entries, after which the least recently used is evicted.
+    cache_max_entries: int = 10_000
+    # Domains with more fallbacks than this are matched by streaming the query
+    # pages instead of compiling (and caching) a FallbackIndex for them.
+    fallback_index_max_entries: int = 100_000
+    # Start the exact and fallback lookups for the requested domain while its
+    # alias is still being looked up, instead of one round trip after another.
+    concurrent_lookups: bool = False
+    # How candidate items are fetched: "query" reads every fallback of a domain,
+    # "batch_get" fetches only the keys that could match with one BatchGetItem.
+    lookup_strategy: str = "query"
+    # Match the regex rules of a domain (RedirectPattern items) after its exact
+    # redirects and before its fallbacks. All patterns of a domain are loaded with
+    # one query and compiled into a single cached matcher, like those of a snapshot.
+    pattern_rules: bool = False
+    # Look up the Resolved item compiled by `python -m tools.compile_routes` first,
+    # answering the request with a single GetItem. Requests without one are
+    # resolved from the alias, redirect and fallback items as usual.
+    resolved_lookups: bool = False
+    # Follow chains of aliases, e.g. a -> b -> c, for at most this many hops.
+    # Requests for domains with longer chains, or chains that loop, get a 508.
+    max_alias_hops: int = 4
+    # Match domains without an alias of their own against the wildcard aliases,
+    # e.g. '*.example.com'. All wildcard aliases are loaded with one query and
+    # cached like any other lookup.
+    wildcard_aliases: bool = False
+    # Skip lookups the Bloom filter built by `python -m tools.build_filter` rules
+    # out, so requests for unknown domains and paths cost no DDB calls. The filter
+    # is reloaded every `routing_filter_refresh_seconds` if the table changed.
+    routing_filter_enabled: bool = False
+    routing_filter_refresh_seconds: float = 60.0
+    # Lowercase the requested domain and strip its port and trailing dot before
+    # any lookup, so 'WWW.Example.com.:443' finds the alias of 'www.example.com'.
+    canonicalize_host: bool = False
+    # Take the requested domain from the x-forwarded-host header CloudFront sets,
+    # but only on requests carrying this secret in their x-origin-secret header.
+    # The origin can be called around the distribution, so without the secret
+    # anyone could pick the domain. The stack sets it with edge caching.
+    origin_secret: Optional[str] = None
+    # How request paths are canonicalized before any lookup, unless the (canonical)
+    # domain has its own policy. Rules have to be stored in the canonical form of
+    # their domain's policy, or canonical requests won't match them.
+    path_policy: PathPolicy = field(default_factory=PathPolicy)
+    domain_path_policies: Dict[str, PathPolicy] = field(default_factory=dict)
+    # How long, in seconds, browsers and CDNs may cache redirects whose rule has no
+    # cache_ttl of its own, and 404s. None sends no caching headers at all, and 0
+    # forbids caching. A short 404 TTL keeps newly added rules from being hidden.
+    redirect_cache_seconds: Optional[int] = None
+    not_found_cache_seconds: Optional[int] = None
+    # A routing snapshot file to answer lookups from before DynamoDB is consulted.
+    snapshot_path: Optional[str] = None
+    # Answer every request from the snapshot alone, without a DynamoDB client, e.g.
+    # in the standalone server. Requests it has no location for get a 404, and
+    # wildcard aliases, which snapshots don't hold, never match. Its regex rules
+    # only match with `pattern_rules`.
+    snapshot_only: bool = False
+    # Load the whole table into memory at init and serve every request from it.
+    mirror_enabled: bool = False
+    # The number of parallel Scan segments used to load the mirror.
+    mirror_scan_segments: int = 4
+    # How often the mirror checks the table for changes, in seconds.
+    mirror_refresh_seconds: float = 30.0
+    # DynamoDB client timeouts and attempts. The function times out after 1 second,
+    # so the worst case of all attempts (connect + read each) has to fit within it.
+    ddb_connect_timeout_seconds: float = 0.15
+    ddb_read_timeout_seconds: float = 0.25
+    ddb_max_attempts: int = 2
+    # Send a duplicate of any DDB read that is slower than the given percentile of
+    # recent reads and use whichever response arrives first. At most
+    # `hedge_max_rate` of all reads are duplicated, and a read that takes longer
+    # than `hedge_budget_seconds` in total fails instead of waiting any longer.
+    hedging_enabled: bool = False
+    hedge_percentile: float = 95.0
+    hedge_max_rate: float = 0.1
+    hedge_budget_seconds: float = 0.5
+    # Write per-stage timings, DDB calls and cache statistics to stdout as EMF for
+    # a `metrics_sample_rate` fraction of requests, at the end of every request.
+    # Records can be batched `metrics_flush_every` at a time instead, written once
+    # the oldest is `metrics_flush_seconds` old; a batch still buffered when Lambda
+    # recycles the environment is lost.
+    metrics_enabled: bool = False
+    metrics_sample_rate: float = 1.0
+    metrics_flush_every: int = 1
+    metrics_flush_seconds: float = 60.0
+    # Profile one in `profile_every` invocations with cProfile (0 disables it), and
+    # with tracemalloc as well if enabled. The aggregated hot spots are logged by
+    # the first invocation after every `profile_dump_seconds`.
+    profile_every: int = 0
+    profile_trace_allocations: bool = False
+    profile_dump_seconds: float = 300.0
+
+    @classmethod
+    def from_environ(cls, environ: Mapping[str, str]) -> "ControllerConfig":
+        """Convert environment variables to a ControllerConfig model."""
+        defaults = cls()
+        return cls(
+            storage_backend=environ.get("STORAGE_BACKEND") or defaults.storage_backend,
+            storage_path=environ.get("STORAGE_PATH") or defaults.storage_path,
+            cache_ttl_seconds=float(
+                environ.get("CACHE_TTL_SECONDS", defaults.cache_ttl_seconds)
+            ),
+            cache_max_entries=int(
+                environ.get("CACHE_MAX_ENTRIES", defaults.cache_max_entries)
+            ),
+            fallback_index_max_entries=int(
+                environ.get(
+                    "FALLBACK_INDEX_MAX_ENTRIES", defaults.fallback_index_max_entries
+                )
+            ),
+            concurrent_lookups=_parse_bool(
+                environ.get("CONCURRENT_LOOKUPS"), defaults.concurrent_lookups
+            ),
+            lookup_strategy=environ.get("LOOKUP_STRATEGY", defaults.lookup_strategy),
+            pattern_rules=_parse_bool(
+                environ.get("PATTERN_RULES"), defaults.pattern_rules
+            ),
+            resolved_lookups=_parse_bool(
+                environ.get("RESOLVED_LOOKUPS"), defaults.resolved_lookups
+            ),
+            max_alias_hops=int(environ.get("MAX_ALIAS_HOPS", defaults.max_alias_hops)),
+            wildcard_aliases=_parse_bool(
+                environ.get("WILDCARD_ALIASES"), defaults.wildcard_aliases
+            ),
+            routing_filter_enabled=_parse_bool(
+                environ.get("ROUTING_FILTER_ENABLED"), defaults.routing_filter_enabled
+            ),
+            routing_filter_refresh_seconds=float(
+                environ.get(
+                    "ROUTING_FILTER_REFRESH_SECONDS",
+                    defaults.routing_filter_refresh_seconds,
+                )
+            ),
+            canonicalize_host=_parse_bool(
+                environ.get("CANONICALIZE_HOST"), defaults.canonicalize_host
+            ),
+            origin_secret=environ.get("ORIGIN_SECRET") or defaults.origin_secret,
+            path_policy=(
+                PathPolicy(**json.loads(environ["PATH_POLICY"]))
+                if environ.get("PATH_POLICY")
+                else defaults.path_policy
+            ),
+            # A JSON object with a policy per domain, e.g. {"example.com": {...}}
+            domain_path_policies={
+                domain: PathPolicy(**policy)
+                for domain, policy in json.loads(
+                    environ.get("DOMAIN_PATH_POLICIES") or "{}"
+                ).items()
+            },
+            redirect_cache_seconds=_parse_optional_int(
+                environ.get("REDIRECT_CACHE_SECONDS"), defaults.redirect_cache_seconds
+            ),
+            not_found_cache_seconds=_parse_optional_int(
+                environ.get("NOT_FOUND_CACHE_SECONDS"),
+                defaults.not_found_cache_seconds,
+            ),
+            snapshot_path=environ.get("SNAPSHOT_PATH") or defaults.snapshot_path,
+            snapshot_only=_parse_bool(
+                environ.get("SNAPSHOT_ONLY"), defaults.snapshot_only
+            ),
+            mirror_enabled=_parse_bool(
+                environ.get("MIRROR_ENABLED"), defaults.mirror_enabled
+            ),
+            mirror_scan_segments=int(
+                environ.get("MIRROR_SCAN_SEGMENTS", defaults.mirror_scan_segments)
+            ),
+            mirror_refresh_seconds=float(
+                environ.get("MIRROR_REFRESH_SECONDS", defaults.mirror_refresh_seconds)
+            ),
+            ddb_connect_timeout_seconds=float(
+                environ.get(
+                    "DDB_CONNECT_TIMEOUT_SECONDS", defaults.ddb_connect_timeout_seconds
+                )
+            ),
+            ddb_read_timeout_seconds=float(
+                environ.get(
+                    "DDB_READ_TIMEOUT_SECONDS", defaults.ddb_read_timeout_seconds
+                )
+            ),
+            ddb_max_attempts=int(
+                environ.get("DDB_MAX_ATTEMPTS", defaults.ddb_max_attempts)
+            ),
+            hedging_enabled=_parse_bool(
+                environ.get("HEDGING_ENABLED"), defaults.hedging_enabled
+            ),
+            hedge_percentile=float(
+                environ.get("HEDGE_PERCENTILE", defaults.hedge_percentile)
+            ),
+            hedge_max_rate=float(
+                environ.get("HEDGE_MAX_RATE", defaults.hedge_max_rate)
+            ),
+            hedge_budget_seconds=float(
+                environ.get("HEDGE_BUDGET_SECONDS", defaults.hedge_budget_seconds)
+            ),
+            metrics_enabled=_parse_bool(
+                environ.get("METRICS_ENABLED"), defaults.metrics_enabled
+            ),
+            metrics_sample_rate=float(
+                environ.get("METRICS_SAMPLE_RATE", defaults.metrics_sample_rate)
+            ),
+            metrics_flush_every=int(
+                environ.get("METRICS_FLUSH_EVERY", defaults.metrics_flush_every)
+            ),
+            metrics_flush_seconds=float(
+                environ.get("METRICS_FLUSH_SECONDS", defaults.metrics_flush_seconds)
+            ),
+            profile_every=int(environ.get("PROFILE_EVERY", defaults.profile_every)),
+            profile_trace_allocations=_parse_bool(
+                environ.get("PROFILE_TRACE_ALLOCATIONS"),
+                defaults.profile_trace_allocations,
+            ),
+            profile_dump_seconds=float(
+                environ.get("PROFILE_DUMP_SECONDS", defaults.profile_dump_seconds)
+            ),
+        )
+
+
+def _parse_bool(value: Optional[str], default: bool) -> bool:
+    """Convert an environment variable value like 'true' or '0' to a bool."""
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _parse_optional_int(value: Optional[str], default: Optional[int]) -> Optional[int]:
+    """Convert an environment variable value like '300' to an int, if it is set."""
+    if value is None or value == "":
+        return default
+    return int(value)
@@ -2,44 +2,99 @@
 
 # Standard library imports
 from dataclasses import dataclass
+from typing import Optional, Union
 
 # Local application / library specific imports
 from . import BaseDataclass
+from .resolution import Location
+
+# All wildcard aliases share one partition, so they can be loaded with one query.
+WILDCARD_ALIAS_KEY = "WildcardAlias"
+# Writers bump the `generation` attribute of this item after every change.
+GENERATION_KEY = "Meta#Generation"
+
+
+def _with_cache_ttl(item: dict, cache_ttl: Optional[int]) -> dict:
+    """Return the item with its optional cache_ttl attribute, if the rule has one."""
+    if cache_ttl is not None:
+        item["cache_ttl"] = cache_ttl
+    return item
 
 
 @dataclass
 class Alias(BaseDataclass):
-    """The Alias model, representing an DomainAlias in the database."""
+    """
+    The Alias model, representing an DomainAlias or WildcardAlias in the database.
+
+    A wildcard alias has a source domain like '*.example.com', and applies to every
+    subdomain of example.com without an alias of its own.
+    """
 
     source_domain: str
     target_domain: str
 
+    @property
+    def is_wildcard(self) -> bool:
+        """Return whether the alias applies to all subdomains of a domain."""
+        return self.source_domain.startswith("*.")
+
     @classmethod
     def from_ddb_item(cls, item: dict) -> "Alias":
         """Convert a DDB item to an Alias object."""
         partition_key: str = item["pk"]
+        if partition_key == WILDCARD_ALIAS_KEY:
+            return cls(source_domain=item["sk"], target_domain=item["target_domain"])
         return cls(
-            source_domain=partition_key.lstrip("DomainAlias#"),
+            source_domain=partition_key.removeprefix("DomainAlias#"),
             target_domain=item["target_domain"],
         )
 
+    def to_ddb_item(self) -> dict:
+        """Convert an Alias object to a DDB item."""
+        if self.is_wildcard:
+            return {
+                "pk": WILDCARD_ALIAS_KEY,
+                "sk": self.source_domain,
+                "target_domain": self.target_domain,
+            }
+        key = f"DomainAlias#{self.source_domain}"
+        return {"pk": key, "sk": key, "target_domain": self.target_domain}
+
 
 @dataclass
 class RedirectOption(BaseDataclass):
-    """The RedirectOption model, representing an RedirectOption in the database."""
+    """
+    The RedirectOption model, representing an RedirectOption in the database.
+
+    `cache_ttl` optionally overrides how long, in seconds, its redirects may be cached.
+    """
 
     domain: str
     path: str
     target: str
+    cache_ttl: Optional[int] = None
+
+    @property
+    def location(self) -> Location:
+        """Return the target as a Location, carrying the cache TTL of the rule."""
+        return Location(self.target, self.cache_ttl)
 
     @classmethod
     def from_ddb_item(cls, item: dict) -> "RedirectOption":
         """Convert a DDB item to an RedirectOption object."""
         partition_key: str = item["pk"]
         return cls(
-            domain=partition_key.lstrip("Redirect#"),
+            domain=partition_key.removeprefix("Redirect#"),
             path=item["sk"],
             target=item["target"],
+            cache_ttl=item.get("cache_ttl"),
+        )
+
+    def to_ddb_item(self) -> dict:
+        """Convert an RedirectOption object to a DDB item."""
+        return _with_cache_ttl(
+            {"pk": f"Redirect#{self.domain}", "sk": self.path, "target": self.target},
+            self.cache_ttl,
         )
 
 
@@ -50,13 +105,144 @@ class RedirectFallbackOption(BaseDataclass):
     domain: str
     path: str
     target: str
+    cache_ttl: Optional[int] = None
+
+    @property
+    def location(self) -> Location:
+        """Return the target as a Location, carrying the cache TTL of the rule."""
+        return Location(self.target, self.cache_ttl)
 
     @classmethod
     def from_ddb_item(cls, item: dict) -> "RedirectFallbackOption":
         """Convert a DDB item to an RedirectFallbackOption object."""
         partition_key: str = item["pk"]
         return cls(
-            domain=partition_key.lstrip("RedirectFallback#"),
+            domain=partition_key.removeprefix("RedirectFallback#"),
+            path=item["sk"],
+            target=item["target"],
+            cache_ttl=item.get("cache_ttl"),
+        )
+
+    def to_ddb_item(self) -> dict:
+        """Convert an RedirectFallbackOption object to a DDB item."""
+        return _with_cache_ttl(
+            {
+                "pk": f"RedirectFallback#{self.domain}",
+                "sk": self.path,
+                "target": self.target,
+            },
+            self.cache_ttl,
+        )
+
+
+@dataclass
+class RedirectPatternOption(BaseDataclass):
+    """
+    The RedirectPatternOption model, representing a RedirectPattern in the database.
+
+    Requests whose whole path matches the regex `pattern` go to `target`, in which
+    '$1', '$2' etc. are replaced with the groups captured by the pattern. Like other
+    rules, it can have its own `cache_ttl`.
+    """
+
+    domain: str
+    pattern: str
+    target: str
+    cache_ttl: Optional[int] = None
+
+    @classmethod
+    def from_ddb_item(cls, item: dict) -> "RedirectPatternOption":
+        """Convert a DDB item to a RedirectPatternOption object."""
+        partition_key: str = item["pk"]
+        return cls(
+            domain=partition_key.removeprefix("RedirectPattern#"),
+            pattern=item["sk"],
+            target=item["target"],
+            cache_ttl=item.get("cache_ttl"),
+        )
+
+    def to_ddb_item(self) -> dict:
+        """Convert a RedirectPatternOption object to a DDB item."""
+        return _with_cache_ttl(
+            {
+                "pk": f"RedirectPattern#{self.domain}",
+                "sk": self.pattern,
+                "target": self.target,
+            },
+            self.cache_ttl,
+        )
+
+
+@dataclass
+class ResolvedRoute(BaseDataclass):
+    """
+    The ResolvedRoute model, representing a precompiled Resolved item in the database.
+
+    It holds the outcome of resolving a request for a source domain and path: the
+    domain after following its alias, and the winning exact or fallback target
+    with the cache TTL of the rule it came from. `generation` is the table
+    generation the route was compiled at; it is outdated once the table's differs.
+    """
+
+    source_domain: str
+    path: str
+    domain: str
+    target: str
+    cache_ttl: Optional[int] = None
+    generation: Optional[int] = None
+
+    @property
+    def location(self) -> Location:
+        """Return the target as a Location, carrying the cache TTL of the rule."""
+        return Location(self.target, self.cache_ttl)
+
+    @classmethod
+    def from_ddb_item(cls, item: dict) -> "ResolvedRoute":
+        """Convert a DDB item to a ResolvedRoute object."""
+        partition_key: str = item["pk"]
+        return cls(
+            source_domain=partition_key.removeprefix("Resolved#"),
             path=item["sk"],
+            domain=item["resolved_domain"],
             target=item["target"],
+            cache_ttl=item.get("cache_ttl"),
+            generation=item.get("generation"),
+        )
+
+    def to_ddb_item(self) -> dict:
+        """Convert a ResolvedRoute object to a DDB item."""
+        item = _with_cache_ttl(
+            {
+                "pk": f"Resolved#{self.source_domain}",
+                "sk": self.path,
+                "resolved_domain": self.domain,
+                "target": self.target,
+            },
+            self.cache_ttl,
         )
+        if self.generation is not None:
+            item["generation"] = self.generation
+        return item
+
+
+def model_from_ddb_item(
+    item: dict,
+) -> Optional[
+    Union[Alias, RedirectOption, RedirectFallbackOption, RedirectPatternOption]
+]:
+    """
+    Convert a DDB item to the rule model matching its partition key, or None for other items.
+
+    Resolved items are derived from the rules rather than rules themselves, so they
+    are not converted here.
+    """
+    partition_key: str = item["pk"]
+    if partition_key.startswith("DomainAlias#") or partition_key == WILDCARD_ALIAS_KEY:
+        return Alias.from_ddb_item(item)
+    if partition_key.startswith("Redirect#"):
+        return RedirectOption.from_ddb_item(item)
+    if partition_key.startswith("RedirectFallback#"):
+        return RedirectFallbackOption.from_ddb_item(item)
+    if partition_key.startswith("RedirectPattern#"):
+        return RedirectPatternOption.from_ddb_item(item)
+    return None
@@ -1,26 +1,73 @@
 """Module for request models."""
 
 # Standard library imports
+import hmac
 from dataclasses import dataclass
 from typing import Optional
 
 # Local application / library specific imports
 from . import BaseDataclass
 
+# The requested host, as set by the viewer request function of the CloudFront
+# distribution. Its origin requests go to the execute-api domain, so that is the
+# domain name in the request context. Any client calling the origin directly
+# could set it as well, so it is only honoured on requests carrying the secret
+# the distribution adds to every origin request in ORIGIN_SECRET_HEADER.
+FORWARDED_HOST_HEADER = "x-forwarded-host"
+ORIGIN_SECRET_HEADER = "x-origin-secret"
+
+
+def _get_header(headers: dict, name: str) -> Optional[str]:
+    """Return the value of a header, whatever the case of its name, or None."""
+    return next(
+        (value for header, value in headers.items() if header.lower() == name), None
+    )
+
 
 @dataclass
 class ApiGatewayRequest(BaseDataclass):
-    """The ApiGatewayRequest model, representing an API Gateway request."""
+    """
+    The ApiGatewayRequest model, representing an API Gateway request.
+
+    It is parsed from REST API (payload format 1.0), HTTP API (2.0) and Lambda
+    Function URL (also 2.0) events. Only the latter two carry the query string as
+    it was sent, in `raw_query_string`; for REST API events it is None.
+    """
 
     domain: str
     path: str
     query_params: Optional[dict]
+    raw_query_string: Optional[str] = None
 
     @classmethod
-    def from_lambda_event(cls, event: dict) -> "ApiGatewayRequest":
-        """Convert a Lambda event to a ApiGatewayRequest model."""
+    def from_lambda_event(
+        cls, event: dict, origin_secret: Optional[str] = None
+    ) -> "ApiGatewayRequest":
+        """
+        Convert a Lambda event to a ApiGatewayRequest model.
+
+        The `x-forwarded-host` header takes precedence over the API domain only if
+        the request carries `origin_secret` in its `x-origin-secret` header, i.e.
+        if it came through the CloudFront distribution, which overwrites whatever
+        the viewer sent in either header.
+        """
+        headers = event.get("headers") or {}
+        forwarded_host = None
+        secret = _get_header(headers, ORIGIN_SECRET_HEADER)
+        if origin_secret and secret is not None:
+            if hmac.compare_digest(secret.encode(), origin_secret.encode()):
+                forwarded_host = _get_header(headers, FORWARDED_HOST_HEADER)
+        domain = forwarded_host or event["requestContext"]["domainName"]
+
+        if event.get("version") == "2.0":
+            return cls(
+                domain=domain,
+                path=event["rawPath"],
+                query_params=event.get("queryStringParameters"),
+                raw_query_string=event.get("rawQueryString") or None,
+            )
         return cls(
-            domain=event["requestContext"]["domainName"],
+            domain=domain,
             path=event["path"],
             query_params=event["queryStringParameters"],
         )
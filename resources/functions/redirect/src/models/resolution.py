@@ -0,0 +1,45 @@
+"""Module for resolution models, representing the outcome of resolving a request."""
+
+# Standard library imports
+from dataclasses import dataclass
+from typing import Optional
+
+# Local application / library specific imports
+from . import BaseDataclass
+
+
+class Location(str):
+    """
+    A redirect location, carrying the cache TTL of the rule it came from.
+
+    It is a plain string everywhere else, so caches, indexes and comparisons
+    don't need to know about the TTL. A TTL of None means the rule has none of
+    its own, and the configured default applies.
+    """
+
+    cache_ttl: Optional[int]
+
+    def __new__(cls, value: str, cache_ttl: Optional[int] = None) -> "Location":
+        """Construct a new Location for the given target and TTL in seconds."""
+        location = super().__new__(cls, value)
+        location.cache_ttl = cache_ttl
+        return location
+
+    @classmethod
+    def from_ddb_item(cls, item: dict) -> "Location":
+        """Convert a DDB rule item, with a target and optional cache_ttl, to a Location."""
+        return cls(item["target"], item.get("cache_ttl"))
+
+
+@dataclass
+class Resolution(BaseDataclass):
+    """
+    The Resolution model, representing the domain and location a request resolved to.
+
+    `cache_ttl` is how long, in seconds, the response may be cached by browsers and
+    CDNs: 0 forbids caching, and None leaves the caching headers out altogether.
+    """
+
+    domain: str
+    location: Optional[str]
+    cache_ttl: Optional[int] = None
@@ -0,0 +1,378 @@
+"""
+A standalone HTTP server for the redirect function, for container and on-premises deployments.
+
+It answers GET and HEAD requests with the same RedirectController and responses
+as event_handler, from local files alone, so it has no network dependencies.
+Export a snapshot with `python -m tools.snapshot` and run, from the function's
+asset directory:
+
+    SNAPSHOT_PATH=snapshot/routes.snap python -m src.server [--port 8080] [--workers N]
+
+The controller is configured from the environment like the function. With the
+default "dynamodb" STORAGE_BACKEND, SNAPSHOT_ONLY is always on; with a local
+backend, exported with `python -m tools.export_storage`, it answers from the
+STORAGE_PATH file, and the snapshot is optional. Set CANONICALIZE_HOST as well
+if clients send a port in the Host header. It is built once, and the listening socket opened once,
+before a pool of worker processes is forked, one per core by default. The kernel
+hands every worker connections from the shared socket, and every worker runs its
+own asyncio event loop, with its own copy of the controller, its caches and a
+cache of encoded responses, shared by all of its connections. Connections are
+kept alive, as HTTP/1.1 intends, until the client closes them or they are idle
+for --keep-alive seconds. Workers that die are replaced; SIGTERM or SIGINT stops
+the server.
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import dataclasses
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Local application / library specific imports
+from .controllers.redirect_controller import RedirectController
+from .models.config import ControllerConfig
+from .models.request import ApiGatewayRequest
+from .utils.alias_chain import AliasChainError
+from .utils.cache import MISSING, TTLCache
+from .utils.response import alias_chain_error_response, redirect_response
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8080
+DEFAULT_KEEP_ALIVE_SECONDS = 15.0
+LISTEN_BACKLOG = 1024
+# Requests whose request line and headers take more than this are refused.
+MAX_HEAD_BYTES = 8192
+HEAD_END = b"\r\n\r\n"
+
+STATUS_LINES = {
+    301: b"HTTP/1.1 301 Moved Permanently\r\n",
+    400: b"HTTP/1.1 400 Bad Request\r\n",
+    404: b"HTTP/1.1 404 Not Found\r\n",
+    405: b"HTTP/1.1 405 Method Not Allowed\r\n",
+    431: b"HTTP/1.1 431 Request Header Fields Too Large\r\n",
+    508: b"HTTP/1.1 508 Loop Detected\r\n",
+}
+NO_CONTENT = b"Content-Length: 0\r\n"
+KEEP_ALIVE = b"\r\n"
+CLOSE = b"Connection: close\r\n\r\n"
+METHOD_NOT_ALLOWED = STATUS_LINES[405] + b"Allow: GET, HEAD\r\n" + NO_CONTENT
+
+
+class BadRequestError(ValueError):
+    """Raised for a request the server can't parse."""
+
+
+def parse_request_head(head: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+    """Return the method, target, HTTP version and lowercased headers of a request."""
+    try:
+        request_line, *header_lines = head.decode().split("\r\n")
+    except UnicodeDecodeError as error:
+        raise BadRequestError("The request isn't valid UTF-8") from error
+
+    parts = request_line.split(" ")
+    if len(parts) != 3 or not parts[1].startswith("/"):
+        raise BadRequestError(f"Malformed request line: {request_line!r}")
+    method, target, version = parts
+    if version not in ("HTTP/1.1", "HTTP/1.0"):
+        raise BadRequestError(f"Unsupported HTTP version: {version!r}")
+
+    headers: Dict[str, str] = {}
+    for line in header_lines:
+        name, separator, value = line.partition(":")
+        # A name with whitespace, or a line break on its own, could smuggle a
+        # header past a proxy, and the values end up in the response headers.
+        if (
+            not separator
+            or not name
+            or name != name.strip()
+            or "\r" in line
+            or "\n" in line
+        ):
+            raise BadRequestError(f"Malformed header line: {line!r}")
+        headers[name.lower()] = value.strip()
+    if "\r" in target or "\n" in target:
+        raise BadRequestError(f"Malformed request target: {target!r}")
+    return method, target, version, headers
+
+
+def request_event(target: str, headers: Dict[str, str]) -> dict:
+    """Return the payload format 2.0 event for a request, like a Function URL's."""
+    path, _, query = target.partition("?")
+    # queryStringParameters is left out, since the raw query string takes
+    # precedence over it whenever there is one.
+    return {
+        "version": "2.0",
+        "rawPath": path,
+        "rawQueryString": query,
+        "headers": headers,
+        "requestContext": {"domainName": headers["host"]},
+    }
+
+
+def encode_response(response: dict) -> bytes:
+    """Return the status line and headers of a Lambda proxy response, without the blank line."""
+    lines = [STATUS_LINES[response["statusCode"]]]
+    lines.extend(
+        f"{name}: {value}\r\n".encode() for name, value in response["headers"].items()
+    )
+    lines.append(NO_CONTENT)
+    return b"".join(lines)
+
+
+def keeps_alive(version: str, headers: Dict[str, str]) -> bool:
+    """Return whether the connection stays open after the response to a request."""
+    if "content-length" in headers or "transfer-encoding" in headers:
+        # Request bodies aren't read, so the connection can't be reused.
+        return headers.get("content-length") == "0"
+    connection = headers.get("connection", "").lower()
+    if version == "HTTP/1.0":
+        return connection == "keep-alive"
+    return connection != "close"
+
+
+class RedirectServer:
+    """
+    Answers HTTP requests with the responses of a RedirectController.
+
+    The encoded response for every domain, path and query string is cached, so a
+    repeated request costs a parse and a cache lookup, and no resolution at all.
+    """
+
+    def __init__(
+        self,
+        controller: RedirectController,
+        response_cache: TTLCache,
+        keep_alive_seconds: float = DEFAULT_KEEP_ALIVE_SECONDS,
+        origin_secret: Optional[str] = None,
+    ) -> None:
+        """Construct a new RedirectServer."""
+        self._controller = controller
+        self._response_cache = response_cache
+        self.keep_alive_seconds = keep_alive_seconds
+        self.origin_secret = origin_secret
+        self.connections: Set["HttpProtocol"] = set()
+
+    def handle(self, head: bytes) -> Tuple[bytes, bool]:
+        """Return the response to a request, and whether the connection stays open."""
+        try:
+            method, target, version, headers = parse_request_head(head)
+        except BadRequestError:
+            return STATUS_LINES[400] + NO_CONTENT + CLOSE, False
+        keep_alive = keeps_alive(version, headers)
+        end = KEEP_ALIVE if keep_alive else CLOSE
+
+        if method not in ("GET", "HEAD"):
+            return METHOD_NOT_ALLOWED + end, keep_alive
+        if "host" not in headers:
+            return STATUS_LINES[400] + NO_CONTENT + end, keep_alive
+
+        request = ApiGatewayRequest.from_lambda_event(
+            request_event(target, headers),
+            origin_secret=self.origin_secret,
+        )
+        key = (request.domain, request.path, request.raw_query_string)
+        response = self._response_cache.get(key)
+        if response is MISSING:
+            try:
+                resolution = self._controller.resolve(request)
+            except AliasChainError as error:
+                # Not cached, like the function's 508s
+                print(f"Not redirecting {request.domain}: {error}", file=sys.stderr)
+                response = encode_response(alias_chain_error_response(request))
+                return response + end, keep_alive
+            response = encode_response(redirect_response(request, resolution))
+            self._response_cache.set(key, response)
+        return response + end, keep_alive
+
+    async def serve(self, sock: socket.socket) -> None:
+        """Serve connections from the listening socket until SIGTERM or SIGINT."""
+        loop = asyncio.get_running_loop()
+        stopped = asyncio.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, stopped.set)
+
+        server = await loop.create_server(lambda: HttpProtocol(self), sock=sock)
+        await stopped.wait()
+        server.close()
+        # Idle keep-alive connections would otherwise hold up the shutdown.
+        for connection in list(self.connections):
+            connection.close()
+        await server.wait_closed()
+
+
+class HttpProtocol(asyncio.Protocol):
+    """
+    A keep-alive HTTP/1.1 connection, answered by a RedirectServer.
+
+    Pipelined requests are answered in order. A client that doesn't read its
+    responses stops being read from, and an idle connection is closed after the
+    server's keep-alive timeout.
+    """
+
+    def __init__(self, server: RedirectServer) -> None:
+        """Construct a new HttpProtocol."""
+        self._server = server
+        self._transport: Optional[asyncio.Transport] = None
+        self._buffer = bytearray()
+        self._last_active = 0.0
+        self._idle_timer: Optional[asyncio.TimerHandle] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        """Register the connection and start its idle timer."""
+        self._transport = transport
+        self._server.connections.add(self)
+        self._last_active = time.monotonic()
+        self._idle_timer = asyncio.get_running_loop().call_later(
+            self._server.keep_alive_seconds, self._check_idle
+        )
+
+    def data_received(self, data: bytes) -> None:
+        """Answer every complete request received so far."""
+        self._last_active = time.monotonic()
+        self._buffer += data
+        while True:
+            end = self._buffer.find(HEAD_END)
+            if end == -1:
+                if len(self._buffer) > MAX_HEAD_BYTES:
+                    self._transport.write(STATUS_LINES[431] + NO_CONTENT + CLOSE)
+                    self.close()
+                return
+            head = bytes(self._buffer[:end])
+            del self._buffer[: end + len(HEAD_END)]
+
+            response, keep_alive = self._server.handle(head)
+            self._transport.write(response)
+            if not keep_alive:
+                self.close()
+                return
+
+    def pause_writing(self) -> None:
+        """Stop reading requests while the client isn't reading the responses."""
+        self._transport.pause_reading()
+
+    def resume_writing(self) -> None:
+        """Read requests again once the responses have been sent."""
+        self._transport.resume_reading()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        """Forget the connection and cancel its idle timer."""
+        self._server.connections.discard(self)
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+
+    def close(self) -> None:
+        """Close the connection after the responses written so far."""
+        self._transport.close()
+
+    def _check_idle(self) -> None:
+        """Close the connection if it has been idle too long, or check again later."""
+        # Checking the time of the last request, instead of rescheduling the
+        # timer for every request, keeps the timer heap out of the hot path.
+        idle_until = self._last_active + self._server.keep_alive_seconds
+        now = time.monotonic()
+        if now >= idle_until:
+            self.close()
+        else:
+            self._idle_timer = asyncio.get_running_loop().call_later(
+                idle_until - now, self._check_idle
+            )
+
+
+def open_socket(host: str, port: int) -> socket.socket:
+    """Open the listening socket the workers share."""
+    sock = socket.create_server((host, port), backlog=LISTEN_BACKLOG)
+    sock.setblocking(False)
+    return sock
+
+
+def run_workers(workers: int, run_worker: Callable[[], None]) -> None:
+    """Fork the workers and replace any that exit, until SIGTERM or SIGINT."""
+    children: Set[int] = set()
+    stopping = False
+
+    def stop(_signum, _frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    def fork_worker() -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                run_worker()
+            except BaseException:  # pylint: disable=broad-exception-caught
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                os._exit(exit_code)  # pylint: disable=protected-access
+        children.add(pid)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        fork_worker()
+
+    while children:
+        pid, status = os.wait()
+        children.discard(pid)
+        if not stopping:
+            print(
+                f"Worker {pid} exited with {os.waitstatus_to_exitcode(status)}, "
+                "starting another",
+                file=sys.stderr,
+            )
+            fork_worker()
+
+
+def main(argv: List[str]) -> None:
+    """Parse the command line, load the rules and serve them."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--keep-alive", type=float, default=DEFAULT_KEEP_ALIVE_SECONDS)
+    args = parser.parse_args(argv)
+
+    config = ControllerConfig.from_environ(os.environ)
+    if config.storage_backend == "dynamodb":
+        config = dataclasses.replace(config, snapshot_only=True)
+    ddb_table_name = os.environ.get("DDB_TABLE_NAME", "")
+    # Built before forking, so a broken configuration or snapshot stops the
+    # server at once, and the workers start with the snapshot mapped already.
+    controller = RedirectController(ddb_table_name=ddb_table_name, config=config)
+    sock = open_socket(args.host, args.port)
+    print(f"Serving redirects on {args.host}:{args.port} with {args.workers} workers")
+
+    def run_worker() -> None:
+        # An SQLite connection mustn't be used across a fork, so every worker
+        # opens the database itself.
+        worker_controller = (
+            RedirectController(ddb_table_name=ddb_table_name, config=config)
+            if config.storage_backend == "sqlite"
+            else controller
+        )
+        server = RedirectServer(
+            worker_controller,
+            TTLCache(
+                ttl=config.cache_ttl_seconds, max_entries=config.cache_max_entries
+            ),
+            keep_alive_seconds=args.keep_alive,
+            origin_secret=config.origin_secret,
+        )
+        asyncio.run(server.serve(sock))
+
+    run_workers(args.workers, run_worker)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
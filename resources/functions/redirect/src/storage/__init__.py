@@ -0,0 +1,34 @@
+"""
+Module for the storage backends the RedirectController reads its rules from.
+
+Every request needs at most three kinds of lookups: the alias of a domain, the
+exact redirect for a domain and path, and the fallbacks of a domain. A backend
+answers those, so the controller can resolve requests from DynamoDB in Lambda,
+or from a local file without any network dependency, e.g. offline or on-premises.
+"""
+
+# Standard library imports
+from typing import Iterator, Optional, Protocol
+
+# Local application / library specific imports
+from ..models.database import Alias, RedirectFallbackOption
+from ..models.resolution import Location
+
+STORAGE_BACKENDS = ("dynamodb", "memory", "sqlite")
+
+
+class StorageBackend(Protocol):
+    """The lookups a storage backend answers for the RedirectController."""
+
+    def get_alias(self, domain: str) -> Optional[Alias]:
+        """Return the alias of the domain itself, without following it, or None."""
+
+    def get_redirect(self, domain: str, path: str) -> Optional[Location]:
+        """Return the location of the exact redirect for a domain and path, or None."""
+
+    def iter_fallbacks(self, domain: str) -> Iterator[RedirectFallbackOption]:
+        """
+        Yield the fallbacks of a domain in path order, like a DynamoDB query would.
+
+        Callers may stop early, so backends should fetch them lazily, a page at a time.
+        """
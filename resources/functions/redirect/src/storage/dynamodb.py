@@ -0,0 +1,124 @@
+"""Module for the DynamoDBBackend class, reading rules from the redirects table."""
+
+# Standard library imports
+from typing import Callable, Iterator, Optional
+
+# Local application / library specific imports
+from ..models.database import Alias, RedirectFallbackOption
+from ..models.resolution import Location
+from ..utils.dynamodb import decode_item, encode_key
+
+
+class DynamoDBBackend:
+    """
+    Reads rules from the redirects table, with one request per lookup.
+
+    Items marked `deleted`, the tombstones mirror writers leave behind, are read
+    like missing ones.
+
+    The low-level client is shared with the controller, which creates and tunes
+    it. Every response is passed to `record_call`, e.g. to count the calls and
+    the capacity they consumed.
+    """
+
+    def __init__(
+        self,
+        ddb_client,
+        ddb_table_name: str,
+        record_call: Optional[Callable[[dict], None]] = None,
+    ) -> None:
+        """Construct a new DynamoDBBackend."""
+        self._ddb_client = ddb_client
+        self._ddb_table_name = ddb_table_name
+        self._record_call = record_call or (lambda response: None)
+
+    def get_alias(self, domain: str) -> Optional[Alias]:
+        """Query the database for the alias of the given domain."""
+        key = f"DomainAlias#{domain}"
+        response = self._ddb_client.get_item(
+            TableName=self._ddb_table_name,
+            Key=encode_key(key, key),
+            ProjectionExpression="pk, target_domain, deleted",
+            ReturnConsumedCapacity="TOTAL",
+        )
+        self._record_call(response)
+
+        if "Item" not in response:
+            return None
+
+        item = decode_item(response["Item"])
+        if item.get("deleted"):
+            return None
+        return Alias.from_ddb_item(item)
+
+    def get_redirect(self, domain: str, path: str) -> Optional[Location]:
+        """Return the location of the exactly matching redirect item, or None."""
+        item = self.get_redirect_item(domain, path)
+        return Location.from_ddb_item(item) if item else None
+
+    def get_redirect_item(self, domain: str, path: str) -> Optional[dict]:
+        """
+        Extracted DDB redirect request for easy mocking.
+
+        Reads the exactly matching redirect item for the requested path, or None.
+        """
+        response = self._ddb_client.get_item(
+            TableName=self._ddb_table_name,
+            Key=encode_key(f"Redirect#{domain}", path),
+            ProjectionExpression="target, cache_ttl, deleted",
+            ReturnConsumedCapacity="TOTAL",
+        )
+        self._record_call(response)
+
+        if "Item" not in response:
+            return None
+
+        item = decode_item(response["Item"])
+        return None if item.get("deleted") else item
+
+    def iter_fallbacks(self, domain: str) -> Iterator[RedirectFallbackOption]:
+        """Yield the fallbacks of the domain, following LastEvaluatedKey."""
+        exclusive_start_key = None
+        while True:
+            ddb_response = self.query_fallbacks(
+                domain=domain, exclusive_start_key=exclusive_start_key
+            )
+            for item in ddb_response["Items"]:
+                yield RedirectFallbackOption(
+                    domain=domain,
+                    path=item["sk"],
+                    target=item["target"],
+                    cache_ttl=item.get("cache_ttl"),
+                )
+
+            exclusive_start_key = ddb_response.get("LastEvaluatedKey")
+            if not exclusive_start_key:
+                return
+
+    def query_fallbacks(
+        self, domain: str, exclusive_start_key: Optional[dict] = None
+    ) -> dict:
+        """
+        Extracted DDB redirect fallbacks request for easy mocking.
+
+        Returns a single page of live fallbacks, projected to the attributes needed
+        for matching.
+        """
+        query_kwargs = {
+            "TableName": self._ddb_table_name,
+            "KeyConditionExpression": "pk = :pk",
+            "ExpressionAttributeValues": {":pk": {"S": f"RedirectFallback#{domain}"}},
+            "ProjectionExpression": "sk, target, cache_ttl, deleted",
+            "ReturnConsumedCapacity": "TOTAL",
+        }
+        if exclusive_start_key:
+            query_kwargs["ExclusiveStartKey"] = exclusive_start_key
+
+        response = self._ddb_client.query(**query_kwargs)
+        self._record_call(response)
+        response["Items"] = [
+            item
+            for item in map(decode_item, response["Items"])
+            if not item.get("deleted")
+        ]
+        return response
@@ -0,0 +1,65 @@
+"""Module for the MemoryBackend class, holding all rules in dictionaries."""
+
+# Standard library imports
+import json
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Local application / library specific imports
+from ..models.database import (
+    Alias,
+    RedirectFallbackOption,
+    RedirectOption,
+    model_from_ddb_item,
+)
+from ..models.resolution import Location
+
+
+class MemoryBackend:
+    """
+    Holds the aliases, exact redirects and fallbacks of a table in memory.
+
+    It is built from table items, e.g. a JSON Lines file written by
+    `python -m tools.export_storage`. Wildcard aliases and regex rules are left
+    out, as the controller only reads those from DynamoDB, and so are tombstones.
+    """
+
+    def __init__(self, items: Iterable[dict] = ()) -> None:
+        """Construct a new MemoryBackend holding the rules among the items."""
+        self._aliases: Dict[str, Alias] = {}
+        self._redirects: Dict[Tuple[str, str], Location] = {}
+        fallbacks: Dict[str, List[RedirectFallbackOption]] = defaultdict(list)
+        for item in items:
+            if item.get("deleted"):
+                continue
+            model = model_from_ddb_item(item)
+            if isinstance(model, Alias) and not model.is_wildcard:
+                self._aliases[model.source_domain] = model
+            elif isinstance(model, RedirectOption):
+                self._redirects[(model.domain, model.path)] = model.location
+            elif isinstance(model, RedirectFallbackOption):
+                fallbacks[model.domain].append(model)
+
+        # Code point order is UTF-8 byte order, the order of DynamoDB sort keys.
+        self._fallbacks = {
+            domain: sorted(options, key=lambda option: option.path)
+            for domain, options in fallbacks.items()
+        }
+
+    @classmethod
+    def from_file(cls, path: str) -> "MemoryBackend":
+        """Load the table items of a JSON Lines file, one item per line."""
+        with open(path, encoding="utf-8") as items_file:
+            return cls(json.loads(line) for line in items_file if line.strip())
+
+    def get_alias(self, domain: str) -> Optional[Alias]:
+        """Return the alias of the domain itself, or None."""
+        return self._aliases.get(domain)
+
+    def get_redirect(self, domain: str, path: str) -> Optional[Location]:
+        """Return the location of the exact redirect for a domain and path, or None."""
+        return self._redirects.get((domain, path))
+
+    def iter_fallbacks(self, domain: str) -> Iterator[RedirectFallbackOption]:
+        """Yield the fallbacks of a domain in path order."""
+        return iter(self._fallbacks.get(domain, ()))
@@ -0,0 +1,156 @@
+"""
+Module for the SQLiteBackend class, reading rules from an indexed SQLite database.
+
+Aliases, exact redirects and fallbacks each have a table whose primary key is
+the domain, and the path for the latter two. The tables are created WITHOUT
+ROWID, so every table is itself a B-tree ordered by its key: an alias or exact
+redirect is one index seek, and the fallbacks of a domain are one contiguous,
+path-ordered range. Paths are compared with the BINARY collation, i.e. in UTF-8
+byte order, so fallbacks come back in the same order as from a DynamoDB query.
+"""
+
+# Standard library imports
+import os
+import sqlite3
+import threading
+from typing import Iterable, Iterator, Optional
+
+# Local application / library specific imports
+from ..models.database import (
+    Alias,
+    RedirectFallbackOption,
+    RedirectOption,
+    model_from_ddb_item,
+)
+from ..models.resolution import Location
+
+SCHEMA = """
+CREATE TABLE aliases (
+    domain TEXT NOT NULL PRIMARY KEY,
+    target_domain TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE redirects (
+    domain TEXT NOT NULL,
+    path TEXT NOT NULL,
+    target TEXT NOT NULL,
+    cache_ttl INTEGER,
+    PRIMARY KEY (domain, path)
+) WITHOUT ROWID;
+CREATE TABLE fallbacks (
+    domain TEXT NOT NULL,
+    path TEXT NOT NULL,
+    target TEXT NOT NULL,
+    cache_ttl INTEGER,
+    PRIMARY KEY (domain, path)
+) WITHOUT ROWID;
+"""
+
+# Fallbacks are read in pages of this many rows, each continuing the range scan
+# of the previous one, so a caller that stops early doesn't read the rest.
+DEFAULT_PAGE_SIZE = 1000
+
+
+class SQLiteBackend:
+    """
+    Reads rules from a database written by `write_database`, opened read-only.
+
+    The connection is shared by all threads, e.g. the concurrent lookups of the
+    controller, and every statement is run under a lock.
+    """
+
+    def __init__(self, path: str, page_size: int = DEFAULT_PAGE_SIZE) -> None:
+        """Open the database at path."""
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No SQLite database at {path}")
+        self._connection = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._page_size = page_size
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        """Close the database."""
+        self._connection.close()
+
+    def get_alias(self, domain: str) -> Optional[Alias]:
+        """Return the alias of the domain itself, or None."""
+        row = self._fetch_one(
+            "SELECT target_domain FROM aliases WHERE domain = ?", (domain,)
+        )
+        if row is None:
+            return None
+        return Alias(source_domain=domain, target_domain=row[0])
+
+    def get_redirect(self, domain: str, path: str) -> Optional[Location]:
+        """Return the location of the exact redirect for a domain and path, or None."""
+        row = self._fetch_one(
+            "SELECT target, cache_ttl FROM redirects WHERE domain = ? AND path = ?",
+            (domain, path),
+        )
+        if row is None:
+            return None
+        return Location(*row)
+
+    def iter_fallbacks(self, domain: str) -> Iterator[RedirectFallbackOption]:
+        """Yield the fallbacks of a domain in path order, a page at a time."""
+        # Every page seeks to the last path of the previous one, so the paging
+        # costs no more than a single scan, and holds no cursor in between.
+        last_path = ""
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT path, target, cache_ttl FROM fallbacks "
+                    "WHERE domain = ? AND path > ? ORDER BY path LIMIT ?",
+                    (domain, last_path, self._page_size),
+                ).fetchall()
+            for path, target, cache_ttl in rows:
+                yield RedirectFallbackOption(
+                    domain=domain, path=path, target=target, cache_ttl=cache_ttl
+                )
+
+            if len(rows) < self._page_size:
+                return
+            last_path = rows[-1][0]
+
+    def _fetch_one(self, statement: str, parameters: tuple) -> Optional[tuple]:
+        """Return the first row a statement selects, or None."""
+        with self._lock:
+            return self._connection.execute(statement, parameters).fetchone()
+
+
+def write_database(path: str, items: Iterable[dict]) -> None:
+    """
+    Write the aliases, exact redirects and fallbacks among table items to a database.
+
+    The database is written next to path and moved into place, replacing any
+    existing file atomically. Wildcard aliases, regex rules and tombstones are
+    left out.
+    """
+    temporary_path = f"{path}.tmp"
+    if os.path.exists(temporary_path):
+        os.remove(temporary_path)
+
+    connection = sqlite3.connect(temporary_path)
+    try:
+        connection.executescript(SCHEMA)
+        for item in items:
+            if item.get("deleted"):
+                continue
+            model = model_from_ddb_item(item)
+            if isinstance(model, Alias) and not model.is_wildcard:
+                connection.execute(
+                    "INSERT OR REPLACE INTO aliases VALUES (?, ?)",
+                    (model.source_domain, model.target_domain),
+                )
+            elif isinstance(model, (RedirectOption, RedirectFallbackOption)):
+                table = (
+                    "redirects" if isinstance(model, RedirectOption) else "fallbacks"
+                )
+                connection.execute(
+                    f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?)",
+                    (model.domain, model.path, model.target, model.cache_ttl),
+                )
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(temporary_path, path)
@@ -0,0 +1 @@
+"""Module for helpers shared by the controllers of the redirect function."""
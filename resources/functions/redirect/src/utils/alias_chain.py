@@ -0,0 +1,53 @@
+"""Module for following chains of aliases, e.g. a -> b -> c, to the domain they end at."""
+
+# Standard library imports
+from typing import Callable, Optional
+
+# Local application / library specific imports
+from ..models.database import Alias
+
+
+class AliasChainError(RuntimeError):
+    """Raised when a chain of aliases can't be followed to its end."""
+
+
+class AliasCycleError(AliasChainError):
+    """Raised when a chain of aliases leads back to a domain it already passed."""
+
+
+class AliasChainTooLongError(AliasChainError):
+    """Raised when a chain of aliases goes on for more than the allowed hops."""
+
+
+def follow_alias_chain(
+    domain: str, lookup: Callable[[str], Optional[Alias]], max_hops: int
+) -> Optional[Alias]:
+    """
+    Return an alias from the domain to the end of its alias chain, or None.
+
+    At most `max_hops` aliases are followed, so with a single hop the chain may only
+    be the alias of the domain itself. The domain a chain ends at is looked up once
+    more to make sure it does end there, and a chain going on beyond `max_hops`
+    raises an AliasChainTooLongError rather than resolving to a domain halfway.
+    An alias pointing to its own source ends the chain, but one leading back to an
+    earlier domain raises an AliasCycleError.
+    """
+    chain = [domain]
+    while True:
+        alias = lookup(chain[-1])
+        if alias is None or alias.target_domain == chain[-1]:
+            break
+        if alias.target_domain in chain:
+            raise AliasCycleError(
+                f"Alias cycle: {' -> '.join(chain + [alias.target_domain])}"
+            )
+        if len(chain) > max_hops:
+            raise AliasChainTooLongError(
+                f"Alias chain longer than {max_hops} hops: "
+                f"{' -> '.join(chain + [alias.target_domain])}"
+            )
+        chain.append(alias.target_domain)
+
+    if len(chain) == 1:
+        return None
+    return Alias(source_domain=domain, target_domain=chain[-1])
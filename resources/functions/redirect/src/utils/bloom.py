@@ -0,0 +1,316 @@
+"""Module for the routing filter, a Bloom filter telling which lookups can't find anything."""
+
+# Standard library imports
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Iterable, List, Optional
+
+# Local application / library specific imports
+from ..models.database import GENERATION_KEY
+from .dynamodb import decode_item, encode_item
+
+logger = logging.getLogger(__name__)
+
+# The filter is stored in chunks under this partition key, written by
+# `python -m tools.build_filter`. Every chunk stays well below the 400 KB item limit.
+FILTER_KEY = "Meta#RoutingFilter"
+FILTER_CHUNK_BYTES = 256 * 1024
+
+
+class BloomFilter:
+    """
+    A Bloom filter over strings, using double hashing of a single BLAKE2b digest.
+
+    A key that was added is always reported as present. A key that wasn't is
+    reported as present with the false positive rate the filter was sized for.
+    """
+
+    def __init__(
+        self, num_bits: int, num_hashes: int, bits: Optional[bytes] = None
+    ) -> None:
+        """Construct a new, empty BloomFilter, or one with the given bits."""
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self._bits = (
+            bytearray(bits) if bits is not None else bytearray(-(-num_bits // 8))
+        )
+
+    @classmethod
+    def for_capacity(
+        cls,
+        capacity: int,
+        false_positive_rate: float,
+        max_bytes: Optional[int] = None,
+    ) -> "BloomFilter":
+        """Return a filter sized for capacity keys, shrunk to max_bytes if given."""
+        capacity = max(1, capacity)
+        num_bits = math.ceil(
+            -capacity * math.log(false_positive_rate) / math.log(2) ** 2
+        )
+        if max_bytes is not None:
+            num_bits = min(num_bits, max_bytes * 8)
+        num_bits = max(64, num_bits)
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return cls(num_bits=num_bits, num_hashes=num_hashes)
+
+    @property
+    def bits(self) -> bytes:
+        """Return the bit array of the filter."""
+        return bytes(self._bits)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Return the size of the bit array, in bytes."""
+        return len(self._bits)
+
+    def false_positive_rate(self, count: int) -> float:
+        """Return the expected false positive rate after adding count keys."""
+        return (
+            1 - math.exp(-self.num_hashes * count / self.num_bits)
+        ) ** self.num_hashes
+
+    def _positions(self, key: str) -> Iterable[int]:
+        """Return the bit positions of a key."""
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return (
+            (first + index * second) % self.num_bits for index in range(self.num_hashes)
+        )
+
+    def add(self, key: str) -> None:
+        """Add a key to the filter."""
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        """Return False if the key was definitely never added."""
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+def domain_key(domain: str) -> str:
+    """Return the key of a domain with an alias, redirects or fallbacks."""
+    return f"D|{domain}"
+
+
+def wildcard_key(suffix: str) -> str:
+    """Return the key of a domain whose subdomains have a wildcard alias."""
+    return f"W|{suffix}"
+
+
+def alias_key(domain: str) -> str:
+    """Return the key of a domain with an alias."""
+    return f"A|{domain}"
+
+
+def redirect_key(domain: str, path: str) -> str:
+    """Return the key of an exact redirect."""
+    return f"R|{domain}|{path}"
+
+
+def fallback_key(domain: str) -> str:
+    """Return the key of a domain with fallbacks."""
+    return f"F|{domain}"
+
+
+def pattern_key(domain: str) -> str:
+    """Return the key of a domain with regex rules."""
+    return f"P|{domain}"
+
+
+def filter_to_ddb_items(
+    bloom: BloomFilter, generation: Optional[int], build_id: str
+) -> List[dict]:
+    """Split a filter into DDB items, one per chunk of its bit array."""
+    bits = bloom.bits
+    chunks = [
+        bits[start : start + FILTER_CHUNK_BYTES]
+        for start in range(0, len(bits), FILTER_CHUNK_BYTES)
+    ]
+    return [
+        {
+            "pk": FILTER_KEY,
+            "sk": f"chunk#{index:04d}",
+            "build_id": build_id,
+            "chunk_count": len(chunks),
+            "num_bits": bloom.num_bits,
+            "num_hashes": bloom.num_hashes,
+            # -1 marks a filter built from a table without a generation item
+            "generation": -1 if generation is None else generation,
+            "bits": chunk,
+        }
+        for index, chunk in enumerate(chunks)
+    ]
+
+
+def filter_from_ddb_items(items: List[dict]) -> Optional[tuple]:
+    """
+    Return the (filter, generation) stored in the items, or None.
+
+    None is returned when there are no chunks, or when they are a mix of two builds,
+    e.g. because they are being rewritten.
+    """
+    if not items:
+        return None
+    first = items[0]
+    if len(items) != first["chunk_count"] or any(
+        item["build_id"] != first["build_id"] for item in items
+    ):
+        return None
+
+    chunks = sorted(items, key=lambda item: item["sk"])
+    bloom = BloomFilter(
+        num_bits=first["num_bits"],
+        num_hashes=first["num_hashes"],
+        bits=b"".join(chunk["bits"] for chunk in chunks),
+    )
+    generation = None if first["generation"] == -1 else first["generation"]
+    return bloom, generation
+
+
+class RoutingFilter:
+    """
+    Answers whether a lookup can possibly find anything, without calling DDB.
+
+    The filter is loaded at init and reloaded in the background at most every
+    `refresh_interval` seconds, when the table generation changed. Rules written
+    after the filter was built aren't in it, so a filter built for an older
+    generation than the table's is not used until it has been rebuilt. Nor is any
+    filter while the table has no generation item, since then nothing tells when
+    the rules changed. Without a (current) filter every lookup may find something,
+    so it is never wrong.
+    """
+
+    def __init__(
+        self,
+        ddb_client: Any,
+        ddb_table_name: str,
+        refresh_interval: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Construct a new RoutingFilter, without loading it yet."""
+        self._ddb_client = ddb_client
+        self._ddb_table_name = ddb_table_name
+        self._refresh_interval = refresh_interval
+        self._clock = clock
+        self._bloom: Optional[BloomFilter] = None
+        self._generation: Optional[int] = None
+        self._next_refresh_at = 0.0
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        """Return whether a filter matching the table generation is loaded."""
+        return self._bloom is not None
+
+    def might_have_domain(self, domain: str) -> bool:
+        """Return False if the domain has no (wildcard) alias, redirects or fallbacks."""
+        bloom = self._bloom
+        return (
+            bloom is None
+            or domain_key(domain) in bloom
+            or self._might_have_wildcard_alias(bloom, domain)
+        )
+
+    def might_have_alias(self, domain: str) -> bool:
+        """Return False if the domain has no alias and no wildcard alias matches it."""
+        bloom = self._bloom
+        return (
+            bloom is None
+            or alias_key(domain) in bloom
+            or self._might_have_wildcard_alias(bloom, domain)
+        )
+
+    @staticmethod
+    def _might_have_wildcard_alias(bloom: BloomFilter, domain: str) -> bool:
+        """Return False if no wildcard alias covers any parent domain of the domain."""
+        labels = domain.split(".")
+        return any(
+            wildcard_key(".".join(labels[index:])) in bloom
+            for index in range(1, len(labels))
+        )
+
+    def might_have_redirect(self, domain: str, path: str) -> bool:
+        """Return False if there is no exact redirect for the path."""
+        bloom = self._bloom
+        return bloom is None or redirect_key(domain, path) in bloom
+
+    def might_have_patterns(self, domain: str) -> bool:
+        """Return False if the domain has no regex rules."""
+        bloom = self._bloom
+        return bloom is None or pattern_key(domain) in bloom
+
+    def might_have_fallbacks(self, domain: str) -> bool:
+        """Return False if the domain has no fallbacks."""
+        bloom = self._bloom
+        return bloom is None or fallback_key(domain) in bloom
+
+    def load(self) -> None:
+        """Load the filter, or disable it if it is missing, incomplete or outdated."""
+        self._next_refresh_at = self._clock() + self._refresh_interval
+        table_generation = self._read_generation()
+        stored = filter_from_ddb_items(self._query_filter_items())
+        if stored is None or table_generation is None or stored[1] != table_generation:
+            self._bloom, self._generation = None, table_generation
+            return
+        self._bloom, self._generation = stored
+
+    def refresh(self) -> None:
+        """Reload the filter if the table generation changed since the last load."""
+        if self._read_generation() != self._generation or self._bloom is None:
+            self.load()
+
+    def maybe_refresh(self) -> None:
+        """Start a background refresh if one is due and none is running."""
+        now = self._clock()
+        if now < self._next_refresh_at or not self._refresh_lock.acquire(
+            blocking=False
+        ):
+            return
+
+        self._next_refresh_at = now + self._refresh_interval
+        threading.Thread(
+            target=self._refresh_in_background, name="filter-refresh", daemon=True
+        ).start()
+
+    def _refresh_in_background(self) -> None:
+        """Refresh the filter, disabling it if that fails."""
+        try:
+            self.refresh()
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Refreshing the routing filter failed, disabling it")
+            self._bloom = None
+        finally:
+            self._refresh_lock.release()
+
+    def _read_generation(self) -> Optional[int]:
+        """Return the current table generation, or None if it isn't tracked."""
+        response = self._ddb_client.get_item(
+            TableName=self._ddb_table_name,
+            Key=encode_item({"pk": GENERATION_KEY, "sk": GENERATION_KEY}),
+            ProjectionExpression="generation",
+        )
+        if "Item" not in response:
+            return None
+        return int(decode_item(response["Item"])["generation"])
+
+    def _query_filter_items(self) -> List[dict]:
+        """Return all chunks of the stored filter, following LastEvaluatedKey."""
+        query_kwargs: dict = {
+            "TableName": self._ddb_table_name,
+            "KeyConditionExpression": "pk = :pk",
+            "ExpressionAttributeValues": {":pk": {"S": FILTER_KEY}},
+        }
+        items = []
+        while True:
+            response = self._ddb_client.query(**query_kwargs)
+            items.extend(decode_item(item) for item in response["Items"])
+            if not response.get("LastEvaluatedKey"):
+                return items
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
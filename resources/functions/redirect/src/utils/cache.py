@@ -0,0 +1,87 @@
+"""Module for the TTLCache class, a bounded in-memory cache for warm invocations."""
+
+# Standard library imports
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+# Sentinel returned by TTLCache.get() when a key is absent or expired. A cached
+# value can legitimately be None (e.g. "no alias exists"), so None can't be used.
+MISSING = object()
+
+
+class TTLCache:
+    """
+    A thread-safe cache with a time-to-live per entry and least-recently-used eviction.
+
+    Entries older than `ttl` seconds are treated as absent. When the cache holds
+    `max_entries` entries, storing a new key evicts the least recently used one.
+    A `ttl` or `max_entries` of 0 disables the cache entirely.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        max_entries: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Construct a new TTLCache."""
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Return whether the cache stores anything at all."""
+        return self._ttl > 0 and self._max_entries > 0
+
+    def __len__(self) -> int:
+        """Return the number of entries in the cache, including expired ones."""
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value for key, or MISSING if it is absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return MISSING
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value for key, evicting the least recently used entry if full."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (self._clock() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached value for key, calling factory() and caching it on a miss."""
+        value = self.get(key)
+        if value is MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,101 @@
+"""Module for the RequestCanonicalizer class, which collapses equivalent requests into one."""
+
+# Standard library imports
+import re
+from dataclasses import replace
+from typing import Dict, Optional
+
+# Local application / library specific imports
+from ..models.config import PathPolicy
+from ..models.request import ApiGatewayRequest
+
+PERCENT_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+REPEATED_SLASHES = re.compile(r"//+")
+# The characters that mean the same whether percent-encoded or not (RFC 3986 2.3).
+UNRESERVED = frozenset(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~"
+)
+
+
+def canonical_host(host: str) -> str:
+    """Return the host lowercased, without its port and trailing dot."""
+    host = host.strip().lower()
+    if host.startswith("["):
+        # An IPv6 literal, whose colons aren't port separators.
+        host = host[: host.find("]") + 1] or host
+    else:
+        host = host.partition(":")[0]
+    return host.rstrip(".")
+
+
+def _normalize_percent_escape(match: "re.Match") -> str:
+    """Return the unreserved character of an escape, or the escape in uppercase."""
+    character = chr(int(match.group(1), 16))
+    if character in UNRESERVED:
+        return character
+    return match.group(0).upper()
+
+
+def canonical_path(path: str, policy: PathPolicy) -> str:
+    """Return the path rewritten according to the policy."""
+    if policy.normalize_percent_encoding and "%" in path:
+        path = PERCENT_ESCAPE.sub(_normalize_percent_escape, path)
+    if policy.lowercase:
+        path = path.lower()
+        if policy.normalize_percent_encoding and "%" in path:
+            # Lowercasing the decoded letters must not lowercase the escapes.
+            path = PERCENT_ESCAPE.sub(lambda match: match.group(0).upper(), path)
+    if policy.collapse_slashes and "//" in path:
+        path = REPEATED_SLASHES.sub("/", path)
+    if policy.trailing_slash == "strip" and len(path) > 1:
+        path = path.rstrip("/") or "/"
+    elif policy.trailing_slash == "add" and not path.endswith("/"):
+        path += "/"
+    return path
+
+
+class RequestCanonicalizer:
+    """
+    Rewrites requests to their canonical domain and path before they are looked up.
+
+    Requests that only differ in the case, port or trailing dot of their host, or in
+    the spelling of their path, then share their cache entries and find the same
+    exact redirects instead of each falling through to the fallbacks. The path
+    policy is chosen by the canonical requested domain, before any alias lookup.
+    """
+
+    def __init__(
+        self,
+        canonicalize_host: bool = False,
+        path_policy: Optional[PathPolicy] = None,
+        domain_path_policies: Optional[Dict[str, PathPolicy]] = None,
+    ) -> None:
+        """Construct a new RequestCanonicalizer."""
+        self._canonicalize_host = canonicalize_host
+        self._path_policy = path_policy or PathPolicy()
+        self._domain_path_policies = {
+            canonical_host(domain): policy
+            for domain, policy in (domain_path_policies or {}).items()
+        }
+
+    @property
+    def enabled(self) -> bool:
+        """Return whether any request can be rewritten."""
+        return (
+            self._canonicalize_host
+            or self._path_policy.enabled
+            or any(policy.enabled for policy in self._domain_path_policies.values())
+        )
+
+    def canonicalize(self, request: ApiGatewayRequest) -> ApiGatewayRequest:
+        """Return the canonical form of the request, or the request itself if it is."""
+        domain = request.domain
+        if self._canonicalize_host:
+            domain = canonical_host(domain)
+
+        policy = self._domain_path_policies.get(domain, self._path_policy)
+        path = canonical_path(request.path, policy)
+
+        if domain == request.domain and path == request.path:
+            return request
+        return replace(request, domain=domain, path=path)
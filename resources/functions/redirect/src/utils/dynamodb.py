@@ -0,0 +1,66 @@
+"""
+Module for converting between low-level DynamoDB attribute values and Python values.
+
+The redirect function talks to the low-level DynamoDB client, which is much
+cheaper to initialise than the boto3 resource layer. Our items only contain
+strings, numbers, booleans and binary values, so they are decoded by hand here
+instead of by boto3's TypeDeserializer, which is only imported for any other
+attribute type.
+"""
+
+# Standard library imports
+from typing import Any, Dict
+
+
+def decode_value(attribute_value: Dict[str, Any]) -> Any:
+    """Convert a low-level attribute value, e.g. {'S': 'x'}, to a Python value."""
+    if "S" in attribute_value:
+        return attribute_value["S"]
+    if "N" in attribute_value:
+        number = attribute_value["N"]
+        try:
+            return int(number)
+        except ValueError:
+            return float(number)
+    if "BOOL" in attribute_value:
+        return attribute_value["BOOL"]
+    if "NULL" in attribute_value:
+        return None
+    if "B" in attribute_value:
+        # The low-level client has already decoded the base64 on the wire
+        return bytes(attribute_value["B"])
+
+    # pylint: disable=import-outside-toplevel
+    from boto3.dynamodb.types import TypeDeserializer
+
+    return TypeDeserializer().deserialize(attribute_value)
+
+
+def decode_item(item: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Convert a low-level DDB item to a dict of Python values."""
+    return {name: decode_value(value) for name, value in item.items()}
+
+
+def encode_value(value: Any) -> Dict[str, Any]:
+    """Convert a string, number, boolean, bytes or None to a low-level attribute value."""
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, (int, float)):
+        return {"N": str(value)}
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, (bytes, bytearray)):
+        return {"B": bytes(value)}
+    raise TypeError(f"Unsupported attribute value type: {type(value).__name__}")
+
+
+def encode_item(item: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Convert a dict of Python values to a low-level DDB item."""
+    return {name: encode_value(value) for name, value in item.items()}
+
+
+def encode_key(partition_key: str, sort_key: str) -> Dict[str, Dict[str, str]]:
+    """Return the low-level primary key for a pk and sk."""
+    return {"pk": {"S": partition_key}, "sk": {"S": sort_key}}
@@ -0,0 +1,99 @@
+"""Module for the FallbackIndex class, a compiled matcher for redirect fallbacks."""
+
+# Standard library imports
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+# Local application / library specific imports
+from ..models.database import RedirectFallbackOption
+
+
+class FallbackIndex:
+    """
+    An Aho-Corasick automaton over the fallback paths of a single domain.
+
+    A fallback matches a request when its path is a substring of the requested
+    path, and the longest matching fallback wins. Ties are won by the option that
+    was added first, which for DDB query results is the lowest sort key. Compiling
+    the automaton costs O(total length of all fallback paths); every lookup after
+    that costs O(length of the requested path), regardless of the number of fallbacks.
+    """
+
+    def __init__(self, options: Iterable[RedirectFallbackOption] = ()) -> None:
+        """Construct and compile a new FallbackIndex."""
+        # Node 0 is the root. Per node we keep its outgoing edges, its failure link
+        # and the best option ending at this node or at any node on its failure chain.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._best: List[Optional[int]] = [None]
+        self._options: List[RedirectFallbackOption] = []
+
+        for option in options:
+            self._insert(option)
+        self._compile()
+
+    def __len__(self) -> int:
+        """Return the number of fallback options in the index."""
+        return len(self._options)
+
+    def match(self, request_path: str) -> Optional[RedirectFallbackOption]:
+        """Return the best fallback option for the request path, or None."""
+        goto, fail, best = self._goto, self._fail, self._best
+        state = 0
+        best_rank: Optional[int] = None
+        for char in request_path:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            rank = best[state]
+            if rank is not None and self._is_better(rank, best_rank):
+                best_rank = rank
+
+        return None if best_rank is None else self._options[best_rank]
+
+    def _insert(self, option: RedirectFallbackOption) -> None:
+        """Add the path of a fallback option to the trie."""
+        state = 0
+        for char in option.path:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(None)
+            state = next_state
+
+        rank = len(self._options)
+        self._options.append(option)
+        if self._best[state] is None:
+            self._best[state] = rank
+
+    def _compile(self) -> None:
+        """Compute failure links and propagate the best option along them (BFS order)."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            fallback_rank = self._best[self._fail[state]]
+            if fallback_rank is not None and self._is_better(
+                fallback_rank, self._best[state]
+            ):
+                self._best[state] = fallback_rank
+
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+
+    def _is_better(self, rank: int, current_rank: Optional[int]) -> bool:
+        """Return whether the option at rank beats the option at current_rank."""
+        if current_rank is None:
+            return True
+
+        length = len(self._options[rank].path)
+        current_length = len(self._options[current_rank].path)
+        return length > current_length or (
+            length == current_length and rank < current_rank
+        )
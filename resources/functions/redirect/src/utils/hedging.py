@@ -0,0 +1,180 @@
+"""Module for hedged DynamoDB reads, which duplicate slow requests to cut tail latency."""
+
+# Standard library imports
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, List, Optional
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+# Only reads are hedged: they are idempotent, so sending one twice is harmless.
+HEDGED_OPERATIONS = frozenset(["get_item", "query", "batch_get_item"])
+
+
+class HedgingPolicy:
+    """
+    Decides how long to wait before hedging a read, and whether a hedge may be sent.
+
+    The hedge delay is the configured percentile of recently observed latencies,
+    so only the slowest few percent of reads are duplicated. Until `min_samples`
+    latencies are known, `initial_delay` is used instead. Hedges are paid for with
+    tokens: every read earns `max_hedge_rate` tokens and every hedge costs one, so
+    at most that fraction of reads is ever sent twice, even when DDB is slow overall.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        max_hedge_rate: float = 0.1,
+        initial_delay: float = 0.05,
+        min_samples: int = 20,
+        window: int = 1_000,
+        max_tokens: float = 10.0,
+    ) -> None:
+        """Construct a new HedgingPolicy."""
+        self._percentile = percentile
+        self._max_hedge_rate = max_hedge_rate
+        self._initial_delay = initial_delay
+        self._min_samples = min_samples
+        self._max_tokens = max_tokens
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._sorted_samples: List[float] = []
+        self._stale_samples = 0
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.hedges = 0
+
+    def record_latency(self, latency: float) -> None:
+        """Record the latency of a completed primary read."""
+        with self._lock:
+            self._samples.append(latency)
+            self._stale_samples += 1
+
+    def delay(self) -> float:
+        """Return how long a read may take before it is hedged, in seconds."""
+        with self._lock:
+            if len(self._samples) < self._min_samples:
+                return self._initial_delay
+
+            # Sorting the window on every read would cost more than the lookup
+            # itself, so the sorted copy is only refreshed every few samples.
+            if self._stale_samples >= max(1, len(self._samples) // 32):
+                self._sorted_samples = sorted(self._samples)
+                self._stale_samples = 0
+
+            rank = round(self._percentile / 100 * (len(self._sorted_samples) - 1))
+            return self._sorted_samples[rank]
+
+    def start_read(self) -> None:
+        """Register a read, earning it a fraction of a hedge."""
+        with self._lock:
+            self.reads += 1
+            self._tokens = min(self._max_tokens, self._tokens + self._max_hedge_rate)
+
+    def try_acquire_hedge(self) -> bool:
+        """Return whether a hedge may be sent, spending a token if so."""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self.hedges += 1
+            return True
+
+
+class HedgedDynamoDBClient:
+    """
+    Wraps a low-level DDB client, hedging its read operations.
+
+    A read that hasn't returned within the policy's delay is sent a second time,
+    and whichever response arrives first is used. A read that takes longer than
+    `budget` seconds in total raises a TimeoutError, so a stuck request fails the
+    invocation cleanly instead of running into the function timeout. Every other
+    operation and attribute is passed through to the wrapped client unchanged.
+    """
+
+    def __init__(
+        self,
+        ddb_client,
+        policy: HedgingPolicy,
+        budget: float,
+        max_workers: int = 8,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Construct a new HedgedDynamoDBClient."""
+        self._ddb_client = ddb_client
+        self.policy = policy
+        self._budget = budget
+        self._max_workers = max_workers
+        self._clock = clock
+        self._executor: Optional["ThreadPoolExecutor"] = None
+        self._executor_lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        """Return the hedged variant of a read operation, or the client attribute itself."""
+        attribute = getattr(self._ddb_client, name)
+        if name not in HEDGED_OPERATIONS:
+            return attribute
+        return lambda **kwargs: self._hedged_call(attribute, kwargs)
+
+    def _get_executor(self) -> "ThreadPoolExecutor":
+        """Return the thread pool the reads are sent from, creating it on first use."""
+        with self._executor_lock:
+            if self._executor is None:
+                # pylint: disable=import-outside-toplevel
+                from concurrent.futures import ThreadPoolExecutor
+
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="ddb-hedge"
+                )
+            return self._executor
+
+    def _hedged_call(self, operation: Callable[..., dict], kwargs: dict) -> dict:
+        """Send a read, hedge it once it is slower than the delay, and return the first response."""
+        # pylint: disable=import-outside-toplevel
+        from concurrent.futures import FIRST_COMPLETED, wait
+
+        executor = self._get_executor()
+        self.policy.start_read()
+        started_at = self._clock()
+        deadline = started_at + self._budget
+
+        primary = executor.submit(operation, **kwargs)
+        # The latency of the primary is recorded even when a hedge wins, otherwise
+        # the slow responses that trigger hedging would vanish from the distribution.
+        primary.add_done_callback(
+            lambda _: self.policy.record_latency(self._clock() - started_at)
+        )
+        pending = {primary}
+
+        done, pending = wait(pending, timeout=min(self.policy.delay(), self._budget))
+        if not done and self.policy.try_acquire_hedge():
+            pending.add(executor.submit(operation, **kwargs))
+
+        first_error: Optional[BaseException] = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                first_error = first_error or future.exception()
+
+            if not pending:
+                raise first_error
+
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                self._abandon(pending)
+                raise TimeoutError(
+                    f"DynamoDB read exceeded its budget of {self._budget} seconds"
+                )
+            done, pending = wait(
+                pending, timeout=remaining, return_when=FIRST_COMPLETED
+            )
+
+    @staticmethod
+    def _abandon(futures: "set[Future]") -> None:
+        """Drop reads that haven't started yet; running ones finish in the background."""
+        for future in futures:
+            future.cancel()
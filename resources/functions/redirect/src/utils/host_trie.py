@@ -0,0 +1,74 @@
+"""Module for the HostSuffixTrie class, which matches hosts against wildcard patterns."""
+
+# Standard library imports
+from typing import Dict, Generic, Iterable, Optional, Tuple, TypeVar
+
+Value = TypeVar("Value")
+
+WILDCARD_PREFIX = "*."
+
+
+class _Node(Generic[Value]):
+    """A trie node for one host label, holding the value of its wildcard pattern."""
+
+    __slots__ = ("children", "value")
+
+    def __init__(self) -> None:
+        """Construct a new, empty node."""
+        self.children: Dict[str, "_Node[Value]"] = {}
+        self.value: Optional[Value] = None
+
+
+class HostSuffixTrie(Generic[Value]):
+    """
+    Matches hosts against wildcard patterns such as '*.example.com'.
+
+    The patterns are stored in a trie over their labels in reverse order, i.e.
+    'com', 'example', so a host is matched by walking its own labels from the
+    right, in O(labels) regardless of the number of patterns. A pattern matches
+    subdomains at any depth, but not the domain itself, and the most specific
+    pattern wins: '*.shop.example.com' over '*.example.com' for 'a.shop.example.com'.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, Value]] = ()) -> None:
+        """Construct a new HostSuffixTrie from (pattern, value) pairs."""
+        self._root: _Node[Value] = _Node()
+        self._size = 0
+        for pattern, value in patterns:
+            self.add(pattern, value)
+
+    def __len__(self) -> int:
+        """Return the number of patterns in the trie."""
+        return self._size
+
+    def add(self, pattern: str, value: Value) -> None:
+        """Add a '*.<suffix>' pattern, replacing the value of an existing one."""
+        if not pattern.startswith(WILDCARD_PREFIX):
+            raise ValueError(f"Not a wildcard pattern: {pattern}")
+
+        node = self._root
+        for label in reversed(pattern[len(WILDCARD_PREFIX) :].split(".")):
+            node = node.children.setdefault(label, _Node())
+        if node.value is None:
+            self._size += 1
+        node.value = value
+
+    def match(self, host: str) -> Optional[Value]:
+        """Return the value of the most specific pattern matching the host, or None."""
+        labels = host.split(".")
+        node = self._root
+        best_match: Optional[Value] = None
+        # The first label is never part of a matched suffix, as '*' has to match
+        # at least one label.
+        for label in reversed(labels[1:]):
+            node = node.children.get(label)
+            if node is None:
+                break
+            if node.value is not None:
+                best_match = node.value
+        return best_match
+
+
+def is_wildcard(domain: str) -> bool:
+    """Return whether a domain is a wildcard pattern like '*.example.com'."""
+    return domain.startswith(WILDCARD_PREFIX)
@@ -0,0 +1,22 @@
+"""Module for the caching headers of redirect responses."""
+
+# Standard library imports
+from typing import Dict, Optional
+
+
+def cache_headers(cache_ttl: Optional[int]) -> Dict[str, str]:
+    """
+    Return the headers allowing a response to be cached for `cache_ttl` seconds.
+
+    'Cache-Control' is honoured by browsers and CloudFront alike. 'CDN-Cache-Control'
+    (RFC 9213) is only read by CDNs, which can then differ from the browser TTL if a
+    CDN in front overrides it. A TTL of 0 forbids caching, and None adds no headers.
+    """
+    if cache_ttl is None:
+        return {}
+    if cache_ttl <= 0:
+        return {"Cache-Control": "no-store", "CDN-Cache-Control": "no-store"}
+    return {
+        "Cache-Control": f"public, max-age={cache_ttl}",
+        "CDN-Cache-Control": f"public, max-age={cache_ttl}",
+    }
@@ -0,0 +1,175 @@
+"""Module for the MetricsRecorder class, which writes hot-path metrics in CloudWatch EMF."""
+
+# Standard library imports
+import json
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import (
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+)
+
+# CloudWatch accepts at most 100 values per metric in a single EMF document.
+MAX_VALUES_PER_METRIC = 100
+# Standard resolution metrics are aggregated per minute, so batched records are
+# written with the minute they were recorded in.
+TIMESTAMP_RESOLUTION_MS = 60_000
+
+
+class MetricsRecorder:
+    """
+    Records per-request metrics and writes them to stdout in Embedded Metric Format.
+
+    Lambda forwards stdout to CloudWatch Logs, which extracts the metrics from the
+    EMF documents, so recording costs no API calls. Only a `sample_rate` fraction
+    of requests is recorded. By default every record is written when its request
+    ends, since Lambda freezes and recycles environments without running exit
+    handlers, so anything still buffered then is lost. With a `flush_every` over
+    one, records are buffered and written together, with a list of values per
+    metric, once there are `flush_every` of them or the oldest is `max_age_seconds`
+    old. Every document carries the minute its records were made in, not the time
+    of writing. A disabled or unsampled request turns every recording call into a
+    no-op.
+    """
+
+    def __init__(
+        self,
+        namespace: str = "RedirectService",
+        enabled: bool = True,
+        sample_rate: float = 1.0,
+        flush_every: int = 1,
+        max_age_seconds: float = 60.0,
+        stream: Optional[TextIO] = None,
+        random_source: Callable[[], float] = random.random,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Construct a new MetricsRecorder."""
+        self._namespace = namespace
+        self._enabled = enabled
+        self._sample_rate = sample_rate
+        self._flush_every = max(1, min(flush_every, MAX_VALUES_PER_METRIC))
+        self._max_age_ms = max_age_seconds * 1000
+        self._stream = stream
+        self._random_source = random_source
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Metric values of the request in progress, or None if it isn't sampled.
+        self._current: Optional[Dict[str, float]] = None
+        self._started_at = 0
+        self._units: Dict[str, str] = {}
+        # The start time, in epoch milliseconds, and metric values of every record
+        self._buffer: List[Tuple[int, Dict[str, float]]] = []
+
+    @property
+    def recording(self) -> bool:
+        """Return whether the request in progress is being recorded."""
+        return self._current is not None
+
+    def begin(self) -> None:
+        """Start a new request, deciding whether it is sampled."""
+        sampled = self._enabled and (
+            self._sample_rate >= 1 or self._random_source() < self._sample_rate
+        )
+        with self._lock:
+            self._current = {} if sampled else None
+            self._started_at = int(self._clock() * 1000)
+
+    def add(self, name: str, value: float = 1, unit: str = "Count") -> None:
+        """Add value to a metric of the request in progress."""
+        if self._current is None:
+            return
+        with self._lock:
+            if self._current is not None:
+                self._current[name] = self._current.get(name, 0) + value
+                self._units[name] = unit
+
+    def timer(self, name: str) -> ContextManager[None]:
+        """Return a context manager adding its duration to a metric, in milliseconds."""
+        if self._current is None:
+            return nullcontext()
+        return self._timed(name)
+
+    @contextmanager
+    def _timed(self, name: str) -> Iterator[None]:
+        """Add the duration of the block to a metric, in milliseconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000, unit="Milliseconds")
+
+    def end(self) -> None:
+        """Finish the request in progress, writing the buffer once it is full or old."""
+        with self._lock:
+            if self._current is not None:
+                self._buffer.append((self._started_at, self._current))
+            self._current = None
+            if not self._buffer or (
+                len(self._buffer) < self._flush_every
+                and self._clock() * 1000 - self._buffer[0][0] < self._max_age_ms
+            ):
+                return
+            documents = self._pop_documents()
+        self._write(documents)
+
+    def flush(self) -> None:
+        """Write all buffered records."""
+        with self._lock:
+            documents = self._pop_documents()
+        self._write(documents)
+
+    def _pop_documents(self) -> List[dict]:
+        """Return an EMF document per minute of the buffered records, emptying the buffer."""
+        minutes: Dict[int, Tuple[int, Dict[str, List[float]]]] = {}
+        for started_at, record in self._buffer:
+            _, values = minutes.setdefault(
+                started_at // TIMESTAMP_RESOLUTION_MS, (started_at, {})
+            )
+            for name, value in record.items():
+                values.setdefault(name, []).append(round(value, 3))
+        self._buffer = []
+
+        return [
+            self._document(timestamp, values) for timestamp, values in minutes.values()
+        ]
+
+    def _document(self, timestamp: int, values: Dict[str, List[float]]) -> dict:
+        """Return an EMF document for the values of records made at timestamp."""
+        return {
+            "_aws": {
+                "Timestamp": timestamp,
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": self._namespace,
+                        "Dimensions": [[]],
+                        "Metrics": [
+                            {"Name": name, "Unit": self._units[name]}
+                            for name in sorted(values)
+                        ],
+                    }
+                ],
+            },
+            **values,
+        }
+
+    def _write(self, documents: List[dict]) -> None:
+        """Write every document as a single line, so CloudWatch Logs sees one event each."""
+        if not documents:
+            return
+        stream = self._stream or sys.stdout
+        stream.write(
+            "".join(
+                json.dumps(document, separators=(",", ":")) + "\n"
+                for document in documents
+            )
+        )
+        stream.flush()
@@ -0,0 +1,349 @@
+"""Module for the TableMirror class, an in-memory copy of the whole redirects table."""
+
+# Standard library imports
+import logging
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Local application / library specific imports
+from ..models.database import (
+    GENERATION_KEY,
+    Alias,
+    RedirectFallbackOption,
+    RedirectOption,
+    RedirectPatternOption,
+    model_from_ddb_item,
+)
+from ..models.resolution import Location
+from .dynamodb import decode_item, encode_key
+from .fallback_index import FallbackIndex
+from .host_trie import HostSuffixTrie
+from .pattern_matcher import PatternMatcher
+
+logger = logging.getLogger(__name__)
+
+# Writers bump the generation after every change (see GENERATION_KEY), and stamp
+# changed items with `stamp_change`. Deleted items are written as tombstones with
+# `deleted` set, so deltas see the deletion. Nothing removes them from the table,
+# so every other read path skips them as well.
+# The sparse index of stamped items by `change_shard` and `updated_at`, which
+# deltas query. Items are spread over the shards by partition key, so a bulk
+# import doesn't write to a single index partition.
+CHANGES_INDEX = "UpdatedAtIndex"
+CHANGE_SHARDS = 8
+# Delta windows overlap by this many seconds, to tolerate clock skew between
+# writers and in-flight writes while the previous window was being scanned.
+DELTA_WINDOW_OVERLAP_SECONDS = 5.0
+
+
+def stamp_change(item: dict, updated_at: int) -> dict:
+    """Return the item stamped with its update time, so mirror deltas find it."""
+    return dict(
+        item,
+        updated_at=updated_at,
+        change_shard=zlib.crc32(item["pk"].encode()) % CHANGE_SHARDS,
+    )
+
+
+@dataclass
+class MirrorState:
+    """
+    A view of the mirrored table. Refreshes swap in a new state instead of
+    modifying the current one, apart from lazily compiled fallback indexes.
+    """
+
+    aliases: Dict[str, Alias] = field(default_factory=dict)
+    redirects: Dict[Tuple[str, str], Location] = field(default_factory=dict)
+    fallbacks: Dict[str, Dict[str, Location]] = field(default_factory=dict)
+    patterns: Dict[str, Dict[str, Location]] = field(default_factory=dict)
+    generation: Optional[int] = None
+    # The start of the scan that produced this state, the next delta window start
+    window_start: float = 0.0
+    loaded_at: float = 0.0
+    # Compiled lazily per domain, and dropped for domains a delta touches
+    fallback_indexes: Dict[str, FallbackIndex] = field(default_factory=dict)
+    # Compiled lazily per domain, and dropped for domains a delta touches
+    pattern_matchers: Dict[str, PatternMatcher] = field(default_factory=dict)
+    # Compiled lazily, and dropped when a delta touches a wildcard alias
+    wildcard_aliases: Optional[HostSuffixTrie] = None
+
+    def apply(self, items: Iterable[dict]) -> "MirrorState":
+        """Return a copy of this state with upserted and deleted items applied."""
+        state = MirrorState(
+            aliases=dict(self.aliases),
+            redirects=dict(self.redirects),
+            fallbacks=dict(self.fallbacks),
+            patterns=dict(self.patterns),
+            generation=self.generation,
+            window_start=self.window_start,
+            loaded_at=self.loaded_at,
+            fallback_indexes=dict(self.fallback_indexes),
+            pattern_matchers=dict(self.pattern_matchers),
+            wildcard_aliases=self.wildcard_aliases,
+        )
+        copied_domains = set()
+        for item in items:
+            model = model_from_ddb_item(item)
+            deleted = bool(item.get("deleted"))
+            if isinstance(model, Alias):
+                if model.is_wildcard:
+                    state.wildcard_aliases = None
+                if deleted:
+                    state.aliases.pop(model.source_domain, None)
+                else:
+                    state.aliases[model.source_domain] = model
+            elif isinstance(model, RedirectOption):
+                if deleted:
+                    state.redirects.pop((model.domain, model.path), None)
+                else:
+                    state.redirects[(model.domain, model.path)] = model.location
+            elif isinstance(model, RedirectFallbackOption):
+                if model.domain not in copied_domains:
+                    state.fallbacks[model.domain] = dict(
+                        state.fallbacks.get(model.domain, {})
+                    )
+                    state.fallback_indexes.pop(model.domain, None)
+                    copied_domains.add(model.domain)
+                if deleted:
+                    state.fallbacks[model.domain].pop(model.path, None)
+                else:
+                    state.fallbacks[model.domain][model.path] = model.location
+            elif isinstance(model, RedirectPatternOption):
+                # Copied whole, since the patterns of a domain are few
+                patterns = dict(state.patterns.get(model.domain, {}))
+                if deleted:
+                    patterns.pop(model.pattern, None)
+                else:
+                    patterns[model.pattern] = Location(model.target, model.cache_ttl)
+                state.patterns[model.domain] = patterns
+                state.pattern_matchers.pop(model.domain, None)
+        return state
+
+
+class TableMirror:
+    """
+    Keep the whole redirects table in memory, refreshing it incrementally.
+
+    The table is loaded with a parallel segmented Scan. Afterwards, at most every
+    `refresh_interval` seconds, a background thread reads the generation item and,
+    only if it changed, queries every shard of the changes index for items updated
+    since the previous window, which reads only the changed items. Without a
+    generation item every refresh runs the delta queries. Items written without
+    `stamp_change` are only picked up by the full reload, every
+    `full_reload_interval` seconds. Tombstones are never part of the mirrored
+    state, but they stay in the table. Wildcard aliases are only matched with
+    `wildcard_aliases`, like in the controller.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        ddb_client: Any,
+        ddb_table_name: str,
+        scan_segments: int = 4,
+        refresh_interval: float = 30.0,
+        full_reload_interval: float = 900.0,
+        clock: Callable[[], float] = time.time,
+        pattern_rules: bool = False,
+        wildcard_aliases: bool = False,
+    ) -> None:
+        """Construct a new, empty TableMirror."""
+        self._ddb_client = ddb_client
+        self._ddb_table_name = ddb_table_name
+        self._scan_segments = scan_segments
+        self._refresh_interval = refresh_interval
+        self._full_reload_interval = full_reload_interval
+        self._clock = clock
+        self._pattern_rules = pattern_rules
+        self._wildcard_aliases = wildcard_aliases
+        self._state = MirrorState()
+        self._next_refresh_at = 0.0
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def state(self) -> MirrorState:
+        """Return the current state of the mirror."""
+        return self._state
+
+    def get_alias(self, domain: str) -> Optional[Alias]:
+        """Return the alias for a domain, or else the best matching wildcard alias, or None."""
+        state = self._state
+        alias = state.aliases.get(domain)
+        if alias is not None or not self._wildcard_aliases:
+            return alias
+
+        wildcard_aliases = state.wildcard_aliases
+        if wildcard_aliases is None:
+            wildcard_aliases = HostSuffixTrie(
+                (alias.source_domain, alias)
+                for alias in state.aliases.values()
+                if alias.is_wildcard
+            )
+            state.wildcard_aliases = wildcard_aliases
+        return wildcard_aliases.match(domain)
+
+    def get_redirect_location(self, domain: str, request_path: str) -> Optional[str]:
+        """Return the exact, first regex or best fallback location for a path, or None."""
+        state = self._state
+        target = state.redirects.get((domain, request_path))
+        if target is not None:
+            return target
+
+        if self._pattern_rules and domain in state.patterns:
+            pattern_matcher = state.pattern_matchers.get(domain)
+            if pattern_matcher is None:
+                patterns = state.patterns[domain]
+                # Sorted by pattern, like a DDB query
+                pattern_matcher = PatternMatcher(
+                    RedirectPatternOption(
+                        domain=domain,
+                        pattern=pattern,
+                        target=patterns[pattern],
+                        cache_ttl=patterns[pattern].cache_ttl,
+                    )
+                    for pattern in sorted(patterns)
+                )
+                state.pattern_matchers[domain] = pattern_matcher
+            target = pattern_matcher.match(request_path)
+            if target is not None:
+                return target
+
+        fallback_index = state.fallback_indexes.get(domain)
+        if fallback_index is None:
+            fallbacks = state.fallbacks.get(domain, {})
+            # Sorted by path, like a DDB query, so ties are broken the same way
+            fallback_index = FallbackIndex(
+                RedirectFallbackOption(
+                    domain=domain,
+                    path=path,
+                    target=fallbacks[path],
+                    cache_ttl=fallbacks[path].cache_ttl,
+                )
+                for path in sorted(fallbacks)
+            )
+            state.fallback_indexes[domain] = fallback_index
+
+        best_match = fallback_index.match(request_path)
+        return best_match.location if best_match else None
+
+    def load(self) -> None:
+        """Replace the mirror with a full copy of the table."""
+        window_start = self._clock()
+        generation = self._read_generation()
+        state = MirrorState().apply(self._scan())
+        state.generation = generation
+        state.window_start = window_start
+        state.loaded_at = window_start
+        self._state = state
+        self._next_refresh_at = window_start + self._refresh_interval
+
+    def refresh(self) -> None:
+        """Apply the changes since the previous load or refresh, if there are any."""
+        state = self._state
+        now = self._clock()
+        if now - state.loaded_at >= self._full_reload_interval:
+            self.load()
+            return
+
+        generation = self._read_generation()
+        if generation is not None and generation == state.generation:
+            return
+
+        delta = self._query_changes(
+            updated_since=state.window_start - DELTA_WINDOW_OVERLAP_SECONDS
+        )
+        new_state = state.apply(delta)
+        new_state.generation = generation
+        new_state.window_start = now
+        self._state = new_state
+
+    def maybe_refresh(self) -> None:
+        """Start a background refresh if one is due and none is running."""
+        now = self._clock()
+        if now < self._next_refresh_at or not self._refresh_lock.acquire(
+            blocking=False
+        ):
+            return
+
+        self._next_refresh_at = now + self._refresh_interval
+        threading.Thread(
+            target=self._refresh_in_background, name="mirror-refresh", daemon=True
+        ).start()
+
+    def _refresh_in_background(self) -> None:
+        """Refresh the mirror, keeping the current state if that fails."""
+        try:
+            self.refresh()
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Refreshing the table mirror failed, serving stale data")
+        finally:
+            self._refresh_lock.release()
+
+    def _read_generation(self) -> Optional[int]:
+        """Return the current table generation, or None if it isn't tracked."""
+        response = self._ddb_client.get_item(
+            TableName=self._ddb_table_name,
+            Key=encode_key(GENERATION_KEY, GENERATION_KEY),
+            ProjectionExpression="generation",
+        )
+        if "Item" not in response:
+            return None
+        return int(decode_item(response["Item"])["generation"])
+
+    def _scan(self) -> List[dict]:
+        """Scan all segments of the table in parallel and return the decoded items."""
+        with ThreadPoolExecutor(
+            max_workers=self._scan_segments, thread_name_prefix="mirror-scan"
+        ) as executor:
+            segments = executor.map(self._scan_segment, range(self._scan_segments))
+            return [item for segment_items in segments for item in segment_items]
+
+    def _scan_segment(self, segment: int) -> List[dict]:
+        """Scan a single segment of the table, following LastEvaluatedKey."""
+        return self._read_pages(
+            self._ddb_client.scan,
+            {
+                "TableName": self._ddb_table_name,
+                "Segment": segment,
+                "TotalSegments": self._scan_segments,
+            },
+        )
+
+    def _query_changes(self, updated_since: float) -> List[dict]:
+        """Query all shards of the changes index in parallel for recently updated items."""
+        with ThreadPoolExecutor(
+            max_workers=min(self._scan_segments, CHANGE_SHARDS),
+            thread_name_prefix="mirror-delta",
+        ) as executor:
+            shards = executor.map(
+                lambda shard: self._read_pages(
+                    self._ddb_client.query,
+                    {
+                        "TableName": self._ddb_table_name,
+                        "IndexName": CHANGES_INDEX,
+                        "KeyConditionExpression": (
+                            "change_shard = :shard AND updated_at >= :since"
+                        ),
+                        "ExpressionAttributeValues": {
+                            ":shard": {"N": str(shard)},
+                            ":since": {"N": str(updated_since)},
+                        },
+                    },
+                ),
+                range(CHANGE_SHARDS),
+            )
+            return [item for shard_items in shards for item in shard_items]
+
+    @staticmethod
+    def _read_pages(operation: Callable[..., dict], kwargs: dict) -> List[dict]:
+        """Run a Scan or Query, following LastEvaluatedKey, and return the decoded items."""
+        items = []
+        while True:
+            response = operation(**kwargs)
+            items.extend(decode_item(item) for item in response["Items"])
+            if not response.get("LastEvaluatedKey"):
+                return items
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
@@ -0,0 +1,151 @@
+"""Module for the PatternMatcher class, which matches paths against many regex rules at once."""
+
+# Standard library imports
+import logging
+import re
+from typing import Dict, List, Match, Optional, Pattern, Sequence
+
+# Local application / library specific imports
+from ..models.database import RedirectPatternOption
+from ..models.resolution import Location
+
+logger = logging.getLogger(__name__)
+
+# References to capture groups in targets, e.g. '$1'. '$0' is the whole path.
+GROUP_REFERENCE = re.compile(r"\$(\d+)")
+# Characters that end the literal prefix of a pattern. A quantifier also takes
+# back the literal before it, which it makes optional or repeatable.
+SPECIAL_CHARACTERS = frozenset(".^$*+?{}[]()|\\")
+QUANTIFIERS = frozenset("*+?{")
+
+
+def compile_pattern(pattern: str, target: str) -> Pattern:
+    """
+    Compile the pattern of a rule, checking the group references of its target.
+
+    Raises a ValueError if the pattern is no valid regex, or the target refers to
+    a group the pattern doesn't have, e.g. '$2' with a single group.
+    """
+    try:
+        regex = re.compile(pattern)
+    except re.error as error:
+        raise ValueError(f"Invalid pattern {pattern!r}: {error}") from error
+    for reference in GROUP_REFERENCE.finditer(target):
+        if int(reference.group(1)) > regex.groups:
+            raise ValueError(
+                f"Target {target!r} refers to {reference.group(0)}, but pattern "
+                f"{pattern!r} has {regex.groups} group(s)"
+            )
+    return regex
+
+
+def expand_target(match: Match, target: str) -> str:
+    """Replace the group references of a target with the groups of a match."""
+    return GROUP_REFERENCE.sub(
+        lambda reference: match.group(int(reference.group(1))) or "", target
+    )
+
+
+def literal_prefix(pattern: str) -> str:
+    """Return the literal text every path matching the pattern starts with."""
+    if "|" in pattern:
+        # A top-level alternation can start with either branch.
+        return ""
+
+    prefix: List[str] = []
+    index = 0
+    while index < len(pattern):
+        character = pattern[index]
+        if character == "\\" and index + 1 < len(pattern):
+            escaped = pattern[index + 1]
+            if escaped.isalnum():
+                # A class like '\d', or a backreference
+                break
+            literal, index = escaped, index + 2
+        elif character in SPECIAL_CHARACTERS:
+            break
+        else:
+            literal, index = character, index + 1
+
+        if index < len(pattern) and pattern[index] in QUANTIFIERS:
+            break
+        prefix.append(literal)
+    return "".join(prefix)
+
+
+class _Node:
+    """A trie node for one prefix character, holding the rules with that prefix."""
+
+    __slots__ = ("children", "indexes")
+
+    def __init__(self) -> None:
+        """Construct a new, empty node."""
+        self.children: Dict[str, "_Node"] = {}
+        self.indexes: List[int] = []
+
+
+class PatternMatcher:
+    """
+    Matches request paths against all regex rules of a domain in a single pass.
+
+    The rules are compiled once into a trie over the literal prefixes of their
+    patterns, e.g. '/blog/' for '/blog/(\\d{4})/(.*)', in which the path is looked
+    up character by character. Only the rules whose prefix the path starts with
+    are evaluated, so a path costs one walk of at most its own length, plus the
+    few regexes left, regardless of the number of rules.
+
+    A pattern has to match the whole path. When several match, the first one in
+    the given order wins. '$1', '$2' etc. in the target are replaced with the
+    groups captured by the pattern. Rules whose pattern doesn't compile, or whose
+    target refers to a group it doesn't have, are logged and left out, so they
+    can't fail the requests for the other rules of the domain.
+
+    A union of all patterns in a single regex was considered as well, but Python's
+    regex engine saves every capture group on every alternative it backtracks
+    from, which made it ten times slower than evaluating 1000 rules one by one.
+    """
+
+    def __init__(self, options: Sequence[RedirectPatternOption]) -> None:
+        """Compile the patterns of the options into a single matcher."""
+        self._options: List[RedirectPatternOption] = []
+        self._regexes: List[Pattern] = []
+        self._root = _Node()
+
+        for option in options:
+            try:
+                regex = compile_pattern(option.pattern, option.target)
+            except ValueError as error:
+                logger.warning("Skipping the rule of %s: %s", option.domain, error)
+                continue
+            index = len(self._options)
+            self._options.append(option)
+            self._regexes.append(regex)
+            node = self._root
+            for character in literal_prefix(option.pattern):
+                node = node.children.setdefault(character, _Node())
+            node.indexes.append(index)
+
+    def __len__(self) -> int:
+        """Return the number of patterns in the matcher."""
+        return len(self._options)
+
+    def candidates(self, request_path: str) -> List[int]:
+        """Return the indexes of the rules the path could match, in rule order."""
+        node = self._root
+        indexes = list(node.indexes)
+        for character in request_path:
+            node = node.children.get(character)
+            if node is None:
+                break
+            indexes.extend(node.indexes)
+        indexes.sort()
+        return indexes
+
+    def match(self, request_path: str) -> Optional[Location]:
+        """Return the target of the first pattern matching the path, or None."""
+        for index in self.candidates(request_path):
+            match = self._regexes[index].fullmatch(request_path)
+            if match is not None:
+                option = self._options[index]
+                return Location(expand_target(match, option.target), option.cache_ttl)
+        return None
@@ -0,0 +1,144 @@
+"""Module for the InvocationProfiler class, which profiles a sample of live invocations."""
+
+# Standard library imports
+import cProfile
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Callable, Optional, TextIO
+
+# The number of hot spots and allocation sites written per report.
+DEFAULT_TOP = 25
+
+
+class InvocationProfiler:
+    """
+    Profiles one in `every` invocations with cProfile, and optionally tracemalloc.
+
+    The statistics are aggregated over the lifetime of the execution environment
+    and written to the log as a single JSON line, at most once per `dump_interval`
+    seconds and on dump(). The interval is checked after every invocation, sampled
+    or not, since Lambda freezes and shuts environments down without running any
+    exit handlers, so nothing is written at shutdown. cProfile only sees the thread
+    that handles the invocation, so lookups on worker threads show up as waits.
+    Allocation sites are those of memory still allocated when an invocation ends,
+    i.e. what it added to caches, buffers and the like.
+    """
+
+    def __init__(
+        self,
+        every: int,
+        trace_allocations: bool = False,
+        dump_interval: float = 300.0,
+        top: int = DEFAULT_TOP,
+        stream: Optional[TextIO] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Construct a new InvocationProfiler."""
+        self._every = max(1, every)
+        self._trace_allocations = trace_allocations
+        self._dump_interval = dump_interval
+        self._top = top
+        self._stream = stream
+        self._clock = clock
+        self._last_dump = clock()
+        self._invocations = 0
+        self._profiled_invocations = 0
+        self._stats: Optional[pstats.Stats] = None
+        self._allocated_bytes: Counter = Counter()
+        self._allocated_blocks: Counter = Counter()
+
+    def run(self, function: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call function, profiling the call if it is one of the sampled invocations."""
+        self._invocations += 1
+        try:
+            # The first invocation is sampled, so the cold start is always covered.
+            if (self._invocations - 1) % self._every:
+                return function(*args, **kwargs)
+            return self._profile(function, *args, **kwargs)
+        finally:
+            if self._clock() - self._last_dump >= self._dump_interval:
+                self.dump()
+
+    def _profile(self, function: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call function with cProfile, and tracemalloc if enabled, and aggregate the results."""
+        start_tracing = self._trace_allocations and not tracemalloc.is_tracing()
+        if start_tracing:
+            tracemalloc.start()
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profile.disable()
+            if self._trace_allocations:
+                self._add_snapshot(tracemalloc.take_snapshot())
+            if start_tracing:
+                tracemalloc.stop()
+            self._add_profile(profile)
+
+    def _add_profile(self, profile: cProfile.Profile) -> None:
+        """Merge the statistics of a profiled invocation into the aggregate."""
+        self._profiled_invocations += 1
+        if self._stats is None:
+            self._stats = pstats.Stats(profile)
+        else:
+            self._stats.add(profile)
+
+    def _add_snapshot(self, snapshot: tracemalloc.Snapshot) -> None:
+        """Merge the allocation sites of a profiled invocation into the aggregate."""
+        snapshot = snapshot.filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)]
+        )
+        for statistic in snapshot.statistics("lineno"):
+            frame = statistic.traceback[0]
+            site = f"{frame.filename}:{frame.lineno}"
+            self._allocated_bytes[site] += statistic.size
+            self._allocated_blocks[site] += statistic.count
+
+    def report(self) -> dict:
+        """Return the top hot spots and allocation sites aggregated so far."""
+        hot_spots = []
+        if self._stats is not None:
+            rows = sorted(
+                self._stats.stats.items(),  # pylint: disable=no-member
+                key=lambda row: row[1][2],
+                reverse=True,
+            )
+            for (filename, lineno, function), row in rows[: self._top]:
+                _, calls, own, cumulative, _ = row
+                hot_spots.append(
+                    {
+                        "function": f"{filename}:{lineno}({function})",
+                        "calls": calls,
+                        "own_ms": round(own * 1000, 3),
+                        "cumulative_ms": round(cumulative * 1000, 3),
+                    }
+                )
+
+        allocation_sites = [
+            {
+                "site": site,
+                "kib": round(size / 1024, 1),
+                "blocks": self._allocated_blocks[site],
+            }
+            for site, size in self._allocated_bytes.most_common(self._top)
+        ]
+        return {
+            "invocations": self._invocations,
+            "profiled_invocations": self._profiled_invocations,
+            "hot_spots": hot_spots,
+            "allocation_sites": allocation_sites,
+        }
+
+    def dump(self) -> None:
+        """Write the aggregated report to the log as one JSON line."""
+        self._last_dump = self._clock()
+        if not self._profiled_invocations:
+            return
+        stream = self._stream or sys.stdout
+        stream.write(json.dumps({"profile": self.report()}) + "\n")
+        stream.flush()
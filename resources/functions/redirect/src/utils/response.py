@@ -0,0 +1,52 @@
+"""Module for building the responses to resolved requests."""
+
+# Standard library imports
+from urllib.parse import urlencode
+
+# Local application / library specific imports
+from ..models.request import ApiGatewayRequest
+from ..models.resolution import Resolution
+from .http_cache import cache_headers
+
+
+def redirect_response(request: ApiGatewayRequest, resolution: Resolution) -> dict:
+    """
+    Return the Lambda proxy response for a resolved request.
+
+    That is a 404 if no redirect location was found, or a 301 with a 'Location'
+    header if it was. Either can carry caching headers, with the TTL of the
+    matching rule or the configured defaults.
+    """
+    # Add the resolved domain and, if configured, the caching headers.
+    base_headers = {"X-Resolved-Domain": resolution.domain} | cache_headers(
+        resolution.cache_ttl
+    )
+
+    # If a redirect location is not found, return a 404.
+    redirect_location = resolution.location
+    if not redirect_location:
+        return {"statusCode": 404, "headers": base_headers}
+
+    # A redirect location is found, so we add any query parameters
+    # from the original request to the redirect location. HTTP API and Function
+    # URL events have the query string as it was sent, so it's passed on as is.
+    if request.raw_query_string:
+        redirect_location += "?" + request.raw_query_string
+    elif request.query_params:
+        redirect_location += "?" + urlencode(request.query_params)
+
+    # Return a 301 redirect to the location retreived from DynamoDB.
+    return {
+        "statusCode": 301,
+        "headers": base_headers | {"Location": redirect_location},
+    }
+
+
+def alias_chain_error_response(request: ApiGatewayRequest) -> dict:
+    """
+    Return the Lambda proxy response for a request whose alias chain can't be followed.
+
+    That is a 508, since the chain loops or goes on for too many hops, without any
+    caching headers, so the chain is followed again once the aliases are fixed.
+    """
+    return {"statusCode": 508, "headers": {"X-Resolved-Domain": request.domain}}
@@ -0,0 +1,238 @@
+"""
+Module for the RoutingSnapshot class, a memory-mapped export of the redirects table.
+
+A snapshot file holds four sorted sections: aliases, redirects, fallbacks and
+regex patterns. Every section is a table of little-endian uint64 record offsets
+followed by the records themselves. A record is a uint32 key length, the UTF-8
+key and the value. Alias keys are the source domain, and their value is the UTF-8
+target domain; redirect, fallback and pattern keys are the domain and path (or
+pattern) separated by a NUL byte, and their value is the int32 cache TTL of the
+rule, -1 if it has none, followed by the UTF-8 target. Because records are
+sorted by key, a lookup is a binary search over the mmapped file, and the
+fallbacks or patterns of a domain form one contiguous range.
+"""
+
+# Standard library imports
+import mmap
+import os
+import struct
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Local application / library specific imports
+from ..models.database import (
+    Alias,
+    RedirectFallbackOption,
+    RedirectOption,
+    RedirectPatternOption,
+)
+from ..models.resolution import Location
+
+MAGIC = b"RDSNAP03"
+# Magic, generation timestamp, and a (record count, offset table offset) per section.
+HEADER = struct.Struct("<8sQ" + "QQ" * 4)
+OFFSET = struct.Struct("<Q")
+KEY_LENGTH = struct.Struct("<I")
+CACHE_TTL = struct.Struct("<i")
+# The cache TTL stored for rules without one of their own
+NO_CACHE_TTL = -1
+
+ALIASES, REDIRECTS, FALLBACKS, PATTERNS = range(4)
+
+
+def _path_key(domain: str, path: str) -> bytes:
+    """Return the record key for a domain and path."""
+    return f"{domain}\x00{path}".encode()
+
+
+def _rule_value(target: str, cache_ttl: Optional[int]) -> bytes:
+    """Return the record value for the target and cache TTL of a rule."""
+    return (
+        CACHE_TTL.pack(NO_CACHE_TTL if cache_ttl is None else cache_ttl)
+        + target.encode()
+    )
+
+
+def _parse_rule_value(value: bytes) -> Tuple[str, Optional[int]]:
+    """Return the target and cache TTL stored in the record value of a rule."""
+    (cache_ttl,) = CACHE_TTL.unpack_from(value)
+    target = value[CACHE_TTL.size :].decode()
+    return target, None if cache_ttl == NO_CACHE_TTL else cache_ttl
+
+
+class RoutingSnapshot:
+    """A read-only, memory-mapped view of a routing snapshot file."""
+
+    def __init__(self, path: str) -> None:
+        """Open and map a snapshot file."""
+        with open(path, "rb") as snapshot_file:
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.generated_at, *sections = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a routing snapshot")
+
+        # A (record count, offset table offset) pair per section
+        self._sections: List[Tuple[int, int]] = list(zip(sections[::2], sections[1::2]))
+
+    def close(self) -> None:
+        """Unmap the snapshot file."""
+        self._mmap.close()
+
+    def section_size(self, section: int) -> int:
+        """Return the number of records in a section."""
+        return self._sections[section][0]
+
+    def get_alias(self, domain: str) -> Optional[Alias]:
+        """Return the alias for a domain, or None if the snapshot has none."""
+        target_domain = self._find(ALIASES, domain.encode())
+        if target_domain is None:
+            return None
+        return Alias(source_domain=domain, target_domain=target_domain.decode())
+
+    def get_redirect_target(self, domain: str, path: str) -> Optional[Location]:
+        """Return the location of the exact redirect for a domain and path, or None."""
+        value = self._find(REDIRECTS, _path_key(domain, path))
+        if value is None:
+            return None
+        return Location(*_parse_rule_value(value))
+
+    def get_fallbacks(self, domain: str) -> List[RedirectFallbackOption]:
+        """Return the fallbacks of a domain in sort key order, like a DDB query would."""
+        fallbacks = []
+        for path, value in self._domain_records(FALLBACKS, domain):
+            target, cache_ttl = _parse_rule_value(value)
+            fallbacks.append(
+                RedirectFallbackOption(
+                    domain=domain, path=path, target=target, cache_ttl=cache_ttl
+                )
+            )
+        return fallbacks
+
+    def get_patterns(self, domain: str) -> List[RedirectPatternOption]:
+        """Return the regex rules of a domain in sort key order, like a DDB query would."""
+        patterns = []
+        for pattern, value in self._domain_records(PATTERNS, domain):
+            target, cache_ttl = _parse_rule_value(value)
+            patterns.append(
+                RedirectPatternOption(
+                    domain=domain, pattern=pattern, target=target, cache_ttl=cache_ttl
+                )
+            )
+        return patterns
+
+    def _domain_records(self, section: int, domain: str) -> Iterator[Tuple[str, bytes]]:
+        """Yield the path (or pattern) and value of every record of a domain in a section."""
+        prefix = f"{domain}\x00".encode()
+        index = self._lower_bound(section, prefix)
+        while index < self.section_size(section):
+            key, value = self._record(section, index)
+            if not key.startswith(prefix):
+                return
+            yield key[len(prefix) :].decode(), value
+            index += 1
+
+    def _find(self, section: int, key: bytes) -> Optional[bytes]:
+        """Return the value for a key in a section, or None."""
+        index = self._lower_bound(section, key)
+        if index < self.section_size(section):
+            record_key, value = self._record(section, index)
+            if record_key == key:
+                return value
+        return None
+
+    def _lower_bound(self, section: int, key: bytes) -> int:
+        """Return the index of the first record in a section with a key >= key."""
+        low, high = 0, self.section_size(section)
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(section, middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _record_offset(self, section: int, index: int) -> int:
+        """Return the file offset of a record."""
+        return OFFSET.unpack_from(self._mmap, self._sections[section][1] + 8 * index)[0]
+
+    def _key(self, section: int, index: int) -> bytes:
+        """Return the key of a record."""
+        offset = self._record_offset(section, index)
+        (key_length,) = KEY_LENGTH.unpack_from(self._mmap, offset)
+        start = offset + KEY_LENGTH.size
+        return self._mmap[start : start + key_length]
+
+    def _record(self, section: int, index: int) -> Tuple[bytes, bytes]:
+        """Return the key and value of a record."""
+        offset = self._record_offset(section, index)
+        end = self._record_offset(section, index + 1)
+        (key_length,) = KEY_LENGTH.unpack_from(self._mmap, offset)
+        start = offset + KEY_LENGTH.size
+        key = self._mmap[start : start + key_length]
+        return key, self._mmap[start + key_length : end]
+
+
+def write_snapshot(
+    path: str,
+    aliases: Iterable[Alias],
+    redirects: Iterable[RedirectOption],
+    fallbacks: Iterable[RedirectFallbackOption],
+    patterns: Iterable[RedirectPatternOption] = (),
+    generated_at: Optional[int] = None,
+) -> None:
+    """Write a snapshot file atomically, replacing any existing file at path."""
+    sections = [
+        sorted(
+            (alias.source_domain.encode(), alias.target_domain.encode())
+            for alias in aliases
+        ),
+        sorted(
+            (
+                _path_key(redirect.domain, redirect.path),
+                _rule_value(redirect.target, redirect.cache_ttl),
+            )
+            for redirect in redirects
+        ),
+        sorted(
+            (
+                _path_key(fallback.domain, fallback.path),
+                _rule_value(fallback.target, fallback.cache_ttl),
+            )
+            for fallback in fallbacks
+        ),
+        sorted(
+            (
+                _path_key(pattern.domain, pattern.pattern),
+                _rule_value(pattern.target, pattern.cache_ttl),
+            )
+            for pattern in patterns
+        ),
+    ]
+
+    header_values: List[int] = []
+    body = bytearray()
+    for records in sections:
+        table_offset = HEADER.size + len(body)
+        # One offset per record, plus one marking the end of the last record
+        record_offset = table_offset + OFFSET.size * (len(records) + 1)
+        offsets = bytearray()
+        data = bytearray()
+        for key, value in records:
+            offsets += OFFSET.pack(record_offset + len(data))
+            data += KEY_LENGTH.pack(len(key)) + key + value
+        offsets += OFFSET.pack(record_offset + len(data))
+        body += offsets + data
+        header_values += [len(records), table_offset]
+
+    header = HEADER.pack(
+        MAGIC,
+        int(time.time()) if generated_at is None else generated_at,
+        *header_values,
+    )
+
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as snapshot_file:
+        snapshot_file.write(header)
+        snapshot_file.write(body)
+    os.replace(temporary_path, path)
@@ -0,0 +1 @@
+"""Local stand-ins for AWS services, shared by tests and benchmarks."""
@@ -0,0 +1,367 @@
+"""Module for in-process stand-ins for a DynamoDB table and the low-level DynamoDB client."""
+
+# Standard library imports
+import random
+import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+# Local application / library specific imports
+from resources.functions.redirect.src.utils.dynamodb import (
+    decode_item,
+    decode_value,
+    encode_item,
+)
+
+_COMPARISONS = {
+    "=": lambda left, right: left == right,
+    "<>": lambda left, right: left != right,
+    "<": lambda left, right: left < right,
+    "<=": lambda left, right: left <= right,
+    ">": lambda left, right: left > right,
+    ">=": lambda left, right: left >= right,
+}
+_CONDITION = re.compile(r"^\s*(#?\w+)\s*(=|<>|<=|>=|<|>)\s*(:\w+)\s*$")
+
+
+class StubTable:
+    """
+    An in-memory table, queried through a StubDynamoDBClient.
+
+    Items are plain Python dicts, kept sorted by (pk, sk) like a DynamoDB
+    partition. Every call sleeps for `latency` seconds first, which is either a
+    constant or a callable returning a (random) latency per call, to simulate
+    network round trips. Calls and their concurrency are recorded for assertions.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[dict] = (),
+        latency: Union[float, Callable[[], float]] = 0.0,
+        page_size: int = 1000,
+        unprocessed_keys_per_call: int = 0,
+        unprocessed_items_per_call: int = 0,
+    ) -> None:
+        """Construct a new StubTable."""
+        self._items_by_key = {(item["pk"], item["sk"]): item for item in items}
+        self._items = self._sorted_items()
+        self.latency = latency
+        self.page_size = page_size
+        self.unprocessed_keys_per_call = unprocessed_keys_per_call
+        self.unprocessed_items_per_call = unprocessed_items_per_call
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.calls: List[str] = []
+        self.max_concurrent_calls = 0
+
+    @property
+    def items(self) -> List[dict]:
+        """Return all items, sorted by primary key."""
+        return self._items
+
+    def get(self, partition_key: str, sort_key: str) -> Optional[dict]:
+        """Return the item with the given primary key, or None."""
+        return self._items_by_key.get((partition_key, sort_key))
+
+    def put(self, item: dict) -> None:
+        """Add or replace an item, e.g. to simulate a write by another process."""
+        self.write([item], [])
+
+    def write(self, items: Iterable[dict], deleted_keys: Iterable[tuple]) -> None:
+        """Add or replace items and delete keys, re-sorting the table only once."""
+        with self._lock:
+            for item in items:
+                self._items_by_key[(item["pk"], item["sk"])] = item
+            for key in deleted_keys:
+                self._items_by_key.pop(key, None)
+            self._items = self._sorted_items()
+
+    def _sorted_items(self) -> List[dict]:
+        """Return all items sorted by (pk, sk)."""
+        return sorted(
+            self._items_by_key.values(), key=lambda item: (item["pk"], item["sk"])
+        )
+
+    @contextmanager
+    def track_call(self, operation: str) -> Iterator[None]:
+        """Record a call and its concurrency while simulating its latency."""
+        with self._lock:
+            self.calls.append(operation)
+            self._in_flight += 1
+            self.max_concurrent_calls = max(self.max_concurrent_calls, self._in_flight)
+        try:
+            latency = self.latency() if callable(self.latency) else self.latency
+            if latency > 0:
+                time.sleep(latency)
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+
+class StubDynamoDBClient:
+    """An in-memory stand-in for the low-level boto3 DynamoDB client."""
+
+    def __init__(self, tables: Dict[str, StubTable]) -> None:
+        """Construct a new StubDynamoDBClient."""
+        self._tables = tables
+
+    def get_item(self, **kwargs) -> dict:
+        """Return the item with the given primary key, like GetItem."""
+        table = self._tables[kwargs["TableName"]]
+        with table.track_call("get_item"):
+            item = table.get(**_decode_key(kwargs["Key"]))
+            response = _consumed_capacity(kwargs, kwargs["TableName"], 0.5)
+            if item is not None:
+                response["Item"] = encode_item(_project(item, kwargs))
+            return response
+
+    def query(self, **kwargs) -> dict:
+        """Return the items matching a KeyConditionExpression, one page at a time."""
+        table = self._tables[kwargs["TableName"]]
+        with table.track_call("query"):
+            key_condition = _parse_condition(kwargs["KeyConditionExpression"], kwargs)
+            items = [item for item in table.items if key_condition(item)]
+            response = _page(table, items, kwargs)
+            response.update(
+                _consumed_capacity(
+                    kwargs, kwargs["TableName"], 0.5 * max(1, response["ScannedCount"])
+                )
+            )
+            return response
+
+    def scan(self, **kwargs) -> dict:
+        """Return all items of the table (or of one segment), one page at a time."""
+        table = self._tables[kwargs["TableName"]]
+        with table.track_call("scan"):
+            items = table.items
+            if "TotalSegments" in kwargs:
+                items = [
+                    item
+                    for item in items
+                    if _segment(item["pk"], kwargs["TotalSegments"])
+                    == kwargs["Segment"]
+                ]
+            return _page(table, items, kwargs)
+
+    def batch_get_item(  # pylint: disable=invalid-name
+        self, RequestItems: dict, ReturnConsumedCapacity: str = "NONE"
+    ) -> dict:
+        """Return the requested items per table, like BatchGetItem."""
+        if sum(len(request["Keys"]) for request in RequestItems.values()) > 100:
+            raise ValueError("Too many items requested for the BatchGetItem call")
+
+        responses, unprocessed_keys, consumed_capacity = {}, {}, []
+        for table_name, request in RequestItems.items():
+            table = self._tables[table_name]
+            with table.track_call("batch_get_item"):
+                keys = request["Keys"]
+                processed_count = max(len(keys) - table.unprocessed_keys_per_call, 1)
+                items = []
+                for key in keys[:processed_count]:
+                    item = table.get(**_decode_key(key))
+                    if item is not None:
+                        items.append(_project(item, request))
+                responses[table_name] = [encode_item(item) for item in items]
+                consumed_capacity.append(
+                    {"TableName": table_name, "CapacityUnits": 0.5 * processed_count}
+                )
+                if keys[processed_count:]:
+                    unprocessed_keys[table_name] = dict(
+                        request, Keys=keys[processed_count:]
+                    )
+        response = {"Responses": responses, "UnprocessedKeys": unprocessed_keys}
+        if ReturnConsumedCapacity != "NONE":
+            response["ConsumedCapacity"] = consumed_capacity
+        return response
+
+    def batch_write_item(  # pylint: disable=invalid-name
+        self, RequestItems: dict
+    ) -> dict:
+        """Put and delete items per table, like BatchWriteItem."""
+        if sum(len(requests) for requests in RequestItems.values()) > 25:
+            raise ValueError("Too many items requested for the BatchWriteItem call")
+
+        unprocessed_items = {}
+        for table_name, requests in RequestItems.items():
+            table = self._tables[table_name]
+            with table.track_call("batch_write_item"):
+                keys = [
+                    tuple(
+                        decode_value(value)
+                        for value in _write_request_key(request).values()
+                    )
+                    for request in requests
+                ]
+                if len(set(keys)) != len(keys):
+                    raise ValueError("Provided list of item keys contains duplicates")
+
+                processed_count = max(
+                    len(requests) - table.unprocessed_items_per_call, 1
+                )
+                table.write(
+                    [
+                        decode_item(request["PutRequest"]["Item"])
+                        for request in requests[:processed_count]
+                        if "PutRequest" in request
+                    ],
+                    [
+                        key
+                        for request, key in zip(requests[:processed_count], keys)
+                        if "DeleteRequest" in request
+                    ],
+                )
+                if requests[processed_count:]:
+                    unprocessed_items[table_name] = requests[processed_count:]
+        return {"UnprocessedItems": unprocessed_items}
+
+    def update_item(self, **kwargs) -> dict:
+        """Apply an 'ADD <attribute> :<value>' UpdateExpression to an item, like UpdateItem."""
+        table = self._tables[kwargs["TableName"]]
+        with table.track_call("update_item"):
+            match = re.fullmatch(
+                r"\s*ADD\s+(\w+)\s+(:\w+)\s*", kwargs["UpdateExpression"]
+            )
+            if not match:
+                raise NotImplementedError(
+                    f"Unsupported update: {kwargs['UpdateExpression']}"
+                )
+            name, placeholder = match.groups()
+            key = _decode_key(kwargs["Key"])
+            item = dict(
+                table.get(**key) or {"pk": key["partition_key"], "sk": key["sort_key"]}
+            )
+            item[name] = item.get(name, 0) + decode_value(
+                kwargs["ExpressionAttributeValues"][placeholder]
+            )
+            table.put(item)
+            return {"Attributes": encode_item(item)}
+
+
+def tail_latency(
+    median: float,
+    slow: float,
+    slow_probability: float,
+    seed: Optional[int] = None,
+) -> Callable[[], float]:
+    """
+    Return a latency distribution with a long tail, for StubTable(latency=...).
+
+    Most calls take around `median` seconds, log-normally distributed like real
+    network round trips, but a `slow_probability` fraction of them take `slow`
+    seconds instead, like a DDB request that hits a busy storage node.
+    """
+    rng = random.Random(seed)
+
+    def latency() -> float:
+        if rng.random() < slow_probability:
+            return slow
+        return rng.lognormvariate(0, 0.25) * median
+
+    return latency
+
+
+def _consumed_capacity(kwargs: dict, table_name: str, capacity_units: float) -> dict:
+    """Return the ConsumedCapacity of a read if it was requested, as eventually consistent."""
+    if kwargs.get("ReturnConsumedCapacity", "NONE") == "NONE":
+        return {}
+    return {
+        "ConsumedCapacity": {"TableName": table_name, "CapacityUnits": capacity_units}
+    }
+
+
+def _write_request_key(request: dict) -> dict:
+    """Return the primary key of a BatchWriteItem put or delete request."""
+    if "PutRequest" in request:
+        item = request["PutRequest"]["Item"]
+        return {"pk": item["pk"], "sk": item["sk"]}
+    return request["DeleteRequest"]["Key"]
+
+
+def _decode_key(key: dict) -> Dict[str, str]:
+    """Convert a low-level primary key to get() keyword arguments."""
+    return {
+        "partition_key": decode_value(key["pk"]),
+        "sort_key": decode_value(key["sk"]),
+    }
+
+
+def _page(table: StubTable, items: List[dict], kwargs: dict) -> dict:
+    """Return the page of items after ExclusiveStartKey, with a LastEvaluatedKey."""
+    start = 0
+    if kwargs.get("ExclusiveStartKey"):
+        start_key = decode_item(kwargs["ExclusiveStartKey"])
+        start = next(
+            (
+                index + 1
+                for index, item in enumerate(items)
+                if (item["pk"], item["sk"]) == (start_key["pk"], start_key["sk"])
+            ),
+            len(items),
+        )
+
+    limit = min(kwargs.get("Limit", table.page_size), table.page_size)
+    page = items[start : start + limit]
+    # Like DynamoDB, filters apply after a page has been read
+    if kwargs.get("FilterExpression"):
+        item_filter = _parse_condition(kwargs["FilterExpression"], kwargs)
+        filtered_page = [item for item in page if item_filter(item)]
+    else:
+        filtered_page = page
+
+    response = {
+        "Items": [encode_item(_project(item, kwargs)) for item in filtered_page],
+        "Count": len(filtered_page),
+        "ScannedCount": len(page),
+    }
+    if start + limit < len(items):
+        last_item = page[-1]
+        response["LastEvaluatedKey"] = encode_item(
+            {"pk": last_item["pk"], "sk": last_item["sk"]}
+        )
+    return response
+
+
+def _segment(partition_key: str, total_segments: int) -> int:
+    """Return the scan segment of a partition key, stable across processes."""
+    return zlib.crc32(partition_key.encode()) % total_segments
+
+
+def _parse_condition(expression: str, kwargs: dict) -> Callable[[dict], bool]:
+    """Convert an expression of ANDed comparisons to a predicate over items."""
+    names = kwargs.get("ExpressionAttributeNames", {})
+    values = {
+        placeholder: decode_value(value)
+        for placeholder, value in kwargs.get("ExpressionAttributeValues", {}).items()
+    }
+
+    comparisons: List[Tuple[str, Callable, object]] = []
+    for clause in re.split(r"\s+AND\s+", expression, flags=re.IGNORECASE):
+        match = _CONDITION.match(clause)
+        if not match:
+            raise NotImplementedError(f"Unsupported condition: {clause}")
+        name, operator, placeholder = match.groups()
+        comparisons.append(
+            (names.get(name, name), _COMPARISONS[operator], values[placeholder])
+        )
+
+    return lambda item: all(
+        name in item and compare(item[name], value)
+        for name, compare, value in comparisons
+    )
+
+
+def _project(item: dict, kwargs: dict) -> dict:
+    """Return only the attributes named in a ProjectionExpression."""
+    projection_expression = kwargs.get("ProjectionExpression")
+    if not projection_expression:
+        return dict(item)
+    names = kwargs.get("ExpressionAttributeNames", {})
+    projected = [
+        names.get(name.strip(), name.strip())
+        for name in projection_expression.split(",")
+    ]
+    return {name: item[name] for name in projected if name in item}
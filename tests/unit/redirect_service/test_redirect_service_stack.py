@@ -0,0 +1,266 @@
+"""Test module for the redirect service stack, asserting on the synthesized template."""
+
+# pylint: disable=import-outside-toplevel
+
+# Related third party imports
+import pytest
+
+
+def synth_template(context: dict):
+    """Synthesize the stack with the given context and return its template."""
+    import aws_cdk as cdk
+    from aws_cdk.assertions import Template
+
+    from redirect_service.redirect_service_stack import RedirectServiceStack
+
+    app = cdk.App(context=context)
+    stack = RedirectServiceStack(app, "RedirectServiceStack")
+    return Template.from_stack(stack)
+
+
+@pytest.fixture(name="edge_template", scope="module")
+def fixture_edge_template():
+    """Return the template synthesized with edge caching enabled."""
+    return synth_template({"edge_caching": "true"})
+
+
+class TestRedirectServiceStack:
+    """Test class for the RedirectServiceStack."""
+
+    @staticmethod
+    def test_without_edge_caching():
+        """Verify the custom domains point to API Gateway, without caching headers."""
+        template = synth_template({})
+
+        template.resource_count_is("AWS::CloudFront::Distribution", 0)
+        template.resource_count_is("AWS::ApiGateway::DomainName", 6)
+        environment = template.find_resources("AWS::Lambda::Function")
+        for function in environment.values():
+            variables = function["Properties"]["Environment"]["Variables"]
+            assert "REDIRECT_CACHE_SECONDS" not in variables
+            assert "ORIGIN_SECRET" not in variables
+        template.resource_count_is("AWS::SecretsManager::Secret", 0)
+
+    @staticmethod
+    def test_table_indexes_changes_for_mirrors(edge_template):
+        """Verify the table has the sparse index of changed rules that mirror deltas query."""
+        from aws_cdk.assertions import Match
+
+        edge_template.has_resource_properties(
+            "AWS::DynamoDB::Table",
+            {
+                "GlobalSecondaryIndexes": [
+                    Match.object_like(
+                        {
+                            "IndexName": "UpdatedAtIndex",
+                            "KeySchema": [
+                                {"AttributeName": "change_shard", "KeyType": "HASH"},
+                                {"AttributeName": "updated_at", "KeyType": "RANGE"},
+                            ],
+                            "Projection": {"ProjectionType": "ALL"},
+                        }
+                    )
+                ]
+            },
+        )
+
+    @staticmethod
+    def test_cache_policy_keys_on_host_path_and_query(edge_template):
+        """Verify responses are cached per forwarded host and query string, by their headers."""
+        from aws_cdk.assertions import Match
+
+        edge_template.resource_count_is("AWS::CloudFront::CachePolicy", 1)
+        edge_template.has_resource_properties(
+            "AWS::CloudFront::CachePolicy",
+            {
+                "CachePolicyConfig": Match.object_like(
+                    {
+                        "DefaultTTL": 0,
+                        "MinTTL": 0,
+                        "ParametersInCacheKeyAndForwardedToOrigin": Match.object_like(
+                            {
+                                "HeadersConfig": {
+                                    "HeaderBehavior": "whitelist",
+                                    "Headers": ["x-forwarded-host"],
+                                },
+                                "QueryStringsConfig": {"QueryStringBehavior": "all"},
+                                "CookiesConfig": {"CookieBehavior": "none"},
+                            }
+                        ),
+                    }
+                )
+            },
+        )
+        edge_template.has_resource_properties(
+            "AWS::CloudFront::Function",
+            {"FunctionCode": Match.string_like_regexp("x-forwarded-host")},
+        )
+
+    @staticmethod
+    def test_distributions_front_the_api(edge_template):
+        """Verify every hosted zone gets a distribution, which its records point to."""
+        from aws_cdk.assertions import Match
+
+        edge_template.resource_count_is("AWS::CloudFront::Distribution", 3)
+        edge_template.resource_count_is("AWS::ApiGateway::DomainName", 0)
+        edge_template.has_resource_properties(
+            "AWS::CloudFront::Distribution",
+            {
+                "DistributionConfig": Match.object_like(
+                    {
+                        "Aliases": [
+                            "auth.awsnews.l15d.com",
+                            "api.awsnews.l15d.com",
+                            "awsnews.l15d.com",
+                        ],
+                        "CustomErrorResponses": [
+                            {"ErrorCode": 404, "ErrorCachingMinTTL": 0}
+                        ],
+                        "DefaultCacheBehavior": Match.object_like(
+                            {
+                                "FunctionAssociations": [
+                                    Match.object_like({"EventType": "viewer-request"})
+                                ]
+                            }
+                        ),
+                    }
+                )
+            },
+        )
+        # An A and an AAAA record for each of the six domain names
+        records = edge_template.find_resources(
+            "AWS::Route53::RecordSet",
+            {"Properties": {"AliasTarget": Match.object_like({})}},
+        )
+        assert len(records) == 12
+        for record in records.values():
+            resource, attribute = record["Properties"]["AliasTarget"]["DNSName"][
+                "Fn::GetAtt"
+            ]
+            assert "Distribution" in resource
+            assert attribute == "DomainName"
+
+    @staticmethod
+    def test_origin_requests_carry_the_origin_secret(edge_template):
+        """Verify every distribution sends the secret the function needs to trust its host."""
+        edge_template.resource_count_is("AWS::SecretsManager::Secret", 1)
+        functions = edge_template.find_resources(
+            "AWS::Lambda::Function",
+            {"Properties": {"Handler": "src.index.event_handler"}},
+        )
+        (function,) = functions.values()
+        origin_secret = function["Properties"]["Environment"]["Variables"][
+            "ORIGIN_SECRET"
+        ]
+
+        distributions = edge_template.find_resources("AWS::CloudFront::Distribution")
+        assert len(distributions) == 3
+        for distribution in distributions.values():
+            (origin,) = distribution["Properties"]["DistributionConfig"]["Origins"]
+            assert origin["OriginCustomHeaders"] == [
+                {"HeaderName": "x-origin-secret", "HeaderValue": origin_secret}
+            ]
+
+    @staticmethod
+    def test_edge_caching_sets_default_cache_ttls(edge_template):
+        """Verify the function sends caching headers for redirects and 404s."""
+        from aws_cdk.assertions import Match
+
+        from redirect_service.redirect_service_stack import (
+            EDGE_NOT_FOUND_CACHE_SECONDS,
+            EDGE_REDIRECT_CACHE_SECONDS,
+        )
+
+        edge_template.has_resource_properties(
+            "AWS::Lambda::Function",
+            {
+                "Environment": {
+                    "Variables": Match.object_like(
+                        {
+                            "REDIRECT_CACHE_SECONDS": str(EDGE_REDIRECT_CACHE_SECONDS),
+                            "NOT_FOUND_CACHE_SECONDS": str(
+                                EDGE_NOT_FOUND_CACHE_SECONDS
+                            ),
+                        }
+                    )
+                }
+            },
+        )
+
+    @staticmethod
+    def test_edge_redirect_function_reads_compiled_store(tmp_path, monkeypatch):
+        """Verify a compiled KeyValueStore is deployed with the function resolving from it."""
+        import json
+
+        from aws_cdk.assertions import Match
+
+        from redirect_service.constructs import proxy
+        from tools.compile_kvs import StoreEntry, import_file_data, render_function
+
+        (tmp_path / proxy.EDGE_FUNCTION_PATH).write_text(render_function())
+        (tmp_path / proxy.EDGE_STORE_IMPORT_PATH).write_text(
+            json.dumps(import_file_data([StoreEntry(key="a|b.com", value="c.com")]))
+        )
+        monkeypatch.setattr(proxy, "EDGE_FUNCTION_ASSET", str(tmp_path))
+
+        template = synth_template({"edge_caching": "true"})
+
+        template.resource_count_is("AWS::CloudFront::KeyValueStore", 1)
+        template.has_resource_properties(
+            "AWS::CloudFront::KeyValueStore",
+            {"ImportSource": Match.object_like({"SourceType": "S3"})},
+        )
+        functions = template.find_resources("AWS::CloudFront::Function")
+        assert len(functions) == 1
+        function = next(iter(functions.values()))["Properties"]
+        assert function["FunctionConfig"]["Runtime"] == "cloudfront-js-2.0"
+        (association,) = function["FunctionConfig"]["KeyValueStoreAssociations"]
+        assert association["KeyValueStoreARN"]["Fn::GetAtt"][1] == "Arn"
+        # The placeholder is replaced with the ID of the store
+        assert "__KVS_ID__" not in json.dumps(function["FunctionCode"])
+
+    @staticmethod
+    def test_http_api_ingress():
+        """Verify an HTTP API with payload format 2.0 serves the custom domains."""
+        from aws_cdk.assertions import Match
+
+        template = synth_template({"ingress": "http"})
+
+        template.resource_count_is("AWS::ApiGateway::RestApi", 0)
+        template.resource_count_is("AWS::ApiGatewayV2::DomainName", 6)
+        template.resource_count_is("AWS::ApiGatewayV2::ApiMapping", 6)
+        template.has_resource_properties(
+            "AWS::ApiGatewayV2::Integration",
+            {"IntegrationType": "AWS_PROXY", "PayloadFormatVersion": "2.0"},
+        )
+        routes = template.find_resources("AWS::ApiGatewayV2::Route")
+        assert sorted(route["Properties"]["RouteKey"] for route in routes.values()) == [
+            "GET /",
+            "GET /{proxy+}",
+        ]
+        template.has_resource_properties(
+            "AWS::Lambda::Permission",
+            {
+                "Principal": "apigateway.amazonaws.com",
+                "Action": "lambda:InvokeFunction",
+            },
+        )
+        template.has_resource_properties(
+            "AWS::Route53::RecordSet",
+            {"AliasTarget": Match.object_like({})},
+        )
+
+    @staticmethod
+    def test_function_url_ingress():
+        """Verify a Function URL is the origin of the distributions, and needs them."""
+        template = synth_template({"ingress": "function_url", "edge_caching": "true"})
+
+        template.resource_count_is("AWS::ApiGateway::RestApi", 0)
+        template.resource_count_is("AWS::Lambda::Url", 1)
+        template.has_resource_properties("AWS::Lambda::Url", {"AuthType": "NONE"})
+        template.resource_count_is("AWS::CloudFront::Distribution", 3)
+
+        with pytest.raises(ValueError, match="edge caching"):
+            synth_template({"ingress": "function_url"})
+        with pytest.raises(ValueError, match="Unknown ingress mode"):
+            synth_template({"ingress": "grpc"})
@@ -5,6 +5,9 @@
 # Standard library imports
 from unittest.mock import MagicMock
 
+# Related third party imports
+import pytest
+
 # Local application / library specific imports
 from resources.functions.redirect.src.models.request import ApiGatewayRequest
 from resources.functions.redirect.src.models.database import Alias
@@ -22,11 +25,8 @@ class TestRedirectController:
         )
 
         controller = RedirectController(ddb_table_name="mock_table")
-        controller._ddb_table.query = MagicMock(
+        controller._ddb_client.get_item = MagicMock(
             return_value={
-                "Items": [],
-                "Count": 0,
-                "ScannedCount": 0,
                 "ResponseMetadata": {
                     # Stripped
                 },
@@ -52,17 +52,14 @@ class TestRedirectController:
         )
 
         controller = RedirectController(ddb_table_name="mock_table")
-        controller._ddb_table.query = MagicMock(
+        controller._ddb_client.get_item = MagicMock(
             return_value={
-                "Items": [
-                    {
-                        "pk": "DomainAlias#j3qfzmnyjl.execute-api.eu-west-1.amazonaws.com",
-                        "sk": "DomainAlias#j3qfzmnyjl.execute-api.eu-west-1.amazonaws.com",
-                        "target_domain": "example.com",
-                    }
-                ],
-                "Count": 1,
-                "ScannedCount": 1,
+                "Item": {
+                    "pk": {
+                        "S": "DomainAlias#j3qfzmnyjl.execute-api.eu-west-1.amazonaws.com"
+                    },
+                    "target_domain": {"S": "example.com"},
+                },
                 "ResponseMetadata": {
                     # Stripped
                 },
@@ -93,21 +90,8 @@ class TestRedirectController:
         )
 
         controller = RedirectController(ddb_table_name="mock_table")
-        controller._get_redirect_from_ddb = MagicMock(
-            return_value={
-                "Items": [
-                    {
-                        "pk": "Redirect#j3qfzmnyjl.execute-api.eu-west-1.amazonaws.com",
-                        "sk": "/",
-                        "target": "https://example.com",
-                    }
-                ],
-                "Count": 1,
-                "ScannedCount": 1,
-                "ResponseMetadata": {
-                    # Stripped
-                },
-            }
+        controller._storage.get_redirect_item = MagicMock(
+            return_value={"target": "https://example.com"}
         )
 
         # 2. ACT
@@ -127,17 +111,8 @@ class TestRedirectController:
         )
 
         controller = RedirectController(ddb_table_name="mock_table")
-        controller._get_redirect_from_ddb = MagicMock(
-            return_value={
-                "Items": [],
-                "Count": 0,
-                "ScannedCount": 3,
-                "ResponseMetadata": {
-                    # Stripped
-                },
-            }
-        )
-        controller._get_redirect_fallbacks_from_ddb = MagicMock(
+        controller._storage.get_redirect_item = MagicMock(return_value=None)
+        controller._storage.query_fallbacks = MagicMock(
             return_value={
                 "Items": [],
                 "Count": 0,
@@ -166,17 +141,8 @@ class TestRedirectController:
         )
 
         controller = RedirectController(ddb_table_name="mock_table")
-        controller._get_redirect_from_ddb = MagicMock(
-            return_value={
-                "Items": [],
-                "Count": 0,
-                "ScannedCount": 3,
-                "ResponseMetadata": {
-                    # Stripped
-                },
-            }
-        )
-        controller._get_redirect_fallbacks_from_ddb = MagicMock(
+        controller._storage.get_redirect_item = MagicMock(return_value=None)
+        controller._storage.query_fallbacks = MagicMock(
             return_value={
                 "Items": [
                     {
@@ -211,17 +177,8 @@ class TestRedirectController:
         )
 
         controller = RedirectController(ddb_table_name="mock_table")
-        controller._get_redirect_from_ddb = MagicMock(
-            return_value={
-                "Items": [],
-                "Count": 0,
-                "ScannedCount": 3,
-                "ResponseMetadata": {
-                    # Stripped
-                },
-            }
-        )
-        controller._get_redirect_fallbacks_from_ddb = MagicMock(
+        controller._storage.get_redirect_item = MagicMock(return_value=None)
+        controller._storage.query_fallbacks = MagicMock(
             return_value={
                 "Items": [
                     {
@@ -251,3 +208,1381 @@ class TestRedirectController:
 
         # 3. ASSERT
         assert response == "https://example.com/option1"
+
+    @staticmethod
+    def test_get_alias_caches_negative_result() -> None:
+        """Verify that a missing alias is cached, so DDB is only queried once."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+
+        controller = RedirectController(ddb_table_name="mock_table")
+        controller._ddb_client.get_item = MagicMock(return_value={})
+
+        request = ApiGatewayRequest(
+            domain="mock_domain", path="/mock_path", query_params=None
+        )
+
+        # 2. ACT
+        first_response = controller.get_alias(request)
+        second_response = controller.get_alias(request)
+
+        # 3. ASSERT
+        assert first_response is None
+        assert second_response is None
+        controller._ddb_client.get_item.assert_called_once()
+
+    @staticmethod
+    def test_get_redirect_location_caches_not_found() -> None:
+        """Verify that a 404 outcome is cached, so repeated requests skip DDB entirely."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+
+        controller = RedirectController(ddb_table_name="mock_table")
+        controller._storage.get_redirect_item = MagicMock(return_value=None)
+        controller._storage.query_fallbacks = MagicMock(
+            return_value={"Items": [], "Count": 0, "ScannedCount": 0}
+        )
+
+        # 2. ACT
+        for _ in range(3):
+            response = controller.get_redirect_location(
+                domain="example.com", request_path="/unknown"
+            )
+
+        # 3. ASSERT
+        assert response is None
+        controller._storage.get_redirect_item.assert_called_once()
+        controller._storage.query_fallbacks.assert_called_once()
+
+    @staticmethod
+    def test_get_redirect_location_cache_disabled() -> None:
+        """Verify that every call reaches DDB when the cache is disabled."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+
+        controller = RedirectController(
+            ddb_table_name="mock_table",
+            config=ControllerConfig(cache_ttl_seconds=0),
+        )
+        controller._storage.get_redirect_item = MagicMock(return_value={"target": "t"})
+
+        # 2. ACT
+        controller.get_redirect_location(domain="example.com", request_path="/")
+        controller.get_redirect_location(domain="example.com", request_path="/")
+
+        # 3. ASSERT
+        assert controller._storage.get_redirect_item.call_count == 2
+
+    @staticmethod
+    def test_fallback_index_is_reused_across_paths() -> None:
+        """Verify that fallbacks are fetched once per domain and reused for other paths."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+
+        controller = RedirectController(ddb_table_name="mock_table")
+        controller._storage.get_redirect_item = MagicMock(return_value=None)
+        controller._storage.query_fallbacks = MagicMock(
+            return_value={
+                "Items": [
+                    {
+                        "pk": "RedirectFallback#example.com",
+                        "sk": "/blog",
+                        "target": "https://example.com/blog",
+                    },
+                    {
+                        "pk": "RedirectFallback#example.com",
+                        "sk": "/docs",
+                        "target": "https://example.com/docs",
+                    },
+                ],
+                "Count": 2,
+                "ScannedCount": 2,
+            }
+        )
+
+        # 2. ACT
+        blog_response = controller.get_redirect_location(
+            domain="example.com", request_path="/blog/2023/post"
+        )
+        docs_response = controller.get_redirect_location(
+            domain="example.com", request_path="/docs/intro"
+        )
+
+        # 3. ASSERT
+        assert blog_response == "https://example.com/blog"
+        assert docs_response == "https://example.com/docs"
+        controller._storage.query_fallbacks.assert_called_once()
+
+    @staticmethod
+    def test_get_redirect_location_fallbacks_span_multiple_pages() -> None:
+        """Verify that fallbacks on later query pages are taken into account."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+
+        controller = RedirectController(ddb_table_name="mock_table")
+        controller._storage.get_redirect_item = MagicMock(return_value=None)
+        controller._ddb_client.query = MagicMock(
+            side_effect=[
+                {
+                    "Items": [
+                        {"sk": {"S": "/"}, "target": {"S": "https://example.com/root"}}
+                    ],
+                    "Count": 1,
+                    "LastEvaluatedKey": {
+                        "pk": {"S": "RedirectFallback#example.com"},
+                        "sk": {"S": "/"},
+                    },
+                },
+                {
+                    "Items": [
+                        {
+                            "sk": {"S": "/path1"},
+                            "target": {"S": "https://example.com/path1"},
+                        }
+                    ],
+                    "Count": 1,
+                },
+            ]
+        )
+
+        # 2. ACT
+        response = controller.get_redirect_location(
+            domain="example.com", request_path="/path1/2"
+        )
+
+        # 3. ASSERT
+        assert response == "https://example.com/path1"
+        assert controller._ddb_client.query.call_count == 2
+        second_call = controller._ddb_client.query.call_args_list[1].kwargs
+        assert second_call["ExclusiveStartKey"] == {
+            "pk": {"S": "RedirectFallback#example.com"},
+            "sk": {"S": "/"},
+        }
+        assert second_call["ProjectionExpression"] == "sk, target, cache_ttl, deleted"
+
+    @staticmethod
+    def test_get_redirect_location_stops_streaming_on_full_path_match() -> None:
+        """Verify that no further pages are fetched once no longer candidate can exist."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+
+        controller = RedirectController(
+            ddb_table_name="mock_table",
+            config=ControllerConfig(fallback_index_max_entries=0),
+        )
+        controller._storage.get_redirect_item = MagicMock(return_value=None)
+        controller._storage.query_fallbacks = MagicMock(
+            side_effect=[
+                {
+                    "Items": [{"sk": "/path1", "target": "https://example.com/path1"}],
+                    "Count": 1,
+                    "LastEvaluatedKey": {"pk": "RedirectFallback#example.com"},
+                },
+                {
+                    "Items": [{"sk": "/path2", "target": "https://example.com/path2"}],
+                    "Count": 1,
+                },
+            ]
+        )
+
+        # 2. ACT
+        response = controller.get_redirect_location(
+            domain="example.com", request_path="/path1"
+        )
+
+        # 3. ASSERT
+        assert response == "https://example.com/path1"
+        controller._storage.query_fallbacks.assert_called_once()
+
+    @staticmethod
+    def test_resolve_concurrent_lookups_overlap() -> None:
+        """Verify that concurrent resolution overlaps the alias, exact and fallback lookups."""
+        # 1. ARRANGE
+        import threading
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.resolution import Resolution
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        # Every lookup waits until all three are in flight, so lookups made one
+        # after the other break the barrier instead of passing.
+        lookups_in_flight = threading.Barrier(3, timeout=5)
+
+        def wait_for_other_lookups() -> float:
+            lookups_in_flight.wait()
+            return 0.0
+
+        table = StubTable(
+            items=[
+                {
+                    "pk": "RedirectFallback#example.com",
+                    "sk": "/blog",
+                    "target": "https://example.com/blog",
+                }
+            ],
+            latency=wait_for_other_lookups,
+        )
+
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": table}),
+        ):
+            controller = RedirectController(
+                ddb_table_name="mock_table",
+                config=ControllerConfig(concurrent_lookups=True),
+            )
+
+        request = ApiGatewayRequest(
+            domain="example.com", path="/blog/post", query_params=None
+        )
+
+        # 2. ACT
+        resolution = controller.resolve(request)
+
+        # 3. ASSERT
+        assert resolution == Resolution(
+            domain="example.com", location="https://example.com/blog"
+        )
+        assert len(table.calls) == 3
+        assert table.max_concurrent_calls == 3
+        assert not lookups_in_flight.broken
+
+    @staticmethod
+    def test_resolve_concurrent_lookups_discard_speculation_for_alias() -> None:
+        """Verify that speculative results are discarded when an alias points elsewhere."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.resolution import Resolution
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(
+            items=[
+                {
+                    "pk": "DomainAlias#www.example.com",
+                    "sk": "DomainAlias#www.example.com",
+                    "target_domain": "example.com",
+                },
+                {
+                    "pk": "Redirect#www.example.com",
+                    "sk": "/",
+                    "target": "https://wrong.example.com",
+                },
+                {
+                    "pk": "Redirect#example.com",
+                    "sk": "/",
+                    "target": "https://right.example.com",
+                },
+            ],
+            latency=0.01,
+        )
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": table}),
+        ):
+            controller = RedirectController(
+                ddb_table_name="mock_table",
+                config=ControllerConfig(concurrent_lookups=True),
+            )
+
+        request = ApiGatewayRequest(
+            domain="www.example.com", path="/", query_params=None
+        )
+
+        # 2. ACT
+        resolution = controller.resolve(request)
+
+        # 3. ASSERT
+        assert resolution == Resolution(
+            domain="example.com", location="https://right.example.com"
+        )
+
+    @staticmethod
+    def test_fallback_prefixes() -> None:
+        """Verify that fallback candidates are the prefixes at path segment boundaries."""
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+
+        assert RedirectController._fallback_prefixes("/path1/2") == [
+            "/",
+            "/path1",
+            "/path1/",
+            "/path1/2",
+        ]
+        assert RedirectController._fallback_prefixes("/") == ["/"]
+        assert RedirectController._fallback_prefixes("//a/") == [
+            "/",
+            "//",
+            "//a",
+            "//a/",
+        ]
+
+    @staticmethod
+    def test_resolve_batch_get_single_round_trip() -> None:
+        """Verify that the batch_get strategy resolves a request with one BatchGetItem."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.resolution import Resolution
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(
+            items=[
+                {
+                    "pk": "RedirectFallback#example.com",
+                    "sk": "/",
+                    "target": "https://example.com/root",
+                },
+                {
+                    "pk": "RedirectFallback#example.com",
+                    "sk": "/path1",
+                    "target": "https://example.com/path1",
+                },
+                {
+                    "pk": "RedirectFallback#example.com",
+                    "sk": "/path1/2/3",
+                    "target": "https://example.com/too-long",
+                },
+            ]
+        )
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": table}),
+        ):
+            controller = RedirectController(
+                ddb_table_name="mock_table",
+                config=ControllerConfig(lookup_strategy="batch_get"),
+            )
+
+        request = ApiGatewayRequest(
+            domain="example.com", path="/path1/2", query_params=None
+        )
+
+        # 2. ACT
+        resolution = controller.resolve(request)
+
+        # 3. ASSERT
+        assert resolution == Resolution(
+            domain="example.com", location="https://example.com/path1"
+        )
+        assert table.calls == ["batch_get_item"]
+
+    @staticmethod
+    def test_resolve_batch_get_follows_alias_and_retries_unprocessed_keys() -> None:
+        """Verify that the batch_get strategy follows aliases and retries unprocessed keys."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.resolution import Resolution
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(
+            items=[
+                {
+                    "pk": "DomainAlias#www.example.com",
+                    "sk": "DomainAlias#www.example.com",
+                    "target_domain": "example.com",
+                },
+                {
+                    "pk": "Redirect#example.com",
+                    "sk": "/about",
+                    "target": "https://example.com/about-us",
+                },
+            ],
+            unprocessed_keys_per_call=2,
+        )
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": table}),
+        ):
+            controller = RedirectController(
+                ddb_table_name="mock_table",
+                config=ControllerConfig(lookup_strategy="batch_get"),
+            )
+
+        request = ApiGatewayRequest(
+            domain="www.example.com", path="/about", query_params=None
+        )
+
+        # 2. ACT
+        with patch("time.sleep"):
+            resolution = controller.resolve(request)
+
+        # 3. ASSERT
+        assert resolution == Resolution(
+            domain="example.com", location="https://example.com/about-us"
+        )
+        assert len(table.calls) > 2
+
+    @staticmethod
+    def test_unknown_lookup_strategy() -> None:
+        """Verify that an unknown lookup strategy is rejected at construction."""
+        import pytest
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+
+        with pytest.raises(ValueError):
+            RedirectController(
+                ddb_table_name="mock_table",
+                config=ControllerConfig(lookup_strategy="scan"),
+            )
+
+    @staticmethod
+    def test_resolve_from_snapshot_without_ddb(tmp_path) -> None:
+        """Verify that exact redirects found in the snapshot are resolved without DDB calls."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.database import (
+            Alias,
+            RedirectFallbackOption,
+            RedirectOption,
+        )
+        from resources.functions.redirect.src.models.resolution import Resolution
+        from resources.functions.redirect.src.utils.snapshot import write_snapshot
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        snapshot_path = str(tmp_path / "routes.snap")
+        write_snapshot(
+            snapshot_path,
+            aliases=[
+                Alias(source_domain="www.example.com", target_domain="example.com")
+            ],
+            redirects=[
+                RedirectOption(
+                    domain="example.com", path="/about", target="https://new.site/us"
+                )
+            ],
+            fallbacks=[
+                RedirectFallbackOption(
+                    domain="example.com", path="/blog", target="https://new.site/blog"
+                )
+            ],
+        )
+        table = StubTable(
+            items=[
+                {
+                    "pk": "Redirect#example.com",
+                    "sk": "/blog/new",
+                    "target": "https://new.site/added-after-snapshot",
+                }
+            ]
+        )
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": table}),
+        ):
+            controller = RedirectController(
+                ddb_table_name="mock_table",
+                config=ControllerConfig(snapshot_path=snapshot_path),
+            )
+
+        # 2. ACT
+        exact_resolution = controller.resolve(
+            ApiGatewayRequest(
+                domain="www.example.com", path="/about", query_params=None
+            )
+        )
+        calls_after_exact_hit = list(table.calls)
+        fallback_resolution = controller.resolve(
+            ApiGatewayRequest(
+                domain="www.example.com", path="/blog/1", query_params=None
+            )
+        )
+        ddb_resolution = controller.resolve(
+            ApiGatewayRequest(
+                domain="www.example.com", path="/blog/new", query_params=None
+            )
+        )
+
+        # 3. ASSERT
+        assert exact_resolution == Resolution(
+            domain="example.com", location="https://new.site/us"
+        )
+        assert calls_after_exact_hit == []
+        assert fallback_resolution == Resolution(
+            domain="example.com", location="https://new.site/blog"
+        )
+        # A rule added after the snapshot wins over its less specific fallback
+        assert ddb_resolution == Resolution(
+            domain="example.com", location="https://new.site/added-after-snapshot"
+        )
+        # Whether example.com has an alias of its own, the exact redirects, and
+        # once, the fallbacks, which could be longer than the snapshot's
+        assert table.calls == ["get_item", "get_item", "query", "get_item"]
+
+    @staticmethod
+    @pytest.mark.parametrize("lookup_strategy", ["query", "batch_get"])
+    def test_longer_fallback_added_after_snapshot_wins(
+        tmp_path, lookup_strategy
+    ) -> None:
+        """Verify a fallback in DDB more specific than the snapshot's is not hidden by it."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.database import (
+            RedirectFallbackOption,
+        )
+        from resources.functions.redirect.src.utils.snapshot import write_snapshot
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        snapshot_path = str(tmp_path / "routes.snap")
+        write_snapshot(
+            snapshot_path,
+            aliases=[],
+            redirects=[],
+            fallbacks=[
+                RedirectFallbackOption(
+                    domain="example.com", path="/a", target="https://snapshot/a"
+                )
+            ],
+        )
+        table = StubTable(
+            items=[
+                {
+                    "pk": "RedirectFallback#example.com",
+                    "sk": "/a/b",
+                    "target": "https://ddb/a/b",
+                }
+            ]
+        )
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": table}),
+        ):
+            controller = RedirectController(
+                ddb_table_name="mock_table",
+                config=ControllerConfig(
+                    snapshot_path=snapshot_path, lookup_strategy=lookup_strategy
+                ),
+            )
+
+        # 2. ACT
+        locations = [
+            controller.resolve(
+                ApiGatewayRequest(domain="example.com", path=path, query_params=None)
+            ).location
+            for path in ["/a/b/c", "/a/x"]
+        ]
+
+        # 3. ASSERT
+        assert locations == ["https://ddb/a/b", "https://snapshot/a"]
+
+    @staticmethod
+    def test_resolve_from_snapshot_only(tmp_path) -> None:
+        """Verify that snapshot-only lookups never create a DDB client, and 404 on a miss."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        import pytest
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.resolution import Resolution
+        from resources.functions.redirect.src.utils.snapshot import write_snapshot
+
+        snapshot_path = str(tmp_path / "routes.snap")
+        write_snapshot(
+            snapshot_path,
+            aliases=[
+                Alias(source_domain="www.example.com", target_domain="example.com")
+            ],
+            redirects=[],
+            fallbacks=[],
+        )
+
+        # 2. ACT
+        with patch.object(RedirectController, "_create_ddb_client") as create_client:
+            controller = RedirectController(
+                ddb_table_name="",
+                config=ControllerConfig(
+                    snapshot_path=snapshot_path,
+                    snapshot_only=True,
+                    wildcard_aliases=True,
+                    pattern_rules=True,
+                ),
+            )
+        resolution = controller.resolve(
+            ApiGatewayRequest(domain="www.example.com", path="/new", query_params=None)
+        )
+
+        # 3. ASSERT
+        create_client.assert_not_called()
+        assert resolution == Resolution(domain="example.com", location=None)
+        with pytest.raises(ValueError, match="snapshot path"):
+            RedirectController(
+                ddb_table_name="", config=ControllerConfig(snapshot_only=True)
+            )
+
+    @staticmethod
+    def test_pattern_rules_precede_snapshot_fallbacks(tmp_path) -> None:
+        """Verify that regex rules win over fallbacks, whether a snapshot is used or not."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.resolution import Resolution
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+        from tools.snapshot import export_snapshot
+
+        items = [
+            {
+                "pk": "RedirectFallback#example.com",
+                "sk": "/",
+                "target": "https://fallback",
+            },
+            {
+                "pk": "RedirectPattern#example.com",
+                "sk": "/posts/(.*)",
+                "target": "https://new/posts/$1",
+            },
+        ]
+        snapshot_path = str(tmp_path / "routes.snap")
+        export_snapshot(items, snapshot_path)
+        configs = [
+            ControllerConfig(pattern_rules=True),
+            ControllerConfig(pattern_rules=True, snapshot_path=snapshot_path),
+            ControllerConfig(
+                pattern_rules=True, snapshot_path=snapshot_path, snapshot_only=True
+            ),
+        ]
+
+        # 2. ACT
+        resolutions = []
+        for config in configs:
+            with patch.object(
+                RedirectController,
+                "_create_ddb_client",
+                return_value=StubDynamoDBClient({"mock_table": StubTable(items=items)}),
+            ):
+                controller = RedirectController(
+                    ddb_table_name="mock_table", config=config
+                )
+            resolutions.append(
+                controller.resolve(
+                    ApiGatewayRequest(
+                        domain="example.com", path="/posts/hello", query_params=None
+                    )
+                )
+            )
+
+        # 3. ASSERT
+        assert resolutions == [
+            Resolution(domain="example.com", location="https://new/posts/hello")
+        ] * len(configs)
+
+    @staticmethod
+    def test_resolve_from_mirror() -> None:
+        """Verify that with the mirror enabled, requests are served without DDB calls."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.resolution import Resolution
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(
+            items=[
+                {
+                    "pk": "DomainAlias#www.example.com",
+                    "sk": "DomainAlias#www.example.com",
+                    "target_domain": "example.com",
+                },
+                {
+                    "pk": "RedirectFallback#example.com",
+                    "sk": "/",
+                    "target": "https://new.site/",
+                },
+            ]
+        )
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": table}),
+        ):
+            controller = RedirectController(
+                ddb_table_name="mock_table",
+                config=ControllerConfig(
+                    mirror_enabled=True, mirror_refresh_seconds=3600
+                ),
+            )
+        table.calls.clear()
+
+        # 2. ACT
+        resolution = controller.resolve(
+            ApiGatewayRequest(domain="www.example.com", path="/a", query_params=None)
+        )
+
+        # 3. ASSERT
+        assert resolution == Resolution(
+            domain="example.com", location="https://new.site/"
+        )
+        assert table.calls == []
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "config, domain, path",
+        [
+            ({}, "example.com", "/gone"),
+            ({}, "www.example.com", "/"),
+            ({"lookup_strategy": "batch_get"}, "example.com", "/gone"),
+            ({"lookup_strategy": "batch_get"}, "www.example.com", "/"),
+            ({"pattern_rules": True}, "example.com", "/p/1"),
+            ({"wildcard_aliases": True}, "shop.example.net", "/"),
+        ],
+    )
+    def test_resolve_skips_tombstones(config, domain, path) -> None:
+        """Verify that items a mirror writer marked deleted are read like missing ones."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.resolution import Resolution
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        tombstones = [
+            {
+                "pk": "DomainAlias#www.example.com",
+                "sk": "DomainAlias#www.example.com",
+                "target_domain": "example.com",
+            },
+            {"pk": "WildcardAlias", "sk": "*.example.net", "target_domain": "a.com"},
+            {"pk": "Redirect#example.com", "sk": "/gone", "target": "https://gone/"},
+            {"pk": "RedirectFallback#example.com", "sk": "/", "target": "https://fb/"},
+            {
+                "pk": "RedirectPattern#example.com",
+                "sk": "/p/(.*)",
+                "target": "https://p/",
+            },
+        ]
+        table = StubTable(items=[dict(item, deleted=True) for item in tombstones])
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": table}),
+        ):
+            controller = RedirectController(
+                ddb_table_name="mock_table", config=ControllerConfig(**config)
+            )
+
+        # 2. ACT
+        resolution = controller.resolve(
+            ApiGatewayRequest(domain=domain, path=path, query_params=None)
+        )
+
+        # 3. ASSERT
+        assert resolution == Resolution(domain=domain, location=None)
+
+    @staticmethod
+    def test_ddb_client_config() -> None:
+        """Verify the DynamoDB client timeouts and retries fit the Lambda timeout."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+
+        # 2. ACT
+        controller = RedirectController(
+            ddb_table_name="mock_table",
+            config=ControllerConfig(
+                ddb_connect_timeout_seconds=0.1,
+                ddb_read_timeout_seconds=0.2,
+                ddb_max_attempts=3,
+            ),
+        )
+
+        # 3. ASSERT
+        client_config = controller._ddb_client.meta.config
+        assert client_config.connect_timeout == 0.1
+        assert client_config.read_timeout == 0.2
+        assert client_config.retries == {"mode": "adaptive", "total_max_attempts": 3}
+        assert client_config.tcp_keepalive is True
+
+    @staticmethod
+    def test_resolve_with_hedging() -> None:
+        """Verify that hedged reads are used for every lookup when hedging is enabled."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.resolution import Resolution
+        from resources.functions.redirect.src.utils.hedging import (
+            HedgedDynamoDBClient,
+        )
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(
+            items=[
+                {
+                    "pk": "Redirect#example.com",
+                    "sk": "/a",
+                    "target": "https://new.site/",
+                }
+            ]
+        )
+        controller = RedirectController(
+            ddb_table_name="mock_table",
+            config=ControllerConfig(hedging_enabled=True, cache_ttl_seconds=0),
+        )
+        assert isinstance(controller._ddb_client, HedgedDynamoDBClient)
+        assert controller._ddb_client.meta.config.read_timeout == 0.25
+        controller._ddb_client._ddb_client = StubDynamoDBClient({"mock_table": table})
+
+        # 2. ACT
+        resolution = controller.resolve(
+            ApiGatewayRequest(domain="example.com", path="/a", query_params=None)
+        )
+
+        # 3. ASSERT
+        assert resolution == Resolution(
+            domain="example.com", location="https://new.site/"
+        )
+        assert controller._ddb_client.policy.reads == 2
+
+    @staticmethod
+    def test_resolve_records_metrics() -> None:
+        """Verify lookups record stage timings, DDB usage and cache statistics."""
+        # 1. ARRANGE
+        import io
+        import json
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.utils.metrics import MetricsRecorder
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(
+            items=[
+                {"pk": "RedirectFallback#example.com", "sk": "/a", "target": "t1"},
+                {"pk": "RedirectFallback#example.com", "sk": "/b", "target": "t2"},
+            ]
+        )
+        stream = io.StringIO()
+        metrics = MetricsRecorder(flush_every=1, stream=stream)
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": table}),
+        ):
+            controller = RedirectController(
+                ddb_table_name="mock_table", metrics=metrics
+            )
+
+        # 2. ACT
+        metrics.begin()
+        controller.resolve(
+            ApiGatewayRequest(domain="example.com", path="/a/1", query_params=None)
+        )
+        metrics.end()
+
+        # 3. ASSERT
+        document = json.loads(stream.getvalue())
+        assert document["DdbCalls"] == [3]
+        assert document["DdbConsumedCapacity"] == [2.0]
+        assert document["FallbackCandidates"] == [2]
+        assert document["CacheHits"] == [0]
+        # The flattened alias, its single hop, the location, the exact redirect and
+        # the fallback index
+        assert document["CacheMisses"] == [5]
+        assert {
+            "AliasLookupTime",
+            "ExactLookupTime",
+            "FallbackLookupTime",
+        } <= set(document)
+
+    @staticmethod
+    def test_resolve_from_resolved_item() -> None:
+        """Verify a current Resolved item answers a request, and other requests fall back."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.resolution import Resolution
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(
+            items=[
+                {
+                    "pk": "DomainAlias#www.example.com",
+                    "sk": "DomainAlias#www.example.com",
+                    "target_domain": "example.com",
+                },
+                {
+                    "pk": "Resolved#www.example.com",
+                    "sk": "/blog/1",
+                    "resolved_domain": "example.com",
+                    "target": "https://new.site/blog",
+                    "generation": 3,
+                },
+                {
+                    "pk": "Resolved#www.example.com",
+                    "sk": "/old",
+                    "resolved_domain": "example.com",
+                    "target": "https://stale/",
+                    "generation": 2,
+                },
+                {"pk": "Redirect#example.com", "sk": "/new", "target": "https://n/"},
+                {"pk": "Redirect#example.com", "sk": "/old", "target": "https://o/"},
+                {"pk": "Meta#Generation", "sk": "Meta#Generation", "generation": 3},
+            ]
+        )
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": table}),
+        ):
+            controller = RedirectController(
+                ddb_table_name="mock_table",
+                config=ControllerConfig(resolved_lookups=True),
+            )
+
+        # 2. ACT
+        resolved_hit = controller.resolve(
+            ApiGatewayRequest(
+                domain="www.example.com", path="/blog/1", query_params=None
+            )
+        )
+        calls_after_hit = list(table.calls)
+        resolved_miss = controller.resolve(
+            ApiGatewayRequest(domain="www.example.com", path="/new", query_params=None)
+        )
+        resolved_outdated = controller.resolve(
+            ApiGatewayRequest(domain="www.example.com", path="/old", query_params=None)
+        )
+
+        # 3. ASSERT
+        assert resolved_hit == Resolution(
+            domain="example.com", location="https://new.site/blog"
+        )
+        # The Resolved item, and the table generation it is checked against
+        assert calls_after_hit == ["get_item", "get_item"]
+        assert resolved_miss == Resolution(domain="example.com", location="https://n/")
+        assert resolved_outdated == Resolution(
+            domain="example.com", location="https://o/"
+        )
+
+    @staticmethod
+    def test_resolve_skips_lookups_ruled_out_by_routing_filter() -> None:
+        """Verify definite misses cost no DDB calls, while known rules still resolve."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.resolution import Resolution
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+        from tools.build_filter import sync_routing_filter
+
+        table = StubTable(
+            items=[
+                {"pk": "Redirect#example.com", "sk": "/a", "target": "https://n/a"},
+                {"pk": "Meta#Generation", "sk": "Meta#Generation", "generation": 1},
+            ]
+        )
+        ddb_client = StubDynamoDBClient({"mock_table": table})
+        sync_routing_filter(ddb_client, "mock_table")
+        with patch.object(
+            RedirectController, "_create_ddb_client", return_value=ddb_client
+        ):
+            controller = RedirectController(
+                ddb_table_name="mock_table",
+                config=ControllerConfig(routing_filter_enabled=True),
+            )
+        table.calls.clear()
+
+        # 2. ACT
+        unknown_domain = controller.resolve(
+            ApiGatewayRequest(domain="probe.com", path="/.env", query_params=None)
+        )
+        unknown_domain_calls = list(table.calls)
+        unknown_path = controller.resolve(
+            ApiGatewayRequest(domain="example.com", path="/.env", query_params=None)
+        )
+        unknown_path_calls = list(table.calls)
+        known_path = controller.resolve(
+            ApiGatewayRequest(domain="example.com", path="/a", query_params=None)
+        )
+
+        # 3. ASSERT
+        assert unknown_domain == Resolution(domain="probe.com", location=None)
+        assert not unknown_domain_calls
+        assert unknown_path == Resolution(domain="example.com", location=None)
+        assert not unknown_path_calls
+        assert known_path == Resolution(domain="example.com", location="https://n/a")
+        assert table.calls == ["get_item"]
+
+    @staticmethod
+    def test_resolve_canonicalizes_requests() -> None:
+        """Verify spelling variants of a request share one exact lookup."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import (
+            ControllerConfig,
+            PathPolicy,
+        )
+        from resources.functions.redirect.src.models.resolution import Resolution
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(
+            items=[{"pk": "Redirect#example.com", "sk": "/foo", "target": "https://n/"}]
+        )
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": table}),
+        ):
+            controller = RedirectController(
+                ddb_table_name="mock_table",
+                config=ControllerConfig(
+                    canonicalize_host=True,
+                    path_policy=PathPolicy(
+                        lowercase=True, trailing_slash="strip", collapse_slashes=True
+                    ),
+                ),
+            )
+
+        # 2. ACT
+        resolutions = [
+            controller.resolve(
+                ApiGatewayRequest(domain=domain, path=path, query_params=None)
+            )
+            for domain, path in [
+                ("example.com", "/foo"),
+                ("Example.COM.", "/Foo/"),
+                ("example.com:443", "//foo//"),
+            ]
+        ]
+
+        # 3. ASSERT
+        assert (
+            resolutions == [Resolution(domain="example.com", location="https://n/")] * 3
+        )
+        assert table.calls == ["get_item", "get_item"]
+
+    @staticmethod
+    def test_resolve_wildcard_alias() -> None:
+        """Verify exact aliases win over wildcards, and all wildcards load with one query."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.resolution import Resolution
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(
+            items=[
+                {
+                    "pk": "WildcardAlias",
+                    "sk": "*.example.com",
+                    "target_domain": "example.com",
+                },
+                {
+                    "pk": "WildcardAlias",
+                    "sk": "*.eu.example.com",
+                    "target_domain": "example.eu",
+                },
+                {
+                    "pk": "DomainAlias#old.example.com",
+                    "sk": "DomainAlias#old.example.com",
+                    "target_domain": "old.site",
+                },
+            ]
+        )
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": table}),
+        ):
+            controller = RedirectController(
+                ddb_table_name="mock_table",
+                config=ControllerConfig(wildcard_aliases=True),
+            )
+
+        # 2. ACT
+        domains = [
+            controller.resolve(
+                ApiGatewayRequest(domain=domain, path="/", query_params=None)
+            ).domain
+            for domain in ["www.example.com", "shop.eu.example.com", "old.example.com"]
+        ]
+
+        # 3. ASSERT
+        assert domains == ["example.com", "example.eu", "old.site"]
+        # One query loads the wildcard aliases, the others are for fallbacks
+        assert table.calls.count("query") == 1 + len(set(domains))
+        assert controller.resolve(
+            ApiGatewayRequest(domain="example.com", path="/", query_params=None)
+        ) == Resolution(domain="example.com", location=None)
+
+    @staticmethod
+    def test_resolve_alias_chain_is_memoized() -> None:
+        """Verify alias chains resolve to their end, and warm chains cost no lookups."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.resolution import Resolution
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(
+            items=[
+                {
+                    "pk": f"DomainAlias#{source}",
+                    "sk": f"DomainAlias#{source}",
+                    "target_domain": target,
+                }
+                for source, target in [("a.com", "b.com"), ("b.com", "c.com")]
+            ]
+            + [{"pk": "Redirect#c.com", "sk": "/", "target": "https://c.com/home"}]
+        )
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": table}),
+        ):
+            controller = RedirectController(ddb_table_name="mock_table")
+
+        # 2. ACT
+        cold = controller.resolve(
+            ApiGatewayRequest(domain="a.com", path="/", query_params=None)
+        )
+        cold_calls = list(table.calls)
+        warm = controller.resolve(
+            ApiGatewayRequest(domain="a.com", path="/", query_params=None)
+        )
+        via_b = controller.get_alias(
+            ApiGatewayRequest(domain="b.com", path="/", query_params=None)
+        )
+
+        # 3. ASSERT
+        assert cold == warm == Resolution(domain="c.com", location="https://c.com/home")
+        # Three alias hops (a, b and c) and the exact redirect
+        assert cold_calls == ["get_item"] * 4
+        assert table.calls == cold_calls
+        assert via_b.target_domain == "c.com"
+
+    @staticmethod
+    def test_resolve_alias_cycle_raises() -> None:
+        """Verify an alias cycle fails instead of resolving to an arbitrary domain."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        import pytest
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.utils.alias_chain import AliasCycleError
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(
+            items=[
+                {
+                    "pk": f"DomainAlias#{source}",
+                    "sk": f"DomainAlias#{source}",
+                    "target_domain": target,
+                }
+                for source, target in [("a.com", "b.com"), ("b.com", "a.com")]
+            ]
+        )
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": table}),
+        ):
+            controller = RedirectController(ddb_table_name="mock_table")
+
+        # 2. ACT / 3. ASSERT
+        with pytest.raises(AliasCycleError):
+            controller.resolve(
+                ApiGatewayRequest(domain="a.com", path="/", query_params=None)
+            )
+
+    @staticmethod
+    def test_resolve_pattern_rules() -> None:
+        """Verify regex rules rank between exact redirects and fallbacks, compiled once."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(
+            items=[
+                {"pk": "Redirect#example.com", "sk": "/blog/2019/x", "target": "exact"},
+                {
+                    "pk": "RedirectPattern#example.com",
+                    "sk": r"/blog/(\d{4})/(.*)",
+                    "target": "https://new.site/posts/$2",
+                },
+                {"pk": "RedirectFallback#example.com", "sk": "/", "target": "root"},
+            ]
+        )
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": table}),
+        ):
+            controller = RedirectController(
+                ddb_table_name="mock_table",
+                config=ControllerConfig(pattern_rules=True),
+            )
+
+        # 2. ACT
+        locations = [
+            controller.get_redirect_location(domain="example.com", request_path=path)
+            for path in ["/blog/2019/x", "/blog/2020/post", "/blog/2021/other", "/y"]
+        ]
+
+        # 3. ASSERT
+        assert locations == [
+            "exact",
+            "https://new.site/posts/post",
+            "https://new.site/posts/other",
+            "root",
+        ]
+        # The patterns are queried once, the fallbacks once, for all paths
+        assert table.calls.count("query") == 2
+
+    @staticmethod
+    def test_resolve_cache_ttls() -> None:
+        """Verify rule TTLs take precedence over the default, and 404s get their own TTL."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.request import ApiGatewayRequest
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(
+            items=[
+                {
+                    "pk": "Redirect#example.com",
+                    "sk": "/popular",
+                    "target": "https://new.site/popular",
+                    "cache_ttl": 86400,
+                },
+                {
+                    "pk": "RedirectFallback#example.com",
+                    "sk": "/blog",
+                    "target": "https://new.site/blog",
+                    "cache_ttl": 0,
+                },
+                {"pk": "Redirect#example.com", "sk": "/a", "target": "https://n/a"},
+            ]
+        )
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": table}),
+        ):
+            controller = RedirectController(
+                ddb_table_name="mock_table",
+                config=ControllerConfig(
+                    redirect_cache_seconds=3600, not_found_cache_seconds=60
+                ),
+            )
+
+        # 2. ACT
+        cache_ttls = {
+            path: controller.resolve(
+                ApiGatewayRequest(domain="example.com", path=path, query_params=None)
+            ).cache_ttl
+            for path in ["/popular", "/blog/post", "/a", "/unknown"]
+        }
+        # A cached location keeps the TTL of its rule
+        cached_ttl = controller.resolve(
+            ApiGatewayRequest(domain="example.com", path="/popular", query_params=None)
+        ).cache_ttl
+
+        # 3. ASSERT
+        assert cache_ttls == {
+            "/popular": 86400,
+            "/blog/post": 0,
+            "/a": 3600,
+            "/unknown": 60,
+        }
+        assert cached_ttl == 86400
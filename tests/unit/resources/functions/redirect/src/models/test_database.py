@@ -64,3 +64,83 @@ class TestDatabase:
             path="/",
             target="https://example.com",
         )
+
+    @staticmethod
+    def test_alias_model_keeps_leading_prefix_characters():
+        """Verify that only the key prefix, not matching leading characters, is removed."""
+        from resources.functions.redirect.src.models.database import (
+            Alias,
+        )
+
+        item = {
+            "pk": "DomainAlias#amazon.com",
+            "sk": "DomainAlias#amazon.com",
+            "target_domain": "example.com",
+        }
+
+        model = Alias.from_ddb_item(item)
+        assert model.source_domain == "amazon.com"
+
+    @staticmethod
+    def test_models_round_trip_through_ddb_items():
+        """Verify that to_ddb_item() writes the key layout from_ddb_item() reads."""
+        from resources.functions.redirect.src.models.database import (
+            Alias,
+            RedirectFallbackOption,
+            RedirectOption,
+            RedirectPatternOption,
+            model_from_ddb_item,
+        )
+
+        models = [
+            Alias(source_domain="www.example.com", target_domain="example.com"),
+            RedirectOption(domain="example.com", path="/a", target="https://a/"),
+            RedirectFallbackOption(
+                domain="example.com", path="/b", target="https://b/"
+            ),
+            RedirectPatternOption(
+                domain="example.com", pattern="/c/(.*)", target="https://c/$1"
+            ),
+        ]
+
+        assert [model_from_ddb_item(model.to_ddb_item()) for model in models] == models
+        assert models[0].to_ddb_item()["sk"] == "DomainAlias#www.example.com"
+
+    @staticmethod
+    def test_wildcard_alias_model():
+        """Verify that wildcard aliases are stored in the WildcardAlias partition."""
+        from resources.functions.redirect.src.models.database import (
+            Alias,
+            model_from_ddb_item,
+        )
+
+        alias = Alias(source_domain="*.example.com", target_domain="example.com")
+
+        item = alias.to_ddb_item()
+        assert item == {
+            "pk": "WildcardAlias",
+            "sk": "*.example.com",
+            "target_domain": "example.com",
+        }
+        assert model_from_ddb_item(item) == alias
+        assert alias.is_wildcard
+
+    @staticmethod
+    def test_rule_cache_ttl():
+        """Verify that a rule only stores a cache_ttl if it has one, and its location carries it."""
+        from resources.functions.redirect.src.models.database import (
+            RedirectOption,
+            model_from_ddb_item,
+        )
+
+        cached = RedirectOption(
+            domain="example.com", path="/a", target="https://a/", cache_ttl=300
+        )
+        uncached = RedirectOption(domain="example.com", path="/b", target="https://b/")
+
+        assert cached.to_ddb_item()["cache_ttl"] == 300
+        assert "cache_ttl" not in uncached.to_ddb_item()
+        assert model_from_ddb_item(cached.to_ddb_item()) == cached
+        assert cached.location == "https://a/"
+        assert cached.location.cache_ttl == 300
+        assert uncached.location.cache_ttl is None
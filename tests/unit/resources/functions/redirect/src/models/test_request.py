@@ -2,6 +2,9 @@
 
 # pylint: disable=import-outside-toplevel
 
+# Related third party imports
+import pytest
+
 
 class TestRequest:
     """Test class for the request models."""
@@ -150,3 +153,111 @@ class TestRequest:
             path="/test/1/bites-1",
             query_params={"some_param": "12"},
         )
+
+    @staticmethod
+    def test_get_model_forwarded_host():
+        """Verify that the host forwarded by CloudFront takes precedence over the API domain."""
+        from resources.functions.redirect.src.models.request import ApiGatewayRequest
+
+        request = {
+            "path": "/test",
+            "headers": {
+                "X-Forwarded-Host": "www.example.com",
+                "X-Origin-Secret": "s3cret",
+            },
+            "queryStringParameters": None,
+            "requestContext": {
+                "domainName": "j3qfzmnyjl.execute-api.eu-west-1.amazonaws.com",
+            },
+        }
+
+        model = ApiGatewayRequest.from_lambda_event(request, origin_secret="s3cret")
+        assert model.domain == "www.example.com"
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "headers, origin_secret",
+        [
+            ({"X-Forwarded-Host": "www.example.com"}, "s3cret"),
+            (
+                {"X-Forwarded-Host": "www.example.com", "X-Origin-Secret": "guess"},
+                "s3cret",
+            ),
+            (
+                {"X-Forwarded-Host": "www.example.com", "X-Origin-Secret": "s3cret"},
+                None,
+            ),
+        ],
+    )
+    def test_get_model_untrusted_forwarded_host(headers, origin_secret):
+        """Verify that the forwarded host is ignored on requests without the origin secret."""
+        from resources.functions.redirect.src.models.request import ApiGatewayRequest
+
+        request = {
+            "path": "/test",
+            "headers": headers,
+            "queryStringParameters": None,
+            "requestContext": {"domainName": "www.example.org"},
+        }
+
+        model = ApiGatewayRequest.from_lambda_event(
+            request, origin_secret=origin_secret
+        )
+        assert model.domain == "www.example.org"
+
+    @staticmethod
+    def test_get_model_http_api_event():
+        """Verify that an HTTP API (payload format 2.0) request keeps its raw query string."""
+        from resources.functions.redirect.src.models.request import ApiGatewayRequest
+
+        request = {
+            "version": "2.0",
+            "routeKey": "GET /{proxy+}",
+            "rawPath": "/test/1/bites-1",
+            "rawQueryString": "some_param=12&q=a%20b",
+            "headers": {"host": "www.example.com"},
+            "queryStringParameters": {"some_param": "12", "q": "a b"},
+            "requestContext": {
+                "apiId": "j3qfzmnyjl",
+                "domainName": "www.example.com",
+                "http": {"method": "GET", "path": "/test/1/bites-1"},
+                "stage": "$default",
+            },
+            "isBase64Encoded": False,
+        }
+
+        model = ApiGatewayRequest.from_lambda_event(request)
+        assert model == ApiGatewayRequest(
+            domain="www.example.com",
+            path="/test/1/bites-1",
+            query_params={"some_param": "12", "q": "a b"},
+            raw_query_string="some_param=12&q=a%20b",
+        )
+
+    @staticmethod
+    def test_get_model_function_url_event():
+        """Verify that a Function URL request without a query string is stored correctly."""
+        from resources.functions.redirect.src.models.request import ApiGatewayRequest
+
+        request = {
+            "version": "2.0",
+            "routeKey": "$default",
+            "rawPath": "/",
+            "rawQueryString": "",
+            "headers": {
+                "host": "abcdefg.lambda-url.eu-west-1.on.aws",
+                "x-forwarded-host": "www.example.com",
+                "x-origin-secret": "s3cret",
+            },
+            "requestContext": {
+                "domainName": "abcdefg.lambda-url.eu-west-1.on.aws",
+                "domainPrefix": "abcdefg",
+                "http": {"method": "GET", "path": "/"},
+            },
+            "isBase64Encoded": False,
+        }
+
+        model = ApiGatewayRequest.from_lambda_event(request, origin_secret="s3cret")
+        assert model == ApiGatewayRequest(
+            domain="www.example.com", path="/", query_params=None
+        )
@@ -0,0 +1,168 @@
+"""Test module for the storage backends."""
+
+# pylint: disable=import-outside-toplevel
+
+# Related third party imports
+import pytest
+
+ITEMS = [
+    {
+        "pk": "DomainAlias#www.example.com",
+        "sk": "DomainAlias#www.example.com",
+        "target_domain": "example.com",
+    },
+    {"pk": "WildcardAlias", "sk": "*.example.net", "target_domain": "example.com"},
+    {"pk": "Redirect#example.com", "sk": "/a", "target": "https://new.site/a"},
+    {
+        "pk": "Redirect#example.com",
+        "sk": "/b",
+        "target": "https://new.site/b",
+        "cache_ttl": 300,
+    },
+    {"pk": "RedirectFallback#example.com", "sk": "/é", "target": "https://e/"},
+    {"pk": "RedirectFallback#example.com", "sk": "/blog", "target": "https://b/"},
+    {"pk": "RedirectFallback#example.com", "sk": "/", "target": "https://root/"},
+    {"pk": "RedirectFallback#example.com", "sk": "/Docs", "target": "https://d/"},
+    {"pk": "RedirectFallback#example.org", "sk": "/", "target": "https://org/"},
+    {"pk": "RedirectPattern#example.com", "sk": "/p/(.*)", "target": "https://p/"},
+]
+
+
+def create_backend(name, tmp_path):
+    """Return a storage backend of the given kind, holding ITEMS."""
+    from resources.functions.redirect.src.storage.dynamodb import DynamoDBBackend
+    from resources.functions.redirect.src.storage.memory import MemoryBackend
+    from resources.functions.redirect.src.storage.sqlite import SQLiteBackend
+    from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+    from tools.export_storage import export_storage
+
+    if name == "dynamodb":
+        table = StubTable(items=ITEMS, page_size=2)
+        return DynamoDBBackend(StubDynamoDBClient({"mock_table": table}), "mock_table")
+
+    path = str(tmp_path / f"rules.{name}")
+    export_storage(ITEMS, name, path)
+    if name == "memory":
+        return MemoryBackend.from_file(path)
+    # Small pages, so the fallbacks span several
+    return SQLiteBackend(path, page_size=2)
+
+
+class TestStorageBackends:
+    """Test class for the storage backends."""
+
+    @staticmethod
+    @pytest.mark.parametrize("name", ["dynamodb", "memory", "sqlite"])
+    def test_backends_answer_alike(name, tmp_path):
+        """Verify every backend answers the lookups the same, with fallbacks in key order."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.models.database import Alias
+
+        backend = create_backend(name, tmp_path)
+
+        # 2. ACT
+        fallbacks = list(backend.iter_fallbacks("example.com"))
+        redirect = backend.get_redirect("example.com", "/b")
+
+        # 3. ASSERT
+        assert backend.get_alias("www.example.com") == Alias(
+            source_domain="www.example.com", target_domain="example.com"
+        )
+        assert backend.get_alias("shop.example.net") is None
+        assert backend.get_redirect("example.com", "/a") == "https://new.site/a"
+        assert backend.get_redirect("example.com", "/c") is None
+        assert (redirect, redirect.cache_ttl) == ("https://new.site/b", 300)
+        # In UTF-8 byte order, like DynamoDB sort keys
+        assert [option.path for option in fallbacks] == ["/", "/Docs", "/blog", "/é"]
+        assert {option.domain for option in fallbacks} == {"example.com"}
+        assert list(backend.iter_fallbacks("unknown.com")) == []
+
+    @staticmethod
+    def test_dynamodb_backend_skips_tombstones():
+        """Verify that items a mirror writer marked deleted are read like missing ones."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.storage.dynamodb import DynamoDBBackend
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        items = [dict(item, deleted=True) for item in ITEMS]
+        items.append(
+            {
+                "pk": "RedirectFallback#example.com",
+                "sk": "/live",
+                "target": "https://l/",
+            }
+        )
+        table = StubTable(items=items, page_size=2)
+        backend = DynamoDBBackend(
+            StubDynamoDBClient({"mock_table": table}), "mock_table"
+        )
+
+        # 2. ACT
+        fallbacks = list(backend.iter_fallbacks("example.com"))
+
+        # 3. ASSERT
+        assert backend.get_alias("www.example.com") is None
+        assert backend.get_redirect("example.com", "/a") is None
+        assert [option.path for option in fallbacks] == ["/live"]
+
+    @staticmethod
+    def test_controller_resolves_from_sqlite_offline(tmp_path):
+        """Verify a controller configured for SQLite resolves requests without a DDB client."""
+        # 1. ARRANGE
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.request import ApiGatewayRequest
+        from resources.functions.redirect.src.models.resolution import Resolution
+        from tools.export_storage import export_storage
+
+        path = str(tmp_path / "rules.sqlite")
+        export_storage(ITEMS, "sqlite", path)
+        config = ControllerConfig.from_environ(
+            {"STORAGE_BACKEND": "sqlite", "STORAGE_PATH": path}
+        )
+
+        # 2. ACT
+        with patch.object(RedirectController, "_create_ddb_client") as create_client:
+            controller = RedirectController(ddb_table_name="", config=config)
+        resolution = controller.resolve(
+            ApiGatewayRequest(
+                domain="www.example.com", path="/blog/post", query_params=None
+            )
+        )
+
+        # 3. ASSERT
+        create_client.assert_not_called()
+        assert resolution == Resolution(domain="example.com", location="https://b/")
+
+    @staticmethod
+    def test_local_backends_refuse_ddb_only_features(tmp_path):
+        """Verify local backends can't be combined with features that read DynamoDB."""
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+
+        path = str(tmp_path / "rules.jsonl")
+
+        with pytest.raises(ValueError, match="wildcard_aliases, batch_get"):
+            RedirectController(
+                ddb_table_name="",
+                config=ControllerConfig(
+                    storage_backend="memory",
+                    storage_path=path,
+                    wildcard_aliases=True,
+                    lookup_strategy="batch_get",
+                ),
+            )
+        with pytest.raises(ValueError, match="needs a storage path"):
+            RedirectController(
+                ddb_table_name="", config=ControllerConfig(storage_backend="sqlite")
+            )
+        with pytest.raises(ValueError, match="Unknown storage backend"):
+            RedirectController(
+                ddb_table_name="", config=ControllerConfig(storage_backend="redis")
+            )
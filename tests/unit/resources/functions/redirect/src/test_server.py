@@ -0,0 +1,153 @@
+"""Test module for the standalone HTTP server."""
+
+# pylint: disable=import-outside-toplevel
+
+# Standard library imports
+import asyncio
+
+REDIRECT_HEAD = b"GET /blog/1?utm_source=mail HTTP/1.1\r\nHost: www.example.com"
+
+
+def create_server(tmp_path):
+    """Return a RedirectServer answering from a small snapshot."""
+    from resources.functions.redirect.src.controllers.redirect_controller import (
+        RedirectController,
+    )
+    from resources.functions.redirect.src.models.config import ControllerConfig
+    from resources.functions.redirect.src.models.database import (
+        Alias,
+        RedirectFallbackOption,
+    )
+    from resources.functions.redirect.src.server import RedirectServer
+    from resources.functions.redirect.src.utils.cache import TTLCache
+    from resources.functions.redirect.src.utils.snapshot import write_snapshot
+
+    snapshot_path = str(tmp_path / "routes.snap")
+    write_snapshot(
+        snapshot_path,
+        aliases=[
+            Alias(source_domain="www.example.com", target_domain="example.com"),
+            Alias(source_domain="loop.com", target_domain="loop.net"),
+            Alias(source_domain="loop.net", target_domain="loop.com"),
+        ],
+        redirects=[],
+        fallbacks=[
+            RedirectFallbackOption(
+                domain="example.com", path="/blog", target="https://new.site/blog"
+            )
+        ],
+    )
+    controller = RedirectController(
+        ddb_table_name="",
+        config=ControllerConfig(
+            snapshot_path=snapshot_path, snapshot_only=True, redirect_cache_seconds=60
+        ),
+    )
+    return RedirectServer(controller, TTLCache(ttl=60, max_entries=100))
+
+
+class TestRedirectServer:
+    """Test class for the RedirectServer."""
+
+    @staticmethod
+    def test_handle_answers_like_the_function(tmp_path):
+        """Verify a request gets the response event_handler would give, and is cached."""
+        # 1. ARRANGE
+        server = create_server(tmp_path)
+
+        # 2. ACT
+        response, keep_alive = server.handle(REDIRECT_HEAD)
+        cached_response, _ = server.handle(REDIRECT_HEAD)
+
+        # 3. ASSERT
+        assert keep_alive
+        assert response == (
+            b"HTTP/1.1 301 Moved Permanently\r\n"
+            b"X-Resolved-Domain: example.com\r\n"
+            b"Cache-Control: public, max-age=60\r\n"
+            b"CDN-Cache-Control: public, max-age=60\r\n"
+            b"Location: https://new.site/blog?utm_source=mail\r\n"
+            b"Content-Length: 0\r\n\r\n"
+        )
+        assert cached_response == response
+        assert len(server._response_cache) == 1
+
+    @staticmethod
+    def test_handle_refuses_other_requests(tmp_path):
+        """Verify malformed requests close the connection, and other methods get a 405."""
+        # 1. ARRANGE
+        server = create_server(tmp_path)
+
+        # 2. ACT
+        not_found, not_found_keep_alive = server.handle(
+            b"GET /none HTTP/1.0\r\nHost: example.com"
+        )
+        post, _ = server.handle(b"POST / HTTP/1.1\r\nHost: example.com")
+        smuggled, smuggled_keep_alive = server.handle(
+            b"GET / HTTP/1.1\r\nHost : example.com"
+        )
+
+        # 3. ASSERT
+        assert not_found.startswith(b"HTTP/1.1 404 Not Found\r\n")
+        assert not_found.endswith(b"Connection: close\r\n\r\n")
+        assert not not_found_keep_alive
+        assert post.startswith(b"HTTP/1.1 405 Method Not Allowed\r\n")
+        assert b"Allow: GET, HEAD\r\n" in post
+        assert smuggled.startswith(b"HTTP/1.1 400 Bad Request\r\n")
+        assert not smuggled_keep_alive
+
+    @staticmethod
+    def test_handle_refuses_alias_cycles(tmp_path):
+        """Verify a domain whose aliases loop gets an uncached 508, not a server error."""
+        # 1. ARRANGE
+        server = create_server(tmp_path)
+
+        # 2. ACT
+        response, keep_alive = server.handle(b"GET / HTTP/1.1\r\nHost: loop.com")
+
+        # 3. ASSERT
+        assert keep_alive
+        assert response == (
+            b"HTTP/1.1 508 Loop Detected\r\n"
+            b"X-Resolved-Domain: loop.com\r\n"
+            b"Content-Length: 0\r\n"
+            b"\r\n"
+        )
+        assert len(server._response_cache) == 0  # pylint: disable=protected-access
+
+    @staticmethod
+    def test_keep_alive_connection(tmp_path):
+        """Verify pipelined requests are answered in order on one kept-alive connection."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.server import HttpProtocol
+
+        server = create_server(tmp_path)
+
+        async def exchange():
+            loop = asyncio.get_running_loop()
+            listener = await loop.create_server(
+                lambda: HttpProtocol(server), host="127.0.0.1", port=0
+            )
+            port = listener.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(REDIRECT_HEAD + b"\r\n\r\n" + REDIRECT_HEAD + b"\r\n\r\n")
+            first = await reader.readuntil(b"\r\n\r\n")
+            second = await reader.readuntil(b"\r\n\r\n")
+            writer.write(
+                b"GET /x HTTP/1.1\r\nHost: example.com\r\nConnection: close\r\n\r\n"
+            )
+            third = await reader.read()
+            writer.close()
+            listener.close()
+            await listener.wait_closed()
+            return first, second, third
+
+        # 2. ACT
+        first, second, third = asyncio.run(exchange())
+
+        # 3. ASSERT
+        assert first == second
+        assert b"Location: https://new.site/blog?utm_source=mail\r\n" in first
+        assert third.startswith(b"HTTP/1.1 404 Not Found\r\n")
+        # The server closed the connection after the last response
+        assert third.endswith(b"Connection: close\r\n\r\n")
@@ -0,0 +1,79 @@
+"""Test module for following alias chains."""
+
+# pylint: disable=import-outside-toplevel
+
+ALIASES = {"a.com": "b.com", "b.com": "c.com", "c.com": "c.com", "x.com": "y.com"}
+
+
+def lookup(domain):
+    """Return the alias of a domain in ALIASES, or None."""
+    from resources.functions.redirect.src.models.database import Alias
+
+    if domain not in ALIASES:
+        return None
+    return Alias(source_domain=domain, target_domain=ALIASES[domain])
+
+
+class TestAliasChain:
+    """Test class for following alias chains."""
+
+    @staticmethod
+    def test_follows_chain_to_its_end():
+        """Verify chains are flattened, and self aliases and unaliased domains end them."""
+        from resources.functions.redirect.src.models.database import Alias
+        from resources.functions.redirect.src.utils.alias_chain import (
+            follow_alias_chain,
+        )
+
+        assert follow_alias_chain("a.com", lookup, max_hops=4) == Alias(
+            source_domain="a.com", target_domain="c.com"
+        )
+        assert follow_alias_chain("c.com", lookup, max_hops=4) is None
+        assert follow_alias_chain("z.com", lookup, max_hops=4) is None
+
+    @staticmethod
+    def test_max_hops_bounds_lookups():
+        """Verify a chain of max_hops aliases resolves, with one lookup more at most."""
+        from unittest.mock import Mock
+
+        from resources.functions.redirect.src.utils.alias_chain import (
+            follow_alias_chain,
+        )
+
+        counted_lookup = Mock(side_effect=lookup)
+
+        alias = follow_alias_chain("a.com", counted_lookup, max_hops=2)
+
+        assert alias.target_domain == "c.com"
+        assert counted_lookup.call_count == 3
+
+    @staticmethod
+    def test_chain_beyond_max_hops_raises():
+        """Verify a chain longer than max_hops raises instead of stopping halfway."""
+        import pytest
+
+        from resources.functions.redirect.src.utils.alias_chain import (
+            AliasChainTooLongError,
+            follow_alias_chain,
+        )
+
+        with pytest.raises(AliasChainTooLongError, match="a.com -> b.com -> c.com"):
+            follow_alias_chain("a.com", lookup, max_hops=1)
+
+    @staticmethod
+    def test_cycle_raises():
+        """Verify a chain leading back to an earlier domain raises."""
+        import pytest
+
+        from resources.functions.redirect.src.models.database import Alias
+        from resources.functions.redirect.src.utils.alias_chain import (
+            AliasCycleError,
+            follow_alias_chain,
+        )
+
+        cycle = {"a.com": "b.com", "b.com": "a.com"}
+
+        with pytest.raises(AliasCycleError, match="a.com -> b.com -> a.com"):
+            follow_alias_chain(
+                "a.com", lambda domain: Alias(domain, cycle[domain]), max_hops=4
+            )
@@ -0,0 +1,118 @@
+"""Test module for the Bloom filter and the routing filter."""
+
+# pylint: disable=import-outside-toplevel
+
+
+class TestBloomFilter:
+    """Test class for the BloomFilter."""
+
+    @staticmethod
+    def test_no_false_negatives_and_bounded_false_positives():
+        """Verify added keys are always found and others rarely are."""
+        from resources.functions.redirect.src.utils.bloom import BloomFilter
+
+        bloom = BloomFilter.for_capacity(10_000, false_positive_rate=0.01)
+        for index in range(10_000):
+            bloom.add(f"/page/{index}")
+
+        false_positives = sum(f"/probe/{index}" in bloom for index in range(20_000))
+
+        assert all(f"/page/{index}" in bloom for index in range(10_000))
+        assert false_positives / 20_000 < 0.02
+        assert abs(bloom.false_positive_rate(10_000) - 0.01) < 0.002
+
+    @staticmethod
+    def test_max_bytes_caps_the_size():
+        """Verify a memory budget shrinks the filter and raises the expected rate."""
+        from resources.functions.redirect.src.utils.bloom import BloomFilter
+
+        bloom = BloomFilter.for_capacity(
+            10_000, false_positive_rate=0.001, max_bytes=4096
+        )
+
+        assert bloom.memory_bytes == 4096
+        assert bloom.false_positive_rate(10_000) > 0.001
+
+    @staticmethod
+    def test_ddb_items_round_trip():
+        """Verify a filter split into chunks loads back, and mixed builds are rejected."""
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.utils import bloom as bloom_module
+
+        bloom = bloom_module.BloomFilter.for_capacity(1000, false_positive_rate=0.01)
+        bloom.add("D|example.com")
+        with patch.object(bloom_module, "FILTER_CHUNK_BYTES", 100):
+            items = bloom_module.filter_to_ddb_items(bloom, 7, build_id="a")
+        mixed = items[:-1] + [dict(items[-1], build_id="b")]
+
+        loaded, generation = bloom_module.filter_from_ddb_items(items[::-1])
+
+        assert len(items) > 1
+        assert generation == 7
+        assert loaded.bits == bloom.bits
+        assert "D|example.com" in loaded
+        assert bloom_module.filter_from_ddb_items(mixed) is None
+        assert bloom_module.filter_from_ddb_items(items[:-1]) is None
+
+
+class TestRoutingFilter:
+    """Test class for the RoutingFilter."""
+
+    @staticmethod
+    def test_fails_open_unless_current():
+        """Verify only a filter built for the current table generation rules anything out."""
+        from resources.functions.redirect.src.utils.bloom import (
+            BloomFilter,
+            RoutingFilter,
+            domain_key,
+            filter_to_ddb_items,
+        )
+        from resources.functions.redirect.src.utils.mirror import GENERATION_KEY
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        bloom = BloomFilter.for_capacity(10, false_positive_rate=0.01)
+        bloom.add(domain_key("example.com"))
+        generation = {"pk": GENERATION_KEY, "sk": GENERATION_KEY, "generation": 2}
+        table = StubTable(items=[generation])
+        routing_filter = RoutingFilter(
+            ddb_client=StubDynamoDBClient({"mock_table": table}),
+            ddb_table_name="mock_table",
+        )
+
+        routing_filter.load()
+        without_filter = routing_filter.might_have_domain("unknown.com")
+        table.write(filter_to_ddb_items(bloom, 2, build_id="a"), [])
+        routing_filter.refresh()
+        current = routing_filter.might_have_domain("unknown.com")
+        table.put(dict(generation, generation=3))
+        routing_filter.refresh()
+        outdated = routing_filter.might_have_domain("unknown.com")
+
+        assert without_filter is True
+        assert current is False
+        assert routing_filter.might_have_domain("example.com") is True
+        assert outdated is True
+        assert routing_filter.active is False
+
+    @staticmethod
+    def test_ignored_without_table_generation():
+        """Verify a filter isn't used while the table has no generation item to check."""
+        from resources.functions.redirect.src.utils.bloom import (
+            BloomFilter,
+            RoutingFilter,
+            filter_to_ddb_items,
+        )
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        bloom = BloomFilter.for_capacity(10, false_positive_rate=0.01)
+        table = StubTable(items=filter_to_ddb_items(bloom, None, build_id="a"))
+        routing_filter = RoutingFilter(
+            ddb_client=StubDynamoDBClient({"mock_table": table}),
+            ddb_table_name="mock_table",
+        )
+
+        routing_filter.load()
+
+        assert routing_filter.active is False
+        assert routing_filter.might_have_domain("example.com") is True
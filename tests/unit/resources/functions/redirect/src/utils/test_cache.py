@@ -0,0 +1,95 @@
+"""Test module for the TTL cache."""
+
+# pylint: disable=import-outside-toplevel
+
+
+class FakeClock:
+    """A manually advanced clock for deterministic expiry tests."""
+
+    def __init__(self) -> None:
+        """Construct a new FakeClock."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return the current fake time."""
+        return self.now
+
+
+class TestTTLCache:
+    """Test class for the TTLCache."""
+
+    @staticmethod
+    def test_get_missing_key():
+        """Verify that an absent key returns the MISSING sentinel."""
+        from resources.functions.redirect.src.utils.cache import MISSING, TTLCache
+
+        cache = TTLCache(ttl=10, max_entries=10)
+
+        assert cache.get("key") is MISSING
+        assert cache.misses == 1
+
+    @staticmethod
+    def test_none_is_cached():
+        """Verify that None is a cacheable value, distinct from a miss."""
+        from resources.functions.redirect.src.utils.cache import TTLCache
+
+        cache = TTLCache(ttl=10, max_entries=10)
+        cache.set("key", None)
+
+        assert cache.get("key") is None
+        assert cache.hits == 1
+
+    @staticmethod
+    def test_entries_expire():
+        """Verify that entries are no longer returned after their TTL."""
+        from resources.functions.redirect.src.utils.cache import MISSING, TTLCache
+
+        clock = FakeClock()
+        cache = TTLCache(ttl=10, max_entries=10, clock=clock)
+        cache.set("key", "value")
+
+        clock.now = 9.9
+        assert cache.get("key") == "value"
+        clock.now = 10.0
+        assert cache.get("key") is MISSING
+        assert len(cache) == 0
+
+    @staticmethod
+    def test_least_recently_used_is_evicted():
+        """Verify that the least recently used entry is evicted when the cache is full."""
+        from resources.functions.redirect.src.utils.cache import MISSING, TTLCache
+
+        cache = TTLCache(ttl=10, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is MISSING
+        assert cache.get("c") == 3
+
+    @staticmethod
+    def test_disabled_cache_stores_nothing():
+        """Verify that a TTL of zero disables the cache."""
+        from resources.functions.redirect.src.utils.cache import MISSING, TTLCache
+
+        cache = TTLCache(ttl=0, max_entries=10)
+        cache.set("key", "value")
+
+        assert not cache.enabled
+        assert cache.get("key") is MISSING
+
+    @staticmethod
+    def test_get_or_set_calls_factory_once():
+        """Verify that get_or_set only calls the factory on a miss."""
+        from unittest.mock import MagicMock
+
+        from resources.functions.redirect.src.utils.cache import TTLCache
+
+        cache = TTLCache(ttl=10, max_entries=10)
+        factory = MagicMock(return_value=None)
+
+        assert cache.get_or_set("key", factory) is None
+        assert cache.get_or_set("key", factory) is None
+        factory.assert_called_once()
@@ -0,0 +1,61 @@
+"""Test module for request canonicalization."""
+
+# pylint: disable=import-outside-toplevel
+
+
+class TestCanonical:
+    """Test class for the request canonicalization."""
+
+    @staticmethod
+    def test_canonical_host():
+        """Verify case, ports and trailing dots are removed from hosts."""
+        from resources.functions.redirect.src.utils.canonical import canonical_host
+
+        assert canonical_host("WWW.Example.com.") == "www.example.com"
+        assert canonical_host("example.com:8443") == "example.com"
+        assert canonical_host("[::1]:443") == "[::1]"
+
+    @staticmethod
+    def test_canonical_path():
+        """Verify every part of a path policy, alone and combined."""
+        from resources.functions.redirect.src.models.config import PathPolicy
+        from resources.functions.redirect.src.utils.canonical import canonical_path
+
+        full_policy = PathPolicy(
+            lowercase=True,
+            trailing_slash="strip",
+            normalize_percent_encoding=True,
+            collapse_slashes=True,
+        )
+
+        assert canonical_path("/Foo//%7e%2fBar/", PathPolicy()) == "/Foo//%7e%2fBar/"
+        assert canonical_path("/Foo//%7e%2fBar/", full_policy) == "/foo/~%2Fbar"
+        assert canonical_path("/%41bc", full_policy) == "/abc"
+        assert canonical_path("/", full_policy) == "/"
+        assert canonical_path("/a", PathPolicy(trailing_slash="add")) == "/a/"
+
+    @staticmethod
+    def test_domain_policy_overrides_default():
+        """Verify the policy of the canonical domain is used, and others keep the default."""
+        from resources.functions.redirect.src.models.config import PathPolicy
+        from resources.functions.redirect.src.models.request import ApiGatewayRequest
+        from resources.functions.redirect.src.utils.canonical import (
+            RequestCanonicalizer,
+        )
+
+        canonicalizer = RequestCanonicalizer(
+            canonicalize_host=True,
+            path_policy=PathPolicy(trailing_slash="strip"),
+            domain_path_policies={"Example.com": PathPolicy(lowercase=True)},
+        )
+        request = ApiGatewayRequest(domain="other.com", path="/a", query_params=None)
+
+        assert canonicalizer.enabled
+        assert canonicalizer.canonicalize(request) is request
+        assert canonicalizer.canonicalize(
+            ApiGatewayRequest(domain="EXAMPLE.com.", path="/A/", query_params=None)
+        ) == ApiGatewayRequest(domain="example.com", path="/a/", query_params=None)
+        assert canonicalizer.canonicalize(
+            ApiGatewayRequest(domain="other.com:443", path="/A/", query_params=None)
+        ) == ApiGatewayRequest(domain="other.com", path="/A", query_params=None)
+        assert not RequestCanonicalizer().enabled
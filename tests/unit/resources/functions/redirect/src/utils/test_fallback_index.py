@@ -0,0 +1,93 @@
+"""Test module for the fallback index."""
+
+# pylint: disable=import-outside-toplevel
+
+# Standard library imports
+import random
+
+
+def _linear_best_match(options, request_path):
+    """Return the best option using the original linear scan, as a reference."""
+    best_match = None
+    max_matching_characters = 0
+    for option in options:
+        if option.path in request_path and len(option.path) > max_matching_characters:
+            best_match = option
+            max_matching_characters = len(option.path)
+    return best_match
+
+
+class TestFallbackIndex:
+    """Test class for the FallbackIndex."""
+
+    @staticmethod
+    def test_empty_index():
+        """Verify that an empty index never matches."""
+        from resources.functions.redirect.src.utils.fallback_index import FallbackIndex
+
+        assert FallbackIndex().match("/path1/2") is None
+
+    @staticmethod
+    def test_longest_substring_wins():
+        """Verify that the longest fallback path contained in the request path wins."""
+        from resources.functions.redirect.src.models.database import (
+            RedirectFallbackOption,
+        )
+        from resources.functions.redirect.src.utils.fallback_index import FallbackIndex
+
+        options = [
+            RedirectFallbackOption(domain="example.com", path="/", target="root"),
+            RedirectFallbackOption(domain="example.com", path="/path1", target="p1"),
+            RedirectFallbackOption(domain="example.com", path="path1/2", target="sub"),
+        ]
+        index = FallbackIndex(options)
+
+        assert index.match("/path1/2").target == "sub"
+        assert index.match("/path1").target == "p1"
+        assert index.match("/other").target == "root"
+        assert index.match("other") is None
+
+    @staticmethod
+    def test_equal_length_tie_goes_to_first_option():
+        """Verify that ties are broken by insertion order, like the linear scan."""
+        from resources.functions.redirect.src.models.database import (
+            RedirectFallbackOption,
+        )
+        from resources.functions.redirect.src.utils.fallback_index import FallbackIndex
+
+        options = [
+            RedirectFallbackOption(domain="example.com", path="/a", target="first"),
+            RedirectFallbackOption(domain="example.com", path="/b", target="second"),
+        ]
+
+        assert FallbackIndex(options).match("/b/a").target == "first"
+
+    @staticmethod
+    def test_matches_linear_scan_on_random_input():
+        """Verify that the index agrees with the linear scan on random fallbacks."""
+        from resources.functions.redirect.src.models.database import (
+            RedirectFallbackOption,
+        )
+        from resources.functions.redirect.src.utils.fallback_index import FallbackIndex
+
+        rng = random.Random(42)
+        alphabet = "/ab"
+        paths = sorted(
+            {
+                "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 5)))
+                for _ in range(60)
+            }
+        )
+        options = [
+            RedirectFallbackOption(domain="example.com", path=path, target=path)
+            for path in paths
+        ]
+        index = FallbackIndex(options)
+
+        for _ in range(500):
+            request_path = "".join(
+                rng.choice(alphabet) for _ in range(rng.randint(0, 12))
+            )
+            assert index.match(request_path) == _linear_best_match(
+                options, request_path
+            )
@@ -0,0 +1,183 @@
+"""Test module for hedged DynamoDB reads."""
+
+# pylint: disable=import-outside-toplevel
+
+# Standard library imports
+import itertools
+import threading
+
+# Related third party imports
+import pytest
+
+ITEMS = [{"pk": "Redirect#example.com", "sk": "/", "target": "https://new.site/"}]
+GET_ITEM_KWARGS = {
+    "TableName": "mock_table",
+    "Key": {"pk": {"S": "Redirect#example.com"}, "sk": {"S": "/"}},
+}
+
+
+class TestHedgingPolicy:
+    """Testclass for the HedgingPolicy class."""
+
+    @staticmethod
+    def test_delay_is_percentile_of_recorded_latencies() -> None:
+        """Verify the initial delay is used until enough latencies are recorded."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.hedging import HedgingPolicy
+
+        policy = HedgingPolicy(percentile=90, initial_delay=0.5, min_samples=10)
+
+        # 2. ACT
+        initial_delay = policy.delay()
+        for latency in range(1, 11):
+            policy.record_latency(latency / 100)
+
+        # 3. ASSERT
+        assert initial_delay == 0.5
+        assert policy.delay() == 0.09
+
+    @staticmethod
+    def test_hedge_rate_is_capped() -> None:
+        """Verify a hedge is only allowed once enough reads have earned one."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.hedging import HedgingPolicy
+
+        policy = HedgingPolicy(max_hedge_rate=0.5)
+
+        # 2. ACT
+        policy.start_read()
+        first_attempt = policy.try_acquire_hedge()
+        policy.start_read()
+        second_attempt = policy.try_acquire_hedge()
+        third_attempt = policy.try_acquire_hedge()
+
+        # 3. ASSERT
+        assert (first_attempt, second_attempt, third_attempt) == (False, True, False)
+        assert policy.reads == 2
+        assert policy.hedges == 1
+
+
+class TestHedgedDynamoDBClient:
+    """Testclass for the HedgedDynamoDBClient class."""
+
+    @staticmethod
+    def test_slow_read_is_hedged() -> None:
+        """Verify a hedge is sent for a slow read and the fastest response is used."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.hedging import (
+            HedgedDynamoDBClient,
+            HedgingPolicy,
+        )
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        # The primary read is held for longer than the budget, so the read only
+        # returns, rather than raising a TimeoutError, if the hedge answers it.
+        primary_released = threading.Event()
+        read_numbers = itertools.count()
+
+        def hold_primary_read() -> float:
+            if next(read_numbers) == 0:
+                primary_released.wait(timeout=5)
+            return 0.0
+
+        table = StubTable(items=ITEMS, latency=hold_primary_read)
+        client = HedgedDynamoDBClient(
+            StubDynamoDBClient({"mock_table": table}),
+            policy=HedgingPolicy(max_hedge_rate=1.0, initial_delay=0.01),
+            budget=1.0,
+        )
+
+        # 2. ACT
+        response = client.get_item(**GET_ITEM_KWARGS)
+        primary_released.set()
+
+        # 3. ASSERT
+        assert response["Item"]["target"] == {"S": "https://new.site/"}
+        assert table.calls == ["get_item", "get_item"]
+        assert client.policy.hedges == 1
+
+    @staticmethod
+    def test_fast_read_is_not_hedged() -> None:
+        """Verify a read that returns within the delay is sent only once."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.hedging import (
+            HedgedDynamoDBClient,
+            HedgingPolicy,
+        )
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(items=ITEMS)
+        client = HedgedDynamoDBClient(
+            StubDynamoDBClient({"mock_table": table}),
+            policy=HedgingPolicy(max_hedge_rate=1.0, initial_delay=0.5),
+            budget=1.0,
+        )
+
+        # 2. ACT
+        client.get_item(**GET_ITEM_KWARGS)
+
+        # 3. ASSERT
+        assert table.calls == ["get_item"]
+        assert client.policy.hedges == 0
+
+    @staticmethod
+    def test_read_exceeding_budget_raises() -> None:
+        """Verify a read that outlives its budget raises a TimeoutError."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.hedging import (
+            HedgedDynamoDBClient,
+            HedgingPolicy,
+        )
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(items=ITEMS, latency=0.3)
+        client = HedgedDynamoDBClient(
+            StubDynamoDBClient({"mock_table": table}),
+            policy=HedgingPolicy(max_hedge_rate=0.0, initial_delay=0.01),
+            budget=0.05,
+        )
+
+        # 2. ACT / 3. ASSERT
+        with pytest.raises(TimeoutError):
+            client.get_item(**GET_ITEM_KWARGS)
+        assert table.calls == ["get_item"]
+
+    @staticmethod
+    def test_errors_are_raised() -> None:
+        """Verify the error of a failed read is raised to the caller."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.hedging import (
+            HedgedDynamoDBClient,
+            HedgingPolicy,
+        )
+        from tests.stubs.dynamodb import StubDynamoDBClient
+
+        client = HedgedDynamoDBClient(
+            StubDynamoDBClient({}), policy=HedgingPolicy(), budget=1.0
+        )
+
+        # 2. ACT / 3. ASSERT
+        with pytest.raises(KeyError):
+            client.get_item(**GET_ITEM_KWARGS)
+
+    @staticmethod
+    def test_other_operations_are_passed_through() -> None:
+        """Verify scans are neither hedged nor routed through the thread pool."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.hedging import (
+            HedgedDynamoDBClient,
+            HedgingPolicy,
+        )
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(items=ITEMS)
+        ddb_client = StubDynamoDBClient({"mock_table": table})
+        client = HedgedDynamoDBClient(ddb_client, policy=HedgingPolicy(), budget=1.0)
+
+        # 2. ACT
+        response = client.scan(TableName="mock_table")
+
+        # 3. ASSERT
+        assert client.scan == ddb_client.scan
+        assert response["Count"] == 1
+        assert client.policy.reads == 0
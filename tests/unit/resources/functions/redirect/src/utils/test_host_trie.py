@@ -0,0 +1,34 @@
+"""Test module for the host suffix trie."""
+
+# pylint: disable=import-outside-toplevel
+
+
+class TestHostSuffixTrie:
+    """Test class for the HostSuffixTrie."""
+
+    @staticmethod
+    def test_most_specific_pattern_wins():
+        """Verify subdomains at any depth match, and longer suffixes take precedence."""
+        from resources.functions.redirect.src.utils.host_trie import HostSuffixTrie
+
+        trie = HostSuffixTrie(
+            [("*.example.com", "broad"), ("*.shop.example.com", "shop")]
+        )
+
+        assert len(trie) == 2
+        assert trie.match("www.example.com") == "broad"
+        assert trie.match("a.b.example.com") == "broad"
+        assert trie.match("shop.example.com") == "broad"
+        assert trie.match("eu.shop.example.com") == "shop"
+        assert trie.match("example.com") is None
+        assert trie.match("www.example.org") is None
+
+    @staticmethod
+    def test_rejects_exact_domains():
+        """Verify only wildcard patterns can be added."""
+        import pytest
+
+        from resources.functions.redirect.src.utils.host_trie import HostSuffixTrie
+
+        with pytest.raises(ValueError):
+            HostSuffixTrie([("example.com", "exact")])
@@ -0,0 +1,22 @@
+"""Test module for the caching headers of redirect responses."""
+
+# pylint: disable=import-outside-toplevel
+
+
+class TestHttpCache:
+    """Test class for the cache_headers function."""
+
+    @staticmethod
+    def test_cache_headers():
+        """Verify a TTL is sent to browsers and CDNs, 0 forbids caching and None sends nothing."""
+        from resources.functions.redirect.src.utils.http_cache import cache_headers
+
+        assert cache_headers(300) == {
+            "Cache-Control": "public, max-age=300",
+            "CDN-Cache-Control": "public, max-age=300",
+        }
+        assert cache_headers(0) == {
+            "Cache-Control": "no-store",
+            "CDN-Cache-Control": "no-store",
+        }
+        assert not cache_headers(None)
@@ -0,0 +1,152 @@
+"""Test module for the EMF metrics recorder."""
+
+# pylint: disable=import-outside-toplevel
+
+# Standard library imports
+import io
+import json
+
+
+class TestMetricsRecorder:
+    """Testclass for the MetricsRecorder class."""
+
+    @staticmethod
+    def test_records_are_batched_into_one_document() -> None:
+        """Verify the records of flush_every requests are written as one EMF line."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.metrics import MetricsRecorder
+
+        stream = io.StringIO()
+        metrics = MetricsRecorder(namespace="Test", flush_every=2, stream=stream)
+
+        # 2. ACT
+        metrics.begin()
+        metrics.add("DdbCalls")
+        metrics.add("DdbCalls")
+        with metrics.timer("AliasLookupTime"):
+            pass
+        metrics.end()
+        output_after_first_request = stream.getvalue()
+        metrics.begin()
+        metrics.add("DdbCalls", 3)
+        metrics.end()
+
+        # 3. ASSERT
+        assert output_after_first_request == ""
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 1
+        document = json.loads(lines[0])
+        directive = document["_aws"]["CloudWatchMetrics"][0]
+        assert directive["Namespace"] == "Test"
+        assert directive["Dimensions"] == [[]]
+        assert directive["Metrics"] == [
+            {"Name": "AliasLookupTime", "Unit": "Milliseconds"},
+            {"Name": "DdbCalls", "Unit": "Count"},
+        ]
+        assert document["DdbCalls"] == [2, 3]
+        assert len(document["AliasLookupTime"]) == 1
+
+    @staticmethod
+    def test_unsampled_requests_are_not_recorded() -> None:
+        """Verify nothing is recorded for requests outside the sample."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.metrics import MetricsRecorder
+
+        stream = io.StringIO()
+        metrics = MetricsRecorder(
+            sample_rate=0.5,
+            flush_every=1,
+            stream=stream,
+            random_source=lambda: 0.9,
+        )
+
+        # 2. ACT
+        metrics.begin()
+        recording = metrics.recording
+        metrics.add("DdbCalls")
+        metrics.end()
+
+        # 3. ASSERT
+        assert recording is False
+        assert stream.getvalue() == ""
+
+    @staticmethod
+    def test_flush_writes_partial_batch() -> None:
+        """Verify flush writes buffered records, and nothing when the buffer is empty."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.metrics import MetricsRecorder
+
+        stream = io.StringIO()
+        metrics = MetricsRecorder(flush_every=10, stream=stream)
+        metrics.begin()
+        metrics.add("Redirects")
+        metrics.end()
+
+        # 2. ACT
+        metrics.flush()
+        metrics.flush()
+
+        # 3. ASSERT
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])["Redirects"] == [1]
+
+    @staticmethod
+    def test_records_are_written_when_requests_end_by_default() -> None:
+        """Verify nothing is buffered across requests unless batching is configured."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.metrics import MetricsRecorder
+
+        stream = io.StringIO()
+        metrics = MetricsRecorder(stream=stream, clock=lambda: 1_700_000_000.5)
+
+        # 2. ACT
+        metrics.begin()
+        metrics.add("Redirects")
+        metrics.end()
+
+        # 3. ASSERT
+        document = json.loads(stream.getvalue())
+        assert document["Redirects"] == [1]
+        assert document["_aws"]["Timestamp"] == 1_700_000_000_500
+
+    @staticmethod
+    def test_batches_are_written_by_age_with_request_times() -> None:
+        """Verify an old batch is written by the next request, a document per minute."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.metrics import MetricsRecorder
+
+        now = [1_700_000_000.0]
+        samples = iter([0.1, 0.1, 0.9])
+        stream = io.StringIO()
+        metrics = MetricsRecorder(
+            sample_rate=0.5,
+            flush_every=10,
+            max_age_seconds=90,
+            stream=stream,
+            random_source=lambda: next(samples),
+            clock=lambda: now[0],
+        )
+
+        # 2. ACT
+        metrics.begin()
+        metrics.add("Redirects")
+        metrics.end()
+        now[0] += 61
+        metrics.begin()
+        metrics.add("Redirects", 2)
+        metrics.end()
+        output_before_max_age = stream.getvalue()
+        now[0] += 30
+        # Unsampled requests write aged batches too
+        metrics.begin()
+        metrics.end()
+
+        # 3. ASSERT
+        assert output_before_max_age == ""
+        documents = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [document["_aws"]["Timestamp"] for document in documents] == [
+            1_700_000_000_000,
+            1_700_000_061_000,
+        ]
+        assert [document["Redirects"] for document in documents] == [[1], [2]]
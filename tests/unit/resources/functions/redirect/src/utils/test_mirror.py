@@ -0,0 +1,233 @@
+"""Test module for the table mirror."""
+
+# pylint: disable=import-outside-toplevel
+
+ITEMS = [
+    {
+        "pk": "DomainAlias#www.example.com",
+        "sk": "DomainAlias#www.example.com",
+        "target_domain": "example.com",
+        "updated_at": 100,
+    },
+    {
+        "pk": "Redirect#example.com",
+        "sk": "/",
+        "target": "https://new.site/",
+        "updated_at": 100,
+    },
+    {
+        "pk": "RedirectFallback#example.com",
+        "sk": "/blog",
+        "target": "https://new.site/blog",
+        "updated_at": 100,
+    },
+    {"pk": "Meta#Generation", "sk": "Meta#Generation", "generation": 1},
+]
+
+
+class FakeClock:
+    """A manually advanced wall clock."""
+
+    def __init__(self, now: float) -> None:
+        """Construct a new FakeClock."""
+        self.now = now
+
+    def __call__(self) -> float:
+        """Return the current fake time."""
+        return self.now
+
+
+class TestTableMirror:
+    """Test class for the TableMirror."""
+
+    @staticmethod
+    def test_load_with_segmented_scan():
+        """Verify that a full load scans every segment and serves all item types."""
+        from resources.functions.redirect.src.models.database import Alias
+        from resources.functions.redirect.src.utils.mirror import TableMirror
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(items=ITEMS)
+        mirror = TableMirror(
+            ddb_client=StubDynamoDBClient({"mock_table": table}),
+            ddb_table_name="mock_table",
+            scan_segments=3,
+        )
+
+        mirror.load()
+
+        assert table.calls.count("scan") == 3
+        assert mirror.state.generation == 1
+        assert mirror.get_alias("www.example.com") == Alias(
+            source_domain="www.example.com", target_domain="example.com"
+        )
+        assert mirror.get_redirect_location("example.com", "/") == "https://new.site/"
+        assert (
+            mirror.get_redirect_location("example.com", "/blog/post")
+            == "https://new.site/blog"
+        )
+        assert mirror.get_redirect_location("example.com", "/other") is None
+
+    @staticmethod
+    def test_refresh_skips_scan_when_generation_unchanged():
+        """Verify that a refresh only reads the generation item if nothing changed."""
+        from resources.functions.redirect.src.utils.mirror import TableMirror
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        table = StubTable(items=ITEMS)
+        mirror = TableMirror(
+            ddb_client=StubDynamoDBClient({"mock_table": table}),
+            ddb_table_name="mock_table",
+            scan_segments=2,
+        )
+        mirror.load()
+        table.calls.clear()
+
+        mirror.refresh()
+
+        assert table.calls == ["get_item"]
+
+    @staticmethod
+    def test_refresh_applies_delta():
+        """Verify that updates and tombstones since the last window are applied."""
+        from resources.functions.redirect.src.utils.mirror import (
+            CHANGE_SHARDS,
+            TableMirror,
+            stamp_change,
+        )
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        clock = FakeClock(now=200)
+        table = StubTable(items=ITEMS)
+        mirror = TableMirror(
+            ddb_client=StubDynamoDBClient({"mock_table": table}),
+            ddb_table_name="mock_table",
+            scan_segments=2,
+            clock=clock,
+        )
+        mirror.load()
+
+        # Warm the fallback index, which the delta has to invalidate
+        assert mirror.get_redirect_location("example.com", "/docs") is None
+
+        clock.now = 300
+        table.put(
+            stamp_change(
+                {
+                    "pk": "RedirectFallback#example.com",
+                    "sk": "/docs",
+                    "target": "https://new.site/docs",
+                },
+                updated_at=250,
+            )
+        )
+        table.put(
+            stamp_change(
+                {
+                    "pk": "Redirect#example.com",
+                    "sk": "/",
+                    "target": "https://new.site/",
+                    "deleted": True,
+                },
+                updated_at=250,
+            )
+        )
+        table.put({"pk": "Meta#Generation", "sk": "Meta#Generation", "generation": 2})
+        table.calls.clear()
+
+        mirror.refresh()
+
+        # The generation, then the changes index shards, without scanning the table
+        assert table.calls == ["get_item"] + ["query"] * CHANGE_SHARDS
+        assert mirror.state.generation == 2
+        assert mirror.state.window_start == 300
+        assert (
+            mirror.get_redirect_location("example.com", "/docs")
+            == "https://new.site/docs"
+        )
+        assert mirror.get_redirect_location("example.com", "/") is None
+
+    @staticmethod
+    def test_wildcard_aliases_follow_deltas():
+        """Verify wildcard aliases match subdomains, and a delta recompiles them."""
+        from resources.functions.redirect.src.utils.mirror import (
+            TableMirror,
+            stamp_change,
+        )
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        clock = FakeClock(now=200)
+        wildcard = {
+            "pk": "WildcardAlias",
+            "sk": "*.example.com",
+            "target_domain": "example.com",
+            "updated_at": 100,
+        }
+        table = StubTable(items=ITEMS + [wildcard])
+        mirror = TableMirror(
+            ddb_client=StubDynamoDBClient({"mock_table": table}),
+            ddb_table_name="mock_table",
+            clock=clock,
+            wildcard_aliases=True,
+        )
+        mirror.load()
+        matched = mirror.get_alias("shop.example.com")
+
+        clock.now = 300
+        table.put(stamp_change(dict(wildcard, deleted=True), updated_at=250))
+        table.put({"pk": "Meta#Generation", "sk": "Meta#Generation", "generation": 2})
+        mirror.refresh()
+
+        assert matched.target_domain == "example.com"
+        assert mirror.get_alias("www.example.com").source_domain == "www.example.com"
+        assert mirror.get_alias("shop.example.com") is None
+
+    @staticmethod
+    def test_wildcard_aliases_need_enabling():
+        """Verify wildcard aliases are ignored unless enabled, like in the controller."""
+        from resources.functions.redirect.src.utils.mirror import TableMirror
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        wildcard = {
+            "pk": "WildcardAlias",
+            "sk": "*.example.com",
+            "target_domain": "example.com",
+        }
+        mirror = TableMirror(
+            ddb_client=StubDynamoDBClient(
+                {"mock_table": StubTable(items=ITEMS + [wildcard])}
+            ),
+            ddb_table_name="mock_table",
+        )
+        mirror.load()
+
+        assert mirror.get_alias("shop.example.com") is None
+        assert mirror.get_alias("www.example.com").target_domain == "example.com"
+
+    @staticmethod
+    def test_maybe_refresh_runs_in_background():
+        """Verify that a due refresh runs on a background thread, at most once at a time."""
+        from resources.functions.redirect.src.utils.mirror import TableMirror
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        clock = FakeClock(now=200)
+        table = StubTable(items=ITEMS)
+        mirror = TableMirror(
+            ddb_client=StubDynamoDBClient({"mock_table": table}),
+            ddb_table_name="mock_table",
+            scan_segments=1,
+            refresh_interval=30,
+            clock=clock,
+        )
+        mirror.load()
+        table.calls.clear()
+
+        mirror.maybe_refresh()
+        clock.now = 231
+        mirror.maybe_refresh()
+        mirror.maybe_refresh()
+        # Wait for the background refresh to release its lock
+        with mirror._refresh_lock:  # pylint: disable=protected-access
+            pass
+
+        assert table.calls == ["get_item"]
@@ -0,0 +1,105 @@
+"""Test module for the regex rule matcher."""
+
+# pylint: disable=import-outside-toplevel
+
+
+class TestPatternMatcher:
+    """Test class for the PatternMatcher."""
+
+    @staticmethod
+    def test_literal_prefix():
+        """Verify the prefix stops at special characters and drops quantified literals."""
+        from resources.functions.redirect.src.utils.pattern_matcher import (
+            literal_prefix,
+        )
+
+        assert literal_prefix(r"/blog/(\d{4})/(.*)") == "/blog/"
+        assert literal_prefix(r"/docs\.old/.*") == "/docs.old/"
+        assert literal_prefix(r"/posts?/(.*)") == "/post"
+        assert literal_prefix(r"/a|/b") == ""
+        assert literal_prefix(r"(?i)/blog/.*") == ""
+
+    @staticmethod
+    def test_substitutes_captured_groups():
+        """Verify groups are substituted per pattern, and unmatched groups are empty."""
+        from resources.functions.redirect.src.models.database import (
+            RedirectPatternOption,
+        )
+        from resources.functions.redirect.src.utils.pattern_matcher import (
+            PatternMatcher,
+        )
+
+        matcher = PatternMatcher(
+            [
+                RedirectPatternOption(
+                    domain="example.com",
+                    pattern=r"/blog/(\d{4})/(.*)",
+                    target="https://new.site/posts/$2?year=$1",
+                ),
+                RedirectPatternOption(
+                    domain="example.com",
+                    pattern=r"/shop(/(\w+))?",
+                    target="https://shop.site/$2",
+                ),
+            ]
+        )
+
+        assert (
+            matcher.match("/blog/2019/hello-world")
+            == "https://new.site/posts/hello-world?year=2019"
+        )
+        assert matcher.match("/shop/shoes") == "https://shop.site/shoes"
+        assert matcher.match("/shop") == "https://shop.site/"
+        assert matcher.match("/blog/19/hello") is None
+        assert matcher.match("/x/blog/2019/hello") is None
+
+    @staticmethod
+    def test_first_matching_rule_wins():
+        """Verify overlapping rules with different prefixes are tried in rule order."""
+        from resources.functions.redirect.src.models.database import (
+            RedirectPatternOption,
+        )
+        from resources.functions.redirect.src.utils.pattern_matcher import (
+            PatternMatcher,
+        )
+
+        options = [
+            RedirectPatternOption(domain="a", pattern=pattern, target=target)
+            for pattern, target in [
+                (r".*\.php", "https://php/"),
+                (r"/blog/(.*)", "https://blog/$1"),
+                (r"/blog/old/(.*)", "https://old/$1"),
+            ]
+        ]
+        matcher = PatternMatcher(options)
+
+        assert len(matcher) == 3
+        assert matcher.candidates("/blog/old/x") == [0, 1, 2]
+        assert matcher.candidates("/shop") == [0]
+        assert matcher.match("/blog/old/index.php") == "https://php/"
+        assert matcher.match("/blog/old/x") == "https://blog/old/x"
+        assert PatternMatcher(options[2:]).match("/blog/old/x") == "https://old/x"
+
+    @staticmethod
+    def test_invalid_rules_are_skipped():
+        """Verify rules that don't compile or lack a referenced group are left out."""
+        from resources.functions.redirect.src.models.database import (
+            RedirectPatternOption,
+        )
+        from resources.functions.redirect.src.utils.pattern_matcher import (
+            PatternMatcher,
+        )
+
+        options = [
+            RedirectPatternOption(domain="a", pattern=pattern, target=target)
+            for pattern, target in [
+                (r"/old/(.*", "https://broken/"),
+                (r"/blog/(.*)", "https://blog/$2"),
+                (r"/blog/(.*)", "https://blog/$1"),
+            ]
+        ]
+        matcher = PatternMatcher(options)
+
+        assert len(matcher) == 1
+        assert matcher.match("/blog/x") == "https://blog/x"
+        assert matcher.match("/old/x") is None
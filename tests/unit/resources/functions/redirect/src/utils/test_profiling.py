@@ -0,0 +1,145 @@
+"""Test module for the invocation profiler."""
+
+# pylint: disable=import-outside-toplevel
+
+# Standard library imports
+import io
+import json
+
+
+def allocate_cache_entry(cache: list) -> int:
+    """Stand-in for a handler that retains memory between invocations."""
+    cache.append(bytearray(64 * 1024))
+    return len(cache)
+
+
+class FakeClock:
+    """A manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        """Construct a new FakeClock."""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Return the current fake time."""
+        return self.now
+
+
+class TestInvocationProfiler:
+    """Testclass for the InvocationProfiler class."""
+
+    @staticmethod
+    def test_one_in_every_invocations_is_profiled() -> None:
+        """Verify only sampled invocations are profiled, and results are passed through."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.profiling import (
+            InvocationProfiler,
+        )
+
+        profiler = InvocationProfiler(every=3, stream=io.StringIO())
+        cache: list = []
+
+        # 2. ACT
+        results = [profiler.run(allocate_cache_entry, cache) for _ in range(7)]
+
+        # 3. ASSERT
+        assert results == [1, 2, 3, 4, 5, 6, 7]
+        report = profiler.report()
+        assert report["invocations"] == 7
+        assert report["profiled_invocations"] == 3
+        hot_spot = next(
+            hot_spot
+            for hot_spot in report["hot_spots"]
+            if hot_spot["function"].endswith("(allocate_cache_entry)")
+        )
+        assert hot_spot["calls"] == 3
+        assert report["allocation_sites"] == []
+
+    @staticmethod
+    def test_allocation_sites_are_traced() -> None:
+        """Verify memory retained by a profiled invocation is attributed to its source line."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.profiling import (
+            InvocationProfiler,
+        )
+
+        profiler = InvocationProfiler(
+            every=1, trace_allocations=True, stream=io.StringIO()
+        )
+
+        # 2. ACT
+        profiler.run(allocate_cache_entry, [])
+
+        # 3. ASSERT
+        top_site = profiler.report()["allocation_sites"][0]
+        assert top_site["site"].endswith("test_profiling.py:12")
+        assert top_site["kib"] >= 64
+
+    @staticmethod
+    def test_report_is_dumped_on_interval() -> None:
+        """Verify the report is logged once the dump interval has passed."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.profiling import (
+            InvocationProfiler,
+        )
+
+        stream = io.StringIO()
+        clock = FakeClock()
+        profiler = InvocationProfiler(
+            every=1, dump_interval=60, stream=stream, clock=clock
+        )
+
+        # 2. ACT
+        profiler.run(allocate_cache_entry, [])
+        output_before_interval = stream.getvalue()
+        clock.now = 61
+        profiler.run(allocate_cache_entry, [])
+
+        # 3. ASSERT
+        assert output_before_interval == ""
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])["profile"]["profiled_invocations"] == 2
+
+    @staticmethod
+    def test_report_is_dumped_by_unsampled_invocations() -> None:
+        """Verify the dump interval is checked on invocations that aren't profiled."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.profiling import (
+            InvocationProfiler,
+        )
+
+        stream = io.StringIO()
+        clock = FakeClock()
+        profiler = InvocationProfiler(
+            every=100, dump_interval=60, stream=stream, clock=clock
+        )
+        profiler.run(allocate_cache_entry, [])
+
+        # 2. ACT
+        clock.now = 61
+        profiler.run(allocate_cache_entry, [])
+
+        # 3. ASSERT
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 1
+        report = json.loads(lines[0])["profile"]
+        assert report["invocations"] == 2
+        assert report["profiled_invocations"] == 1
+
+    @staticmethod
+    def test_dump_without_profiles_writes_nothing() -> None:
+        """Verify nothing is logged when no invocation was profiled yet."""
+        # 1. ARRANGE
+        from resources.functions.redirect.src.utils.profiling import (
+            InvocationProfiler,
+        )
+
+        stream = io.StringIO()
+        profiler = InvocationProfiler(every=10, stream=stream)
+
+        # 2. ACT
+        profiler.dump()
+
+        # 3. ASSERT
+        assert stream.getvalue() == ""
@@ -0,0 +1,162 @@
+"""Test module for the routing snapshot."""
+
+# pylint: disable=import-outside-toplevel
+
+
+def _write_fixture_snapshot(path: str) -> None:
+    """Write a small snapshot with aliases, redirects, fallbacks and patterns."""
+    from resources.functions.redirect.src.models.database import (
+        Alias,
+        RedirectFallbackOption,
+        RedirectOption,
+        RedirectPatternOption,
+    )
+    from resources.functions.redirect.src.utils.snapshot import write_snapshot
+
+    write_snapshot(
+        path,
+        aliases=[Alias(source_domain="www.example.com", target_domain="example.com")],
+        redirects=[
+            RedirectOption(domain="example.com", path="/", target="https://new.site/"),
+            RedirectOption(domain="example.com.evil", path="/", target="https://evil/"),
+        ],
+        fallbacks=[
+            RedirectFallbackOption(
+                domain="example.com", path="/path1", target="https://new.site/p1"
+            ),
+            RedirectFallbackOption(
+                domain="example.com", path="/", target="https://new.site/root"
+            ),
+            RedirectFallbackOption(
+                domain="example.com.evil", path="/x", target="https://evil/x"
+            ),
+        ],
+        patterns=[
+            RedirectPatternOption(
+                domain="example.com", pattern="/b/(.*)", target="https://b/$1"
+            ),
+            RedirectPatternOption(
+                domain="example.com", pattern="/a/(.*)", target="https://a/$1"
+            ),
+        ],
+        generated_at=1_700_000_000,
+    )
+
+
+class TestRoutingSnapshot:
+    """Test class for the RoutingSnapshot."""
+
+    @staticmethod
+    def test_lookups(tmp_path):
+        """Verify that all kinds of rules are found in a written snapshot."""
+        from resources.functions.redirect.src.models.database import (
+            Alias,
+            RedirectFallbackOption,
+            RedirectPatternOption,
+        )
+        from resources.functions.redirect.src.utils.snapshot import RoutingSnapshot
+
+        path = str(tmp_path / "routes.snap")
+        _write_fixture_snapshot(path)
+        snapshot = RoutingSnapshot(path)
+
+        assert snapshot.generated_at == 1_700_000_000
+        assert snapshot.get_alias("www.example.com") == Alias(
+            source_domain="www.example.com", target_domain="example.com"
+        )
+        assert snapshot.get_alias("example.com") is None
+        assert snapshot.get_redirect_target("example.com", "/") == "https://new.site/"
+        assert snapshot.get_redirect_target("example.com", "/missing") is None
+        assert snapshot.get_fallbacks("example.com") == [
+            RedirectFallbackOption(
+                domain="example.com", path="/", target="https://new.site/root"
+            ),
+            RedirectFallbackOption(
+                domain="example.com", path="/path1", target="https://new.site/p1"
+            ),
+        ]
+        assert snapshot.get_fallbacks("unknown.com") == []
+        assert snapshot.get_patterns("example.com") == [
+            RedirectPatternOption(
+                domain="example.com", pattern="/a/(.*)", target="https://a/$1"
+            ),
+            RedirectPatternOption(
+                domain="example.com", pattern="/b/(.*)", target="https://b/$1"
+            ),
+        ]
+        assert snapshot.get_patterns("example.com.evil") == []
+        snapshot.close()
+
+    @staticmethod
+    def test_rules_keep_their_cache_ttl(tmp_path):
+        """Verify that rules keep their cache TTL, including 0, and rules without one get None."""
+        from resources.functions.redirect.src.models.database import (
+            RedirectFallbackOption,
+            RedirectOption,
+            RedirectPatternOption,
+        )
+        from resources.functions.redirect.src.utils.snapshot import (
+            RoutingSnapshot,
+            write_snapshot,
+        )
+
+        path = str(tmp_path / "routes.snap")
+        write_snapshot(
+            path,
+            aliases=[],
+            redirects=[
+                RedirectOption(
+                    domain="a.com", path="/0", target="https://0", cache_ttl=0
+                ),
+                RedirectOption(domain="a.com", path="/none", target="https://none"),
+            ],
+            fallbacks=[
+                RedirectFallbackOption(
+                    domain="a.com", path="/", target="https://f", cache_ttl=60
+                )
+            ],
+            patterns=[
+                RedirectPatternOption(
+                    domain="a.com", pattern="/p/(.*)", target="https://p", cache_ttl=0
+                )
+            ],
+        )
+        snapshot = RoutingSnapshot(path)
+
+        assert snapshot.get_redirect_target("a.com", "/0").cache_ttl == 0
+        assert snapshot.get_redirect_target("a.com", "/none").cache_ttl is None
+        assert [fallback.cache_ttl for fallback in snapshot.get_fallbacks("a.com")] == [
+            60
+        ]
+        assert [pattern.cache_ttl for pattern in snapshot.get_patterns("a.com")] == [0]
+        snapshot.close()
+
+    @staticmethod
+    def test_empty_snapshot(tmp_path):
+        """Verify that an empty snapshot can be written and searched."""
+        from resources.functions.redirect.src.utils.snapshot import (
+            RoutingSnapshot,
+            write_snapshot,
+        )
+
+        path = str(tmp_path / "routes.snap")
+        write_snapshot(path, aliases=[], redirects=[], fallbacks=[])
+        snapshot = RoutingSnapshot(path)
+
+        assert snapshot.get_alias("example.com") is None
+        assert snapshot.get_redirect_target("example.com", "/") is None
+        assert snapshot.get_fallbacks("example.com") == []
+        assert snapshot.get_patterns("example.com") == []
+
+    @staticmethod
+    def test_not_a_snapshot(tmp_path):
+        """Verify that files without the snapshot magic are rejected."""
+        import pytest
+
+        from resources.functions.redirect.src.utils.snapshot import RoutingSnapshot
+
+        path = tmp_path / "routes.snap"
+        path.write_bytes(b"\x00" * 128)
+
+        with pytest.raises(ValueError):
+            RoutingSnapshot(str(path))
@@ -0,0 +1,78 @@
+"""Test module for the routing filter builder."""
+
+# pylint: disable=import-outside-toplevel
+
+RULES = [
+    {
+        "pk": "DomainAlias#www.example.com",
+        "sk": "DomainAlias#www.example.com",
+        "target_domain": "example.com",
+    },
+    {"pk": "Redirect#example.com", "sk": "/a", "target": "https://new.site/a"},
+    {
+        "pk": "RedirectFallback#example.com",
+        "sk": "/blog",
+        "target": "https://new.site/blog",
+    },
+    {"pk": "Meta#Generation", "sk": "Meta#Generation", "generation": 3},
+]
+
+
+class TestBuildFilter:
+    """Test class for the routing filter builder."""
+
+    @staticmethod
+    def test_filter_keys():
+        """Verify the keys cover domains, aliases, exact redirects and fallback domains."""
+        from tools.build_filter import filter_keys
+
+        keys = filter_keys(RULES + [dict(RULES[1], sk="/gone", deleted=True)])
+
+        assert keys == {
+            "D|www.example.com",
+            "A|www.example.com",
+            "D|example.com",
+            "R|example.com|/a",
+            "F|example.com",
+        }
+
+    @staticmethod
+    def test_sync_routing_filter_replaces_chunks():
+        """Verify the filter is stored for the current generation, without leftover chunks."""
+        from resources.functions.redirect.src.utils.bloom import (
+            FILTER_KEY,
+            RoutingFilter,
+        )
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+        from tools.build_filter import sync_routing_filter
+
+        old_chunk = {"pk": FILTER_KEY, "sk": "chunk#0009", "build_id": "old"}
+        table = StubTable(items=RULES + [old_chunk])
+        ddb_client = StubDynamoDBClient({"mock_table": table})
+
+        report = sync_routing_filter(ddb_client, "mock_table", false_positive_rate=0.01)
+        routing_filter = RoutingFilter(ddb_client, "mock_table")
+        routing_filter.load()
+
+        assert report["keys"] == 5
+        assert report["chunks"] == 1
+        assert report["expected_false_positive_rate"] <= 0.01
+        assert table.get(FILTER_KEY, "chunk#0009") is None
+        assert routing_filter.active
+        assert routing_filter.might_have_redirect("example.com", "/a")
+        assert not routing_filter.might_have_domain("unknown.com")
+
+    @staticmethod
+    def test_sync_routing_filter_needs_generation():
+        """Verify no filter is built for a table without a generation item."""
+        import pytest
+
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+        from tools.build_filter import sync_routing_filter
+
+        table = StubTable(items=RULES[:-1])
+        ddb_client = StubDynamoDBClient({"mock_table": table})
+
+        with pytest.raises(ValueError, match="no generation item"):
+            sync_routing_filter(ddb_client, "mock_table")
+        assert table.calls == ["get_item"]
@@ -0,0 +1,217 @@
+"""Test module for the bulk import and export tool."""
+
+# pylint: disable=import-outside-toplevel
+
+# Standard library imports
+import io
+
+# Related third party imports
+import pytest
+
+RULES_CSV = """type,source,path,target
+alias,www.example.com,,example.com
+redirect,example.com,/a,https://new.site/a
+redirect,example.com,/a,https://new.site/a-updated
+fallback,example.com,/blog,https://new.site/blog
+"""
+
+
+class TestBulkTool:
+    """Test class for the bulk import and export tool."""
+
+    @staticmethod
+    def test_import_rules():
+        """Verify rows are written in the key layout of the database models."""
+        from resources.functions.redirect.src.models.database import (
+            model_from_ddb_item,
+        )
+        from resources.functions.redirect.src.utils.mirror import stamp_change
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+        from tools.bulk import import_rules, read_rows
+
+        table = StubTable()
+        ddb_client = StubDynamoDBClient({"mock_table": table})
+
+        written = import_rules(
+            ddb_client,
+            "mock_table",
+            read_rows(io.StringIO(RULES_CSV), "csv"),
+            workers=2,
+            updated_at=100,
+        )
+
+        assert written == 3
+        assert table.get("Redirect#example.com", "/a") == stamp_change(
+            {
+                "pk": "Redirect#example.com",
+                "sk": "/a",
+                "target": "https://new.site/a-updated",
+            },
+            updated_at=100,
+        )
+        assert (
+            model_from_ddb_item(
+                table.get("DomainAlias#www.example.com", "DomainAlias#www.example.com")
+            ).target_domain
+            == "example.com"
+        )
+        assert table.get("RedirectFallback#example.com", "/blog") is not None
+        assert table.get("Meta#Generation", "Meta#Generation")["generation"] == 1
+
+    @staticmethod
+    def test_import_retries_unprocessed_items():
+        """Verify every batch is written in full, retrying UnprocessedItems."""
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+        from tools.bulk import item_batches, write_batch
+
+        table = StubTable(unprocessed_items_per_call=2)
+        ddb_client = StubDynamoDBClient({"mock_table": table})
+        items = [
+            {"pk": "Redirect#example.com", "sk": f"/{index}", "target": "t"}
+            for index in range(25)
+        ]
+
+        for batch in item_batches(items):
+            write_batch(ddb_client, "mock_table", batch, sleep=lambda _: None)
+
+        assert len(table.items) == 25
+        assert table.calls == ["batch_write_item"] * 3
+
+    @staticmethod
+    def test_import_rejects_unknown_rule_types():
+        """Verify an invalid row fails the import."""
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+        from tools.bulk import import_rules
+
+        with pytest.raises(ValueError, match="Unknown rule type"):
+            import_rules(
+                StubDynamoDBClient({"mock_table": StubTable()}),
+                "mock_table",
+                [{"type": "rewrite", "source": "example.com"}],
+            )
+
+    @staticmethod
+    @pytest.mark.parametrize(
+        "pattern, target, message",
+        [
+            ("/blog/(.*", "https://blog/", "Invalid pattern"),
+            ("/blog/(.*)", "https://blog/$2", "refers to \\$2"),
+        ],
+    )
+    def test_import_rejects_invalid_patterns(pattern, target, message):
+        """Verify a pattern that doesn't compile or lacks a referenced group fails the import."""
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+        from tools.bulk import import_rules
+
+        table = StubTable()
+        row = {"type": "pattern", "source": "a.com", "path": pattern, "target": target}
+
+        with pytest.raises(ValueError, match=message):
+            import_rules(StubDynamoDBClient({"mock_table": table}), "mock_table", [row])
+        assert table.calls == []
+
+    @staticmethod
+    def test_export_rules_round_trips_import():
+        """Verify an export of all segments writes every rule back as a row."""
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+        from tools.bulk import export_rules, import_rules, read_rows, row_writer
+
+        table = StubTable(page_size=1)
+        ddb_client = StubDynamoDBClient({"mock_table": table})
+        import_rules(ddb_client, "mock_table", read_rows(io.StringIO(RULES_CSV), "csv"))
+        table.put(
+            {
+                "pk": "Redirect#example.com",
+                "sk": "/deleted",
+                "target": "t",
+                "deleted": True,
+            }
+        )
+
+        output = io.StringIO()
+        with row_writer(output, "jsonl") as write_row:
+            exported = export_rules(ddb_client, "mock_table", write_row, segments=3)
+
+        rows = list(read_rows(io.StringIO(output.getvalue()), "jsonl"))
+        assert exported == 3
+        assert sorted(rows, key=lambda row: (row["type"], row["path"])) == [
+            {
+                "type": "alias",
+                "source": "www.example.com",
+                "path": "",
+                "target": "example.com",
+            },
+            {
+                "type": "fallback",
+                "source": "example.com",
+                "path": "/blog",
+                "target": "https://new.site/blog",
+            },
+            {
+                "type": "redirect",
+                "source": "example.com",
+                "path": "/a",
+                "target": "https://new.site/a-updated",
+            },
+        ]
+
+    @staticmethod
+    def test_export_rules_stops_when_a_segment_fails():
+        """Verify a failed segment ends the export, though the others fill the queue."""
+        import threading
+
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+        from tools.bulk import export_rules
+
+        class FailingClient(StubDynamoDBClient):
+            """Fails every scan of the first segment."""
+
+            def scan(self, **kwargs) -> dict:
+                if kwargs["Segment"] == 0:
+                    raise RuntimeError("segment failed")
+                return super().scan(**kwargs)
+
+        table = StubTable(
+            items=[
+                {"pk": f"Redirect#{index}.example.com", "sk": "/", "target": "t"}
+                for index in range(100)
+            ],
+            page_size=1,
+        )
+        errors = []
+
+        def export() -> None:
+            try:
+                export_rules(
+                    FailingClient({"mock_table": table}),
+                    "mock_table",
+                    lambda row: None,
+                    segments=2,
+                )
+            except RuntimeError as error:
+                errors.append(error)
+
+        thread = threading.Thread(target=export, daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+
+        assert not thread.is_alive()
+        assert [str(error) for error in errors] == ["segment failed"]
+
+    @staticmethod
+    def test_rows_keep_cache_ttls():
+        """Verify the optional cache_ttl field survives an import and export."""
+        from tools.bulk import row_from_rule, rule_from_row
+
+        row = {
+            "type": "redirect",
+            "source": "example.com",
+            "path": "/a",
+            "target": "https://new.site/a",
+            "cache_ttl": "300",
+        }
+
+        rule = rule_from_row(row)
+        assert rule.cache_ttl == 300
+        assert row_from_rule(rule) == row
+        assert rule_from_row(dict(row, cache_ttl="")).cache_ttl is None
@@ -0,0 +1,229 @@
+"""Test module for the KeyValueStore compiler and the edge function it renders."""
+
+# pylint: disable=import-outside-toplevel
+
+# Standard library imports
+import io
+import json
+import shutil
+import subprocess
+from urllib.parse import quote, urlencode
+
+# Related third party imports
+import pytest
+
+RULES = [
+    {
+        "pk": "DomainAlias#www.example.com",
+        "sk": "DomainAlias#www.example.com",
+        "target_domain": "example.com",
+    },
+    {
+        "pk": "DomainAlias#old.example.org",
+        "sk": "DomainAlias#old.example.org",
+        "target_domain": "www.example.com",
+    },
+    {"pk": "WildcardAlias", "sk": "*.example.net", "target_domain": "example.com"},
+    {
+        "pk": "Redirect#example.com",
+        "sk": "/a",
+        "target": "https://new.site/a",
+        "cache_ttl": 86400,
+    },
+    {"pk": "Redirect#example.com", "sk": "/b", "target": "https://new.site/b"},
+    # Unreachable, as www.example.com is an alias
+    {"pk": "Redirect#www.example.com", "sk": "/x", "target": "https://new.site/x"},
+    {
+        "pk": "RedirectFallback#example.com",
+        "sk": "/blog",
+        "target": "https://new.site/blog",
+    },
+    {
+        "pk": "RedirectPattern#example.com",
+        "sk": r"/p/(\d+)",
+        "target": "https://new.site/posts/$1",
+    },
+]
+REQUESTS_LOG = """\
+www.example.com /blog/hot
+www.example.com /blog/hot
+shop.example.net /a
+example.com /p/7
+"""
+# (host, path, query parameters, answered at the edge)
+REQUESTS = [
+    ("example.com", "/a", {}, True),
+    ("www.example.com", "/b", {"utm_source": "mail"}, True),
+    ("old.example.org", "/a", {}, True),
+    ("www.example.com", "/blog/hot", {}, True),
+    ("example.com", "/p/7", {}, True),
+    ("shop.example.net", "/a", {}, True),
+    ("example.com", "/blog/cold", {}, False),
+    ("other.example.net", "/a", {}, False),
+    ("www.example.com", "/x", {}, False),
+    ("example.com", "/a", {"q": "a b"}, False),
+    ("unknown.com", "/", {}, False),
+]
+NODE_HARNESS = """
+const DATA = %s;
+const cf = {kvs: () => ({get: async (key) => {
+    if (Object.prototype.hasOwnProperty.call(DATA, key)) return DATA[key];
+    throw new Error('Key not found');
+}})};
+%s
+const results = [];
+for (const event of %s) results.push(await handler(event));
+console.log(JSON.stringify(results));
+"""
+
+
+def compile_fixture_store(max_bytes=None):
+    """Compile the fixture rules and requests into store entries and a report."""
+    from tools.compile_kvs import compile_store, read_request_counts
+    from tools.compile_routes import RuleSet
+
+    kwargs = {"max_bytes": max_bytes} if max_bytes else {}
+    return compile_store(
+        RuleSet.from_ddb_items(RULES),
+        read_request_counts(io.StringIO(REQUESTS_LOG)),
+        default_cache_ttl=3600,
+        **kwargs,
+    )
+
+
+def run_edge_function(entries, events):
+    """Run the rendered function with node against an in-memory store."""
+    from tools.compile_kvs import render_function
+
+    source = render_function().replace("import cf from 'cloudfront';", "")
+    script = NODE_HARNESS % (
+        json.dumps({entry.key: entry.value for entry in entries}),
+        source,
+        json.dumps(events),
+    )
+    output = subprocess.run(
+        ["node", "--input-type=module"],
+        input=script,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(output.stdout)
+
+
+class TestCompileKvs:
+    """Test class for the KeyValueStore compiler."""
+
+    @staticmethod
+    def test_compile_store():
+        """Verify aliases resolve to their chain end, and unreachable redirects are left out."""
+        entries, report = compile_fixture_store()
+
+        store = {entry.key: entry.value for entry in entries}
+        assert store == {
+            "a|old.example.org": "example.com",
+            "a|www.example.com": "example.com",
+            "a|shop.example.net": "example.com",
+            # The most requested first
+            "r|example.com|/blog/hot": "3600|https://new.site/blog",
+            "r|example.com|/a": "86400|https://new.site/a",
+            "r|example.com|/p/7": "3600|https://new.site/posts/7",
+            "r|example.com|/b": "3600|https://new.site/b",
+        }
+        assert list(store)[3] == "r|example.com|/blog/hot"
+        assert report["aliases"] == 3
+        assert report["redirects"] == 4
+        assert report["bytes"] == sum(entry.size for entry in entries)
+
+    @staticmethod
+    def test_compile_store_leaves_out_broken_alias_chains():
+        """Verify hosts whose alias chain is too long are left out."""
+        from tools.compile_kvs import compile_store, read_request_counts
+        from tools.compile_routes import RuleSet
+
+        entries, report = compile_store(
+            RuleSet.from_ddb_items(RULES, max_alias_hops=1),
+            read_request_counts(io.StringIO(REQUESTS_LOG)),
+        )
+
+        keys = {entry.key for entry in entries}
+        assert "a|www.example.com" in keys
+        assert "a|old.example.org" not in keys
+        assert report["aliases"] == 2
+
+    @staticmethod
+    def test_compile_store_within_size_limit():
+        """Verify the least requested redirects are left out when the store is full."""
+        entries, report = compile_fixture_store(max_bytes=200)
+
+        keys = [entry.key for entry in entries]
+        assert "r|example.com|/blog/hot" in keys
+        assert "r|example.com|/b" not in keys
+        assert report["left_out"] > 0
+        assert report["bytes"] <= 200
+
+        with pytest.raises(ValueError, match="aliases alone"):
+            compile_fixture_store(max_bytes=10)
+
+    @staticmethod
+    @pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+    def test_edge_function_answers_like_the_controller():
+        """Verify the function answers like the redirect function, or forwards the request."""
+        from unittest.mock import patch
+
+        from resources.functions.redirect.src.controllers.redirect_controller import (
+            RedirectController,
+        )
+        from resources.functions.redirect.src.models.config import ControllerConfig
+        from resources.functions.redirect.src.models.request import ApiGatewayRequest
+        from resources.functions.redirect.src.utils.http_cache import cache_headers
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+
+        with patch.object(
+            RedirectController,
+            "_create_ddb_client",
+            return_value=StubDynamoDBClient({"mock_table": StubTable(items=RULES)}),
+        ):
+            controller = RedirectController(
+                ddb_table_name="mock_table",
+                config=ControllerConfig(
+                    pattern_rules=True,
+                    wildcard_aliases=True,
+                    redirect_cache_seconds=3600,
+                ),
+            )
+        entries, _ = compile_fixture_store()
+        events = [
+            {
+                "request": {
+                    "uri": path,
+                    "headers": {"host": {"value": host}},
+                    "querystring": {
+                        name: {"value": quote(value)} for name, value in query.items()
+                    },
+                }
+            }
+            for host, path, query, _ in REQUESTS
+        ]
+
+        results = run_edge_function(entries, events)
+
+        for (host, path, query, answered), result in zip(REQUESTS, results):
+            assert result.get("statusCode") == (301 if answered else None), (host, path)
+            if not answered:
+                # Forwarded to the origin, with the host for the redirect function
+                assert result["headers"]["x-forwarded-host"] == {"value": host}
+                continue
+
+            resolution = controller.resolve(
+                ApiGatewayRequest(domain=host, path=path, query_params=query or None)
+            )
+            location = resolution.location
+            if query:
+                location += "?" + urlencode(query)
+            expected_headers = {"X-Resolved-Domain": resolution.domain}
+            expected_headers |= cache_headers(resolution.cache_ttl)
+            expected_headers["Location"] = location
+            assert {
+                name.lower(): value for name, value in expected_headers.items()
+            } == {name: header["value"] for name, header in result["headers"].items()}
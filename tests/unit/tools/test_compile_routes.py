@@ -0,0 +1,149 @@
+"""Test module for the route compiler."""
+
+# pylint: disable=import-outside-toplevel
+
+RULES = [
+    {
+        "pk": "DomainAlias#www.example.com",
+        "sk": "DomainAlias#www.example.com",
+        "target_domain": "example.com",
+    },
+    {"pk": "Redirect#example.com", "sk": "/a", "target": "https://new.site/a"},
+    {"pk": "RedirectFallback#example.com", "sk": "/", "target": "https://new.site/"},
+    {
+        "pk": "RedirectFallback#example.com",
+        "sk": "/blog",
+        "target": "https://new.site/blog",
+    },
+    {"pk": "Meta#Generation", "sk": "Meta#Generation", "generation": 3},
+]
+
+
+class TestCompileRoutes:
+    """Test class for the route compiler."""
+
+    @staticmethod
+    def test_compile_routes():
+        """Verify every known path of every source domain resolves like the controller."""
+        import io
+
+        from resources.functions.redirect.src.models.database import ResolvedRoute
+        from tools.compile_routes import RuleSet, compile_routes, read_known_paths
+
+        rules = RuleSet.from_ddb_items(RULES)
+        known_paths = read_known_paths(io.StringIO("www.example.com /blog/post-1\n"))
+
+        routes = list(compile_routes(rules, known_paths))
+
+        assert [
+            (route.source_domain, route.path, route.target) for route in routes
+        ] == [
+            ("example.com", "/", "https://new.site/"),
+            ("example.com", "/a", "https://new.site/a"),
+            ("example.com", "/blog", "https://new.site/blog"),
+            ("www.example.com", "/", "https://new.site/"),
+            ("www.example.com", "/a", "https://new.site/a"),
+            ("www.example.com", "/blog", "https://new.site/blog"),
+            ("www.example.com", "/blog/post-1", "https://new.site/blog"),
+        ]
+        assert all(route.domain == "example.com" for route in routes)
+        assert isinstance(routes[0], ResolvedRoute)
+
+    @staticmethod
+    def test_sync_resolved_items():
+        """Verify only changed Resolved items are written and stale ones are deleted."""
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+        from tools.compile_routes import sync_resolved_items
+
+        table = StubTable(
+            items=RULES
+            + [
+                {
+                    "pk": "Resolved#example.com",
+                    "sk": "/a",
+                    "resolved_domain": "example.com",
+                    "target": "https://new.site/a",
+                    "generation": 3,
+                },
+                {
+                    "pk": "Resolved#example.com",
+                    "sk": "/blog",
+                    "resolved_domain": "example.com",
+                    "target": "https://new.site/blog",
+                    "generation": 2,
+                },
+                {
+                    "pk": "Resolved#example.com",
+                    "sk": "/removed",
+                    "resolved_domain": "example.com",
+                    "target": "https://old.site/",
+                },
+            ]
+        )
+        ddb_client = StubDynamoDBClient({"mock_table": table})
+
+        counts = sync_resolved_items(ddb_client, "mock_table")
+        recompiled_counts = sync_resolved_items(
+            ddb_client, "mock_table", domains={"example.com"}
+        )
+
+        # The item of an older generation is rewritten, though its target is the same
+        assert counts == {"written": 5, "deleted": 1}
+        assert recompiled_counts == {"written": 0, "deleted": 0}
+        assert table.get("Resolved#example.com", "/removed") is None
+        assert table.get("Resolved#www.example.com", "/blog") == {
+            "pk": "Resolved#www.example.com",
+            "sk": "/blog",
+            "resolved_domain": "example.com",
+            "target": "https://new.site/blog",
+            "generation": 3,
+        }
+
+    @staticmethod
+    def test_sync_resolved_items_needs_generation():
+        """Verify no Resolved items are compiled for a table without a generation item."""
+        import pytest
+
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+        from tools.compile_routes import sync_resolved_items
+
+        table = StubTable(items=RULES[:-1])
+
+        with pytest.raises(ValueError, match="no generation item"):
+            sync_resolved_items(StubDynamoDBClient({"mock_table": table}), "mock_table")
+        assert table.calls == ["get_item"]
+
+    @staticmethod
+    def test_compile_routes_leaves_out_broken_alias_chains():
+        """Verify domains whose alias chain loops or is too long are left out."""
+        from tools.compile_routes import RuleSet, compile_routes
+
+        rules = RuleSet.from_ddb_items(
+            RULES
+            + [
+                {
+                    "pk": "DomainAlias#a.com",
+                    "sk": "DomainAlias#a.com",
+                    "target_domain": "b.com",
+                },
+                {
+                    "pk": "DomainAlias#b.com",
+                    "sk": "DomainAlias#b.com",
+                    "target_domain": "a.com",
+                },
+                {
+                    "pk": "DomainAlias#old.example.com",
+                    "sk": "DomainAlias#old.example.com",
+                    "target_domain": "www.example.com",
+                },
+            ],
+            max_alias_hops=1,
+        )
+
+        routes = list(compile_routes(rules))
+
+        # www.example.com is one hop away, but old.example.com two
+        assert {route.source_domain for route in routes} == {
+            "example.com",
+            "www.example.com",
+        }
@@ -0,0 +1,82 @@
+"""Test module for the storage export tool."""
+
+# pylint: disable=import-outside-toplevel
+
+# Related third party imports
+import pytest
+
+
+class TestExportStorageTool:
+    """Test class for the storage export tool."""
+
+    @staticmethod
+    def test_export_replaces_existing_file(tmp_path):
+        """Verify that an export replaces the previous one, and leaves no temporary file."""
+        from resources.functions.redirect.src.storage.sqlite import SQLiteBackend
+        from tools.export_storage import export_storage
+
+        output = tmp_path / "rules.sqlite"
+        export_storage(
+            [{"pk": "Redirect#example.com", "sk": "/", "target": "https://a/"}],
+            "sqlite",
+            str(output),
+        )
+        export_storage(
+            [{"pk": "Redirect#example.com", "sk": "/", "target": "https://b/"}],
+            "sqlite",
+            str(output),
+        )
+
+        assert SQLiteBackend(str(output)).get_redirect("example.com", "/") == (
+            "https://b/"
+        )
+        assert [path.name for path in tmp_path.iterdir()] == ["rules.sqlite"]
+
+    @staticmethod
+    @pytest.mark.parametrize("backend", ["memory", "sqlite"])
+    def test_export_leaves_out_tombstones_and_meta_items(backend, tmp_path):
+        """Verify that only live rules are exported, and binary meta items don't break it."""
+        from resources.functions.redirect.src.storage.memory import MemoryBackend
+        from resources.functions.redirect.src.storage.sqlite import SQLiteBackend
+        from tools.export_storage import export_storage
+
+        output = str(tmp_path / f"rules.{backend}")
+        export_storage(
+            [
+                {"pk": "Redirect#example.com", "sk": "/a", "target": "https://a/"},
+                {
+                    "pk": "Redirect#example.com",
+                    "sk": "/deleted",
+                    "target": "https://deleted/",
+                    "deleted": True,
+                    "updated_at": 100,
+                },
+                {
+                    "pk": "DomainAlias#www.example.com",
+                    "sk": "DomainAlias#www.example.com",
+                    "target_domain": "example.com",
+                    "deleted": True,
+                },
+                {"pk": "Meta#RoutingFilter", "sk": "0", "bits": b"\x00\xff"},
+                {"pk": "Meta#Generation", "sk": "Meta#Generation", "generation": 3},
+            ],
+            backend,
+            output,
+        )
+        storage = (
+            MemoryBackend.from_file(output)
+            if backend == "memory"
+            else SQLiteBackend(output)
+        )
+
+        assert storage.get_redirect("example.com", "/a") == "https://a/"
+        assert storage.get_redirect("example.com", "/deleted") is None
+        assert storage.get_alias("www.example.com") is None
+
+    @staticmethod
+    def test_export_unknown_backend(tmp_path):
+        """Verify that only the local backends can be exported to."""
+        from tools.export_storage import export_storage
+
+        with pytest.raises(ValueError, match="Unknown local storage backend"):
+            export_storage([], "dynamodb", str(tmp_path / "rules"))
@@ -0,0 +1,60 @@
+"""Test module for the snapshot export tool."""
+
+# pylint: disable=import-outside-toplevel
+
+
+class TestSnapshotTool:
+    """Test class for the snapshot export tool."""
+
+    @staticmethod
+    def test_export_snapshot(tmp_path):
+        """Verify that all pages of a table scan end up in the right snapshot sections."""
+        from resources.functions.redirect.src.utils.snapshot import RoutingSnapshot
+        from tests.stubs.dynamodb import StubDynamoDBClient, StubTable
+        from tools.snapshot import export_snapshot, scan_items
+
+        table = StubTable(
+            items=[
+                {
+                    "pk": "DomainAlias#amazon.com",
+                    "sk": "DomainAlias#amazon.com",
+                    "target_domain": "example.com",
+                },
+                {"pk": "Redirect#example.com", "sk": "/", "target": "https://a/"},
+                {
+                    "pk": "RedirectFallback#example.com",
+                    "sk": "/b",
+                    "target": "https://b/",
+                },
+                {
+                    "pk": "RedirectPattern#example.com",
+                    "sk": "/p/(.*)",
+                    "target": "https://p/$1",
+                },
+                {
+                    "pk": "Redirect#example.com",
+                    "sk": "/deleted",
+                    "target": "https://deleted/",
+                    "deleted": True,
+                },
+                {"pk": "SomethingElse", "sk": "ignored"},
+            ],
+            page_size=1,
+        )
+        output = str(tmp_path / "routes.snap")
+
+        export_snapshot(
+            scan_items(StubDynamoDBClient({"mock_table": table}), "mock_table"), output
+        )
+
+        snapshot = RoutingSnapshot(output)
+        assert snapshot.get_alias("amazon.com").target_domain == "example.com"
+        assert snapshot.get_redirect_target("example.com", "/") == "https://a/"
+        assert snapshot.get_redirect_target("example.com", "/deleted") is None
+        assert [option.path for option in snapshot.get_fallbacks("example.com")] == [
+            "/b"
+        ]
+        assert [option.pattern for option in snapshot.get_patterns("example.com")] == [
+            "/p/(.*)"
+        ]
+        assert table.calls == ["scan"] * 6
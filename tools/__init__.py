@@ -0,0 +1 @@
+"""Command line tools for managing the redirects table, run as modules from the repository root."""
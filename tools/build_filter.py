@@ -0,0 +1,200 @@
+"""
+Build the routing filter, a Bloom filter of the rules, and store it in the table.
+
+Run from the repository root after every change to the rules:
+
+    python -m tools.build_filter --table-name <table> [--false-positive-rate <rate>]
+        [--max-bytes <bytes>]
+
+The filter holds every domain with an alias, redirects or fallbacks, every alias,
+every wildcard alias, every exact redirect and every domain with fallbacks or
+regex rules. With ROUTING_FILTER_ENABLED
+the redirect function skips the lookups it rules out, so requests for unknown
+domains and paths cost no DynamoDB calls. A false positive only costs the lookup
+the filter would otherwise have saved.
+
+The filter is sized for the requested false positive rate, unless that takes more
+than --max-bytes, in which case it is shrunk and the rate goes up. The memory
+budget report shows the resulting size and expected rate. The filter records the
+table generation it was built for, and functions ignore it once the rules change.
+The table needs a generation item for that, which `python -m tools.bulk import`
+creates, so the build fails without one.
+"""
+
+# Standard library imports
+import argparse
+import sys
+import uuid
+from typing import Dict, Iterable, List, Optional, Set
+
+# Related third party imports
+import boto3
+
+# Local application / library specific imports
+from resources.functions.redirect.src.models.database import (
+    Alias,
+    RedirectFallbackOption,
+    RedirectOption,
+    RedirectPatternOption,
+    model_from_ddb_item,
+)
+from resources.functions.redirect.src.utils.bloom import (
+    FILTER_KEY,
+    BloomFilter,
+    alias_key,
+    domain_key,
+    fallback_key,
+    filter_to_ddb_items,
+    pattern_key,
+    redirect_key,
+    wildcard_key,
+)
+from resources.functions.redirect.src.utils.dynamodb import (
+    decode_item,
+    encode_item,
+    encode_key,
+)
+from resources.functions.redirect.src.utils.mirror import GENERATION_KEY
+from tools.bulk import write_requests
+from tools.snapshot import scan_items
+
+DEFAULT_FALSE_POSITIVE_RATE = 0.01
+
+
+def filter_keys(items: Iterable[dict]) -> Set[str]:
+    """Return the filter keys of all rules among the items of a table scan."""
+    keys: Set[str] = set()
+    for item in items:
+        if item.get("deleted"):
+            continue
+        model = model_from_ddb_item(item)
+        if isinstance(model, Alias) and model.is_wildcard:
+            keys.add(wildcard_key(model.source_domain.removeprefix("*.")))
+        elif isinstance(model, Alias):
+            keys.add(domain_key(model.source_domain))
+            keys.add(alias_key(model.source_domain))
+        elif isinstance(model, RedirectOption):
+            keys.add(domain_key(model.domain))
+            keys.add(redirect_key(model.domain, model.path))
+        elif isinstance(model, RedirectFallbackOption):
+            keys.add(domain_key(model.domain))
+            keys.add(fallback_key(model.domain))
+        elif isinstance(model, RedirectPatternOption):
+            keys.add(domain_key(model.domain))
+            keys.add(pattern_key(model.domain))
+    return keys
+
+
+def build_filter(
+    keys: Set[str],
+    false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE,
+    max_bytes: Optional[int] = None,
+) -> BloomFilter:
+    """Return a filter holding the keys, sized for the rate within max_bytes."""
+    bloom = BloomFilter.for_capacity(len(keys), false_positive_rate, max_bytes)
+    for key in keys:
+        bloom.add(key)
+    return bloom
+
+
+def memory_budget_report(bloom: BloomFilter, key_count: int) -> Dict[str, float]:
+    """Return the size and expected false positive rate of a filter."""
+    return {
+        "keys": key_count,
+        "bits": bloom.num_bits,
+        "bytes": bloom.memory_bytes,
+        "hashes": bloom.num_hashes,
+        "bits_per_key": round(bloom.num_bits / max(1, key_count), 2),
+        "expected_false_positive_rate": round(bloom.false_positive_rate(key_count), 6),
+    }
+
+
+def read_generation(ddb_client, table_name: str) -> Optional[int]:
+    """Return the current table generation, or None if it isn't tracked."""
+    response = ddb_client.get_item(
+        TableName=table_name,
+        Key=encode_key(GENERATION_KEY, GENERATION_KEY),
+        ConsistentRead=True,
+    )
+    if "Item" not in response:
+        return None
+    return int(decode_item(response["Item"])["generation"])
+
+
+def store_filter(
+    ddb_client,
+    table_name: str,
+    bloom: BloomFilter,
+    generation: Optional[int],
+    stale_chunk_keys: Iterable[str] = (),
+) -> int:
+    """Write the filter chunks and delete leftover chunks of a larger filter."""
+    items = filter_to_ddb_items(bloom, generation, build_id=uuid.uuid4().hex)
+    written_keys = {item["sk"] for item in items}
+    requests: List[dict] = [
+        {"PutRequest": {"Item": encode_item(item)}} for item in items
+    ]
+    requests.extend(
+        {"DeleteRequest": {"Key": encode_key(FILTER_KEY, sort_key)}}
+        for sort_key in sorted(set(stale_chunk_keys) - written_keys)
+    )
+    # Chunks are up to 256 KiB, so they are written one per call to stay within
+    # the 16 MB BatchWriteItem request limit by a wide margin.
+    for request in requests:
+        write_requests(ddb_client, table_name, [request])
+    return len(items)
+
+
+def sync_routing_filter(
+    ddb_client,
+    table_name: str,
+    false_positive_rate: float = DEFAULT_FALSE_POSITIVE_RATE,
+    max_bytes: Optional[int] = None,
+) -> Dict[str, float]:
+    """Build the filter from the rules of the table, store it and return its report."""
+    # The generation is read before the scan, so rules written during the scan
+    # bump it past the stored one and the filter is ignored until the next build.
+    generation = read_generation(ddb_client, table_name)
+    if generation is None:
+        raise ValueError(
+            "The table has no generation item, so functions couldn't tell when the "
+            "filter is outdated. Bump it with every write to the rules first."
+        )
+    chunk_keys = []
+    keys = set()
+    for item in scan_items(ddb_client, table_name):
+        if item["pk"] == FILTER_KEY:
+            chunk_keys.append(item["sk"])
+        else:
+            keys.update(filter_keys([item]))
+
+    bloom = build_filter(keys, false_positive_rate, max_bytes)
+    report = memory_budget_report(bloom, len(keys))
+    report["chunks"] = store_filter(
+        ddb_client, table_name, bloom, generation, stale_chunk_keys=chunk_keys
+    )
+    return report
+
+
+def main(argv: List[str]) -> None:
+    """Parse the command line, build the filter and print its memory budget report."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--table-name", required=True)
+    parser.add_argument(
+        "--false-positive-rate", type=float, default=DEFAULT_FALSE_POSITIVE_RATE
+    )
+    parser.add_argument("--max-bytes", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    report = sync_routing_filter(
+        boto3.client("dynamodb"),
+        args.table_name,
+        false_positive_rate=args.false_positive_rate,
+        max_bytes=args.max_bytes,
+    )
+    for name, value in report.items():
+        print(f"{name}: {value}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
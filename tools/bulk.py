@@ -0,0 +1,473 @@
+"""
+Import redirect rules into the redirects table from CSV or JSONL, or export them.
+
+Run from the repository root:
+
+    python -m tools.bulk import --table-name <table> rules.csv [--workers 8]
+    python -m tools.bulk export --table-name <table> rules.jsonl [--segments 8]
+
+Every row is one rule, with the fields type, source, path and target:
+
+    alias     requests for domain `source` are handled as requests for `target`
+    redirect  requests for exactly `path` on domain `source` go to `target`
+    fallback  requests on domain `source` whose path contains `path` go to `target`
+    pattern   requests on domain `source` whose whole path matches the regex `path`
+              go to `target`, with '$1', '$2' etc. replaced by the captured groups
+
+Redirects, fallbacks and patterns can have an optional `cache_ttl` field, the
+number of seconds browsers and CDNs may cache their redirects.
+
+The format follows the file extension, '.csv' or '.jsonl'. Files are streamed,
+so memory use doesn't depend on their size. Imported items are stamped with
+their update time and the table generation is bumped afterwards, so running
+functions with a table mirror pick the changes up.
+"""
+
+# Standard library imports
+import argparse
+import csv
+import json
+import queue
+import random
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+# Related third party imports
+import boto3
+import botocore.config
+
+# Local application / library specific imports
+from resources.functions.redirect.src.models.database import (
+    Alias,
+    RedirectFallbackOption,
+    RedirectOption,
+    RedirectPatternOption,
+    model_from_ddb_item,
+)
+from resources.functions.redirect.src.utils.dynamodb import decode_item, encode_item
+from resources.functions.redirect.src.utils.mirror import GENERATION_KEY, stamp_change
+from resources.functions.redirect.src.utils.pattern_matcher import compile_pattern
+
+FIELDS = ["type", "source", "path", "target", "cache_ttl"]
+FORMATS = ("csv", "jsonl")
+# BatchWriteItem accepts at most 25 items per call.
+BATCH_WRITE_MAX_ITEMS = 25
+BATCH_WRITE_MAX_ATTEMPTS = 8
+
+Rule = Union[Alias, RedirectOption, RedirectFallbackOption, RedirectPatternOption]
+
+
+class Progress:
+    """A thread-safe item counter that reports its progress at most once per interval."""
+
+    def __init__(
+        self, label: str, stream: Optional[TextIO] = None, interval: float = 1.0
+    ) -> None:
+        """Construct a new Progress."""
+        self._label = label
+        self._stream = stream
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._reported_at = 0.0
+        self.count = 0
+
+    def add(self, count: int) -> None:
+        """Count processed items, and report them if the interval has passed."""
+        with self._lock:
+            self.count += count
+            now = time.monotonic()
+            if now - self._reported_at >= self._interval:
+                self._reported_at = now
+                self._report(now, end="\r")
+
+    def close(self) -> None:
+        """Report the final count."""
+        with self._lock:
+            self._report(time.monotonic(), end="\n")
+
+    def _report(self, now: float, end: str) -> None:
+        """Write the count and the rate so far."""
+        rate = self.count / max(now - self._started_at, 1e-9)
+        stream = self._stream or sys.stderr
+        stream.write(f"{self._label} {self.count} items ({rate:.0f}/s){end}")
+        stream.flush()
+
+
+def rule_from_row(row: Dict[str, str]) -> Rule:
+    """Convert an import row to the model of its rule type."""
+    rule_type = row.get("type")
+    if rule_type == "alias":
+        return Alias(source_domain=row["source"], target_domain=row["target"])
+    # Empty in CSV rows of rules without a TTL of their own
+    cache_ttl = (
+        int(row["cache_ttl"]) if row.get("cache_ttl") not in (None, "") else None
+    )
+    if rule_type == "redirect":
+        return RedirectOption(
+            domain=row["source"],
+            path=row["path"],
+            target=row["target"],
+            cache_ttl=cache_ttl,
+        )
+    if rule_type == "fallback":
+        return RedirectFallbackOption(
+            domain=row["source"],
+            path=row["path"],
+            target=row["target"],
+            cache_ttl=cache_ttl,
+        )
+    if rule_type == "pattern":
+        # Refused here, as the redirect function would only skip the rule
+        compile_pattern(row["path"], row["target"])
+        return RedirectPatternOption(
+            domain=row["source"],
+            pattern=row["path"],
+            target=row["target"],
+            cache_ttl=cache_ttl,
+        )
+    raise ValueError(f"Unknown rule type {rule_type!r} in row {row}")
+
+
+def row_from_rule(rule: Rule) -> Dict[str, str]:
+    """Convert a rule model to an export row."""
+    if isinstance(rule, Alias):
+        return {
+            "type": "alias",
+            "source": rule.source_domain,
+            "path": "",
+            "target": rule.target_domain,
+        }
+    if isinstance(rule, RedirectPatternOption):
+        row = {
+            "type": "pattern",
+            "source": rule.domain,
+            "path": rule.pattern,
+            "target": rule.target,
+        }
+    else:
+        row = {
+            "type": "redirect" if isinstance(rule, RedirectOption) else "fallback",
+            "source": rule.domain,
+            "path": rule.path,
+            "target": rule.target,
+        }
+    if rule.cache_ttl is not None:
+        row["cache_ttl"] = str(rule.cache_ttl)
+    return row
+
+
+def file_format(path: str, requested_format: Optional[str] = None) -> str:
+    """Return the requested format, or else the one matching the file extension."""
+    if requested_format:
+        return requested_format
+    for candidate in FORMATS:
+        if path.endswith(f".{candidate}"):
+            return candidate
+    raise ValueError(f"Can't tell the format of {path}, pass --format")
+
+
+def read_rows(rows_file: TextIO, rows_format: str) -> Iterator[Dict[str, str]]:
+    """Yield the rows of a CSV or JSONL file one at a time."""
+    if rows_format == "csv":
+        yield from csv.DictReader(rows_file)
+        return
+
+    for line in rows_file:
+        if line.strip():
+            yield json.loads(line)
+
+
+@contextmanager
+def row_writer(
+    rows_file: TextIO, rows_format: str
+) -> Iterator[Callable[[Dict[str, str]], None]]:
+    """Return a function writing rows to a CSV or JSONL file."""
+    if rows_format == "csv":
+        writer = csv.DictWriter(rows_file, fieldnames=FIELDS)
+        writer.writeheader()
+        yield writer.writerow
+        return
+
+    yield lambda row: rows_file.write(json.dumps(row) + "\n")
+
+
+def item_batches(
+    items: Iterable[dict], size: int = BATCH_WRITE_MAX_ITEMS
+) -> Iterator[List[dict]]:
+    """
+    Yield batches of items for BatchWriteItem.
+
+    BatchWriteItem rejects batches with duplicate keys. A later item replaces an
+    earlier one with the same key in the same batch, as sequential writes would.
+    Batches are written in parallel, so for duplicates in different batches
+    either one may end up in the table.
+    """
+    batch: Dict[Tuple[str, str], dict] = {}
+    for item in items:
+        batch[(item["pk"], item["sk"])] = item
+        if len(batch) == size:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+
+def write_batch(
+    ddb_client,
+    table_name: str,
+    items: List[dict],
+    sleep: Callable[[float], None] = time.sleep,
+) -> None:
+    """Write a batch of items, retrying UnprocessedItems with exponential backoff."""
+    write_requests(
+        ddb_client,
+        table_name,
+        [{"PutRequest": {"Item": encode_item(item)}} for item in items],
+        sleep=sleep,
+    )
+
+
+def write_requests(
+    ddb_client,
+    table_name: str,
+    requests: List[dict],
+    sleep: Callable[[float], None] = time.sleep,
+) -> None:
+    """Send a batch of put and delete requests, retrying UnprocessedItems with backoff."""
+    request_items = {table_name: requests}
+    for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+        if attempt:
+            # Full jitter keeps parallel workers from retrying in lockstep.
+            sleep(random.uniform(0, min(5.0, 0.05 * 2**attempt)))
+
+        response = ddb_client.batch_write_item(RequestItems=request_items)
+        request_items = response.get("UnprocessedItems")
+        if not request_items:
+            return
+
+    raise RuntimeError("Unprocessed items remained after retrying BatchWriteItem")
+
+
+def bump_generation(ddb_client, table_name: str) -> None:
+    """Increment the table generation, signalling mirrors to look for changes."""
+    ddb_client.update_item(
+        TableName=table_name,
+        Key=encode_item({"pk": GENERATION_KEY, "sk": GENERATION_KEY}),
+        UpdateExpression="ADD generation :one",
+        ExpressionAttributeValues={":one": {"N": "1"}},
+    )
+
+
+def import_rules(
+    ddb_client,
+    table_name: str,
+    rows: Iterable[Dict[str, str]],
+    workers: int = 8,
+    progress: Optional[Progress] = None,
+    updated_at: Optional[int] = None,
+) -> int:
+    """
+    Write the rules of the rows to the table with parallel BatchWriteItem calls.
+
+    At most two batches per worker are in flight, so rows are read only as fast
+    as they are written. Returns the number of items written.
+    """
+    progress = progress or Progress("imported", interval=float("inf"))
+    updated_at = int(time.time()) if updated_at is None else updated_at
+    items = (stamp_change(rule_from_row(row).to_ddb_item(), updated_at) for row in rows)
+
+    in_flight = threading.BoundedSemaphore(workers * 2)
+    errors: List[BaseException] = []
+
+    def on_done(future: Future, count: int) -> None:
+        in_flight.release()
+        if future.exception() is not None:
+            errors.append(future.exception())
+        else:
+            progress.add(count)
+
+    try:
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bulk-import"
+        ) as executor:
+            for batch in item_batches(items):
+                in_flight.acquire()  # pylint: disable=consider-using-with
+                if errors:
+                    in_flight.release()
+                    break
+                future = executor.submit(write_batch, ddb_client, table_name, batch)
+                future.add_done_callback(
+                    lambda future, count=len(batch): on_done(future, count)
+                )
+    finally:
+        # Even a failed import may have written items that mirrors should see.
+        if progress.count:
+            bump_generation(ddb_client, table_name)
+
+    if errors:
+        raise errors[0]
+    return progress.count
+
+
+def scan_segment(
+    ddb_client, table_name: str, segment: int, total_segments: int
+) -> Iterator[List[dict]]:
+    """Yield the decoded pages of a single scan segment."""
+    scan_kwargs: dict = {
+        "TableName": table_name,
+        "Segment": segment,
+        "TotalSegments": total_segments,
+    }
+    while True:
+        response = ddb_client.scan(**scan_kwargs)
+        yield [decode_item(item) for item in response["Items"]]
+
+        if not response.get("LastEvaluatedKey"):
+            return
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def export_rules(
+    ddb_client,
+    table_name: str,
+    write_row: Callable[[Dict[str, str]], None],
+    segments: int = 8,
+    progress: Optional[Progress] = None,
+) -> int:
+    """
+    Write every rule in the table as a row, scanning its segments in parallel.
+
+    Scanned pages are handed to the writing thread through a bounded queue, so at
+    most two pages per segment are held in memory. Items that aren't rules, like
+    the generation item and tombstones, are skipped. Returns the number of rows.
+    """
+    progress = progress or Progress("exported", interval=float("inf"))
+    pages: "queue.Queue[Union[List[dict], BaseException, None]]" = queue.Queue(
+        maxsize=segments * 2
+    )
+    # Set when the export fails, so segments blocked on a full queue give up
+    # rather than keep the executor from shutting down.
+    cancelled = threading.Event()
+
+    def put(page: Union[List[dict], BaseException, None]) -> bool:
+        while not cancelled.is_set():
+            try:
+                pages.put(page, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def scan(segment: int) -> None:
+        try:
+            for page in scan_segment(ddb_client, table_name, segment, segments):
+                if not put(page):
+                    return
+        except BaseException as error:  # pylint: disable=broad-except
+            put(error)
+        else:
+            put(None)
+
+    with ThreadPoolExecutor(
+        max_workers=segments, thread_name_prefix="bulk-export"
+    ) as executor:
+        for segment in range(segments):
+            executor.submit(scan, segment)
+
+        try:
+            finished_segments = 0
+            while finished_segments < segments:
+                page = pages.get()
+                if page is None:
+                    finished_segments += 1
+                    continue
+                if isinstance(page, BaseException):
+                    raise page
+
+                rows = 0
+                for item in page:
+                    rule = model_from_ddb_item(item)
+                    if rule is not None and not item.get("deleted"):
+                        write_row(row_from_rule(rule))
+                        rows += 1
+                progress.add(rows)
+        except BaseException:
+            cancelled.set()
+            raise
+
+    return progress.count
+
+
+def create_ddb_client(max_pool_connections: int):
+    """Create a DDB client with a connection for every worker."""
+    return boto3.client(
+        "dynamodb",
+        config=botocore.config.Config(
+            max_pool_connections=max_pool_connections,
+            retries={"mode": "adaptive", "max_attempts": 10},
+        ),
+    )
+
+
+def main(argv: List[str]) -> None:
+    """Parse the command line and run the import or export."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="write rules to the table")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--workers", type=int, default=8)
+
+    export_parser = subparsers.add_parser("export", help="read rules from the table")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--segments", type=int, default=8)
+
+    for subparser in (import_parser, export_parser):
+        subparser.add_argument("--table-name", required=True)
+        subparser.add_argument("--format", choices=FORMATS, default=None)
+    args = parser.parse_args(argv)
+
+    rows_format = file_format(args.path, args.format)
+    if args.command == "import":
+        ddb_client = create_ddb_client(args.workers)
+        progress = Progress("imported")
+        with open(args.path, encoding="utf-8", newline="") as rows_file:
+            import_rules(
+                ddb_client,
+                args.table_name,
+                read_rows(rows_file, rows_format),
+                workers=args.workers,
+                progress=progress,
+            )
+    else:
+        ddb_client = create_ddb_client(args.segments)
+        progress = Progress("exported")
+        with open(args.path, "w", encoding="utf-8", newline="") as rows_file:
+            with row_writer(rows_file, rows_format) as write_row:
+                export_rules(
+                    ddb_client,
+                    args.table_name,
+                    write_row,
+                    segments=args.segments,
+                    progress=progress,
+                )
+    progress.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
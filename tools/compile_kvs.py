@@ -0,0 +1,274 @@
+"""
+Compile the hottest redirects into a CloudFront KeyValueStore, resolved at the edge.
+
+Run from the repository root after every change to the rules:
+
+    python -m tools.compile_kvs --table-name <table> [--requests <file>]
+        [--redirect-cache-seconds <seconds>] [--max-alias-hops <hops>]
+        [--max-bytes <bytes>]
+
+Two files are written into the edge function's asset directory, which the Proxy
+construct deploys with edge caching enabled:
+
+    redirects.kvs.json  the import file of the KeyValueStore
+    redirect.js         the CloudFront Function resolving requests from the store
+
+The store holds every alias, as the domain at the end of its chain, and every
+exact redirect of a domain that isn't aliased away. The --requests file adds the
+outcome of the most requested paths, one '<domain> <path>' line per request, e.g.
+from the access logs, whether an exact redirect, a regex rule or a fallback
+produced it. Wildcard aliases are only included for requested hosts. Hosts whose
+alias chain is longer than --max-alias-hops, or loops, are left out.
+
+The function answers a request with a 301 when the store has its host and path,
+with the same headers as the redirect function, and forwards every other request
+to it. Requests are looked up as they arrive, so with CANONICALIZE_HOST or a
+PATH_POLICY only canonical requests are answered at the edge.
+
+A store holds at most --max-bytes of keys and values. Aliases always have to fit;
+redirects are added by the number of requests for them until the store is full,
+and the remainder is left to the redirect function.
+"""
+
+# Standard library imports
+import argparse
+import json
+import os
+import string
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+# Related third party imports
+import boto3
+
+# Local application / library specific imports
+from resources.functions.redirect.src.models.request import FORWARDED_HOST_HEADER
+from resources.functions.redirect.src.models.resolution import Location
+from tools.compile_routes import DEFAULT_MAX_ALIAS_HOPS, RuleSet
+from tools.snapshot import scan_items
+
+DEFAULT_OUTPUT_DIRECTORY = "resources/functions/edge"
+IMPORT_FILE_NAME = "redirects.kvs.json"
+FUNCTION_FILE_NAME = "redirect.js"
+FUNCTION_TEMPLATE = os.path.join(os.path.dirname(__file__), "edge_redirect.js")
+# Replaced with the ID of the deployed store by the Proxy construct.
+KVS_ID_PLACEHOLDER = "__KVS_ID__"
+
+# The limits of a CloudFront KeyValueStore, in UTF-8 bytes. The total is kept a
+# little below the 5 MB quota, to leave room for the import file's own overhead.
+MAX_KEY_BYTES = 512
+MAX_VALUE_BYTES = 1024
+DEFAULT_MAX_BYTES = 5_000_000
+
+ALIAS_PREFIX = "a|"
+REDIRECT_PREFIX = "r|"
+SEPARATOR = "|"
+
+
+@dataclass
+class StoreEntry:
+    """A key and value of the store, and the number of requests it answers."""
+
+    key: str
+    value: str
+    requests: int = 0
+
+    @property
+    def size(self) -> int:
+        """Return the size the entry takes up in the store, in bytes."""
+        return len(self.key.encode()) + len(self.value.encode())
+
+
+def alias_entry_key(host: str) -> str:
+    """Return the store key of the alias of a host."""
+    return f"{ALIAS_PREFIX}{host}"
+
+
+def redirect_entry_key(domain: str, path: str) -> str:
+    """Return the store key of the redirect for a path of a domain."""
+    return f"{REDIRECT_PREFIX}{domain}{SEPARATOR}{path}"
+
+
+def redirect_entry_value(location: Location, default_cache_ttl: Optional[int]) -> str:
+    """Return the store value of a redirect: its cache TTL, if any, and location."""
+    cache_ttl = (
+        location.cache_ttl if location.cache_ttl is not None else default_cache_ttl
+    )
+    return f"{'' if cache_ttl is None else cache_ttl}{SEPARATOR}{location}"
+
+
+def read_request_counts(requests_file: TextIO) -> Counter:
+    """Count the '<domain> <path>' lines, one per request, by (domain, path)."""
+    request_counts: Counter = Counter()
+    for line in requests_file:
+        if line.strip():
+            domain, path = line.split(maxsplit=1)
+            request_counts[(domain, path.strip())] += 1
+    return request_counts
+
+
+def alias_entries(
+    rules: RuleSet, request_counts: Optional[Counter] = None
+) -> Iterator[StoreEntry]:
+    """Yield the entries of all aliases, and of requested hosts a wildcard matches."""
+    hosts = set(rules.aliases)
+    hosts.update(
+        domain
+        for domain, _ in (request_counts or {})
+        if rules.wildcard_aliases.match(domain) is not None
+    )
+    for host in sorted(hosts):
+        domain = rules.resolve_domain(host)
+        if domain is not None and domain != host:
+            yield StoreEntry(key=alias_entry_key(host), value=domain)
+
+
+def redirect_entries(
+    rules: RuleSet,
+    request_counts: Optional[Counter] = None,
+    default_cache_ttl: Optional[int] = None,
+) -> Iterator[StoreEntry]:
+    """
+    Yield the entries of the exact redirects and requested paths, most requested first.
+
+    Requests are counted by the domain their alias resolves to, as they share one
+    entry. Redirects of domains that are aliased to another domain are never used.
+    """
+    counts: Counter = Counter()
+    for (source_domain, path), count in (request_counts or {}).items():
+        domain = rules.resolve_domain(source_domain)
+        if domain is not None:
+            counts[(domain, path)] += count
+    for domain, redirects in rules.redirects.items():
+        if rules.resolve_domain(domain) == domain:
+            counts.update({(domain, path): 0 for path in redirects})
+
+    for (domain, path), count in sorted(
+        counts.items(), key=lambda entry: (-entry[1], entry[0])
+    ):
+        location = rules.resolve_location(domain, path)
+        if location is not None:
+            yield StoreEntry(
+                key=redirect_entry_key(domain, path),
+                value=redirect_entry_value(location, default_cache_ttl),
+                requests=count,
+            )
+
+
+def fit_to_store(
+    aliases: Iterable[StoreEntry],
+    redirects: Iterable[StoreEntry],
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Tuple[List[StoreEntry], Dict[str, int]]:
+    """
+    Return the entries that fit in the store, and a report of what was left out.
+
+    All aliases are required, since a missing alias would make the function answer
+    for the wrong domain. Redirects are added in order until the store is full;
+    entries over the key or value limits are skipped.
+    """
+    entries: List[StoreEntry] = []
+    report = {"aliases": 0, "redirects": 0, "too_large": 0, "left_out": 0, "bytes": 0}
+    for entry in aliases:
+        if len(entry.key.encode()) > MAX_KEY_BYTES:
+            raise ValueError(f"Alias key over {MAX_KEY_BYTES} bytes: {entry.key}")
+        entries.append(entry)
+        report["aliases"] += 1
+        report["bytes"] += entry.size
+    if report["bytes"] > max_bytes:
+        raise ValueError(f"The aliases alone take {report['bytes']} bytes")
+
+    for entry in redirects:
+        if (
+            len(entry.key.encode()) > MAX_KEY_BYTES
+            or len(entry.value.encode()) > MAX_VALUE_BYTES
+        ):
+            report["too_large"] += 1
+        elif report["bytes"] + entry.size > max_bytes:
+            report["left_out"] += 1
+        else:
+            entries.append(entry)
+            report["redirects"] += 1
+            report["bytes"] += entry.size
+    return entries, report
+
+
+def import_file_data(entries: Iterable[StoreEntry]) -> dict:
+    """Return the contents of a KeyValueStore import file for the entries."""
+    return {"data": [{"key": entry.key, "value": entry.value} for entry in entries]}
+
+
+def render_function(kvs_id: str = KVS_ID_PLACEHOLDER) -> str:
+    """Return the source of the CloudFront Function reading the given store."""
+    with open(FUNCTION_TEMPLATE, encoding="utf-8") as template_file:
+        template = string.Template(template_file.read())
+    return template.substitute(
+        kvs_id=kvs_id,
+        alias_prefix=ALIAS_PREFIX,
+        redirect_prefix=REDIRECT_PREFIX,
+        separator=SEPARATOR,
+        forwarded_host_header=FORWARDED_HOST_HEADER,
+    )
+
+
+def compile_store(
+    rules: RuleSet,
+    request_counts: Optional[Counter] = None,
+    default_cache_ttl: Optional[int] = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> Tuple[List[StoreEntry], Dict[str, int]]:
+    """Compile the rules into the entries of the store, and a report of what was left out."""
+    return fit_to_store(
+        alias_entries(rules, request_counts),
+        redirect_entries(rules, request_counts, default_cache_ttl),
+        max_bytes,
+    )
+
+
+def main(argv: List[str]) -> None:
+    """Parse the command line and write the store import file and function."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--table-name", required=True)
+    parser.add_argument("--requests", default=None)
+    # Should match REDIRECT_CACHE_SECONDS of the redirect function
+    parser.add_argument("--redirect-cache-seconds", type=int, default=None)
+    # Should match MAX_ALIAS_HOPS of the redirect function
+    parser.add_argument("--max-alias-hops", type=int, default=DEFAULT_MAX_ALIAS_HOPS)
+    parser.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES)
+    parser.add_argument("--output-directory", default=DEFAULT_OUTPUT_DIRECTORY)
+    args = parser.parse_args(argv)
+
+    request_counts = None
+    if args.requests:
+        with open(args.requests, encoding="utf-8") as requests_file:
+            request_counts = read_request_counts(requests_file)
+
+    rules = RuleSet.from_ddb_items(
+        scan_items(boto3.client("dynamodb"), args.table_name), args.max_alias_hops
+    )
+    entries, report = compile_store(
+        rules, request_counts, args.redirect_cache_seconds, args.max_bytes
+    )
+
+    os.makedirs(args.output_directory, exist_ok=True)
+    with open(
+        os.path.join(args.output_directory, IMPORT_FILE_NAME), "w", encoding="utf-8"
+    ) as import_file:
+        json.dump(import_file_data(entries), import_file)
+    with open(
+        os.path.join(args.output_directory, FUNCTION_FILE_NAME), "w", encoding="utf-8"
+    ) as function_file:
+        function_file.write(render_function())
+
+    print(
+        f"Wrote {report['aliases']} aliases and {report['redirects']} redirects "
+        f"({report['bytes']} of {args.max_bytes} bytes) to {args.output_directory}; "
+        f"left out {report['left_out']} redirects for space and "
+        f"{report['too_large']} over the size limits"
+    )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,316 @@
+"""
+Compile the redirect rules into Resolved items, so requests need a single GetItem.
+
+Run from the repository root after every change to the rules:
+
+    python -m tools.compile_routes --table-name <table> [--known-paths <file>]
+        [--domain <domain> ...] [--max-alias-hops <hops>]
+
+For every domain with rules, and every alias pointing to one, a Resolved#<domain>
+item is written per known path. It holds the domain after following the alias and
+the location RedirectController would resolve: an exact match, or else the first
+matching regex rule, or else the winning fallback, with the cache TTL of that rule.
+Known paths are the paths of all redirects and fallbacks of a domain, plus those
+listed in the --known-paths file, one '<domain> <path>' per line, e.g. the most
+requested paths from the access logs.
+
+Only changed items are written, and Resolved items the rules no longer produce
+are deleted. With --domain, only the items of the given source domains are
+compiled. Requests for paths without a Resolved item are resolved from the rules.
+
+Alias chains are followed for up to --max-alias-hops hops, which should match
+MAX_ALIAS_HOPS of the redirect function. Domains whose chain loops or is longer
+are logged and left out, so their requests fail in the function like before.
+
+Every item is stamped with the table generation it was compiled at, and the
+redirect function ignores items of any other generation, so imports and other
+writes that bump the generation never leave stale targets behind. Items of the
+domains left out with --domain are therefore ignored after such a write until
+the next full compile. The table needs a generation item, so compiling fails
+without one.
+"""
+
+# Standard library imports
+import argparse
+import logging
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO
+
+# Related third party imports
+import boto3
+
+# Local application / library specific imports
+from resources.functions.redirect.src.models.config import ControllerConfig
+from resources.functions.redirect.src.models.database import (
+    Alias,
+    RedirectFallbackOption,
+    RedirectOption,
+    RedirectPatternOption,
+    ResolvedRoute,
+    model_from_ddb_item,
+)
+from resources.functions.redirect.src.models.resolution import Location
+from resources.functions.redirect.src.utils.alias_chain import (
+    AliasChainError,
+    follow_alias_chain,
+)
+from resources.functions.redirect.src.utils.dynamodb import encode_item, encode_key
+from resources.functions.redirect.src.utils.fallback_index import FallbackIndex
+from resources.functions.redirect.src.utils.host_trie import HostSuffixTrie
+from resources.functions.redirect.src.utils.pattern_matcher import PatternMatcher
+from tools.build_filter import read_generation
+from tools.bulk import BATCH_WRITE_MAX_ITEMS, write_requests
+from tools.snapshot import scan_items
+
+RESOLVED_PREFIX = "Resolved#"
+# The default MAX_ALIAS_HOPS of the redirect function
+DEFAULT_MAX_ALIAS_HOPS = ControllerConfig().max_alias_hops
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RuleSet:
+    """All rules of the table, and the Resolved items it currently holds."""
+
+    aliases: Dict[str, str] = field(default_factory=dict)
+    wildcard_aliases: HostSuffixTrie = field(default_factory=HostSuffixTrie)
+    redirects: Dict[str, Dict[str, Location]] = field(
+        default_factory=lambda: defaultdict(dict)
+    )
+    fallbacks: Dict[str, List[RedirectFallbackOption]] = field(
+        default_factory=lambda: defaultdict(list)
+    )
+    patterns: Dict[str, List[RedirectPatternOption]] = field(
+        default_factory=lambda: defaultdict(list)
+    )
+    resolved: Dict[tuple, dict] = field(default_factory=dict)
+    # Alias chains are followed as far as the redirect function follows them.
+    max_alias_hops: int = DEFAULT_MAX_ALIAS_HOPS
+    # Compiled lazily per domain by resolve_location()
+    _fallback_indexes: Dict[str, FallbackIndex] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+    _pattern_matchers: Dict[str, PatternMatcher] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+
+    @classmethod
+    def from_ddb_items(
+        cls, items: Iterable[dict], max_alias_hops: int = DEFAULT_MAX_ALIAS_HOPS
+    ) -> "RuleSet":
+        """Sort the items of a table scan into a RuleSet."""
+        rules = cls(max_alias_hops=max_alias_hops)
+        for item in items:
+            if item.get("deleted"):
+                continue
+            if item["pk"].startswith(RESOLVED_PREFIX):
+                rules.resolved[(item["pk"], item["sk"])] = item
+                continue
+
+            model = model_from_ddb_item(item)
+            if isinstance(model, Alias) and model.is_wildcard:
+                rules.wildcard_aliases.add(model.source_domain, model.target_domain)
+            elif isinstance(model, Alias):
+                rules.aliases[model.source_domain] = model.target_domain
+            elif isinstance(model, RedirectOption):
+                rules.redirects[model.domain][model.path] = model.location
+            elif isinstance(model, RedirectFallbackOption):
+                rules.fallbacks[model.domain].append(model)
+            elif isinstance(model, RedirectPatternOption):
+                rules.patterns[model.domain].append(model)
+        return rules
+
+    def get_alias(self, domain: str) -> Optional[Alias]:
+        """Return the exact or else the best matching wildcard alias of a domain."""
+        target_domain = self.aliases.get(domain) or self.wildcard_aliases.match(domain)
+        if target_domain is None:
+            return None
+        return Alias(source_domain=domain, target_domain=target_domain)
+
+    def resolve_domain(self, domain: str) -> Optional[str]:
+        """
+        Return the domain at the end of the alias chain of a domain.
+
+        Returns None, and logs why, if the chain loops or is longer than
+        `max_alias_hops`, as the redirect function can't resolve the domain either.
+        """
+        try:
+            alias = follow_alias_chain(domain, self.get_alias, self.max_alias_hops)
+        except AliasChainError as error:
+            logger.warning("Leaving out %s: %s", domain, error)
+            return None
+        return alias.target_domain if alias else domain
+
+    def resolve_location(self, domain: str, path: str) -> Optional[Location]:
+        """
+        Return the location RedirectController resolves a path of a domain to, or None.
+
+        That is the exact redirect, or else the first matching regex rule, or else
+        the winning fallback, with the cache TTL of that rule.
+        """
+        if domain not in self._fallback_indexes:
+            # Like a DDB query, ties between fallbacks go to the lowest sort key.
+            self._fallback_indexes[domain] = FallbackIndex(
+                sorted(self.fallbacks.get(domain, []), key=lambda option: option.path)
+            )
+            self._pattern_matchers[domain] = PatternMatcher(
+                sorted(self.patterns.get(domain, []), key=lambda option: option.pattern)
+            )
+
+        target = self.redirects.get(domain, {}).get(path)
+        if target is None:
+            target = self._pattern_matchers[domain].match(path)
+        if target is None:
+            best_match = self._fallback_indexes[domain].match(path)
+            target = best_match.location if best_match else None
+        return target
+
+
+def read_known_paths(paths_file: TextIO) -> Dict[str, Set[str]]:
+    """Read '<domain> <path>' lines into the known paths per domain."""
+    known_paths: Dict[str, Set[str]] = defaultdict(set)
+    for line in paths_file:
+        if line.strip():
+            domain, path = line.split(maxsplit=1)
+            known_paths[domain].add(path.strip())
+    return known_paths
+
+
+def compile_routes(
+    rules: RuleSet,
+    known_paths: Optional[Dict[str, Set[str]]] = None,
+    domains: Optional[Set[str]] = None,
+    generation: Optional[int] = None,
+) -> Iterator[ResolvedRoute]:
+    """
+    Yield the resolved route of every known path of every (selected) source domain.
+
+    The routes are stamped with the table generation the rules were read at.
+    """
+    known_paths = known_paths or {}
+    source_domains = (
+        set(rules.redirects)
+        | set(rules.fallbacks)
+        | set(rules.patterns)
+        | set(rules.aliases)
+    )
+    if domains is not None:
+        source_domains &= domains
+
+    for source_domain in sorted(source_domains):
+        domain = rules.resolve_domain(source_domain)
+        if domain is None:
+            continue
+        paths = set(rules.redirects.get(domain, {}))
+        paths.update(option.path for option in rules.fallbacks.get(domain, []))
+        paths.update(known_paths.get(source_domain, ()))
+        paths.update(known_paths.get(domain, ()))
+
+        for path in sorted(paths):
+            target = rules.resolve_location(domain, path)
+            if target is not None:
+                yield ResolvedRoute(
+                    source_domain=source_domain,
+                    path=path,
+                    domain=domain,
+                    target=str(target),
+                    cache_ttl=target.cache_ttl,
+                    generation=generation,
+                )
+
+
+def resolved_item_changes(
+    rules: RuleSet,
+    routes: Iterable[ResolvedRoute],
+    domains: Optional[Set[str]] = None,
+) -> Iterator[dict]:
+    """Yield the BatchWriteItem requests that bring the Resolved items up to date."""
+    compiled_keys = set()
+    for route in routes:
+        item = route.to_ddb_item()
+        key = (item["pk"], item["sk"])
+        compiled_keys.add(key)
+        current = rules.resolved.get(key)
+        if current is None or ResolvedRoute.from_ddb_item(current) != route:
+            yield {"PutRequest": {"Item": encode_item(item)}}
+
+    for key in rules.resolved:
+        partition_key, sort_key = key
+        source_domain = partition_key.removeprefix(RESOLVED_PREFIX)
+        if key not in compiled_keys and (domains is None or source_domain in domains):
+            yield {"DeleteRequest": {"Key": encode_key(partition_key, sort_key)}}
+
+
+def sync_resolved_items(
+    ddb_client,
+    table_name: str,
+    known_paths: Optional[Dict[str, Set[str]]] = None,
+    domains: Optional[Set[str]] = None,
+    max_alias_hops: int = DEFAULT_MAX_ALIAS_HOPS,
+) -> Dict[str, int]:
+    """Compile the rules of the table and write the changed Resolved items back."""
+    # The generation is read before the scan, so rules written during the scan
+    # bump it past the stamped one and the items are ignored until recompiled.
+    generation = read_generation(ddb_client, table_name)
+    if generation is None:
+        raise ValueError(
+            "The table has no generation item, so functions couldn't tell when "
+            "Resolved items are outdated. Bump it with every write to the rules first."
+        )
+    rules = RuleSet.from_ddb_items(scan_items(ddb_client, table_name), max_alias_hops)
+    if domains is not None:
+        # The routes of aliases change with the rules of the domain they point to,
+        # and with the alias of that domain.
+        domains = domains | {
+            source_domain
+            for source_domain, domain in rules.aliases.items()
+            if domain in domains or rules.resolve_domain(source_domain) in domains
+        }
+    changes = resolved_item_changes(
+        rules, compile_routes(rules, known_paths, domains, generation), domains
+    )
+
+    counts = {"PutRequest": 0, "DeleteRequest": 0}
+    batch: List[dict] = []
+    for change in changes:
+        counts[next(iter(change))] += 1
+        batch.append(change)
+        if len(batch) == BATCH_WRITE_MAX_ITEMS:
+            write_requests(ddb_client, table_name, batch)
+            batch = []
+    if batch:
+        write_requests(ddb_client, table_name, batch)
+
+    return {"written": counts["PutRequest"], "deleted": counts["DeleteRequest"]}
+
+
+def main(argv: List[str]) -> None:
+    """Parse the command line and compile the Resolved items."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--table-name", required=True)
+    parser.add_argument("--known-paths", default=None)
+    parser.add_argument("--domain", action="append", default=None)
+    # Should match MAX_ALIAS_HOPS of the redirect function
+    parser.add_argument("--max-alias-hops", type=int, default=DEFAULT_MAX_ALIAS_HOPS)
+    args = parser.parse_args(argv)
+
+    known_paths = None
+    if args.known_paths:
+        with open(args.known_paths, encoding="utf-8") as paths_file:
+            known_paths = read_known_paths(paths_file)
+
+    counts = sync_resolved_items(
+        boto3.client("dynamodb"),
+        args.table_name,
+        known_paths=known_paths,
+        domains=set(args.domain) if args.domain else None,
+        max_alias_hops=args.max_alias_hops,
+    )
+    print(f"Wrote {counts['written']} and deleted {counts['deleted']} Resolved items")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,72 @@
+// Template of the CloudFront Function rendered by `python -m tools.compile_kvs`.
+// It answers requests from the KeyValueStore compiled from the redirects table,
+// and forwards all others to the redirect function, just like an edge cache miss.
+import cf from 'cloudfront';
+
+const kvsHandle = cf.kvs('${kvs_id}');
+const ALIAS_PREFIX = '${alias_prefix}';
+const REDIRECT_PREFIX = '${redirect_prefix}';
+const SEPARATOR = '${separator}';
+const FORWARDED_HOST_HEADER = '${forwarded_host_header}';
+// Query parameters that mean the same to urlencode() in the redirect function,
+// whether encoded or not. Requests with other parameters go to the origin.
+const PLAIN_QUERY_VALUE = /^[A-Za-z0-9_.~-]*$$/;
+
+async function get(key) {
+    try {
+        return await kvsHandle.get(key);
+    } catch (err) {
+        // Missing keys throw
+        return null;
+    }
+}
+
+function queryString(querystring) {
+    var parts = [];
+    for (var name in querystring) {
+        var parameter = querystring[name];
+        if (parameter.multiValue || !PLAIN_QUERY_VALUE.test(name)
+                || !PLAIN_QUERY_VALUE.test(parameter.value)) {
+            return null;
+        }
+        parts.push(name + '=' + parameter.value);
+    }
+    return parts.join('&');
+}
+
+function redirect(domain, entry, query) {
+    var separator = entry.indexOf(SEPARATOR);
+    var cacheTtl = entry.substring(0, separator);
+    var location = entry.substring(separator + 1);
+    var headers = {
+        'x-resolved-domain': {value: domain},
+        'location': {value: query ? location + '?' + query : location},
+    };
+    if (cacheTtl !== '') {
+        var cacheControl = Number(cacheTtl) > 0 ? 'public, max-age=' + cacheTtl : 'no-store';
+        headers['cache-control'] = {value: cacheControl};
+        headers['cdn-cache-control'] = {value: cacheControl};
+    }
+    return {statusCode: 301, statusDescription: 'Moved Permanently', headers: headers};
+}
+
+async function handler(event) {
+    var request = event.request;
+    var host = request.headers.host.value;
+    // The origin request goes to the execute-api domain, so the redirect function
+    // reads the requested host from this header.
+    request.headers[FORWARDED_HOST_HEADER] = {value: host};
+
+    // Escaped paths may be decoded differently by API Gateway, so they go to the origin.
+    var query = queryString(request.querystring);
+    if (query === null || request.uri.indexOf('%') !== -1) {
+        return request;
+    }
+
+    var domain = (await get(ALIAS_PREFIX + host)) || host;
+    var entry = await get(REDIRECT_PREFIX + domain + SEPARATOR + request.uri);
+    if (entry === null) {
+        return request;
+    }
+    return redirect(domain, entry, query);
+}
@@ -0,0 +1,76 @@
+"""
+Export the redirects table for a local storage backend of the redirect function.
+
+Run from the repository root:
+
+    python -m tools.export_storage --table-name <table> --backend sqlite --output <path>
+
+The "sqlite" backend reads an indexed SQLite database, and the "memory" backend
+a JSON Lines file of table items, which it loads into memory at init. Point the
+function or the standalone server at the output with STORAGE_BACKEND and
+STORAGE_PATH. Only aliases, exact redirects and fallbacks are used by them.
+Other items, like tombstones, the generation item or routing filter chunks, are
+left out.
+"""
+
+# Standard library imports
+import argparse
+import json
+import os
+import sys
+from typing import Iterable, Iterator, List
+
+# Related third party imports
+import boto3
+
+# Local application / library specific imports
+from resources.functions.redirect.src.models.database import model_from_ddb_item
+from resources.functions.redirect.src.storage.sqlite import write_database
+from tools.snapshot import scan_items
+
+LOCAL_BACKENDS = ("memory", "sqlite")
+
+
+def rule_items(items: Iterable[dict]) -> Iterator[dict]:
+    """Yield the items of the rules among table items, without tombstones."""
+    for item in items:
+        model = model_from_ddb_item(item)
+        if model is not None and not item.get("deleted"):
+            yield model.to_ddb_item()
+
+
+def write_items(path: str, items: Iterable[dict]) -> None:
+    """Write table items to a JSON Lines file, replacing any existing file atomically."""
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as items_file:
+        for item in items:
+            items_file.write(json.dumps(item) + "\n")
+    os.replace(temporary_path, path)
+
+
+def export_storage(items: Iterable[dict], backend: str, output: str) -> None:
+    """Write the rules among the items to the file the given local backend reads."""
+    if backend == "sqlite":
+        write_database(output, rule_items(items))
+    elif backend == "memory":
+        write_items(output, rule_items(items))
+    else:
+        raise ValueError(f"Unknown local storage backend: {backend}")
+
+
+def main(argv: List[str]) -> None:
+    """Parse the command line and export the table."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--table-name", required=True)
+    parser.add_argument("--backend", choices=LOCAL_BACKENDS, required=True)
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args(argv)
+
+    export_storage(
+        scan_items(boto3.client("dynamodb"), args.table_name), args.backend, args.output
+    )
+    print(f"Wrote {args.output} for the {args.backend} storage backend")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
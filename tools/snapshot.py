@@ -0,0 +1,96 @@
+"""
+Export the redirects table to a routing snapshot file, loaded by the redirect function.
+
+Run from the repository root:
+
+    python -m tools.snapshot --table-name <table> [--output <path>]
+
+By default the snapshot is written into the redirect function's asset directory,
+so the next deployment of the Process construct ships it with the function.
+"""
+
+# Standard library imports
+import argparse
+import sys
+from typing import Iterable, Iterator, List
+
+# Related third party imports
+import boto3
+
+# Local application / library specific imports
+from resources.functions.redirect.src.models.database import (
+    Alias,
+    RedirectFallbackOption,
+    RedirectOption,
+    RedirectPatternOption,
+    model_from_ddb_item,
+)
+from resources.functions.redirect.src.utils.dynamodb import decode_item
+from resources.functions.redirect.src.utils.snapshot import (
+    ALIASES,
+    FALLBACKS,
+    PATTERNS,
+    REDIRECTS,
+    RoutingSnapshot,
+    write_snapshot,
+)
+
+DEFAULT_OUTPUT = "resources/functions/redirect/snapshot/routes.snap"
+
+
+def scan_items(ddb_client, table_name: str) -> Iterator[dict]:
+    """Yield every item in the table, decoded, following LastEvaluatedKey."""
+    scan_kwargs: dict = {"TableName": table_name}
+    while True:
+        response = ddb_client.scan(**scan_kwargs)
+        yield from (decode_item(item) for item in response["Items"])
+
+        if not response.get("LastEvaluatedKey"):
+            return
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def export_snapshot(items: Iterable[dict], output: str) -> None:
+    """Sort the alias, redirect, fallback and pattern items into a snapshot, without tombstones."""
+    aliases: List[Alias] = []
+    redirects: List[RedirectOption] = []
+    fallbacks: List[RedirectFallbackOption] = []
+    patterns: List[RedirectPatternOption] = []
+    for item in items:
+        if item.get("deleted"):
+            continue
+        model = model_from_ddb_item(item)
+        if isinstance(model, Alias):
+            aliases.append(model)
+        elif isinstance(model, RedirectOption):
+            redirects.append(model)
+        elif isinstance(model, RedirectFallbackOption):
+            fallbacks.append(model)
+        elif isinstance(model, RedirectPatternOption):
+            patterns.append(model)
+
+    write_snapshot(output, aliases, redirects, fallbacks, patterns)
+
+
+def main(argv: List[str]) -> None:
+    """Parse the command line and export the snapshot."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--table-name", required=True)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args(argv)
+
+    ddb_client = boto3.client("dynamodb")
+    export_snapshot(scan_items(ddb_client, args.table_name), args.output)
+
+    snapshot = RoutingSnapshot(args.output)
+    print(
+        f"Wrote {args.output}: {snapshot.section_size(ALIASES)} aliases, "
+        f"{snapshot.section_size(REDIRECTS)} redirects, "
+        f"{snapshot.section_size(FALLBACKS)} fallbacks, "
+        f"{snapshot.section_size(PATTERNS)} patterns"
+    )
+    snapshot.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])